@@ -0,0 +1,449 @@
+"""
+Detection benchmark suite.
+
+Times screen capture, template matching and end-to-end detection
+(isReadyForPrompt / givePrompt) on synthetic IDE-like screenshots at 1080p,
+1440p and 4K, and optionally on recorded screens. Every option that affects
+detection cost is measured separately: grayscale vs colour matching,
+confidence threshold, region-of-interest tracking, the coarse-to-fine
+pyramid engine, multi-scale matching, the detection cache and the template
+pack. Matching results are checked against
+the ground truth, so a change that makes detection faster but wrong shows up
+as a drop in accuracy.
+
+Runs headless (no display needed); results are written as JSON so runs of
+different commits can be compared with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/bench_detection.py --output results.json
+    python benchmarks/bench_detection.py --resolutions 1080p --repeat 5
+    python benchmarks/bench_detection.py --recorded path/to/frames
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+from unittest import mock
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from screens import IMAGES_DIR, RESOLUTIONS, Screen, load_templates, matches, render_screen  # noqa: E402
+
+from devhelm_junie_agent import ui_interaction  # noqa: E402
+from devhelm_junie_agent.detection import (  # noqa: E402
+    Box,
+    DetectionCache,
+    PyramidMatcher,
+    RegionTracker,
+    detect_templates,
+    frame_hash,
+    match_template,
+)
+from devhelm_junie_agent.frame_bus import BusCapture, FrameBus  # noqa: E402
+from devhelm_junie_agent.screen_backend import ReplayBackend, load_frames  # noqa: E402
+from devhelm_junie_agent.screen_capture import ScreenCaptureException, XShmCapture  # noqa: E402
+from devhelm_junie_agent.template_cache import DEFAULT_SCALES, TemplateCache, scale_template  # noqa: E402
+
+# Version of the results file layout
+RESULTS_VERSION = 1
+
+CONFIDENCES = (0.8, 0.9, 0.95)
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> List[float]:
+    """
+    Time a callable.
+
+    Args:
+        fn: Function to time
+        repeat: Timed calls
+        warmup: Untimed calls made first
+
+    Returns:
+        list: Duration of every timed call in seconds
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(name: str, resolution: str, samples: Sequence[float], params: Optional[dict] = None, accuracy: Optional[float] = None) -> dict:
+    """
+    Build a result record from timing samples.
+
+    Args:
+        name: Benchmark name, e.g. 'match.full'
+        resolution: Resolution label, e.g. '1080p'
+        samples: Durations in seconds
+        params: Options the benchmark ran with
+        accuracy: Fraction of detections that matched the ground truth
+
+    Returns:
+        dict: JSON-serialisable result
+    """
+    ordered = sorted(samples)
+    milliseconds = [sample * 1000.0 for sample in ordered]
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'name': name,
+        'resolution': resolution,
+        'params': params or {},
+        'samples': len(ordered),
+        'mean_ms': statistics.fmean(milliseconds),
+        'median_ms': statistics.median(milliseconds),
+        'p95_ms': milliseconds[p95_index],
+        'min_ms': milliseconds[0],
+        'max_ms': milliseconds[-1],
+        'accuracy': accuracy,
+    }
+
+
+class Cycle:
+    """Returns the items of a list in turn, one per call."""
+
+    def __init__(self, items: Sequence):
+        self.items = list(items)
+        self.position = -1
+
+    def __call__(self):
+        self.position = (self.position + 1) % len(self.items)
+        return self.items[self.position]
+
+
+def bench_capture(label: str, frames: List[np.ndarray], repeat: int) -> List[dict]:
+    """Time the capture paths that work without a display."""
+    results = []
+
+    backend = ReplayBackend(frames, loop=True)
+    results.append(summarize('capture.replay', label, measure(backend.capture, repeat)))
+
+    bus = FrameBus.create(frames[0].shape, slots=4)
+    capture = None
+    try:
+        for frame in frames:
+            bus.publish(frame)
+        capture = BusCapture(bus)
+        results.append(summarize('capture.bus', label, measure(capture.capture, repeat), {'zero_copy': True}))
+        results.append(summarize('capture.bus_publish', label, measure(lambda: bus.publish(frames[0]), repeat)))
+    finally:
+        del capture
+        bus.close()
+
+    results.append(summarize('hash.frame', label, measure(lambda: frame_hash(frames[0]), repeat)))
+    return results
+
+
+def bench_display_capture(repeat: int) -> List[dict]:
+    """Time MIT-SHM capture of the real display, when there is one."""
+    if not os.getenv('DISPLAY'):
+        return []
+    try:
+        capture = XShmCapture()
+    except ScreenCaptureException:
+        return []
+    try:
+        frame = capture.capture()
+        label = f"display-{frame.shape[1]}x{frame.shape[0]}"
+        return [summarize('capture.xshm', label, measure(capture.capture, repeat))]
+    finally:
+        capture.close()
+
+
+def bench_matching(label: str, screens: List[Screen], templates: Dict[str, np.ndarray], repeat: int) -> List[dict]:
+    """Time template matching with every matcher option."""
+    results = []
+    frames = [screen.frame for screen in screens]
+
+    for confidence in CONFIDENCES:
+        next_screen = Cycle(screens)
+        correct = []
+
+        def full():
+            screen = next_screen()
+            result = detect_templates(screen.frame, templates, confidence=confidence)
+            correct.extend(matches(result.location(name), screen.boxes.get(name)) for name in templates)
+
+        samples = measure(full, repeat)
+        results.append(summarize('match.full', label, samples, {'confidence': confidence, 'grayscale': True}, _rate(correct)))
+
+    # Region of interest: the tracker knows where each template was last seen
+    tracker = RegionTracker()
+    next_screen = Cycle(screens[:1])
+    detect_templates(frames[0], templates, tracker=tracker)
+    correct = []
+
+    def roi():
+        screen = next_screen()
+        result = detect_templates(screen.frame, templates, tracker=tracker)
+        correct.extend(matches(result.location(name), screen.boxes.get(name)) for name in templates)
+
+    results.append(summarize('match.roi', label, measure(roi, repeat), {'confidence': 0.9, 'padding': tracker.padding}, _rate(correct)))
+
+    # Colour matching, as done before frames were converted to grayscale
+    colour_templates = {name: cv2.cvtColor(template, cv2.COLOR_GRAY2BGR) for name, template in templates.items()}
+    colour_frames = Cycle([cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR) for frame in frames])
+
+    def colour():
+        frame = colour_frames()
+        for template in colour_templates.values():
+            match_template(frame, template, 0.9)
+
+    results.append(summarize('match.full', label, measure(colour, repeat), {'confidence': 0.9, 'grayscale': False}))
+    results.append(bench_pyramid(label, frames, templates, repeat))
+    return results
+
+
+def bench_pyramid(label: str, frames: List[np.ndarray], templates: Dict[str, np.ndarray], repeat: int) -> dict:
+    """
+    Time the coarse-to-fine PyramidMatcher against the full-resolution search.
+
+    The engine must return exactly what the full search returns, so its
+    accuracy is the fraction of locations identical to detect_templates()
+    with the default matcher, and its speedup is relative to that search.
+    """
+    expected = [detect_templates(frame, templates).locations for frame in frames]
+    next_index = Cycle(range(len(frames)))
+    full_samples = measure(lambda: detect_templates(frames[next_index()], templates), repeat)
+
+    matcher = PyramidMatcher()
+    next_index = Cycle(range(len(frames)))
+    agreed = []
+
+    def pyramid():
+        index = next_index()
+        result = detect_templates(frames[index], templates, matcher=matcher)
+        agreed.extend(result.locations[name] == expected[index][name] for name in templates)
+
+    samples = measure(pyramid, repeat)
+    result = summarize('match.pyramid', label, samples,
+                       {'confidence': 0.9, 'grayscale': True, 'levels': matcher.levels, 'candidates': matcher.candidates},
+                       _rate(agreed))
+    result['speedup'] = statistics.median(full_samples) / statistics.median(samples)
+    return result
+
+
+def bench_multiscale(label: str, size, templates: Dict[str, np.ndarray], rng: random.Random, repeat: int, variants: int) -> List[dict]:
+    """Time single- and multi-scale matching on screens with scaled templates."""
+    scales = [scale for scale in DEFAULT_SCALES if scale != 1.0 and scale <= 1.5]
+    screens = [render_screen(size, templates, rng, scales=scales) for _ in range(variants)]
+    scaled = {name: {scale: scale_template(template, scale) for scale in DEFAULT_SCALES} for name, template in templates.items()}
+    results = []
+
+    for multiscale in (False, True):
+        next_screen = Cycle(screens)
+        correct = []
+
+        def scaled_match():
+            screen = next_screen()
+            for name in templates:
+                if multiscale:
+                    found = _best_scale(screen.frame, scaled[name])
+                else:
+                    found = match_template(screen.frame, templates[name], 0.9)
+                correct.append(matches(found, screen.boxes.get(name)))
+
+        results.append(summarize('match.scaled_screen', label, measure(scaled_match, repeat),
+                                 {'multiscale': multiscale, 'scales': list(DEFAULT_SCALES) if multiscale else [1.0]},
+                                 _rate(correct)))
+    return results
+
+
+def bench_end_to_end(label: str, screens: List[Screen], repeat: int) -> List[dict]:
+    """Time isReadyForPrompt and givePrompt through UIInteraction."""
+    results = []
+    frames = [screen.frame for screen in screens]
+    template_cache = TemplateCache(IMAGES_DIR, persist=False)
+    template_cache.load()
+
+    for cache_size in (0, 64):
+        ui = ui_interaction.UIInteraction(
+            backend=ReplayBackend(frames, loop=True),
+            template_cache=template_cache,
+            detection_cache=DetectionCache(cache_size),
+        )
+        correct = []
+
+        def ready():
+            correct.append(ui.isReadyForPrompt())
+
+        samples = measure(ready, repeat)
+        results.append(summarize('detect.is_ready_for_prompt', label, samples,
+                                 {'detection_cache': cache_size, 'roi': True}, _rate(correct)))
+
+    ui = ui_interaction.UIInteraction(
+        backend=ReplayBackend(frames, loop=True),
+        template_cache=template_cache,
+        detection_cache=DetectionCache(0),
+    )
+    correct = []
+
+    def give():
+        correct.append(ui.givePrompt("Implement DH-123"))
+
+    # The fixed settle delay after clicking the input box is not detection cost
+    with mock.patch.object(ui_interaction.time, 'sleep'):
+        samples = measure(give, repeat)
+    results.append(summarize('detect.give_prompt', label, samples,
+                             {'detection_cache': 0, 'click_settle_excluded_s': 1.0}, _rate(correct)))
+    return results
+
+
+def bench_templates(repeat: int) -> List[dict]:
+    """Time loading the templates from PNGs and from the pack."""
+    results = []
+    results.append(summarize('templates.decode', 'n/a', measure(lambda: TemplateCache(IMAGES_DIR, persist=False).load(), repeat)))
+    with tempfile.TemporaryDirectory() as directory:
+        pack_path = Path(directory) / "templates.npz"
+        TemplateCache(IMAGES_DIR, pack_path=pack_path).load()
+        results.append(summarize('templates.pack', 'n/a', measure(lambda: TemplateCache(IMAGES_DIR, pack_path=pack_path).load(), repeat)))
+    return results
+
+
+def run_benchmarks(
+    resolutions: Dict[str, tuple],
+    repeat: int = 20,
+    seed: int = 0,
+    variants: int = 4,
+    recorded: Optional[Path] = None,
+) -> dict:
+    """
+    Run the whole suite.
+
+    Args:
+        resolutions: Label -> (width, height) of the synthetic screens
+        repeat: Timed calls per benchmark
+        seed: Seed for the synthetic screens, so runs are comparable
+        variants: Different synthetic screens per resolution
+        recorded: Optional directory of recorded PNG frames to benchmark too
+
+    Returns:
+        dict: Results document (see write_results())
+    """
+    rng = random.Random(seed)
+    templates = load_templates()
+    results = bench_templates(repeat)
+    results.extend(bench_display_capture(repeat))
+
+    for label, size in resolutions.items():
+        screens = [render_screen(size, templates, rng) for _ in range(variants)]
+        frames = [screen.frame for screen in screens]
+        results.extend(bench_capture(label, frames, repeat))
+        results.extend(bench_matching(label, screens, templates, repeat))
+        results.extend(bench_multiscale(label, size, templates, rng, repeat, variants))
+        results.extend(bench_end_to_end(label, screens, repeat))
+
+    if recorded is not None:
+        frames = load_frames(Path(recorded))
+        label = f"recorded-{frames[0].shape[1]}x{frames[0].shape[0]}"
+        next_frame = Cycle(frames)
+        results.append(summarize('match.full', label, measure(lambda: detect_templates(next_frame(), templates), repeat),
+                                 {'confidence': 0.9, 'grayscale': True}))
+        results.append(bench_pyramid(label, frames, templates, repeat))
+        results.extend(bench_end_to_end(label, [Screen(frame) for frame in frames], repeat))
+
+    return {
+        'version': RESULTS_VERSION,
+        'meta': _metadata(seed, repeat, variants),
+        'results': results,
+    }
+
+
+def write_results(document: dict, output: Path) -> None:
+    """Write a results document as JSON."""
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def _best_scale(frame: np.ndarray, variants: Dict[float, np.ndarray]):
+    best, best_score = None, 0.9
+    for template in variants.values():
+        height, width = template.shape
+        if height > frame.shape[0] or width > frame.shape[1]:
+            continue
+        _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED))
+        if score >= best_score:
+            best, best_score = Box(int(location[0]), int(location[1]), width, height), score
+    return best
+
+
+def _rate(outcomes: Sequence[bool]) -> Optional[float]:
+    return sum(outcomes) / len(outcomes) if outcomes else None
+
+
+def _metadata(seed: int, repeat: int, variants: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads(),
+        'seed': seed,
+        'repeat': repeat,
+        'variants': variants,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark screen detection")
+    parser.add_argument('--resolutions', default=','.join(RESOLUTIONS),
+                        help=f"Comma-separated resolutions ({', '.join(RESOLUTIONS)} or WIDTHxHEIGHT)")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed calls per benchmark")
+    parser.add_argument('--variants', type=int, default=4, help="Synthetic screens per resolution")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic screens")
+    parser.add_argument('--recorded', type=Path, help="Directory of recorded PNG frames to benchmark too")
+    parser.add_argument('--output', type=Path, default=Path("benchmark-results.json"), help="JSON results file")
+    args = parser.parse_args(argv)
+
+    resolutions = {}
+    for label in filter(None, (part.strip().lower() for part in args.resolutions.split(','))):
+        if label in RESOLUTIONS:
+            resolutions[label] = RESOLUTIONS[label]
+        else:
+            width, _, height = label.partition('x')
+            resolutions[label] = (int(width), int(height))
+
+    document = run_benchmarks(resolutions, args.repeat, args.seed, args.variants, args.recorded)
+    write_results(document, args.output)
+
+    for result in document['results']:
+        accuracy = '' if result['accuracy'] is None else f"  accuracy {result['accuracy']:.0%}"
+        if 'speedup' in result:
+            accuracy += f"  speedup {result['speedup']:.1f}x"
+        params = ' '.join(f"{key}={value}" for key, value in sorted(result['params'].items()))
+        print(f"{result['name']:<28} {result['resolution']:<12} median {result['median_ms']:8.2f} ms  "
+              f"p95 {result['p95_ms']:8.2f} ms{accuracy}  {params}")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
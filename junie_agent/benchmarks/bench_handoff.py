@@ -0,0 +1,498 @@
+"""
+End-to-end task hand-off latency harness.
+
+Runs the real agent (``python -m devhelm_junie_agent.main``) against a local
+``/v1/task`` stand-in (ReferenceServer) and a minimal fake Junie tool window
+on a private Xvfb display. The fake window shows the "Start Again" button and
+the "Type your" label from the bundled templates and records every keystroke
+it receives.
+
+Every iteration the harness finishes the task in progress on the server,
+queues the next one and shows "Start Again" in the fake window, which is the
+moment Junie hands control back. The hand-off latency is the time from there
+until the window receives Enter after the complete prompt; it covers screen
+polling, readiness confirmation, the task request, the click on the input box
+(including its settle delay) and typing. Typing throughput is measured from
+the first to the last character of the prompt.
+
+Needs Xvfb and python-xlib. Results are written as JSON in the same layout as
+bench_detection.py, so runs can be compared with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/bench_handoff.py --output handoff.json
+    python benchmarks/bench_handoff.py --iterations 50 --prompt-length 400
+    python benchmarks/bench_handoff.py --env TASK_PUSH=true --env DAMAGE_WATCH=true
+"""
+
+import argparse
+import os
+import queue
+import random
+import select
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_detection import RESULTS_VERSION, _metadata, summarize, write_results  # noqa: E402
+from screens import IMAGES_DIR  # noqa: E402
+
+from devhelm_junie_agent.reference_server import ReferenceServer  # noqa: E402
+from devhelm_junie_agent.screen_backend import start_xvfb  # noqa: E402
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Characters used for generated prompts (typeable on a US keymap)
+PROMPT_ALPHABET = string.ascii_letters + string.digits + " .,:;-_()[]/?!'\"#"
+
+
+class HarnessException(Exception):
+    """Raised when the harness cannot start or the agent stops responding."""
+    pass
+
+
+@dataclass
+class Submission:
+    """
+    A prompt received by the fake Junie window.
+
+    Attributes:
+        text: Characters typed before Enter
+        shown_at: When "Start Again" was shown (monotonic seconds)
+        first_key_at: When the first character arrived
+        last_key_at: When the last character arrived
+        submitted_at: When Enter arrived
+    """
+    text: str
+    shown_at: float
+    first_key_at: float
+    last_key_at: float
+    submitted_at: float
+
+    @property
+    def latency(self) -> float:
+        """Seconds from "Start Again" appearing to the prompt being submitted."""
+        return self.submitted_at - self.shown_at
+
+    @property
+    def typing_time(self) -> float:
+        """Seconds between the first and the last typed character."""
+        return self.last_key_at - self.first_key_at
+
+
+class FakeJunie:
+    """
+    Minimal stand-in for the Junie tool window.
+
+    A full-screen window drawn with the bundled templates: the "Type your"
+    label is always visible, the "Start Again" button only while Junie is
+    idle. Pressing Enter after some text submits it, which hides the button
+    again until show_idle() is called. All X calls are made on one thread
+    with its own connection; other threads talk to it through queues.
+    """
+
+    BACKGROUND = 0x2b2b2b
+    INPUT_BOX = 0x3c3f41
+
+    def __init__(self, display_name: str):
+        """
+        Initialize the fake window.
+
+        Args:
+            display_name: X display to open the window on
+        """
+        self.display_name = display_name
+        self.templates = {
+            name: cv2.imread(str(IMAGES_DIR / f"{name}.png"), cv2.IMREAD_COLOR)
+            for name in ('start_again', 'type_your')
+        }
+        self.idle = False
+        self.shown_at = 0.0
+        self.submissions: "queue.Queue[Submission]" = queue.Queue()
+
+        self._commands: "queue.Queue[str]" = queue.Queue()
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._typed: List[Tuple[str, float]] = []
+
+    def start(self, timeout: float = 10.0) -> 'FakeJunie':
+        """
+        Open the window on a background thread.
+
+        Args:
+            timeout: Seconds to wait for the window to be mapped
+
+        Returns:
+            FakeJunie: self
+
+        Raises:
+            HarnessException: If the window could not be created
+        """
+        self._thread = threading.Thread(target=self._run, name="fake-junie", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout) or self._error is not None:
+            raise HarnessException(f"Fake Junie window failed to start: {self._error}")
+        return self
+
+    def stop(self) -> None:
+        """Close the window."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def show_idle(self) -> None:
+        """Show "Start Again", as Junie does when it finished a task."""
+        self._commands.put('idle')
+
+    def wait_for_submission(self, timeout: float) -> Submission:
+        """
+        Wait for the next prompt submitted with Enter.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            Submission: The received prompt and its timestamps
+
+        Raises:
+            HarnessException: If nothing was submitted in time
+        """
+        try:
+            return self.submissions.get(timeout=timeout)
+        except queue.Empty:
+            raise HarnessException(f"No prompt submitted within {timeout:.0f}s")
+
+    def _run(self) -> None:
+        try:
+            from Xlib import X, display as xdisplay
+
+            self._display = xdisplay.Display(self.display_name)
+            screen = self._display.screen()
+            self._width, self._height = screen.width_in_pixels, screen.height_in_pixels
+            self._window = screen.root.create_window(
+                0, 0, self._width, self._height, 0, screen.root_depth,
+                background_pixel=self.BACKGROUND,
+                override_redirect=True,
+                event_mask=X.ExposureMask | X.KeyPressMask | X.ButtonPressMask,
+            )
+            self._gc = self._window.create_gc(foreground=self.BACKGROUND)
+            self._depth = screen.root_depth
+            self._window.map()
+            self._window.set_input_focus(X.RevertToParent, X.CurrentTime)
+            self._draw()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        fileno = self._display.fileno()
+        while not self._stopping.is_set():
+            while True:
+                try:
+                    command = self._commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command == 'idle':
+                    self.idle = True
+                    self._draw()
+                    self.shown_at = time.monotonic()
+            while self._display.pending_events():
+                self._handle(self._display.next_event())
+            select.select([fileno], [], [], 0.005)
+        self._display.close()
+
+    def _handle(self, event) -> None:
+        from Xlib import X, XK
+
+        received_at = time.monotonic()
+        if event.type == X.Expose and event.count == 0:
+            self._draw()
+        elif event.type == X.ButtonPress:
+            self._window.set_input_focus(X.RevertToParent, X.CurrentTime)
+            self._display.flush()
+        elif event.type == X.KeyPress:
+            shifted = 1 if event.state & X.ShiftMask else 0
+            keysym = self._display.keycode_to_keysym(event.detail, shifted) or \
+                self._display.keycode_to_keysym(event.detail, 0)
+            if keysym == XK.XK_Return:
+                self._submit(received_at)
+            elif keysym == XK.XK_BackSpace:
+                self._typed = self._typed[:-1]
+            elif 0x20 <= keysym <= 0xff:
+                self._typed.append((chr(keysym), received_at))
+
+    def _submit(self, submitted_at: float) -> None:
+        if not self._typed:
+            return
+        text = ''.join(char for char, _ in self._typed)
+        first, last = self._typed[0][1], self._typed[-1][1]
+        self._typed = []
+        self.idle = False
+        self._draw()
+        self.submissions.put(Submission(text, self.shown_at, first, last, submitted_at))
+
+    def _draw(self) -> None:
+        # Tool window on the right, "Start Again" above the input row
+        left = self._width * 3 // 4 + 20
+        bottom = self._height - 80
+        self._gc.change(foreground=self.BACKGROUND)
+        self._window.fill_rectangle(self._gc, 0, 0, self._width, self._height)
+        self._gc.change(foreground=self.INPUT_BOX)
+        self._window.fill_rectangle(self._gc, left, bottom - 6, self._width - left - 20, 50)
+        self._put(self.templates['type_your'], left, bottom)
+        if self.idle:
+            self._put(self.templates['start_again'], left, bottom - 80)
+        self._display.flush()
+
+    def _put(self, image: np.ndarray, x: int, y: int) -> None:
+        from Xlib import X
+
+        height, width = image.shape[:2]
+        pixels = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+        self._window.put_image(self._gc, x, y, width, height, X.ZPixmap, self._depth, 0, pixels.tobytes())
+
+
+def make_prompt(rng: random.Random, length: int) -> str:
+    """
+    Generate a prompt of printable characters.
+
+    Args:
+        rng: Random source
+        length: Number of characters
+
+    Returns:
+        str: The prompt
+    """
+    return ''.join(rng.choice(PROMPT_ALPHABET) for _ in range(length))
+
+
+def agent_environment(server_url: str, display_name: str, poll_interval: float, overrides: Dict[str, str]) -> Dict[str, str]:
+    """
+    Build the environment the agent process runs with.
+
+    Args:
+        server_url: Base URL of the ReferenceServer
+        display_name: Xvfb display with the fake window
+        poll_interval: Screen polling interval in seconds
+        overrides: Extra variables (win over the defaults)
+
+    Returns:
+        dict: Environment variables
+    """
+    env = dict(os.environ)
+    env.update({
+        'BASE_URL': server_url,
+        'API_KEY': 'bench',
+        'DISPLAY': display_name,
+        'SCREEN_BACKEND': 'xvfb',
+        'TEXT_INPUT_MODE': 'xtest',
+        'POLL_FAST_INTERVAL': str(poll_interval),
+        'POLL_MIN_INTERVAL': str(poll_interval),
+        'POLL_MAX_INTERVAL': str(poll_interval),
+        'POLL_JITTER': '0',
+        'READINESS_CONFIRMATIONS': '1',
+        'READINESS_INTERVAL': str(poll_interval),
+        'MAX_CONSECUTIVE_CONTINUES': '1000000',
+        'TASK_JOURNAL': 'false',
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(SRC_DIR), os.environ.get('PYTHONPATH')])),
+    })
+    env.update(overrides)
+    return env
+
+
+def run_handoff(
+    iterations: int = 20,
+    warmup: int = 2,
+    prompt_length: int = 200,
+    size: Tuple[int, int] = (1920, 1080),
+    poll_interval: float = 0.1,
+    timeout: float = 30.0,
+    seed: int = 0,
+    env: Optional[Dict[str, str]] = None,
+) -> dict:
+    """
+    Run the agent against the fake Junie window and measure hand-offs.
+
+    Args:
+        iterations: Measured hand-offs
+        warmup: Hand-offs run first and not measured
+        prompt_length: Characters per prompt
+        size: (width, height) of the Xvfb screen
+        poll_interval: Agent screen polling interval in seconds
+        timeout: Seconds to wait for each hand-off
+        seed: Seed for the generated prompts
+        env: Extra agent environment variables
+
+    Returns:
+        dict: Results document (metadata and results)
+
+    Raises:
+        HarnessException: If Xvfb is missing, the agent exits or a hand-off
+            times out or types the wrong text
+    """
+    if not shutil.which("Xvfb"):
+        raise HarnessException("Xvfb is not installed")
+
+    rng = random.Random(seed)
+    overrides = dict(env or {})
+    label = f"{size[0]}x{size[1]}"
+    display_name, xvfb = start_xvfb(*size)
+    window = None
+    agent = None
+    server = ReferenceServer().start()
+    log = tempfile.NamedTemporaryFile(prefix="handoff-agent-", suffix=".log", delete=False)
+    submissions: List[Submission] = []
+    try:
+        window = FakeJunie(display_name).start()
+
+        # The agent takes its first task at startup without typing it (Junie is assumed busy)
+        server.add_task("initial task", ticket_id='BENCH-0')
+        agent = subprocess.Popen(
+            [sys.executable, '-m', 'devhelm_junie_agent.main'],
+            env=agent_environment(server.url, display_name, poll_interval, overrides),
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + timeout
+        while server.current is None:
+            if agent.poll() is not None or time.monotonic() > deadline:
+                raise HarnessException(f"Agent did not fetch its initial task; see {log.name}")
+            time.sleep(0.05)
+
+        for index in range(warmup + iterations):
+            prompt = make_prompt(rng, prompt_length)
+            server.complete()
+            server.add_task(prompt, ticket_id=f'BENCH-{index + 1}')
+            window.show_idle()
+
+            try:
+                submission = window.wait_for_submission(timeout)
+            except HarnessException:
+                state = "exited" if agent.poll() is not None else "running"
+                raise HarnessException(f"Hand-off {index + 1} timed out (agent {state}); see {log.name}")
+            if submission.text != prompt:
+                raise HarnessException(
+                    f"Hand-off {index + 1} typed {submission.text[:40]!r}..., expected {prompt[:40]!r}..."
+                )
+            if index >= warmup:
+                submissions.append(submission)
+    finally:
+        if agent is not None:
+            agent.terminate()
+            try:
+                agent.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                agent.kill()
+                agent.wait()
+        server.stop()
+        if window is not None:
+            window.stop()
+        xvfb.terminate()
+        xvfb.wait()
+        log.close()
+
+    params = {'prompt_length': prompt_length, 'poll_interval': poll_interval}
+    params.update({f"env.{key}": value for key, value in sorted(overrides.items())})
+    per_char = [submission.typing_time / max(1, len(submission.text) - 1) for submission in submissions]
+    typing_time = sum(submission.typing_time for submission in submissions)
+    typed = sum(len(submission.text) - 1 for submission in submissions)
+
+    results = [
+        _summarize('handoff.latency', label, [submission.latency for submission in submissions], params),
+        _summarize('handoff.first_key', label, [submission.first_key_at - submission.shown_at for submission in submissions], params),
+        _summarize('handoff.per_char', label, per_char, params),
+    ]
+
+    metadata = _metadata(seed, iterations, 1)
+    metadata.update({'warmup': warmup, 'agent_log': log.name})
+    return {
+        'version': RESULTS_VERSION,
+        'metadata': metadata,
+        'results': results,
+        'throughput': {'chars_per_second': typed / typing_time if typing_time > 0 else None},
+    }
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        samples: Values (any order)
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The smallest sample with at least that fraction of samples
+            at or below it
+    """
+    ordered = sorted(samples)
+    rank = max(1, int(np.ceil(fraction * len(ordered))))
+    return ordered[rank - 1]
+
+
+def _summarize(name: str, resolution: str, samples: Sequence[float], params: dict) -> dict:
+    # bench_detection's record plus nearest-rank tail percentiles
+    result = summarize(name, resolution, samples, params)
+    result.update({f"p{round(p * 100)}_ms": percentile(samples, p) * 1000.0 for p in (0.5, 0.95, 0.99)})
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure end-to-end task hand-off latency")
+    parser.add_argument('--iterations', type=int, default=20, help="Measured hand-offs")
+    parser.add_argument('--warmup', type=int, default=2, help="Unmeasured hand-offs run first")
+    parser.add_argument('--prompt-length', type=int, default=200, help="Characters per prompt")
+    parser.add_argument('--resolution', default='1920x1080', help="Xvfb screen size (WIDTHxHEIGHT)")
+    parser.add_argument('--poll-interval', type=float, default=0.1, help="Agent screen polling interval in seconds")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Seconds to wait for each hand-off")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the generated prompts")
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra agent environment variable (repeatable)")
+    parser.add_argument('--output', type=Path, default=Path("handoff-results.json"), help="JSON results file")
+    args = parser.parse_args(argv)
+
+    width, _, height = args.resolution.lower().partition('x')
+    overrides = dict(item.split('=', 1) for item in args.env)
+
+    try:
+        document = run_handoff(
+            iterations=args.iterations,
+            warmup=args.warmup,
+            prompt_length=args.prompt_length,
+            size=(int(width), int(height)),
+            poll_interval=args.poll_interval,
+            timeout=args.timeout,
+            seed=args.seed,
+            env=overrides,
+        )
+    except HarnessException as e:
+        print(f"Hand-off benchmark failed: {e}", file=sys.stderr)
+        return 1
+    write_results(document, args.output)
+
+    for result in document['results']:
+        print(f"{result['name']:<20} p50 {result['p50_ms']:9.2f}  p95 {result['p95_ms']:9.2f}  "
+              f"p99 {result['p99_ms']:9.2f}  max {result['max_ms']:9.2f} ms")
+    rate = document['throughput']['chars_per_second']
+    print(f"typing throughput    {rate:,.0f} chars/s" if rate else "typing throughput    n/a")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Compare two detection benchmark result files.
+
+Benchmarks are matched by name, resolution and parameters. A benchmark is
+reported as a regression when its median got slower by more than the
+threshold, or when its accuracy dropped. The exit status is 1 if there is
+any regression, so the script can gate CI.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json
+    python benchmarks/compare.py baseline.json candidate.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Key = Tuple[str, str, str]
+
+
+def load_results(path: Path) -> Dict[Key, dict]:
+    """
+    Load a results file keyed by (name, resolution, parameters).
+
+    Args:
+        path: File written by bench_detection.py
+
+    Returns:
+        dict: Key -> result record
+    """
+    document = json.loads(Path(path).read_text())
+    return {
+        (result['name'], result['resolution'], json.dumps(result['params'], sort_keys=True)): result
+        for result in document['results']
+    }
+
+
+def compare(baseline: Dict[Key, dict], candidate: Dict[Key, dict], threshold: float = 0.2) -> List[dict]:
+    """
+    Compare matching benchmarks.
+
+    Args:
+        baseline: Results of the reference run
+        candidate: Results of the run being checked
+        threshold: Allowed relative slowdown of the median (0.2 = 20%)
+
+    Returns:
+        list: One row per benchmark present in both runs, with 'change'
+            (relative median change) and 'regression' flags
+    """
+    rows = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        change = (after['median_ms'] - before['median_ms']) / before['median_ms'] if before['median_ms'] else 0.0
+        accuracy_drop = (
+            before.get('accuracy') is not None
+            and after.get('accuracy') is not None
+            and after['accuracy'] < before['accuracy']
+        )
+        rows.append({
+            'name': key[0],
+            'resolution': key[1],
+            'params': key[2],
+            'before_ms': before['median_ms'],
+            'after_ms': after['median_ms'],
+            'change': change,
+            'accuracy_drop': accuracy_drop,
+            'regression': change > threshold or accuracy_drop,
+        })
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare detection benchmark results")
+    parser.add_argument('baseline', type=Path, help="Results of the reference commit")
+    parser.add_argument('candidate', type=Path, help="Results of the commit being checked")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed relative median slowdown (default 0.2)")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.candidate), args.threshold)
+    for row in rows:
+        flag = "REGRESSION" if row['regression'] else ""
+        accuracy = " (accuracy dropped)" if row['accuracy_drop'] else ""
+        print(f"{row['name']:<28} {row['resolution']:<12} {row['before_ms']:9.2f} -> {row['after_ms']:9.2f} ms "
+              f"{row['change']:+7.1%} {flag}{accuracy}  {row['params']}")
+
+    regressions = sum(row['regression'] for row in rows)
+    print(f"{len(rows)} benchmarks compared, {regressions} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
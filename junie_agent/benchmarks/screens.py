@@ -0,0 +1,157 @@
+"""
+Synthetic IDE-like screenshots for the benchmarks.
+
+render_screen() draws a dark IDE layout (title bar, project tree, editor with
+lines of "code", tool window) and pastes the bundled templates at random
+positions and scales, returning the frame together with the ground-truth
+boxes so detection accuracy can be checked as well as speed.
+"""
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from devhelm_junie_agent.detection import Box
+
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4k': (3840, 2160),
+}
+
+IMAGES_DIR = Path(__file__).resolve().parents[1] / "src" / "devhelm_junie_agent" / "images"
+
+
+@dataclass
+class Screen:
+    """
+    A rendered screenshot and where the templates were placed.
+
+    Attributes:
+        frame: 2D uint8 grayscale image
+        boxes: Template name -> Box of the pasted template
+        scales: Template name -> scale the template was pasted at
+    """
+    frame: np.ndarray
+    boxes: Dict[str, Box] = field(default_factory=dict)
+    scales: Dict[str, float] = field(default_factory=dict)
+
+
+def load_templates(names: Iterable[str] = ('start_again', 'type_your')) -> Dict[str, np.ndarray]:
+    """
+    Load bundled templates as grayscale arrays.
+
+    Args:
+        names: Template names (file names without .png)
+
+    Returns:
+        dict: Template name -> 2D uint8 array
+    """
+    templates = {}
+    for name in names:
+        image = cv2.imread(str(IMAGES_DIR / f"{name}.png"), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise FileNotFoundError(f"Template not found: {name}.png")
+        templates[name] = image
+    return templates
+
+
+def render_screen(
+    size: Tuple[int, int],
+    templates: Dict[str, np.ndarray],
+    rng: random.Random,
+    scales: Iterable[float] = (1.0,),
+    visible: Optional[Iterable[str]] = None,
+) -> Screen:
+    """
+    Render an IDE-like screenshot with templates pasted onto it.
+
+    Args:
+        size: (width, height) in pixels
+        templates: Template name -> grayscale template
+        rng: Random source for layout, text and placement
+        scales: Scales to choose from for every pasted template
+        visible: Templates to paste (defaults to all)
+
+    Returns:
+        Screen: The frame and the ground truth
+    """
+    width, height = size
+    frame = np.full((height, width), 43, dtype=np.uint8)
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+
+    # Title bar, project tree, tool window and a separator per panel
+    unit = max(1, height // 54)
+    tree_width = width // 6
+    tool_width = width // 4
+    cv2.rectangle(frame, (0, 0), (width, 2 * unit), 60, -1)
+    cv2.rectangle(frame, (0, 2 * unit), (tree_width, height), 49, -1)
+    cv2.rectangle(frame, (width - tool_width, 2 * unit), (width, height), 49, -1)
+    cv2.line(frame, (tree_width, 2 * unit), (tree_width, height), 30, 1)
+    cv2.line(frame, (width - tool_width, 2 * unit), (width - tool_width, height), 30, 1)
+
+    # Lines of "code" and tree entries: short bars of varying brightness
+    for left, right in ((unit, tree_width - unit), (tree_width + 4 * unit, width - tool_width - unit)):
+        for top in range(3 * unit, height - unit, unit):
+            x = left + rng.randrange(0, 4) * 2 * unit
+            while x < right and rng.random() < 0.8:
+                length = rng.randrange(unit, 8 * unit)
+                cv2.rectangle(frame, (x, top + unit // 4), (min(x + length, right), top + unit * 3 // 4), rng.randrange(90, 200), -1)
+                x += length + unit // 2
+
+    # Mild capture noise so frames are not trivially flat
+    noise = np_rng.integers(-3, 4, size=frame.shape, dtype=np.int16)
+    frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    screen = Screen(frame)
+    names = list(visible) if visible is not None else list(templates)
+    scale_choices = list(scales)
+    occupied: List[Box] = []
+    for name in names:
+        scale = rng.choice(scale_choices)
+        template = templates[name]
+        if scale != 1.0:
+            template = cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+        template_height, template_width = template.shape
+
+        # Place inside the tool window, where Junie lives, without overlaps
+        for _ in range(100):
+            left = rng.randrange(width - tool_width + unit, width - template_width - unit)
+            top = rng.randrange(3 * unit, height - template_height - unit)
+            box = Box(left, top, template_width, template_height)
+            if not any(_overlaps(box, other) for other in occupied):
+                break
+        frame[top:top + template_height, left:left + template_width] = template
+        occupied.append(box)
+        screen.boxes[name] = box
+        screen.scales[name] = scale
+
+    return screen
+
+
+def matches(found: Optional[Box], expected: Optional[Box], tolerance: int = 3) -> bool:
+    """
+    Check a detection against the ground truth.
+
+    Args:
+        found: Box returned by the matcher
+        expected: Box where the template was pasted (None if not pasted)
+        tolerance: Pixels the top-left corner may be off
+
+    Returns:
+        bool: True if both are None or the corners agree
+    """
+    if found is None or expected is None:
+        return found is None and expected is None
+    return abs(found.left - expected.left) <= tolerance and abs(found.top - expected.top) <= tolerance
+
+
+def _overlaps(first: Box, second: Box) -> bool:
+    return (
+        first.left < second.left + second.width and second.left < first.left + first.width
+        and first.top < second.top + second.height and second.top < first.top + first.height
+    )
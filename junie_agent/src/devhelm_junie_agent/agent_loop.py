@@ -0,0 +1,261 @@
+"""
+Agent loop module: one pass of the agent's decision loop.
+
+This module provides AgentLoop, the per-iteration logic shared by main()'s
+sync loop and every FleetWorker: check the screen (reusing the last
+detection while the DAMAGE watcher reports no change), confirm readiness,
+request a task and enter the prompt or "continue" - guarded by the
+TaskJournal when one is given - and prefetch the next task while Junie
+works. The caller owns the loop around it: sleeping, error handling and
+shutdown.
+
+create_task_source() stacks the optional push stream and prefetcher on top
+of a TaskRequester the same way for both callers.
+"""
+
+import time
+from enum import Enum
+from typing import Callable, Optional, Tuple
+
+from .damage import DamageWatcher
+from .journal import TaskJournal
+from .metrics import ERRORS
+from .prefetch import TaskPrefetcher
+from .readiness import ReadinessDetector
+from .scheduler import PollScheduler
+from .task_requester import Task, TaskRequester, TaskRequesterException, TaskStatus
+from .task_stream import TaskStream
+from .tracing import span
+
+
+class PassResult(Enum):
+    """What the caller should do after a pass of the agent loop."""
+    SLEEP = "sleep"  # Sleep until the next poll
+    AGAIN = "again"  # Poll again straight away (the server held the request open)
+    FINISHED = "finished"  # The continue limit was reached
+
+
+def create_task_source(
+    requester: TaskRequester,
+    config,
+    on_event: Optional[Callable[[], None]] = None,
+) -> Tuple[object, Optional[TaskStream], Optional[TaskPrefetcher]]:
+    """
+    Wrap a TaskRequester in the push stream and prefetcher enabled in config.
+
+    Args:
+        requester: TaskRequester for the session's API key
+        config: Config object with the task_push and task_prefetch settings
+        on_event: Called after every pushed event (used to end the loop's sleep)
+
+    Returns:
+        tuple: (task source with request_task(), started TaskStream or None,
+            TaskPrefetcher or None)
+    """
+    tasks = requester
+    stream = None
+    if config.task_push:
+        stream = TaskStream(requester, on_event=on_event).start()
+        tasks = stream
+
+    prefetcher = None
+    if config.task_prefetch:
+        prefetcher = TaskPrefetcher(
+            tasks,
+            task_lease=config.task_lease,
+            status_lease=config.task_status_lease,
+            min_interval=config.task_prefetch_interval
+        )
+        tasks = prefetcher
+    return tasks, stream, prefetcher
+
+
+class AgentLoop:
+    """
+    Decides and performs one pass of the agent loop for one IDE session.
+    """
+
+    def __init__(
+        self,
+        ui,
+        tasks,
+        scheduler: PollScheduler,
+        readiness: ReadinessDetector,
+        logger,
+        max_consecutive_continues: int = 5,
+        journal: Optional[TaskJournal] = None,
+        current_task: Optional[Task] = None,
+        watcher: Optional[DamageWatcher] = None,
+        prefetcher: Optional[TaskPrefetcher] = None,
+        max_detection_age: float = 60.0,
+        name: str = '',
+    ):
+        """
+        Initialize the AgentLoop.
+
+        Args:
+            ui: UIInteraction used for detection and input
+            tasks: Task source with request_task(), retry_after and long_polled
+                (TaskRequester, TaskStream or TaskPrefetcher)
+            scheduler: PollScheduler deciding the delays between polls
+            readiness: ReadinessDetector confirming "Start Again"
+            logger: Logger instance
+            max_consecutive_continues: Continue prompts allowed before the
+                pass reports PassResult.FINISHED
+            journal: Optional TaskJournal recording prompts and continues
+            current_task: Task being worked on at start-up; its continue
+                count is restored from the journal
+            watcher: Optional started DamageWatcher; detection is skipped
+                while it reports no change in the watched regions
+            prefetcher: The TaskPrefetcher inside tasks, if any, asked to
+                fetch the next task while Junie is working
+            max_detection_age: Seconds a detection is reused while the
+                watcher reports no change (the window may have moved)
+            name: Session name prefixed to log messages (fleet workers)
+        """
+        self.ui = ui
+        self.tasks = tasks
+        self.scheduler = scheduler
+        self.readiness = readiness
+        self.logger = logger
+        self.max_consecutive_continues = max_consecutive_continues
+        self.journal = journal
+        self.current_task = current_task
+        self.watcher = watcher
+        self.prefetcher = prefetcher
+        self.max_detection_age = max_detection_age
+        self._prefix = f"{name}: " if name else ''
+
+        # Counter for consecutive continue prompts (DH-8: Continue limit), restored from the journal
+        entry = journal.get(current_task.id) if journal is not None and current_task is not None else None
+        self.consecutive_continue_count = entry.continues if entry is not None else 0
+
+    def poll(self) -> PassResult:
+        """
+        Run one pass: detect, and hand out a task or "continue" when ready.
+
+        Returns:
+            PassResult: Whether to sleep, poll again at once or stop
+
+        Raises:
+            Exception: Errors from detection or input are left to the caller
+        """
+        # With the DAMAGE watcher, detection only runs when a watched region changed,
+        # or when the last one is older than max_detection_age (the window may have moved).
+        ui = self.ui
+        if (
+            self.watcher is not None
+            and ui.last_detection is not None
+            and time.monotonic() - ui.last_detection.captured_at < self.max_detection_age
+            and not self.watcher.consume()
+        ):
+            ready = ui.last_detection.is_ready_for_prompt
+        else:
+            ready = ui.isReadyForPrompt()
+
+        if not ready:
+            # UI not ready - Junie is still working
+            self.logger.debug(f"{self._prefix}UI not ready for prompt - waiting...")
+            self.scheduler.on_busy()
+
+            # Fetch the next task in the background so the hand-off is immediate
+            if self.prefetcher is not None and self.prefetcher.prefetch():
+                self.logger.debug(f"{self._prefix}Prefetching next task in the background")
+            return PassResult.SLEEP
+
+        self.logger.debug(f"{self._prefix}UI is ready for prompt - 'Start Again' button detected")
+
+        # Confirm the button is stable over several captures to avoid race conditions
+        if not self.readiness.confirm(ui.last_detection):
+            self.logger.debug(f"{self._prefix}'Start Again' button not stable yet - waiting...")
+            self.scheduler.on_busy()
+            return PassResult.SLEEP
+
+        self.scheduler.on_ready()
+
+        try:
+            with span('loop.request_task'):
+                result = self.tasks.request_task()
+
+            if isinstance(result, Task):
+                self._give_task(result)
+
+            elif result == TaskStatus.BUSY:
+                if not self._continue():
+                    return PassResult.FINISHED
+
+            elif result == TaskStatus.NONE:
+                # DevHelm has no tasks - do nothing
+                self.logger.debug(f"{self._prefix}DevHelm has no tasks available - doing nothing")
+                self.scheduler.on_idle()
+
+                # The server already held the request open - ask again straight away
+                if self.tasks.long_polled:
+                    return PassResult.AGAIN
+
+        except TaskRequesterException as e:
+            self.logger.error(f"{self._prefix}Error requesting task: {e}")
+            ERRORS.labels('request').inc()
+            self.scheduler.on_error()
+
+        # Honour the server's Retry-After hint, if any
+        if self.tasks.retry_after:
+            self.logger.debug(f"{self._prefix}Server asked to retry after {self.tasks.retry_after:.0f}s")
+            self.scheduler.defer(self.tasks.retry_after)
+        return PassResult.SLEEP
+
+    def _give_task(self, task: Task) -> None:
+        # New task received - update current task and give prompt
+        self.current_task = task
+        self.logger.info(f"{self._prefix}New task received: {task.ticket_id} - {task.prompt}")
+
+        # Reset continue counter when new task is received (DH-8: Continue limit)
+        self.consecutive_continue_count = 0
+
+        # The journal makes sure a task is typed at most once, even across restarts
+        journal = self.journal
+        if journal is not None:
+            journal.record_received(task)
+            if not journal.begin_submit(task.id):
+                self.logger.warning(f"{self._prefix}Prompt for {task.ticket_id} was already submitted - not typing it again")
+                self.consecutive_continue_count = journal.get(task.id).continues
+                self.scheduler.on_prompt_sent()
+                return
+
+        try:
+            success = self.ui.givePrompt(task.prompt)
+        except Exception:
+            # Nothing was typed yet, so the task may be submitted on a later pass
+            if journal is not None and not self.ui.prompt_typing_started:
+                journal.abort_submit(task.id)
+            raise
+        if success:
+            self.logger.info(f"{self._prefix}Successfully entered new task prompt")
+            if journal is not None:
+                journal.record_submitted(task.id)
+            self.scheduler.on_prompt_sent()
+        else:
+            self.logger.error(f"{self._prefix}Failed to enter task prompt")
+            ERRORS.labels('prompt').inc()
+            if journal is not None:
+                journal.abort_submit(task.id)
+            self.scheduler.on_error()
+
+    def _continue(self) -> bool:
+        # DevHelm says still busy - tell Junie to continue; False once the limit is reached
+        self.logger.info(f"{self._prefix}DevHelm indicates task still in progress - telling Junie to continue")
+
+        # Check continue limit before sending continue prompt (DH-8: Continue limit)
+        self.consecutive_continue_count += 1
+        self.logger.debug(f"{self._prefix}Continue count: {self.consecutive_continue_count}/{self.max_consecutive_continues}")
+
+        if self.consecutive_continue_count > self.max_consecutive_continues:
+            self.logger.warning(f"{self._prefix}Maximum consecutive continue limit ({self.max_consecutive_continues}) reached. Stopping to avoid quota waste.")
+            return False
+
+        if self.journal is not None and self.current_task is not None:
+            self.journal.record_continue(self.current_task.id)
+        self.ui.continuePrompt()
+        self.logger.info(f"{self._prefix}Successfully entered 'continue' prompt")
+        self.scheduler.on_prompt_sent()
+        return True
@@ -0,0 +1,64 @@
+"""
+Async TaskRequester module for the asyncio runtime.
+
+This module provides AsyncTaskRequester, the coroutine counterpart of
+TaskRequester. It runs TaskRequester.request_task() on a dedicated worker
+thread, so a slow (or long-polled) API call never blocks the event loop,
+while timeouts, retries, Retry-After, the circuit breaker, long polling and
+conditional requests all come from the same HttpClient as the sync loop.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+from .task_requester import Task, TaskRequester, TaskStatus
+
+
+class AsyncTaskRequester:
+    """
+    Requests tasks from the DevHelm API without blocking the event loop.
+
+    request_task() follows the TaskRequester.request_task() contract.
+    """
+
+    def __init__(self, requester: TaskRequester):
+        """
+        Initialize the AsyncTaskRequester.
+
+        Args:
+            requester: TaskRequester whose requests are run off the event loop
+        """
+        self.requester = requester
+        # One thread: requests are sequential, like the sync loop's
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-requester")
+
+    @property
+    def retry_after(self) -> Optional[float]:
+        """Seconds the server asked us to wait (Retry-After) on the last response."""
+        return self.requester.retry_after
+
+    @property
+    def long_polled(self) -> bool:
+        """True if the server held the last request open (long poll applied)."""
+        return self.requester.long_polled
+
+    async def request_task(self) -> Union[Task, TaskStatus]:
+        """
+        Request a new task from the DevHelm API.
+
+        Returns:
+            Task: A Task object if a new task is available (HTTP 200)
+            TaskStatus.BUSY: If there is already a task in progress (HTTP 409)
+            TaskStatus.NONE: If no tasks are available to work on (HTTP 204)
+
+        Raises:
+            TaskRequesterException: If the server returns an invalid response,
+                an unexpected HTTP status code, or cannot be reached
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.requester.request_task)
+
+    async def close(self) -> None:
+        """Stop the worker thread; an in-flight request finishes in the background."""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,256 @@
+"""
+Async runtime module: the agent loop as cooperating asyncio tasks.
+
+This module provides AsyncAgent, an alternative to the blocking loop in
+main() selected with RUNTIME=async. The work is split into three
+coroutines connected by an event and a queue:
+
+- watch_screen: runs detection and readiness confirmation and publishes
+  whether the UI is ready for a prompt.
+- fetch_tasks: waits until the UI is ready and requests a task through
+  AsyncTaskRequester, so a slow API call never holds up detection.
+- drive_input: enters prompts and "continue" for each fetched result,
+  recording them in the TaskJournal when one is given.
+
+Template matching and typing are CPU-bound or blocking, so they run on a
+single-thread executor (which also keeps every UI call serialised). SIGINT
+and SIGTERM cancel the coroutines and shut the executor down cleanly.
+"""
+
+import asyncio
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .async_requester import AsyncTaskRequester
+from .journal import TaskJournal
+from .metrics import ERRORS
+from .readiness import ReadinessDetector
+from .scheduler import PollScheduler
+from .task_requester import Task, TaskRequesterException, TaskStatus
+
+
+class AsyncAgent:
+    """
+    Runs the agent as screen-watching, task-fetching and input coroutines.
+    """
+
+    def __init__(
+        self,
+        ui,
+        requester: AsyncTaskRequester,
+        scheduler: PollScheduler,
+        logger,
+        readiness: Optional[ReadinessDetector] = None,
+        max_consecutive_continues: int = 5,
+        journal: Optional[TaskJournal] = None,
+        current_task: Optional[Task] = None,
+    ):
+        """
+        Initialize the AsyncAgent.
+
+        Args:
+            ui: UIInteraction used for detection and input
+            requester: AsyncTaskRequester for the DevHelm API
+            scheduler: PollScheduler deciding the delays between polls
+            logger: Logger instance
+            readiness: Optional ReadinessDetector confirming "Start Again"
+            max_consecutive_continues: Continue prompts allowed before exiting
+            journal: Optional TaskJournal recording prompts and continues
+            current_task: Task being worked on at start-up; its continue
+                count is restored from the journal
+        """
+        self.ui = ui
+        self.requester = requester
+        self.scheduler = scheduler
+        self.logger = logger
+        self.readiness = readiness
+        self.max_consecutive_continues = max_consecutive_continues
+        self.journal = journal
+        self.current_task = current_task
+
+        entry = journal.get(current_task.id) if journal is not None and current_task is not None else None
+        self.consecutive_continue_count = entry.continues if entry is not None else 0
+        self.exit_code = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui")
+        self._ready: Optional[asyncio.Event] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._results: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def run(self) -> int:
+        """
+        Run until stopped by a signal, stop() or the continue limit.
+
+        Returns:
+            int: Process exit code
+        """
+        loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._results = asyncio.Queue(maxsize=1)
+
+        handled = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+                handled.append(signum)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not the main thread, or not supported on this platform
+
+        self._tasks = [
+            asyncio.ensure_future(self.watch_screen()),
+            asyncio.ensure_future(self.fetch_tasks()),
+            asyncio.ensure_future(self.drive_input()),
+        ]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for signum in handled:
+                loop.remove_signal_handler(signum)
+            # Let an in-flight UI call (e.g. typing a prompt) finish
+            await loop.run_in_executor(None, self._executor.shutdown, True)
+            await self.requester.close()
+            self.logger.info("Shutting down agent...")
+        return self.exit_code
+
+    def stop(self) -> None:
+        """Cancel every coroutine; run() then shuts down cleanly."""
+        for task in self._tasks:
+            task.cancel()
+
+    async def watch_screen(self) -> None:
+        """Detect whether the UI is ready and publish it to the other coroutines."""
+        while True:
+            try:
+                ready = await self._in_executor(self.ui.isReadyForPrompt)
+                if ready and self.readiness is not None:
+                    ready = await self._in_executor(self.readiness.confirm, self.ui.last_detection)
+            except Exception as e:
+                self.logger.error(f"Unexpected error while watching the screen: {e}")
+                ERRORS.labels('loop').inc()
+                ready = False
+
+            if ready:
+                if not self._ready.is_set():
+                    self.logger.debug("UI is ready for prompt - 'Start Again' button detected")
+                    self.scheduler.on_ready()
+                self._ready.set()
+            else:
+                self.logger.debug("UI not ready for prompt - waiting...")
+                self._ready.clear()
+                self.scheduler.on_busy()
+
+            await self._sleep(self.scheduler.next_delay())
+
+    async def fetch_tasks(self) -> None:
+        """Request a task each time the UI is ready."""
+        while True:
+            await self._ready.wait()
+            try:
+                result = await self.requester.request_task()
+            except TaskRequesterException as e:
+                self.logger.error(f"Error requesting task: {e}")
+                ERRORS.labels('request').inc()
+                self.scheduler.on_error()
+                await asyncio.sleep(self.scheduler.next_delay())
+                continue
+
+            if self.requester.retry_after:
+                self.scheduler.defer(self.requester.retry_after)
+
+            await self._results.put(result)
+            await self._results.join()
+
+            if result == TaskStatus.NONE or self._ready.is_set():
+                # Nothing to do yet (or the prompt failed) - wait for the next poll
+                await asyncio.sleep(self.scheduler.next_delay())
+
+    async def drive_input(self) -> None:
+        """Enter prompts and "continue" for every fetched result."""
+        while True:
+            result = await self._results.get()
+            try:
+                await self._handle(result)
+            except Exception as e:
+                self.logger.error(f"Unexpected error while entering input: {e}")
+                ERRORS.labels('loop').inc()
+                self.scheduler.on_error()
+            finally:
+                self._results.task_done()
+
+    async def _handle(self, result) -> None:
+        if isinstance(result, Task):
+            self.current_task = result
+            self.logger.info(f"New task received: {result.ticket_id} - {result.prompt}")
+            self.consecutive_continue_count = 0
+
+            # The journal makes sure a task is typed at most once, even across restarts
+            if self.journal is not None:
+                await self._in_executor(self.journal.record_received, result)
+                if not await self._in_executor(self.journal.begin_submit, result.id):
+                    self.logger.warning(f"Prompt for {result.ticket_id} was already submitted - not typing it again")
+                    entry = await self._in_executor(self.journal.get, result.id)
+                    self.consecutive_continue_count = entry.continues
+                    self._prompt_sent()
+                    return
+
+            try:
+                success = await self._in_executor(self.ui.givePrompt, result.prompt)
+            except Exception:
+                # Nothing was typed yet, so the task may be submitted on a later pass
+                if self.journal is not None and not self.ui.prompt_typing_started:
+                    await self._in_executor(self.journal.abort_submit, result.id)
+                raise
+
+            if success:
+                self.logger.info("Successfully entered new task prompt")
+                if self.journal is not None:
+                    await self._in_executor(self.journal.record_submitted, result.id)
+                self._prompt_sent()
+            else:
+                self.logger.error("Failed to enter task prompt")
+                ERRORS.labels('prompt').inc()
+                if self.journal is not None:
+                    await self._in_executor(self.journal.abort_submit, result.id)
+                self.scheduler.on_error()
+
+        elif result == TaskStatus.BUSY:
+            self.logger.info("DevHelm indicates task still in progress - telling Junie to continue")
+            self.consecutive_continue_count += 1
+            self.logger.debug(f"Continue count: {self.consecutive_continue_count}/{self.max_consecutive_continues}")
+
+            if self.consecutive_continue_count > self.max_consecutive_continues:
+                self.logger.warning(f"Maximum consecutive continue limit ({self.max_consecutive_continues}) reached. Terminating agent to avoid quota waste.")
+                self.exit_code = 0
+                self.stop()
+                return
+
+            if self.journal is not None and self.current_task is not None:
+                await self._in_executor(self.journal.record_continue, self.current_task.id)
+            await self._in_executor(self.ui.continuePrompt)
+            self.logger.info("Successfully entered 'continue' prompt")
+            self._prompt_sent()
+
+        elif result == TaskStatus.NONE:
+            self.logger.debug("DevHelm has no tasks available - doing nothing")
+            self.scheduler.on_idle()
+
+    def _prompt_sent(self) -> None:
+        # Junie is working now: stop fetching and look at the screen again soon
+        self._ready.clear()
+        self.scheduler.on_prompt_sent()
+        self._wake.set()
+
+    async def _sleep(self, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _in_executor(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
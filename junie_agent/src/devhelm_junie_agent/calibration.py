@@ -0,0 +1,332 @@
+"""
+Calibration module for matching templates at the display's scale.
+
+The bundled templates were captured at one display scale. On a HiDPI display
+or with a different IDE zoom, the UI elements are larger or smaller, and a
+template only matches once it is resized by the same factor. ScaleCalibration
+finds that factor once: when a template is missing from a frame, it sweeps
+a range of scales, keeps the best match above the confidence, and stores the
+scale in a small JSON profile on disk. From then on detection matches each
+template at that single scale.
+
+Profiles are keyed by display and resolution. Each one records a hash of
+every template it was calibrated with, so a different monitor, resolution
+or template image triggers a new calibration. A calibrated template that has
+not been seen for a long time is swept again, in case the IDE zoom changed.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .detection import Box, PyramidMatcher
+from .template_cache import scale_template
+
+# Bump when the profile layout changes so old profiles are ignored
+PROFILE_VERSION = 1
+
+# Scales swept by a calibration (a finer sweep follows around the best one)
+CALIBRATION_SCALES: Tuple[float, ...] = tuple(round(0.5 + 0.05 * step, 2) for step in range(31))
+
+# Profiles of several fleet workers share one file
+_PROFILE_LOCK = threading.Lock()
+
+
+def default_calibration_path() -> Path:
+    """
+    Return the default location of the calibration profile.
+
+    Uses $XDG_STATE_HOME (or ~/.local/state), next to the task journal.
+    """
+    state_home = os.getenv('XDG_STATE_HOME') or str(Path.home() / ".local" / "state")
+    return Path(state_home) / "devhelm-junie-agent" / "calibration.json"
+
+
+def find_scale(
+    frame: np.ndarray,
+    template: np.ndarray,
+    scales: Iterable[float] = CALIBRATION_SCALES,
+    confidence: float = 0.9,
+    refine_step: float = 0.01,
+    matcher: Optional[PyramidMatcher] = None,
+) -> Optional[Tuple[float, float, Box]]:
+    """
+    Find the scale at which a template best matches a frame.
+
+    Every scale is tried, then the scales between the best one and its
+    neighbours are tried in refine_step increments.
+
+    Args:
+        frame: Grayscale frame as a 2D uint8 array
+        template: Grayscale template at its captured scale
+        scales: Ascending scale factors to sweep
+        confidence: Minimum correlation score for a match (0.0 - 1.0)
+        refine_step: Increment of the finer sweep (0 disables it)
+        matcher: PyramidMatcher to sweep with (defaults to a new one)
+
+    Returns:
+        Optional[tuple]: (scale, score, Box) of the best match, or None if
+            no scale reaches the confidence
+    """
+    matcher = matcher if matcher is not None else PyramidMatcher()
+    scales = sorted(scales)
+
+    def score_at(scale: float) -> Tuple[float, Optional[Box]]:
+        return matcher.best_match(frame, scale_template(template, scale))
+
+    results = {scale: score_at(scale) for scale in scales}
+    best = max(results, key=lambda scale: results[scale][0])
+
+    if refine_step and len(scales) > 1:
+        index = scales.index(best)
+        low = scales[max(0, index - 1)]
+        high = scales[min(len(scales) - 1, index + 1)]
+        steps = int(round((high - low) / refine_step))
+        for step in range(1, steps):
+            scale = round(low + step * refine_step, 4)
+            if scale not in results:
+                results[scale] = score_at(scale)
+        best = max(results, key=lambda scale: results[scale][0])
+
+    score, box = results[best]
+    if box is None or score < confidence:
+        return None
+    return best, score, box
+
+
+def template_digest(template: np.ndarray) -> str:
+    """Return a short hash identifying a template's pixels."""
+    digest = hashlib.sha256(str(template.shape).encode('ascii'))
+    digest.update(np.ascontiguousarray(template).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class ScaleCalibration:
+    """
+    Per-display template scales, calibrated on demand and kept on disk.
+
+    Call select() with the shape of every captured frame, template() to get
+    a template at its calibrated scale, seen() when it was found and, when
+    it was not and due() says so, calibrate().
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        display: str = '',
+        scales: Iterable[float] = CALIBRATION_SCALES,
+        confidence: float = 0.9,
+        retry_interval: float = 60.0,
+        stale_after: float = 600.0,
+        persist: bool = True,
+    ):
+        """
+        Initialize the ScaleCalibration and load the stored profiles.
+
+        Args:
+            path: Profile file (defaults to default_calibration_path())
+            display: Name of the display being calibrated, e.g. ':1'
+            scales: Scale factors swept by a calibration
+            confidence: Minimum correlation score for a calibrated match
+            retry_interval: Seconds between sweeps for the same template
+            stale_after: Seconds a calibrated template may go unseen before
+                it is swept again (0 never sweeps calibrated templates)
+            persist: Whether to read and write the profile file at all
+        """
+        self.path: Optional[Path] = None
+        if persist:
+            self.path = Path(path).expanduser() if path is not None else default_calibration_path()
+        self.display = display or 'default'
+        self.scales = tuple(scales)
+        self.confidence = confidence
+        self.retry_interval = retry_interval
+        self.stale_after = stale_after
+
+        self.key: Optional[str] = None
+        self._profiles: Dict[str, Dict[str, dict]] = self._read()
+        self._scaled: Dict[Tuple[str, float], np.ndarray] = {}
+        self._digests: Dict[str, Tuple[np.ndarray, str]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._last_sweep: Dict[str, float] = {}
+
+    def select(self, frame_shape: Tuple[int, ...]) -> None:
+        """
+        Use the profile of this display at the resolution of a frame.
+
+        Args:
+            frame_shape: Shape of the captured frame
+        """
+        key = f"{self.display}@{frame_shape[1]}x{frame_shape[0]}"
+        if key != self.key:
+            self.key = key
+            self._last_seen.clear()
+            self._last_sweep.clear()
+
+    def scale_for(self, name: str, template: np.ndarray) -> Optional[float]:
+        """
+        Get the calibrated scale of a template on the selected display.
+
+        Args:
+            name: Template file name (e.g. 'start_again.png')
+            template: The template at its captured scale
+
+        Returns:
+            Optional[float]: The scale, or None if it is not calibrated
+        """
+        entry = self._profiles.get(self.key, {}).get(name)
+        if entry is None or entry.get('digest') != self._digest(name, template):
+            return None
+        return entry['scale']
+
+    def template(self, name: str, template: np.ndarray) -> np.ndarray:
+        """
+        Get a template at its calibrated scale (unchanged if not calibrated).
+
+        Args:
+            name: Template file name
+            template: The template at its captured scale
+
+        Returns:
+            np.ndarray: The scaled template
+        """
+        scale = self.scale_for(name, template)
+        if scale is None or scale == 1.0:
+            return template
+        scaled = self._scaled.get((name, scale))
+        if scaled is None:
+            scaled = self._scaled[(name, scale)] = scale_template(template, scale)
+        return scaled
+
+    def seen(self, name: str, template: np.ndarray, now: Optional[float] = None) -> None:
+        """
+        Record that a template was found at its current scale.
+
+        A template found before it was ever calibrated is recorded at its
+        captured scale, so it is never swept unless it goes stale.
+
+        Args:
+            name: Template file name
+            template: The template at its captured scale
+            now: time.monotonic() timestamp (defaults to now)
+        """
+        self._last_seen[name] = now if now is not None else time.monotonic()
+        if self.scale_for(name, template) is None:
+            self._record(name, template, 1.0, None)
+
+    def due(self, name: str, template: np.ndarray, now: Optional[float] = None) -> bool:
+        """
+        Check whether a missing template should be swept now.
+
+        Args:
+            name: Template file name
+            template: The template at its captured scale
+            now: time.monotonic() timestamp (defaults to now)
+
+        Returns:
+            bool: True if the template is uncalibrated or stale and was not
+                swept within retry_interval
+        """
+        now = now if now is not None else time.monotonic()
+        last_sweep = self._last_sweep.get(name)
+        if last_sweep is not None and now - last_sweep < self.retry_interval:
+            return False
+        if self.scale_for(name, template) is None:
+            return True
+        if not self.stale_after:
+            return False
+        # A freshly selected profile counts as seen
+        last_seen = self._last_seen.setdefault(name, now)
+        return now - last_seen >= self.stale_after
+
+    def calibrate(self, frame: np.ndarray, name: str, template: np.ndarray, now: Optional[float] = None) -> Optional[Box]:
+        """
+        Sweep the scales for a template and store the best one.
+
+        The stored scale is kept if no scale matches, since the template may
+        simply not be on screen.
+
+        Args:
+            frame: Grayscale frame as a 2D uint8 array
+            name: Template file name
+            template: The template at its captured scale
+            now: time.monotonic() timestamp (defaults to now)
+
+        Returns:
+            Optional[Box]: Where the template was found, or None
+        """
+        if self.key is None:
+            self.select(frame.shape)
+        now = now if now is not None else time.monotonic()
+        self._last_sweep[name] = now
+
+        # A new matcher per sweep: nothing computed from an earlier frame is reused,
+        # since the capture buffer may be the same array with new contents
+        found = find_scale(frame, template, self.scales, self.confidence, matcher=PyramidMatcher())
+        if found is None:
+            return None
+        scale, score, box = found
+        self._last_seen[name] = now
+        self._record(name, template, scale, score)
+        return box
+
+    def profile(self) -> Dict[str, float]:
+        """Return the calibrated scale of every template on the selected display."""
+        return {name: entry['scale'] for name, entry in self._profiles.get(self.key, {}).items()}
+
+    def _digest(self, name: str, template: np.ndarray) -> str:
+        # The template cache hands out the same array every time, so it is hashed once
+        cached = self._digests.get(name)
+        if cached is None or cached[0] is not template:
+            cached = self._digests[name] = (template, template_digest(template))
+        return cached[1]
+
+    def _record(self, name: str, template: np.ndarray, scale: float, score: Optional[float]) -> None:
+        entry = {
+            'scale': scale,
+            'score': round(score, 4) if score is not None else None,
+            'digest': self._digest(name, template),
+            'calibrated_at': time.time(),
+        }
+        self._profiles.setdefault(self.key, {})[name] = entry
+        self._write(name, entry)
+
+    def _read(self) -> Dict[str, Dict[str, dict]]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            document = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(document, dict) or document.get('version') != PROFILE_VERSION:
+            return {}
+        return document.get('displays', {})
+
+    def _write(self, name: str, entry: dict) -> None:
+        if self.path is None:
+            return
+
+        tmp_path = None
+        with _PROFILE_LOCK:
+            try:
+                # Merge into what is on disk; other workers may have calibrated other displays
+                displays = self._read()
+                displays.setdefault(self.key, {})[name] = entry
+                document = {'version': PROFILE_VERSION, 'displays': displays}
+
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Write to a temporary file first so a crash never leaves a torn profile
+                fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".json.tmp")
+                with os.fdopen(fd, 'w') as tmp_file:
+                    json.dump(document, tmp_file, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # Persistence is an optimisation only; the in-memory profile still works
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
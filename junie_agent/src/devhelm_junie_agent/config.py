@@ -9,7 +9,71 @@ class Config:
     Encapsulates all configuration data including API access and logging settings.
     """
     
-    def __init__(self, api_url: str, api_key: str, log_format: str, log_file: str, max_consecutive_continues: int):
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        log_format: str,
+        log_file: str,
+        max_consecutive_continues: int,
+        text_input_mode: str = 'auto',
+        screen_capture_mode: str = 'auto',
+        screen_backend: str = 'pyautogui',
+        screen_replay_dir: str = '',
+        poll_fast_interval: float = 1.0,
+        poll_min_interval: float = 5.0,
+        poll_max_interval: float = 60.0,
+        poll_backoff: float = 2.0,
+        poll_jitter: float = 0.1,
+        poll_fast_window: float = 30.0,
+        readiness_confirmations: int = 3,
+        readiness_interval: float = 1.0,
+        readiness_window: float = 10.0,
+        detection_cache_size: int = 64,
+        damage_watch: bool = False,
+        damage_window: str = '',
+        http_connect_timeout: float = 5.0,
+        http_read_timeout: float = 30.0,
+        http_retries: int = 3,
+        http_backoff: float = 0.5,
+        http_jitter: float = 0.5,
+        http_max_retry_after: float = 120.0,
+        http_pool_size: int = 2,
+        http_circuit_threshold: int = 5,
+        http_circuit_reset: float = 60.0,
+        task_long_poll: float = 0.0,
+        task_conditional: bool = False,
+        task_push: bool = False,
+        task_prefetch: bool = False,
+        task_prefetch_interval: float = 30.0,
+        task_lease: float = 300.0,
+        task_status_lease: float = 5.0,
+        runtime: str = 'sync',
+        fleet: str = '',
+        fleet_restart_backoff: float = 5.0,
+        fleet_stall_timeout: float = 600.0,
+        frame_bus: bool = False,
+        frame_bus_interval: float = 0.25,
+        frame_bus_slots: int = 4,
+        task_journal: bool = True,
+        task_journal_path: str = '',
+        metrics_port: int = 0,
+        metrics_host: str = '127.0.0.1',
+        trace_file: str = '',
+        profile_mode: str = 'cprofile',
+        profile_iterations: int = 20,
+        profile_dir: str = '',
+        log_queue_size: int = 10000,
+        log_debug_sample: int = 10,
+        log_rotation_mb: float = 100,
+        log_compress: bool = False,
+        log_retention_days: float = 7,
+        match_engine: str = 'full',
+        scale_calibration: bool = True,
+        calibration_path: str = '',
+        calibration_retry: float = 60,
+        calibration_stale: float = 600
+    ):
         """
         Initialize Config with validated configuration values.
         
@@ -19,12 +83,126 @@ class Config:
             log_format: Log format setting ('json' or other)
             log_file: Log file path (empty string means stdout)
             max_consecutive_continues: Maximum number of consecutive continue prompts before terminating
+            text_input_mode: Text entry backend ('auto', 'clipboard', 'xtest' or 'pyautogui')
+            screen_capture_mode: Screen capture backend ('auto', 'xshm' or 'pyautogui')
+            screen_backend: Screen backend ('pyautogui', 'xvfb' or 'replay')
+            screen_replay_dir: Directory of recorded frames for the 'replay' backend
+            poll_fast_interval: Seconds between polls right after a prompt is sent
+            poll_min_interval: Shortest poll interval outside the fast window
+            poll_max_interval: Longest poll interval reached by backing off
+            poll_backoff: Multiplier applied to the poll interval while busy or idle
+            poll_jitter: Random spread of each poll delay as a fraction (0.1 = +/-10%)
+            poll_fast_window: Seconds after a prompt during which the fast interval is used
+            readiness_confirmations: Consecutive captures that must show "Start Again" before a hand-off
+            readiness_interval: Seconds between readiness confirmation captures
+            readiness_window: Maximum seconds allowed for the readiness confirmation
+            detection_cache_size: Detection results kept per frame hash (0 disables the cache)
+            damage_watch: Wake the main loop on X DAMAGE events instead of polling the screen
+            damage_window: Substring of the IDE window title to watch (empty watches the whole screen)
+            http_connect_timeout: Seconds allowed to connect to the DevHelm API
+            http_read_timeout: Seconds allowed between bytes of an API response
+            http_retries: Retries of idempotent API requests after the first attempt
+            http_backoff: Base of the exponential backoff between retries, in seconds
+            http_jitter: Random spread of each retry backoff (0.5 = +/-50%)
+            http_max_retry_after: Longest server Retry-After wait honoured between retries
+            http_pool_size: Keep-alive connections kept to the DevHelm API
+            http_circuit_threshold: Consecutive failed requests that open the circuit breaker (0 disables it)
+            http_circuit_reset: Seconds an open circuit breaker waits before a trial request
+            task_long_poll: Seconds the DevHelm API may hold a task request open (0 disables long polling)
+            task_conditional: Send ETag/If-None-Match conditional task requests
+            task_push: Subscribe to server-sent task events instead of polling for tasks
+            task_prefetch: Fetch the next task in the background while Junie is working
+            task_prefetch_interval: Shortest time between background task requests, in seconds
+            task_lease: Seconds a prefetched task is used before it is re-validated with the server
+            task_status_lease: Seconds a prefetched busy/none status is trusted
+            runtime: Agent loop implementation ('sync' or 'async')
+            fleet: Displays driven by this process as DISPLAY[=API_KEY] entries (empty means a single session)
+            fleet_restart_backoff: Seconds before a failed fleet worker is first restarted
+            fleet_stall_timeout: Seconds without progress before a fleet worker is reported stalled
+            frame_bus: Capture the screen in a separate process and share frames through shared memory
+            frame_bus_interval: Seconds between captures of the frame publisher process
+            frame_bus_slots: Frames kept in the shared memory ring buffer
+            task_journal: Record task progress on disk so a restarted agent resumes and never types a prompt twice
+            task_journal_path: Journal database file (empty means the default location)
+            metrics_port: Port of the Prometheus metrics endpoint (0 disables it)
+            metrics_host: Interface the metrics endpoint listens on
+            trace_file: File receiving JSON timing spans of every loop phase (empty disables tracing)
+            profile_mode: Profiler started by SIGUSR1 ('cprofile' or 'sample')
+            profile_iterations: Loop iterations profiled per SIGUSR1
+            profile_dir: Directory for profiles (empty means the default location)
+            log_queue_size: Log lines held in memory before new lines are dropped
+            log_debug_sample: Keep one in this many DEBUG lines while the log queue is half full
+            log_rotation_mb: Rotate the log file at this size in megabytes (0 disables rotation)
+            log_compress: Gzip rotated log files
+            log_retention_days: Delete rotated log files older than this many days (0 keeps them)
+            match_engine: Template matching engine ('full' or 'pyramid' for coarse-to-fine matching)
+            scale_calibration: Find and remember the scale templates appear at on each display
+            calibration_path: Calibration profile file (empty means the default location)
+            calibration_retry: Seconds between scale sweeps for a missing template
+            calibration_stale: Seconds a calibrated template may go unseen before it is swept again (0 never)
         """
         self.api_url = api_url
         self.api_key = api_key
         self.log_format = log_format
         self.log_file = log_file
         self.max_consecutive_continues = max_consecutive_continues
+        self.text_input_mode = text_input_mode
+        self.screen_capture_mode = screen_capture_mode
+        self.screen_backend = screen_backend
+        self.screen_replay_dir = screen_replay_dir
+        self.poll_fast_interval = poll_fast_interval
+        self.poll_min_interval = poll_min_interval
+        self.poll_max_interval = poll_max_interval
+        self.poll_backoff = poll_backoff
+        self.poll_jitter = poll_jitter
+        self.poll_fast_window = poll_fast_window
+        self.readiness_confirmations = readiness_confirmations
+        self.readiness_interval = readiness_interval
+        self.readiness_window = readiness_window
+        self.detection_cache_size = detection_cache_size
+        self.damage_watch = damage_watch
+        self.damage_window = damage_window
+        self.http_connect_timeout = http_connect_timeout
+        self.http_read_timeout = http_read_timeout
+        self.http_retries = http_retries
+        self.http_backoff = http_backoff
+        self.http_jitter = http_jitter
+        self.http_max_retry_after = http_max_retry_after
+        self.http_pool_size = http_pool_size
+        self.http_circuit_threshold = http_circuit_threshold
+        self.http_circuit_reset = http_circuit_reset
+        self.task_long_poll = task_long_poll
+        self.task_conditional = task_conditional
+        self.task_push = task_push
+        self.task_prefetch = task_prefetch
+        self.task_prefetch_interval = task_prefetch_interval
+        self.task_lease = task_lease
+        self.task_status_lease = task_status_lease
+        self.runtime = runtime
+        self.fleet = fleet
+        self.fleet_restart_backoff = fleet_restart_backoff
+        self.fleet_stall_timeout = fleet_stall_timeout
+        self.frame_bus = frame_bus
+        self.frame_bus_interval = frame_bus_interval
+        self.frame_bus_slots = frame_bus_slots
+        self.task_journal = task_journal
+        self.task_journal_path = task_journal_path
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        self.trace_file = trace_file
+        self.profile_mode = profile_mode
+        self.profile_iterations = profile_iterations
+        self.profile_dir = profile_dir
+        self.log_queue_size = log_queue_size
+        self.log_debug_sample = log_debug_sample
+        self.log_rotation_mb = log_rotation_mb
+        self.log_compress = log_compress
+        self.log_retention_days = log_retention_days
+        self.match_engine = match_engine
+        self.scale_calibration = scale_calibration
+        self.calibration_path = calibration_path
+        self.calibration_retry = calibration_retry
+        self.calibration_stale = calibration_stale
 
 
 def get_config() -> Config:
@@ -43,10 +221,103 @@ def get_config() -> Config:
     # Fetch logging environment variables
     log_format = os.getenv('LOG_FORMAT', '')
     log_file = os.getenv('LOG_FILE', '')
+    log_queue_size = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    log_debug_sample = int(os.getenv('LOG_DEBUG_SAMPLE', '10'))
+    log_rotation_mb = float(os.getenv('LOG_ROTATION_MB', '100'))
+    log_compress = os.getenv('LOG_COMPRESS', 'false').lower() in ('1', 'true', 'yes', 'on')
+    log_retention_days = float(os.getenv('LOG_RETENTION_DAYS', '7'))
     
     # Fetch continue limit configuration with default of 5
     max_consecutive_continues = int(os.getenv('MAX_CONSECUTIVE_CONTINUES', '5'))
     
+    # Fetch text entry backend configuration (clipboard paste, then XTest, then typing)
+    text_input_mode = os.getenv('TEXT_INPUT_MODE', 'auto')
+    
+    # Fetch screen capture backend configuration (X11 shared memory when available)
+    screen_capture_mode = os.getenv('SCREEN_CAPTURE_MODE', 'auto')
+    
+    # Fetch screen backend configuration (live desktop, Xvfb display or recorded frames)
+    screen_backend = os.getenv('SCREEN_BACKEND', 'pyautogui')
+    screen_replay_dir = os.getenv('SCREEN_REPLAY_DIR', '')
+    
+    # Fetch adaptive polling configuration (seconds)
+    poll_fast_interval = float(os.getenv('POLL_FAST_INTERVAL', '1'))
+    poll_min_interval = float(os.getenv('POLL_MIN_INTERVAL', '5'))
+    poll_max_interval = float(os.getenv('POLL_MAX_INTERVAL', '60'))
+    poll_backoff = float(os.getenv('POLL_BACKOFF', '2'))
+    poll_jitter = float(os.getenv('POLL_JITTER', '0.1'))
+    poll_fast_window = float(os.getenv('POLL_FAST_WINDOW', '30'))
+    
+    # Fetch readiness confirmation configuration (replaces the fixed 60s race-avoidance sleep)
+    readiness_confirmations = int(os.getenv('READINESS_CONFIRMATIONS', '3'))
+    readiness_interval = float(os.getenv('READINESS_INTERVAL', '1'))
+    readiness_window = float(os.getenv('READINESS_WINDOW', '10'))
+    
+    # Fetch detection cache configuration (unchanged frames skip template matching)
+    detection_cache_size = int(os.getenv('DETECTION_CACHE_SIZE', '64'))
+    
+    # Fetch template matching engine configuration (full-resolution or coarse-to-fine)
+    match_engine = os.getenv('MATCH_ENGINE', 'full').lower()
+    
+    # Fetch template scale calibration configuration (HiDPI displays and IDE zoom)
+    scale_calibration = os.getenv('SCALE_CALIBRATION', 'true').lower() in ('1', 'true', 'yes', 'on')
+    calibration_path = os.getenv('CALIBRATION_PATH', '')
+    calibration_retry = float(os.getenv('CALIBRATION_RETRY', '60'))
+    calibration_stale = float(os.getenv('CALIBRATION_STALE', '600'))
+    
+    # Fetch X DAMAGE watcher configuration (event-driven wake-up, off by default)
+    damage_watch = os.getenv('DAMAGE_WATCH', 'false').lower() in ('1', 'true', 'yes', 'on')
+    damage_window = os.getenv('DAMAGE_WINDOW', '')
+    
+    # Fetch HTTP client configuration (timeouts, retries, pool size, circuit breaker)
+    http_connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+    http_read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+    http_retries = int(os.getenv('HTTP_RETRIES', '3'))
+    http_backoff = float(os.getenv('HTTP_BACKOFF', '0.5'))
+    http_jitter = float(os.getenv('HTTP_JITTER', '0.5'))
+    http_max_retry_after = float(os.getenv('HTTP_MAX_RETRY_AFTER', '120'))
+    http_pool_size = int(os.getenv('HTTP_POOL_SIZE', '2'))
+    http_circuit_threshold = int(os.getenv('HTTP_CIRCUIT_THRESHOLD', '5'))
+    http_circuit_reset = float(os.getenv('HTTP_CIRCUIT_RESET', '60'))
+    
+    # Fetch task fetching capabilities (fall back to plain polling if the server lacks them)
+    task_long_poll = float(os.getenv('TASK_LONG_POLL', '0'))
+    task_conditional = os.getenv('TASK_CONDITIONAL', 'false').lower() in ('1', 'true', 'yes', 'on')
+    task_push = os.getenv('TASK_PUSH', 'false').lower() in ('1', 'true', 'yes', 'on')
+    
+    # Fetch task prefetching configuration (next task fetched while Junie works)
+    task_prefetch = os.getenv('TASK_PREFETCH', 'false').lower() in ('1', 'true', 'yes', 'on')
+    task_prefetch_interval = float(os.getenv('TASK_PREFETCH_INTERVAL', '30'))
+    task_lease = float(os.getenv('TASK_LEASE', '300'))
+    task_status_lease = float(os.getenv('TASK_STATUS_LEASE', '5'))
+    
+    # Fetch agent runtime configuration (sync loop or asyncio tasks)
+    runtime = os.getenv('RUNTIME', 'sync').lower()
+    
+    # Fetch fleet configuration (several displays driven by one process)
+    fleet = os.getenv('FLEET', '')
+    fleet_restart_backoff = float(os.getenv('FLEET_RESTART_BACKOFF', '5'))
+    fleet_stall_timeout = float(os.getenv('FLEET_STALL_TIMEOUT', '600'))
+    
+    # Fetch frame bus configuration (one capture process shared through shared memory)
+    frame_bus = os.getenv('FRAME_BUS', 'false').lower() in ('1', 'true', 'yes', 'on')
+    frame_bus_interval = float(os.getenv('FRAME_BUS_INTERVAL', '0.25'))
+    frame_bus_slots = int(os.getenv('FRAME_BUS_SLOTS', '4'))
+    
+    # Fetch task journal configuration (progress kept across restarts)
+    task_journal = os.getenv('TASK_JOURNAL', 'true').lower() in ('1', 'true', 'yes', 'on')
+    task_journal_path = os.getenv('TASK_JOURNAL_PATH', '')
+    
+    # Fetch metrics endpoint configuration (disabled unless a port is set)
+    metrics_port = int(os.getenv('METRICS_PORT', '0'))
+    metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+    
+    # Fetch tracing and on-demand profiling configuration
+    trace_file = os.getenv('TRACE_FILE', '')
+    profile_mode = os.getenv('PROFILE_MODE', 'cprofile').lower()
+    profile_iterations = int(os.getenv('PROFILE_ITERATIONS', '20'))
+    profile_dir = os.getenv('PROFILE_DIR', '')
+    
     if not api_url:
         # Note: We can't use logger here yet since it needs the logging configuration
         sys.stderr.write("Error: BASE_URL environment variable is not set\n")
@@ -57,4 +328,67 @@ def get_config() -> Config:
         sys.stderr.write("Error: API_KEY environment variable is not set\n")
         sys.exit(1)
     
-    return Config(api_url, api_key, log_format, log_file, max_consecutive_continues)
\ No newline at end of file
+    return Config(
+        api_url,
+        api_key,
+        log_format,
+        log_file,
+        max_consecutive_continues,
+        text_input_mode=text_input_mode,
+        screen_capture_mode=screen_capture_mode,
+        screen_backend=screen_backend,
+        screen_replay_dir=screen_replay_dir,
+        poll_fast_interval=poll_fast_interval,
+        poll_min_interval=poll_min_interval,
+        poll_max_interval=poll_max_interval,
+        poll_backoff=poll_backoff,
+        poll_jitter=poll_jitter,
+        poll_fast_window=poll_fast_window,
+        readiness_confirmations=readiness_confirmations,
+        readiness_interval=readiness_interval,
+        readiness_window=readiness_window,
+        detection_cache_size=detection_cache_size,
+        damage_watch=damage_watch,
+        damage_window=damage_window,
+        http_connect_timeout=http_connect_timeout,
+        http_read_timeout=http_read_timeout,
+        http_retries=http_retries,
+        http_backoff=http_backoff,
+        http_jitter=http_jitter,
+        http_max_retry_after=http_max_retry_after,
+        http_pool_size=http_pool_size,
+        http_circuit_threshold=http_circuit_threshold,
+        http_circuit_reset=http_circuit_reset,
+        task_long_poll=task_long_poll,
+        task_conditional=task_conditional,
+        task_push=task_push,
+        task_prefetch=task_prefetch,
+        task_prefetch_interval=task_prefetch_interval,
+        task_lease=task_lease,
+        task_status_lease=task_status_lease,
+        runtime=runtime,
+        fleet=fleet,
+        fleet_restart_backoff=fleet_restart_backoff,
+        fleet_stall_timeout=fleet_stall_timeout,
+        frame_bus=frame_bus,
+        frame_bus_interval=frame_bus_interval,
+        frame_bus_slots=frame_bus_slots,
+        task_journal=task_journal,
+        task_journal_path=task_journal_path,
+        metrics_port=metrics_port,
+        metrics_host=metrics_host,
+        trace_file=trace_file,
+        profile_mode=profile_mode,
+        profile_iterations=profile_iterations,
+        profile_dir=profile_dir,
+        log_queue_size=log_queue_size,
+        log_debug_sample=log_debug_sample,
+        log_rotation_mb=log_rotation_mb,
+        log_compress=log_compress,
+        log_retention_days=log_retention_days,
+        match_engine=match_engine,
+        scale_calibration=scale_calibration,
+        calibration_path=calibration_path,
+        calibration_retry=calibration_retry,
+        calibration_stale=calibration_stale,
+    )
\ No newline at end of file
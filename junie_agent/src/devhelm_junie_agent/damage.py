@@ -0,0 +1,261 @@
+"""
+Damage module for waking the agent loop when the screen actually changes.
+
+This module provides the DamageWatcher class. It subscribes to X DAMAGE
+events for the IDE window (or the whole screen) on a background thread and
+flags a change only when the damaged area overlaps a watched region - the
+padded last known locations of the registered templates. While any template
+is missing from the last detection, damage anywhere counts. main() sleeps on
+the watcher's event instead of a plain timer and skips template detection
+while nothing in the watched regions has changed, so readiness is noticed
+almost immediately and an idle agent uses next to no CPU. A full detection
+still runs at least every poll_max_interval, in case the window moved.
+"""
+
+import select
+import threading
+from typing import Callable, List, Optional
+
+from .detection import Box
+
+
+class DamageWatcherException(Exception):
+    """Exception raised when X DAMAGE events cannot be watched."""
+    pass
+
+
+def overlaps(first: Box, second: Box) -> bool:
+    """
+    Check whether two boxes intersect.
+
+    Args:
+        first: First box
+        second: Second box
+
+    Returns:
+        bool: True if the boxes share at least one pixel
+    """
+    return (
+        first.left < second.left + second.width
+        and second.left < first.left + first.width
+        and first.top < second.top + second.height
+        and second.top < first.top + first.height
+    )
+
+
+class DamageWatcher:
+    """
+    Watches X DAMAGE events and flags changes in the watched regions.
+
+    Watched regions default to the last known template locations kept by
+    the UIInteraction region tracker, grown by padding. While any template
+    has not been located yet the whole window is watched.
+    """
+
+    def __init__(
+        self,
+        ui=None,
+        display_name: Optional[str] = None,
+        window_name: Optional[str] = None,
+        padding: int = 16,
+        regions: Optional[Callable[[], Optional[List[Box]]]] = None,
+    ):
+        """
+        Initialize the DamageWatcher.
+
+        Args:
+            ui: UIInteraction whose region tracker supplies the watched regions
+            display_name: X display to watch (defaults to $DISPLAY)
+            window_name: Substring of the IDE window title; the root window
+                is watched when empty or when no window matches
+            padding: Pixels added around every watched template location
+            regions: Callable returning watched boxes in screen coordinates,
+                or None to watch everything; overrides the ui regions
+        """
+        self.ui = ui
+        self.display_name = display_name
+        self.window_name = window_name
+        self.padding = padding
+        self._regions = regions
+
+        # Set whenever relevant damage arrives; main() sleeps on it
+        self.changed = threading.Event()
+        self.changed.set()  # Nothing is known yet, so detect on the first pass
+
+        self.damage_events = 0
+        self.relevant_events = 0
+        # Set when the X connection is lost; every pass then counts as changed
+        self._failed = False
+
+        self._display = None
+        self._window = None
+        self._damage = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> 'DamageWatcher':
+        """
+        Connect to the X server and start watching in a background thread.
+
+        Returns:
+            DamageWatcher: self
+
+        Raises:
+            DamageWatcherException: If python-xlib is missing, the display
+                cannot be opened or the server lacks the DAMAGE extension
+        """
+        try:
+            from Xlib import display as xdisplay
+            from Xlib.ext import damage
+        except ImportError as e:
+            raise DamageWatcherException("python-xlib is required to watch X DAMAGE events") from e
+
+        try:
+            self._display = xdisplay.Display(self.display_name)
+        except Exception as e:
+            raise DamageWatcherException(f"Cannot open display {self.display_name!r}: {e}") from e
+
+        if not self._display.has_extension(damage.extname):
+            self._display.close()
+            self._display = None
+            raise DamageWatcherException("X server does not support the DAMAGE extension")
+
+        self._display.damage_query_version()
+        root = self._display.screen().root
+        self._window = (self._find_window(root, self.window_name) if self.window_name else None) or root
+        self._damage = self._window.damage_create(damage.DamageReportRawRectangles)
+        self._display.flush()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="damage-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the background thread and close the X connection."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._display is not None:
+            try:
+                self._display.damage_destroy(self._damage)
+                self._display.close()
+            except Exception:
+                pass
+            self._display = None
+
+    def consume(self) -> bool:
+        """
+        Check for relevant damage since the previous call and reset the flag.
+
+        Once the watcher has failed this is always True, so the caller
+        detects on every pass (and sleeps on its timer, since the flag is
+        still cleared).
+
+        Returns:
+            bool: True if a watched region changed or the watcher failed
+        """
+        was_set = self.changed.is_set()
+        self.changed.clear()
+        return was_set or self._failed
+
+    def watched_regions(self) -> Optional[List[Box]]:
+        """
+        Get the regions whose damage triggers a detection pass.
+
+        Returns:
+            Optional[List[Box]]: Boxes in screen coordinates, or None to
+                treat any damage as relevant
+        """
+        if self._regions is not None:
+            return self._regions()
+        if self.ui is None:
+            return None
+
+        # Until every template is on screen it may appear anywhere, so watch the whole window
+        detection = self.ui.last_detection
+        if detection is None or not all(detection.found(name) for name in self.ui.templates):
+            return None
+        locations = dict(self.ui.region_tracker.last_locations)
+        if any(name not in locations for name in self.ui.templates):
+            return None
+
+        return [
+            Box(box.left - self.padding, box.top - self.padding,
+                box.width + 2 * self.padding, box.height + 2 * self.padding)
+            for box in locations.values()
+        ]
+
+    def handle_damage(self, area: Box) -> bool:
+        """
+        Record a damaged area and flag a change if it is relevant.
+
+        Args:
+            area: Damaged area in screen coordinates
+
+        Returns:
+            bool: True if the area overlaps a watched region
+        """
+        self.damage_events += 1
+        regions = self.watched_regions()
+        if regions is not None and not any(overlaps(area, region) for region in regions):
+            return False
+
+        self.relevant_events += 1
+        self.changed.set()
+        return True
+
+    def _run(self) -> None:
+        notify = self._display.extension_event.DamageNotify
+        fileno = self._display.fileno()
+        while not self._stop.is_set():
+            readable, _, _ = select.select([fileno], [], [], 0.5)
+            if not readable and not self._display.pending_events():
+                continue
+
+            try:
+                offset = self._window_offset()
+                while self._display.pending_events():
+                    event = self._display.next_event()
+                    if event.type != notify:
+                        continue
+                    area = event.area
+                    self.handle_damage(Box(area.x + offset[0], area.y + offset[1], area.width, area.height))
+                # Acknowledge the damage so the server reports the next change
+                self._display.damage_subtract(self._damage)
+                self._display.flush()
+            except Exception:
+                if self._stop.is_set():
+                    break
+                # Losing the connection must not stall the agent: fall back
+                # to timer polling by flagging every pass as changed
+                self._failed = True
+                self.changed.set()
+                break
+
+    def _window_offset(self):
+        if self._window == self._display.screen().root:
+            return 0, 0
+        coords = self._window.translate_coords(self._display.screen().root, 0, 0)
+        return -coords.x, -coords.y
+
+    def _find_window(self, window, name: str):
+        try:
+            title = window.get_wm_name()
+        except Exception:
+            title = None
+        if isinstance(title, bytes):
+            title = title.decode('utf-8', 'replace')
+        if title and name in title:
+            return window
+
+        try:
+            children = window.query_tree().children
+        except Exception:
+            return None
+        for child in children:
+            found = self._find_window(child, name)
+            if found is not None:
+                return found
+        return None
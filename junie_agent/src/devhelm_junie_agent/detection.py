@@ -0,0 +1,550 @@
+"""
+Detection module for locating UI templates in a captured screen frame.
+
+This module provides the data types and matching routine used by
+UIInteraction. A single grayscale frame is captured once per detection pass
+and every registered template is matched against it, so checking for several
+UI elements costs one screen capture instead of one per element.
+
+RegionTracker remembers where each template was last found so the next pass
+can search a small padded region around it before falling back to the full
+frame.
+
+DetectionCache skips matching altogether when the screen has not changed:
+frames are reduced to a cheap block hash and recent hashes are mapped to the
+detection result they produced.
+
+PyramidMatcher is an opt-in matching engine for large screens: it searches a
+half-resolution copy of the frame first and only runs the full-resolution
+correlation in small windows around the best coarse candidates.
+"""
+
+import dataclasses
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .metrics import MATCH_SECONDS
+
+
+class Box(NamedTuple):
+    """
+    Location of a matched template on screen.
+
+    Mirrors the Box tuple returned by pyautogui.locateOnScreen().
+
+    Attributes:
+        left: X coordinate of the left edge
+        top: Y coordinate of the top edge
+        width: Width of the matched region
+        height: Height of the matched region
+    """
+    left: int
+    top: int
+    width: int
+    height: int
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """Return the (x, y) centre of the box."""
+        return self.left + self.width // 2, self.top + self.height // 2
+
+
+@dataclass
+class DetectionResult:
+    """
+    Result of matching every registered template against one captured frame.
+
+    Attributes:
+        locations: Mapping of template name to its Box, or None if not found
+        captured_at: time.monotonic() timestamp of the frame capture
+    """
+    locations: Dict[str, Optional[Box]] = field(default_factory=dict)
+    captured_at: float = field(default_factory=time.monotonic)
+
+    def found(self, name: str) -> bool:
+        """
+        Check whether a template was found in the frame.
+
+        Args:
+            name: Template name (e.g. 'start_again')
+
+        Returns:
+            bool: True if the template was found, False otherwise
+        """
+        return self.locations.get(name) is not None
+
+    def location(self, name: str) -> Optional[Box]:
+        """
+        Get the location of a template in the frame.
+
+        Args:
+            name: Template name (e.g. 'type_your')
+
+        Returns:
+            Optional[Box]: The matched location, or None if not found
+        """
+        return self.locations.get(name)
+
+    @property
+    def is_ready_for_prompt(self) -> bool:
+        """True if the "Start Again" button was found in the frame."""
+        return self.found('start_again')
+
+
+@dataclass
+class RegionStats:
+    """
+    Hit/miss counters for region-of-interest searches of one template.
+
+    Attributes:
+        roi_hits: Searches answered from the padded region alone
+        roi_misses: Region searches that missed and fell back to the full frame
+        full_searches: Full-frame searches (misses plus searches with no region)
+    """
+    roi_hits: int = 0
+    roi_misses: int = 0
+    full_searches: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of region searches that found the template (0.0 - 1.0)."""
+        attempts = self.roi_hits + self.roi_misses
+        return self.roi_hits / attempts if attempts else 0.0
+
+
+class RegionTracker:
+    """
+    Remembers where each template was last found.
+
+    The last location is kept even when a template disappears (for example
+    while Junie is working and "Start Again" is hidden), so it is searched
+    first again as soon as the element comes back.
+    """
+
+    def __init__(self, padding: int = 64):
+        """
+        Initialize the RegionTracker.
+
+        Args:
+            padding: Pixels added on every side of the last known location
+        """
+        self.padding = padding
+        self.last_locations: Dict[str, Box] = {}
+        self.stats: Dict[str, RegionStats] = {}
+
+    def region_for(self, name: str, frame_shape: Tuple[int, ...]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get the padded search region for a template.
+
+        Args:
+            name: Template name
+            frame_shape: Shape of the frame being searched
+
+        Returns:
+            Optional[tuple]: (left, top, right, bottom) clipped to the frame,
+                or None if the template has not been found yet
+        """
+        box = self.last_locations.get(name)
+        if box is None:
+            return None
+
+        frame_height, frame_width = frame_shape[:2]
+        left = max(0, box.left - self.padding)
+        top = max(0, box.top - self.padding)
+        right = min(frame_width, box.left + box.width + self.padding)
+        bottom = min(frame_height, box.top + box.height + self.padding)
+        return left, top, right, bottom
+
+    def record(self, name: str, box: Optional[Box], roi_hit: Optional[bool]) -> None:
+        """
+        Record the outcome of a search.
+
+        Args:
+            name: Template name
+            box: Location found, or None if the template was not found
+            roi_hit: True if found in the region, False if the region missed,
+                None if no region was searched
+        """
+        stats = self.stats.setdefault(name, RegionStats())
+        if roi_hit:
+            stats.roi_hits += 1
+        else:
+            stats.full_searches += 1
+            if roi_hit is False:
+                stats.roi_misses += 1
+
+        if box is not None:
+            self.last_locations[name] = box
+
+    def reset(self) -> None:
+        """Forget all remembered locations (statistics are kept)."""
+        self.last_locations.clear()
+
+
+def match_template(frame: np.ndarray, template: np.ndarray, confidence: float = 0.9) -> Optional[Box]:
+    """
+    Locate a template in a grayscale frame.
+
+    Uses normalised cross-correlation (the same method pyautogui uses when
+    a confidence is given) and returns the best match above the threshold.
+
+    Args:
+        frame: Grayscale frame as a 2D uint8 array
+        template: Grayscale template as a 2D uint8 array
+        confidence: Minimum correlation score for a match (0.0 - 1.0)
+
+    Returns:
+        Optional[Box]: Location of the best match, or None if no match
+    """
+    template_height, template_width = template.shape[:2]
+    frame_height, frame_width = frame.shape[:2]
+    if template_height > frame_height or template_width > frame_width:
+        return None
+
+    scores = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    _, max_score, _, max_location = cv2.minMaxLoc(scores)
+    if max_score < confidence:
+        return None
+
+    left, top = max_location
+    return Box(int(left), int(top), template_width, template_height)
+
+
+# Signature shared by match_template() and PyramidMatcher
+Matcher = Callable[[np.ndarray, np.ndarray, float], Optional[Box]]
+
+# Values accepted by create_matcher()
+MATCH_ENGINES = ('full', 'pyramid')
+
+
+class PyramidMatcher:
+    """
+    Coarse-to-fine template matcher.
+
+    The frame and the template are reduced with cv2.pyrDown() and correlated
+    at the coarse level, which costs a fraction of a full-resolution search.
+    The best `candidates` coarse peaks are then scored at full resolution in
+    small windows around their positions, and the best of those is returned
+    if it reaches the confidence.
+
+    Every returned score is a full-resolution TM_CCOEFF_NORMED score, so
+    any match reported is one match_template() would accept at that
+    location. Results are not guaranteed to be identical, though: if the
+    best full-resolution location is not among the coarse candidates, the
+    matcher misses it (or reports a lower-scoring location). The detection
+    benchmark measures how often this happens on every run
+    ('match.pyramid' agreement).
+
+    pyrDown() reflects the template at its edges where the frame has real
+    neighbours, so the outer coarse pixel of the template is cropped before
+    matching. Templates too small for a coarse level, and small frames such
+    as tracker regions, are matched at full resolution.
+
+    The frame is reduced again on every call. Capture backends may hand out
+    the same buffer with new contents (XShmCapture does), so a reduced frame
+    cannot be reused safely; pyrDown() costs a few milliseconds even at 4K.
+    """
+
+    def __init__(self, levels: int = 1, candidates: int = 4, min_size: int = 8):
+        """
+        Initialize the PyramidMatcher.
+
+        Args:
+            levels: Most pyrDown() reductions applied (each halves both sides)
+            candidates: Coarse peaks refined at full resolution
+            min_size: Smallest coarse template side; fewer levels are used
+                for templates that would get smaller
+        """
+        self.levels = levels
+        self.candidates = candidates
+        self.min_size = min_size
+
+    def __call__(self, frame: np.ndarray, template: np.ndarray, confidence: float = 0.9) -> Optional[Box]:
+        """
+        Locate a template in a grayscale frame.
+
+        Args:
+            frame: Grayscale frame as a 2D uint8 array
+            template: Grayscale template as a 2D uint8 array
+            confidence: Minimum correlation score for a match (0.0 - 1.0)
+
+        Returns:
+            Optional[Box]: Location of the best match, or None if no match
+        """
+        score, box = self.best_match(frame, template)
+        return box if score >= confidence else None
+
+    def best_match(self, frame: np.ndarray, template: np.ndarray) -> Tuple[float, Optional[Box]]:
+        """
+        Find the best-scoring location of a template, whatever its score.
+
+        Args:
+            frame: Grayscale frame as a 2D uint8 array
+            template: Grayscale template as a 2D uint8 array
+
+        Returns:
+            tuple: Full-resolution correlation score (-1.0 if the template
+                does not fit) and the Box it was found at
+        """
+        template_height, template_width = template.shape[:2]
+        frame_height, frame_width = frame.shape[:2]
+        if template_height > frame_height or template_width > frame_width:
+            return -1.0, None
+
+        coarse_template, level = template, 0
+        while level < self.levels:
+            reduced = cv2.pyrDown(coarse_template)
+            if min(reduced.shape[:2]) - 2 < self.min_size:
+                break
+            coarse_template, level = reduced, level + 1
+        coarse_frame = frame
+        for _ in range(level):
+            coarse_frame = cv2.pyrDown(coarse_frame)
+        coarse_template = coarse_template[1:-1, 1:-1]
+        if level == 0 or any(side > limit for side, limit in zip(coarse_template.shape[:2], coarse_frame.shape[:2])):
+            _, score, _, (left, top) = cv2.minMaxLoc(cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED))
+            return score, Box(int(left), int(top), template_width, template_height)
+
+        scores = cv2.matchTemplate(coarse_frame, coarse_template, cv2.TM_CCOEFF_NORMED)
+        coarse_height, coarse_width = coarse_template.shape[:2]
+        factor = 2 ** level
+        padding = factor + 1
+
+        best_score, best_location = -1.0, None
+        for _ in range(self.candidates):
+            _, _, _, (x, y) = cv2.minMaxLoc(scores)
+            # Undo the crop, then search every full-resolution position that
+            # rounds to this coarse one
+            left, top = (x - 1) * factor, (y - 1) * factor
+            window_left, window_top = max(0, left - padding), max(0, top - padding)
+            window_right = min(frame_width - template_width, left + padding)
+            window_bottom = min(frame_height - template_height, top + padding)
+            if window_left <= window_right and window_top <= window_bottom:
+                window = frame[window_top:window_bottom + template_height, window_left:window_right + template_width]
+                _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))
+                if score > best_score:
+                    best_score, best_location = score, (window_left + location[0], window_top + location[1])
+            # Suppress this peak so the next candidate is a different place
+            scores[max(0, y - coarse_height // 2):y + coarse_height // 2 + 1,
+                   max(0, x - coarse_width // 2):x + coarse_width // 2 + 1] = -1.0
+
+        if best_location is None:
+            return best_score, None
+        return best_score, Box(int(best_location[0]), int(best_location[1]), template_width, template_height)
+
+
+def create_matcher(engine: str = 'full') -> Matcher:
+    """
+    Create a template matching engine.
+
+    Args:
+        engine: 'full' (match_template(), a full-resolution search) or
+            'pyramid' (a new PyramidMatcher)
+
+    Returns:
+        Matcher: Callable taking (frame, template, confidence)
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    engine = (engine or 'full').lower()
+    if engine == 'full':
+        return match_template
+    if engine == 'pyramid':
+        return PyramidMatcher()
+    raise ValueError(f"Unknown match engine: {engine}")
+
+
+def detect_templates(
+    frame: np.ndarray,
+    templates: Dict[str, np.ndarray],
+    names: Optional[Iterable[str]] = None,
+    confidence: float = 0.9,
+    captured_at: Optional[float] = None,
+    tracker: Optional[RegionTracker] = None,
+    matcher: Optional[Matcher] = None,
+) -> DetectionResult:
+    """
+    Match several templates against the same frame.
+
+    Args:
+        frame: Grayscale frame as a 2D uint8 array
+        templates: Mapping of template name to grayscale template
+        names: Template names to match (defaults to all templates)
+        confidence: Minimum correlation score for a match (0.0 - 1.0)
+        captured_at: time.monotonic() timestamp of the frame capture
+        tracker: Optional RegionTracker; when given, each template is first
+            searched around its last known location
+        matcher: Engine used for full-frame searches (defaults to match_template)
+
+    Returns:
+        DetectionResult: Locations of every requested template
+    """
+    result = DetectionResult(captured_at=captured_at if captured_at is not None else time.monotonic())
+    for name in (names if names is not None else templates.keys()):
+        started = time.perf_counter()
+        if tracker is None:
+            result.locations[name] = (matcher or match_template)(frame, templates[name], confidence)
+        else:
+            result.locations[name] = match_tracked(frame, name, templates[name], tracker, confidence, matcher)
+        MATCH_SECONDS.labels(name).observe(time.perf_counter() - started)
+    return result
+
+
+def match_tracked(
+    frame: np.ndarray,
+    name: str,
+    template: np.ndarray,
+    tracker: RegionTracker,
+    confidence: float = 0.9,
+    matcher: Optional[Matcher] = None,
+) -> Optional[Box]:
+    """
+    Locate a template, searching its last known region before the full frame.
+
+    Args:
+        frame: Grayscale frame as a 2D uint8 array
+        name: Template name used to look up the last known location
+        template: Grayscale template as a 2D uint8 array
+        tracker: RegionTracker holding last locations and statistics
+        confidence: Minimum correlation score for a match (0.0 - 1.0)
+        matcher: Engine used for the full-frame search (defaults to
+            match_template; regions are always matched at full resolution)
+
+    Returns:
+        Optional[Box]: Location in full-frame coordinates, or None
+    """
+    region = tracker.region_for(name, frame.shape)
+    if region is not None:
+        left, top, right, bottom = region
+        box = match_template(frame[top:bottom, left:right], template, confidence)
+        if box is not None:
+            box = Box(box.left + left, box.top + top, box.width, box.height)
+            tracker.record(name, box, roi_hit=True)
+            return box
+
+    box = (matcher or match_template)(frame, template, confidence)
+    tracker.record(name, box, roi_hit=False if region is not None else None)
+    return box
+
+
+def frame_hash(frame: np.ndarray, block: int = 8, shift: int = 2) -> bytes:
+    """
+    Compute a cheap block hash of a frame.
+
+    The frame is averaged over block x block cells and every cell is
+    quantised by dropping its lowest `shift` bits, so capture noise and
+    single-pixel changes (a blinking cursor) usually hash the same while any
+    real change of a UI element does not.
+
+    Args:
+        frame: Grayscale frame as a 2D uint8 array
+        block: Edge length in pixels of each averaged cell
+        shift: Low bits dropped from every cell average
+
+    Returns:
+        bytes: 16-byte digest identifying the frame
+    """
+    frame_height, frame_width = frame.shape[:2]
+    cells = cv2.resize(
+        frame,
+        (max(1, frame_width // block), max(1, frame_height // block)),
+        interpolation=cv2.INTER_AREA,
+    )
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(frame.shape, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(cells >> shift).tobytes())
+    return digest.digest()
+
+
+@dataclass
+class CacheStats:
+    """
+    Hit/miss counters for the detection cache.
+
+    Attributes:
+        hits: Detection passes answered from the cache
+        misses: Detection passes that had to run template matching
+    """
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache (0.0 - 1.0)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class DetectionCache:
+    """
+    Bounded LRU cache from frame hash to detection result.
+
+    While Junie is working or the screen sits idle most captures are
+    identical, so the previous result can be returned without matching.
+    A maxsize of 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        """
+        Initialize the DetectionCache.
+
+        Args:
+            maxsize: Maximum number of results kept (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, DetectionResult]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, captured_at: Optional[float] = None) -> Optional[DetectionResult]:
+        """
+        Look up the result for a frame.
+
+        Args:
+            key: Cache key (frame hash plus anything else the result depends on)
+            captured_at: Timestamp given to the returned copy
+
+        Returns:
+            Optional[DetectionResult]: A copy of the cached result, or None
+        """
+        result = self._entries.get(key)
+        if result is None:
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return dataclasses.replace(
+            result,
+            locations=dict(result.locations),
+            captured_at=captured_at if captured_at is not None else time.monotonic(),
+        )
+
+    def put(self, key: Hashable, result: DetectionResult) -> None:
+        """
+        Store the result for a frame, evicting the least recently used entry.
+
+        Args:
+            key: Cache key
+            result: Detection result produced for the frame
+        """
+        if self.maxsize <= 0:
+            return
+
+        self._entries[key] = dataclasses.replace(result, locations=dict(result.locations))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached result (statistics are kept)."""
+        self._entries.clear()
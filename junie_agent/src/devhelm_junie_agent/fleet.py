@@ -0,0 +1,479 @@
+"""
+Fleet module for driving several IDE sessions from one agent process.
+
+Hosts that run many Junie instances on separate X displays used to need one
+agent process per display, each with its own interpreter, decoded templates
+and HTTP connection pool. With FLEET set, main() starts a FleetSupervisor
+instead: every display gets a FleetWorker thread with its own UIInteraction,
+scheduler, readiness detector, API key, circuit breaker and task journal,
+while all workers share one HttpClient (a single keep-alive pool) and one
+TemplateCache. Each worker runs the same AgentLoop pass as main(), so the
+journal, push, prefetch and DAMAGE options apply per display.
+
+The supervisor checks the workers' health, restarts a worker whose thread
+died (with exponential backoff) and reports workers that stopped making
+progress. A worker that fails repeatedly in a row gives up so it is rebuilt
+with a fresh screen connection.
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .agent_loop import AgentLoop, PassResult, create_task_source
+from .calibration import ScaleCalibration
+from .damage import DamageWatcher, DamageWatcherException
+from .detection import DetectionCache, create_matcher
+from .http_client import CircuitBreaker, HttpClient
+from .journal import TaskJournal, worker_journal_path
+from .metrics import ERRORS, LOOP_SECONDS
+from .readiness import ReadinessDetector
+from .scheduler import PollScheduler
+from .screen_backend import create_screen_backend
+from .task_requester import TaskRequester
+from .template_cache import TemplateCache
+from .ui_interaction import UIInteraction
+
+
+class FleetException(Exception):
+    """Exception raised for an invalid fleet specification."""
+    pass
+
+
+@dataclass
+class WorkerSpec:
+    """
+    One IDE session driven by the fleet.
+
+    Attributes:
+        name: Name used in logs and health reports
+        display: X display of the session (e.g. ':1')
+        api_key: DevHelm API key of the session
+    """
+    name: str
+    display: str
+    api_key: str
+
+
+@dataclass
+class WorkerHealth:
+    """
+    Health snapshot of a worker.
+
+    Attributes:
+        state: 'starting', 'running', 'failed', 'finished' or 'stopped'
+        alive: Whether the worker thread is running
+        restarts: Times the supervisor restarted the worker
+        seconds_since_heartbeat: Seconds since the worker last finished a loop pass
+        last_error: Message of the error that last stopped the worker
+    """
+    state: str
+    alive: bool
+    restarts: int
+    seconds_since_heartbeat: float
+    last_error: Optional[str]
+
+
+def parse_fleet(value: str, default_api_key: str) -> List[WorkerSpec]:
+    """
+    Parse a fleet specification.
+
+    The specification is a comma-separated list of DISPLAY[=API_KEY]
+    entries, e.g. ":1=key-one,:2=key-two,:3". Entries without a key use
+    default_api_key.
+
+    Args:
+        value: The fleet specification (FLEET)
+        default_api_key: API key for entries that do not name one
+
+    Returns:
+        list: One WorkerSpec per display
+
+    Raises:
+        FleetException: If an entry is malformed or a display is listed twice
+    """
+    specs: List[WorkerSpec] = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        display, _, api_key = entry.partition('=')
+        display, api_key = display.strip(), api_key.strip() or default_api_key
+        if not display:
+            raise FleetException(f"Fleet entry without a display: {entry!r}")
+        if not api_key:
+            raise FleetException(f"Fleet entry {display} has no API key")
+        if any(spec.display == display for spec in specs):
+            raise FleetException(f"Display {display} is listed twice in the fleet")
+        specs.append(WorkerSpec(name=f"display{display}", display=display, api_key=api_key))
+
+    if not specs:
+        raise FleetException("Fleet specification lists no displays")
+    return specs
+
+
+class FleetWorker:
+    """
+    Runs the agent loop for one display on its own thread.
+    """
+
+    def __init__(
+        self,
+        spec: WorkerSpec,
+        config,
+        http_client: HttpClient,
+        template_cache: TemplateCache,
+        logger,
+        ui_factory: Optional[Callable[[WorkerSpec], UIInteraction]] = None,
+        max_errors: int = 10,
+    ):
+        """
+        Initialize the FleetWorker.
+
+        Args:
+            spec: Display and API key of the session
+            config: Config object with the polling, readiness and API settings
+            http_client: HttpClient shared by all workers (each worker's
+                requests are guarded by a circuit breaker of its own)
+            template_cache: TemplateCache shared by all workers
+            logger: Logger instance
+            ui_factory: Builds the worker's UIInteraction (defaults to a
+                screen backend bound to spec.display), replaceable in tests
+            max_errors: Consecutive failed loop passes before the worker gives
+                up and lets the supervisor rebuild it
+        """
+        self.spec = spec
+        self.name = spec.name
+        self.config = config
+        self.http_client = http_client
+        self.template_cache = template_cache
+        self.logger = logger
+        self.ui_factory = ui_factory or self._create_ui
+        self.max_errors = max_errors
+
+        self.state = 'starting'
+        self.heartbeat = time.monotonic()
+        self.last_error: Optional[str] = None
+        self.agent: Optional[AgentLoop] = None
+
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'FleetWorker':
+        """Start the worker thread."""
+        self.state = 'starting'
+        self.heartbeat = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"fleet-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask the worker to stop and wait for its thread."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        """Whether the worker thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def consecutive_continue_count(self) -> int:
+        """Continue prompts sent for the current task."""
+        return self.agent.consecutive_continue_count if self.agent is not None else 0
+
+    def _create_ui(self, spec: WorkerSpec) -> UIInteraction:
+        # The live-desktop backend follows $DISPLAY, so fleets attach to each display directly
+        mode = self.config.screen_backend if self.config.screen_backend == 'replay' else 'xvfb'
+        return UIInteraction(
+            backend=create_screen_backend(
+                mode,
+                display_name=spec.display,
+                replay_dir=self.config.screen_replay_dir,
+                text_input_mode=self.config.text_input_mode,
+                screen_capture_mode=self.config.screen_capture_mode
+            ),
+            template_cache=self.template_cache,
+            detection_cache=DetectionCache(self.config.detection_cache_size),
+            matcher=create_matcher(self.config.match_engine),
+            calibration=ScaleCalibration(
+                self.config.calibration_path or None,
+                display=spec.display,
+                retry_interval=self.config.calibration_retry,
+                stale_after=self.config.calibration_stale
+            ) if self.config.scale_calibration else None
+        )
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        except Exception as e:
+            self.last_error = str(e)
+            self.state = 'failed'
+            self.logger.error(f"{self.name}: worker failed: {e}")
+
+    def _loop(self) -> None:
+        config = self.config
+        ui = self.ui_factory(self.spec)
+        # One API key failing must not open the breaker of the other displays
+        shared_breaker = self.http_client.breaker
+        requester = TaskRequester(
+            config.api_url,
+            self.spec.api_key,
+            http_client=self.http_client,
+            long_poll=config.task_long_poll,
+            conditional=config.task_conditional,
+            breaker=CircuitBreaker(shared_breaker.failure_threshold, shared_breaker.reset_timeout)
+        )
+        scheduler = PollScheduler(
+            fast_interval=config.poll_fast_interval,
+            min_interval=config.poll_min_interval,
+            max_interval=config.poll_max_interval,
+            backoff=config.poll_backoff,
+            jitter=config.poll_jitter,
+            fast_window=config.poll_fast_window
+        )
+        readiness = ReadinessDetector(
+            ui,
+            confirmations=config.readiness_confirmations,
+            interval=config.readiness_interval,
+            window=config.readiness_window
+        )
+
+        watcher = journal = stream = prefetcher = None
+        try:
+            if config.damage_watch:
+                try:
+                    watcher = DamageWatcher(ui, display_name=self.spec.display,
+                                            window_name=config.damage_window or None).start()
+                    # Sleep on the watcher's event; stop() sets it too
+                    self._wake = watcher.changed
+                except DamageWatcherException as e:
+                    self.logger.warning(f"{self.name}: X DAMAGE watcher unavailable, polling the screen instead: {e}")
+
+            tasks, stream, prefetcher = create_task_source(requester, config, on_event=self._wake.set)
+
+            # Every display works on its own task, so each worker keeps its own journal
+            current_task = None
+            if config.task_journal:
+                try:
+                    journal = TaskJournal(worker_journal_path(self.name, config.task_journal_path or None))
+                    resumed = journal.resume()
+                    if resumed is not None and resumed.submitted:
+                        current_task = resumed.task
+                except (sqlite3.Error, OSError) as e:
+                    self.logger.warning(f"{self.name}: task journal unavailable, continuing without it: {e}")
+
+            self.agent = AgentLoop(
+                ui,
+                tasks,
+                scheduler,
+                readiness,
+                self.logger,
+                max_consecutive_continues=config.max_consecutive_continues,
+                journal=journal,
+                current_task=current_task,
+                watcher=watcher,
+                prefetcher=prefetcher,
+                max_detection_age=config.poll_max_interval,
+                name=self.name
+            )
+            self._drive(scheduler, watcher is None)
+        finally:
+            if watcher is not None:
+                watcher.stop()
+            if prefetcher is not None:
+                prefetcher.close()
+            if stream is not None:
+                stream.stop()
+            if journal is not None:
+                journal.close()
+
+    def _drive(self, scheduler: PollScheduler, clear_wake: bool) -> None:
+        self.state = 'running'
+        self.logger.info(f"{self.name}: driving display {self.spec.display}")
+        errors = 0
+
+        while not self._stopping.is_set():
+            if clear_wake:
+                self._wake.clear()
+            try:
+                with LOOP_SECONDS.time():
+                    outcome = self.agent.poll()
+                if outcome == PassResult.FINISHED:
+                    self.state = 'finished'
+                    return
+                errors = 0
+            except Exception as e:
+                errors += 1
+                ERRORS.labels('loop').inc()
+                self.logger.error(f"{self.name}: unexpected error in worker loop: {e}")
+                if errors >= self.max_errors:
+                    raise
+                scheduler.on_error()
+                outcome = PassResult.SLEEP
+
+            self.heartbeat = time.monotonic()
+            if outcome == PassResult.SLEEP:
+                scheduler.sleep(self._wake)
+
+        self.state = 'stopped'
+
+
+class FleetSupervisor:
+    """
+    Runs a pool of FleetWorkers and restarts the ones that fail.
+    """
+
+    def __init__(
+        self,
+        specs: List[WorkerSpec],
+        config,
+        logger,
+        http_client: Optional[HttpClient] = None,
+        template_cache: Optional[TemplateCache] = None,
+        worker_factory: Optional[Callable[..., FleetWorker]] = None,
+        restart_backoff: float = 5.0,
+        max_restart_backoff: float = 300.0,
+        stall_timeout: float = 600.0,
+        check_interval: float = 5.0,
+    ):
+        """
+        Initialize the FleetSupervisor.
+
+        Args:
+            specs: One WorkerSpec per display
+            config: Config object shared by every worker
+            logger: Logger instance
+            http_client: Shared HttpClient (defaults to one built from config,
+                with a connection per worker); its breaker settings are
+                copied into one circuit breaker per worker
+            template_cache: Shared TemplateCache (defaults to the bundled images)
+            worker_factory: Called like FleetWorker(spec, config, http_client,
+                template_cache, logger), replaceable in tests
+            restart_backoff: Seconds before the first restart of a failed worker
+            max_restart_backoff: Longest wait between restarts of the same worker
+            stall_timeout: Seconds without a heartbeat before a worker is reported stalled
+            check_interval: Seconds between health checks in run()
+        """
+        self.specs = specs
+        self.config = config
+        self.logger = logger
+        self.http_client = http_client if http_client is not None else HttpClient(
+            connect_timeout=config.http_connect_timeout,
+            read_timeout=config.http_read_timeout,
+            retries=config.http_retries,
+            backoff_factor=config.http_backoff,
+            jitter=config.http_jitter,
+            max_retry_after=config.http_max_retry_after,
+            pool_size=max(config.http_pool_size, len(specs)),
+            circuit_threshold=config.http_circuit_threshold,
+            circuit_reset=config.http_circuit_reset
+        )
+        if template_cache is None:
+            template_cache = TemplateCache(Path(__file__).parent / "images")
+            template_cache.load()
+        self.template_cache = template_cache
+        self.worker_factory = worker_factory or FleetWorker
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.stall_timeout = stall_timeout
+        self.check_interval = check_interval
+
+        self.workers: Dict[str, FleetWorker] = {}
+        self.restarts: Dict[str, int] = {}
+        self._restart_at: Dict[str, float] = {}
+        self._stalled: set = set()
+        self._stopping = threading.Event()
+
+    def start(self) -> 'FleetSupervisor':
+        """Start one worker per display."""
+        for spec in self.specs:
+            self.restarts[spec.name] = 0
+            self.workers[spec.name] = self._create_worker(spec).start()
+        self.logger.info(f"Fleet started with {len(self.specs)} workers")
+        return self
+
+    def check(self) -> None:
+        """Run one health check: restart failed workers and report stalled ones."""
+        now = time.monotonic()
+        for spec in self.specs:
+            worker = self.workers[spec.name]
+            if worker.alive:
+                # A stuck thread cannot be killed safely; report it so it can be investigated
+                stalled = now - worker.heartbeat > self.stall_timeout
+                if stalled and spec.name not in self._stalled:
+                    self.logger.warning(f"{spec.name}: no progress for {now - worker.heartbeat:.0f}s")
+                    self._stalled.add(spec.name)
+                elif not stalled and spec.name in self._stalled:
+                    self.logger.info(f"{spec.name}: making progress again")
+                    self._stalled.discard(spec.name)
+                continue
+
+            if worker.state != 'failed' or self._stopping.is_set():
+                continue
+
+            restart_at = self._restart_at.get(spec.name)
+            if restart_at is None:
+                delay = min(self.restart_backoff * (2 ** self.restarts[spec.name]), self.max_restart_backoff)
+                self._restart_at[spec.name] = now + delay
+                self.logger.warning(f"{spec.name}: restarting in {delay:.0f}s")
+            elif now >= restart_at:
+                del self._restart_at[spec.name]
+                self.restarts[spec.name] += 1
+                self.workers[spec.name] = self._create_worker(spec).start()
+
+    def health(self) -> Dict[str, WorkerHealth]:
+        """
+        Report the health of every worker.
+
+        Returns:
+            dict: Worker name -> WorkerHealth
+        """
+        now = time.monotonic()
+        return {
+            name: WorkerHealth(
+                state=worker.state,
+                alive=worker.alive,
+                restarts=self.restarts[name],
+                seconds_since_heartbeat=now - worker.heartbeat,
+                last_error=worker.last_error,
+            )
+            for name, worker in self.workers.items()
+        }
+
+    def run(self) -> int:
+        """
+        Supervise the workers until every one has finished or stop() is called.
+
+        Returns:
+            int: Process exit code
+        """
+        self.start()
+        try:
+            while not self._stopping.wait(self.check_interval):
+                self.check()
+                if all(worker.state == 'finished' for worker in self.workers.values()):
+                    self.logger.info("Every fleet worker has finished")
+                    break
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+        return 0
+
+    def stop(self) -> None:
+        """Stop every worker and release the shared connection pool."""
+        self._stopping.set()
+        self.logger.info("Shutting down fleet...")
+        for worker in self.workers.values():
+            worker.stop()
+        self.http_client.close()
+
+    def _create_worker(self, spec: WorkerSpec) -> FleetWorker:
+        return self.worker_factory(spec, self.config, self.http_client, self.template_cache, self.logger)
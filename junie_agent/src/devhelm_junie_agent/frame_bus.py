@@ -0,0 +1,475 @@
+"""
+Frame bus module for sharing captured frames between processes.
+
+When several detectors or diagnostics look at the same display, each used to
+capture the screen itself. With the frame bus a single FramePublisher
+process captures the display and writes every frame into a ring buffer in
+multiprocessing.shared_memory, tagged with a sequence number. Any number of
+consumer processes attach to the bus by name and read frames as NumPy views
+of the shared segment without copying, so capture cost stays constant as
+consumers are added and matching runs on as many cores as there are
+consumers.
+
+The writer marks a slot as being written before copying a frame into it, and
+only then publishes its sequence number. A reader checks the slot's number
+before using a frame and can call FrameBus.is_current() afterwards to find
+out whether the slot was overwritten meanwhile; with N slots a frame stays
+intact until N - 1 newer frames have been published.
+"""
+
+import functools
+import multiprocessing
+import os
+import time
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .screen_capture import ScreenCapture, create_screen_capture
+
+# Header: magic, version, slots, height, width, latest sequence, publisher pid, reserved
+_MAGIC = 0x44484642  # "DHFB"
+_VERSION = 1
+_HEADER_FIELDS = 8
+_HEADER_SIZE = _HEADER_FIELDS * 8
+_MAGIC_FIELD, _VERSION_FIELD, _SLOTS_FIELD, _HEIGHT_FIELD, _WIDTH_FIELD, _LATEST_FIELD, _PID_FIELD = range(7)
+
+# Slot header: sequence number (-1 while being written) and capture timestamp
+_SLOT_HEADER_SIZE = 16
+_WRITING = -1
+_ALIGN = 64
+
+
+def _slot_size(shape: Tuple[int, int]) -> int:
+    # Slot header plus frame, padded so every slot starts on a cache line
+    size = _SLOT_HEADER_SIZE + shape[0] * shape[1]
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameBusException(Exception):
+    """Exception raised when the frame bus cannot be created or attached."""
+    pass
+
+
+class BusFrame(NamedTuple):
+    """
+    A frame read from the bus.
+
+    Attributes:
+        seq: Sequence number of the frame (starts at 1)
+        image: Read-only 2D uint8 grayscale view into shared memory
+        captured_at: time.monotonic() timestamp of the capture
+    """
+    seq: int
+    image: np.ndarray
+    captured_at: float
+
+
+class FrameBus:
+    """
+    Ring buffer of grayscale frames in shared memory.
+
+    Use FrameBus.create() in the process that publishes frames and
+    FrameBus.attach() in every consumer.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Initialize the FrameBus over a shared memory segment.
+
+        Prefer the create() and attach() class methods.
+
+        Args:
+            shm: Shared memory segment laid out by create()
+            owner: Whether this process created the segment and unlinks it
+        """
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if self._header[_MAGIC_FIELD] != _MAGIC or self._header[_VERSION_FIELD] != _VERSION:
+            raise FrameBusException(f"Shared memory segment {shm.name} is not a frame bus")
+
+        self.slots = int(self._header[_SLOTS_FIELD])
+        self.shape: Tuple[int, int] = (int(self._header[_HEIGHT_FIELD]), int(self._header[_WIDTH_FIELD]))
+        slot_size = _slot_size(self.shape)
+
+        self._seqs = []
+        self._times = []
+        self._images = []
+        for index in range(self.slots):
+            offset = _HEADER_SIZE + index * slot_size
+            self._seqs.append(np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=offset))
+            self._times.append(np.ndarray((1,), dtype=np.float64, buffer=shm.buf, offset=offset + 8))
+            self._images.append(np.ndarray(self.shape, dtype=np.uint8, buffer=shm.buf, offset=offset + _SLOT_HEADER_SIZE))
+
+    @classmethod
+    def create(cls, shape: Tuple[int, int], slots: int = 4, name: Optional[str] = None) -> 'FrameBus':
+        """
+        Create a new bus.
+
+        Args:
+            shape: (height, width) of the frames
+            slots: Frames kept in the ring buffer (at least 2)
+            name: Shared memory name (defaults to a unique name)
+
+        Returns:
+            FrameBus: The bus, owned by the calling process
+
+        Raises:
+            FrameBusException: If the segment cannot be created
+        """
+        if slots < 2:
+            raise ValueError("A frame bus needs at least 2 slots")
+        height, width = shape
+        size = _HEADER_SIZE + slots * _slot_size((height, width))
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except (OSError, ValueError) as e:
+            raise FrameBusException(f"Cannot create frame bus: {e}")
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_SLOTS_FIELD] = slots
+        header[_HEIGHT_FIELD] = height
+        header[_WIDTH_FIELD] = width
+        header[_PID_FIELD] = os.getpid()
+        header[_VERSION_FIELD] = _VERSION
+        header[_MAGIC_FIELD] = _MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'FrameBus':
+        """
+        Attach to an existing bus.
+
+        Args:
+            name: Shared memory name of the bus
+
+        Returns:
+            FrameBus: The bus, read by the calling process
+
+        Raises:
+            FrameBusException: If no bus with that name exists
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except (OSError, ValueError) as e:
+            raise FrameBusException(f"Cannot attach to frame bus {name}: {e}")
+        # Only the creator may unlink the segment; Python registers attachments too
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        """Shared memory name consumers attach to."""
+        return self._shm.name
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the newest frame (0 before the first one)."""
+        return int(self._header[_LATEST_FIELD])
+
+    def publish(self, frame: np.ndarray, captured_at: Optional[float] = None) -> int:
+        """
+        Write a frame into the next slot.
+
+        Args:
+            frame: 2D uint8 grayscale frame of the bus's shape
+            captured_at: time.monotonic() timestamp of the capture
+
+        Returns:
+            int: Sequence number of the frame
+        """
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the bus {self.shape}")
+        seq = self.latest_seq + 1
+        index = seq % self.slots
+
+        self._seqs[index][0] = _WRITING
+        np.copyto(self._images[index], frame)
+        self._times[index][0] = captured_at if captured_at is not None else time.monotonic()
+        self._seqs[index][0] = seq
+        self._header[_LATEST_FIELD] = seq
+        return seq
+
+    def read(self, seq: Optional[int] = None) -> Optional[BusFrame]:
+        """
+        Read a frame without copying it.
+
+        Args:
+            seq: Sequence number to read (defaults to the newest frame)
+
+        Returns:
+            BusFrame or None: The frame, or None if it has not been published
+                yet or was already overwritten
+        """
+        if seq is None:
+            seq = self.latest_seq
+        if seq <= 0:
+            return None
+
+        index = seq % self.slots
+        if self._seqs[index][0] != seq:
+            return None
+        image = self._images[index].view()
+        image.flags.writeable = False
+        captured_at = float(self._times[index][0])
+        if self._seqs[index][0] != seq:
+            return None
+        return BusFrame(seq, image, captured_at)
+
+    def wait(self, after_seq: int = 0, timeout: Optional[float] = None, poll_interval: float = 0.002) -> Optional[BusFrame]:
+        """
+        Wait for a frame newer than after_seq.
+
+        Args:
+            after_seq: Sequence number already seen
+            timeout: Seconds to wait at most (None waits forever)
+            poll_interval: Seconds between checks of the sequence number
+
+        Returns:
+            BusFrame or None: The newest frame, or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.latest_seq > after_seq:
+                frame = self.read()
+                if frame is not None:
+                    return frame
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def publisher_alive(self) -> bool:
+        """
+        Check whether the process that created the bus is still running.
+
+        Returns:
+            bool: False once the publisher has exited (even if its parent
+                has not reaped it yet)
+        """
+        pid = int(self._header[_PID_FIELD])
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        # An exited child keeps its pid as a zombie until it is reaped
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                return stat.read().rsplit(')', 1)[1].split()[0] != 'Z'
+        except (OSError, IndexError):
+            return True
+
+    def is_current(self, seq: int) -> bool:
+        """
+        Check whether a frame read earlier is still intact.
+
+        Args:
+            seq: Sequence number of the frame
+
+        Returns:
+            bool: False once the frame's slot has been reused
+        """
+        return self._seqs[seq % self.slots][0] == seq
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Detach from the bus, and remove it if this process created it.
+
+        Args:
+            unlink: Remove the bus even though another process created it
+        """
+        self._header = None
+        self._seqs, self._times, self._images = [], [], []
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # A consumer still holds a frame view; the mapping goes with it
+        if self.owner or unlink:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class BusCapture(ScreenCapture):
+    """
+    Screen capture that reads the newest frame from a FrameBus.
+
+    Every capture returns a private copy of the frame. The copy is only
+    returned if the slot was not overwritten while it was being made;
+    otherwise the newest frame is read again. Once the publisher has exited,
+    or its newest frame is older than max_age, capture() raises instead of
+    returning the last frame forever.
+    """
+
+    name = "bus"
+
+    def __init__(self, bus: FrameBus, timeout: float = 5.0, retries: int = 3, max_age: Optional[float] = None):
+        """
+        Initialize the BusCapture.
+
+        Args:
+            bus: Attached FrameBus
+            timeout: Seconds to wait for the first frame
+            retries: Reads of a newer frame after a torn read before giving up
+            max_age: Seconds after which the newest frame counts as stale
+                (None never treats frames as stale)
+        """
+        self.bus = bus
+        self.timeout = timeout
+        self.retries = retries
+        self.max_age = max_age
+        self.last_seq = 0
+
+    def check(self) -> None:
+        """
+        Check that the publisher is still delivering frames.
+
+        Raises:
+            FrameBusException: If the publisher has exited or its newest
+                frame is older than max_age
+        """
+        if not self.bus.publisher_alive():
+            raise FrameBusException("Frame publisher is no longer running")
+        if self.max_age is None:
+            return
+        frame = self.bus.read()
+        if frame is not None and time.monotonic() - frame.captured_at > self.max_age:
+            raise FrameBusException(f"Newest frame on the bus is {time.monotonic() - frame.captured_at:.1f}s old")
+
+    def capture(self) -> np.ndarray:
+        self.check()
+        for _ in range(self.retries + 1):
+            frame = self.bus.read()
+            if frame is None:
+                frame = self.bus.wait(self.last_seq, timeout=self.timeout)
+            if frame is None:
+                raise FrameBusException("No frame published on the frame bus")
+            image = frame.image.copy()
+            if self.bus.is_current(frame.seq):
+                self.last_seq = frame.seq
+                return image
+        raise FrameBusException("Frame bus slots were overwritten while reading")
+
+
+def _publish_frames(conn, name: str, capture_factory: Callable[[], ScreenCapture], interval: float, slots: int, stop) -> None:
+    # Body of the publisher process: capture, publish, repeat until stopped
+    try:
+        capture = capture_factory()
+        frame = capture.capture()
+        bus = FrameBus.create(frame.shape, slots=slots, name=name)
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+        return
+
+    try:
+        bus.publish(frame)
+        conn.send(None)
+        while not stop.wait(interval):
+            captured_at = time.monotonic()
+            bus.publish(capture.capture(), captured_at)
+    finally:
+        capture.close()
+        bus.close()
+
+
+class FramePublisher:
+    """
+    Captures a display in a separate process and publishes it on a FrameBus.
+    """
+
+    def __init__(
+        self,
+        capture_mode: str = 'auto',
+        display_name: Optional[str] = None,
+        interval: float = 0.25,
+        slots: int = 4,
+        capture_factory: Optional[Callable[[], ScreenCapture]] = None,
+    ):
+        """
+        Initialize the FramePublisher.
+
+        Args:
+            capture_mode: Mode passed to create_screen_capture()
+            display_name: X display to capture (defaults to $DISPLAY)
+            interval: Seconds between captures
+            slots: Frames kept in the ring buffer
+            capture_factory: Creates the capture backend inside the publisher
+                process (defaults to create_screen_capture()), replaceable in tests
+        """
+        self.interval = interval
+        self.slots = slots
+        # A partial of a module-level function pickles under the spawn and forkserver start methods
+        self.capture_factory = capture_factory or functools.partial(create_screen_capture, capture_mode, display_name)
+        self.name = f"devhelm-frames-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.bus: Optional[FrameBus] = None
+        self._process: Optional[multiprocessing.Process] = None
+        self._stop = multiprocessing.Event()
+
+    def start(self, timeout: float = 10.0) -> 'FramePublisher':
+        """
+        Start the publisher process and attach to its bus.
+
+        Args:
+            timeout: Seconds to wait for the first frame
+
+        Returns:
+            FramePublisher: self
+
+        Raises:
+            FrameBusException: If the publisher cannot capture or create the bus
+        """
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_publish_frames,
+            args=(sender, self.name, self.capture_factory, self.interval, self.slots, self._stop),
+            name="frame-publisher",
+            daemon=True,
+        )
+        try:
+            self._process.start()
+        except Exception as e:
+            # e.g. an unpicklable capture factory under spawn, or no processes left
+            self._process = None
+            receiver.close()
+            raise FrameBusException(f"Frame publisher could not be started: {e}")
+        finally:
+            sender.close()
+
+        if not receiver.poll(timeout):
+            self.stop()
+            raise FrameBusException("Frame publisher did not start in time")
+        error = receiver.recv()
+        receiver.close()
+        if error is not None:
+            self.stop()
+            raise FrameBusException(f"Frame publisher failed: {error}")
+
+        try:
+            self.bus = FrameBus.attach(self.name)
+        except FrameBusException:
+            self.stop()
+            raise
+        return self
+
+    def stop(self) -> None:
+        """Stop the publisher process; it removes the bus on exit."""
+        if self._process is not None:
+            # A killed publisher may have died holding the event's lock, so only signal a live one
+            if self._process.is_alive():
+                self._stop.set()
+            self._process.join(5.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self.bus is not None:
+            # A publisher that was killed could not remove the bus itself
+            self.bus.close(unlink=True)
+            self.bus = None
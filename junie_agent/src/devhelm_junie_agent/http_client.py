@@ -0,0 +1,275 @@
+"""
+HTTP client module for talking to the DevHelm API.
+
+This module provides the HttpClient class used by TaskRequester. It wraps a
+keep-alive urllib3.PoolManager with connect/read timeouts, jittered retries
+of idempotent requests that honour the server's Retry-After header, and a
+circuit breaker that fails fast while the server keeps erroring, so a hung
+or failing control server can never freeze the agent loop.
+"""
+
+import random
+import time
+from typing import Callable, Dict, Optional
+
+import urllib3
+from urllib3.util.retry import Retry
+
+
+class HttpClientException(Exception):
+    """Exception raised when an HTTP request fails after all retries."""
+    pass
+
+
+class CircuitOpenError(HttpClientException):
+    """Exception raised when the circuit breaker rejects a request."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated request failures.
+
+    After failure_threshold consecutive failures the breaker opens and
+    rejects every request for reset_timeout seconds. It then lets a single
+    trial request through (half-open); success closes the breaker again,
+    failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+                (0 disables the breaker)
+            reset_timeout: Seconds the breaker stays open before a trial request
+            clock: Monotonic clock, replaceable in tests
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """Current breaker state: 'closed', 'open' or 'half_open'."""
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent.
+
+        Returns:
+            bool: False while the breaker is open
+        """
+        return self.state != self.OPEN
+
+    def record_success(self) -> None:
+        """Record a successful request; closes the breaker."""
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Record a failed request; opens the breaker once the threshold is hit."""
+        self.failures += 1
+        if self.failure_threshold and (self.failures >= self.failure_threshold or self._opened_at is not None):
+            self._opened_at = self._clock()
+
+
+class JitteredRetry(Retry):
+    """
+    urllib3 Retry with proportional backoff jitter and a Retry-After cap.
+
+    Implemented here rather than with urllib3's own backoff_jitter and
+    retry_after_max so the same behaviour is available on urllib3 1.26.
+    """
+
+    def __init__(self, *args, jitter: float = 0.5, max_retry_after: float = 120.0, **kwargs):
+        """
+        Initialize the JitteredRetry.
+
+        Args:
+            jitter: Random spread as a fraction of each backoff (0.5 = +/-50%)
+            max_retry_after: Longest Retry-After wait honoured, in seconds
+            *args, **kwargs: Passed to urllib3 Retry
+        """
+        super().__init__(*args, **kwargs)
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kw) -> 'JitteredRetry':
+        retry = super().new(**kw)
+        retry.jitter = self.jitter
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return backoff
+        return backoff * (1 + (random.random() * 2 - 1) * self.jitter)
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds.
+
+    Args:
+        value: Header value (HTTP dates are not used by the DevHelm API)
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if absent or invalid
+    """
+    if not isinstance(value, (str, bytes)):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class HttpClient:
+    """
+    Pooled HTTP client with timeouts, retries and a circuit breaker.
+
+    Only idempotent methods (GET, HEAD) are retried. Connection errors,
+    timeouts and 429/502/503/504 responses count as retryable; once the
+    retries are spent the request counts as one failure for the breaker.
+    """
+
+    # Methods that are safe to send more than once
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD'})
+
+    # Response statuses worth retrying
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        jitter: float = 0.5,
+        max_retry_after: float = 120.0,
+        pool_size: int = 2,
+        circuit_threshold: int = 5,
+        circuit_reset: float = 60.0,
+    ):
+        """
+        Initialize the HttpClient.
+
+        Args:
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed between bytes of the response
+            retries: Retries of idempotent requests after the first attempt
+            backoff_factor: Base of the exponential backoff between retries
+            jitter: Random spread of each backoff (0.5 = +/-50%)
+            max_retry_after: Longest Retry-After wait honoured between retries
+            pool_size: Keep-alive connections kept per host
+            circuit_threshold: Consecutive failed requests that open the
+                circuit breaker (0 disables it)
+            circuit_reset: Seconds before an open breaker allows a trial request
+        """
+        self.timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.retry = JitteredRetry(
+            total=retries,
+            allowed_methods=self.IDEMPOTENT_METHODS,
+            status_forcelist=self.RETRY_STATUSES,
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            jitter=jitter,
+            max_retry_after=max_retry_after,
+        )
+        self.breaker = CircuitBreaker(circuit_threshold, circuit_reset)
+        self.pool = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=pool_size,
+            timeout=self.timeout,
+            retries=self.retry,
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        **kwargs,
+    ):
+        """
+        Send a request through the pool.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            headers: Request headers
+            breaker: Circuit breaker guarding this request (defaults to the
+                client's own)
+            **kwargs: Passed to urllib3 (e.g. timeout, body)
+
+        Returns:
+            urllib3.BaseHTTPResponse: The final response (which may be a
+                5xx response once retries are exhausted)
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            HttpClientException: If the request failed without a response
+        """
+        breaker = breaker if breaker is not None else self.breaker
+        if not breaker.allow():
+            raise CircuitOpenError("Circuit breaker open: DevHelm API is failing, not sending request")
+
+        if method.upper() not in self.IDEMPOTENT_METHODS:
+            kwargs.setdefault('retries', False)
+
+        try:
+            response = self.pool.request(method, url, headers=headers, **kwargs)
+        except urllib3.exceptions.HTTPError as e:
+            breaker.record_failure()
+            raise HttpClientException(f"HTTP request failed: {e}") from e
+
+        if response.status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def timeout_for_wait(self, wait: float) -> urllib3.Timeout:
+        """
+        Get a timeout for a request the server may hold open.
+
+        Args:
+            wait: Seconds the server may hold the request (long polling)
+
+        Returns:
+            urllib3.Timeout: The configured timeout with the read timeout
+                extended by wait
+        """
+        return urllib3.Timeout(connect=self.timeout.connect_timeout, read=self.timeout.read_timeout + wait)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        self.pool.clear()
@@ -0,0 +1,281 @@
+"""
+Journal module for remembering task progress across agent restarts.
+
+This module provides the TaskJournal class, a small SQLite database that
+records, per Task.id, when a task was received, when its prompt was
+submitted to Junie and how many "continue" prompts followed. A restarted
+agent (after a crash, or after the continue limit ended it) reads the latest
+entry back in a single query and carries on where it stopped instead of
+starting with no memory.
+
+Typing a prompt is guarded by begin_submit(): it atomically marks the task
+as being submitted and refuses if that already happened, so the same task
+is never typed twice. A crash between begin_submit() and record_submitted()
+leaves the task marked 'submitting'; it is treated as submitted, because the
+prompt may already be in Junie's input box.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .task_requester import Task
+
+# Task states
+RECEIVED = 'received'
+SUBMITTING = 'submitting'
+SUBMITTED = 'submitted'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    ticket_id TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    state TEXT NOT NULL,
+    continues INTEGER NOT NULL DEFAULT 0,
+    received_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_received ON tasks (received_at);
+"""
+
+
+def default_journal_path() -> Path:
+    """
+    Return the default location of the task journal.
+
+    Uses $XDG_STATE_HOME (or ~/.local/state) so the journal survives restarts.
+    """
+    state_home = os.getenv('XDG_STATE_HOME') or str(Path.home() / ".local" / "state")
+    return Path(state_home) / "devhelm-junie-agent" / "journal.sqlite3"
+
+
+def worker_journal_path(name: str, path: Optional[str] = None) -> Path:
+    """
+    Return the journal location of one fleet worker.
+
+    Every worker keeps its own journal next to the configured (or default)
+    one, e.g. journal-display_1.sqlite3, since each display works on its
+    own task.
+
+    Args:
+        name: Worker name (e.g. 'display:1')
+        path: Configured journal file (defaults to default_journal_path());
+            ':memory:' is returned unchanged
+
+    Returns:
+        Path: The worker's journal file
+    """
+    if path == ':memory:':
+        return Path(path)
+    base = Path(path) if path else default_journal_path()
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+    return base.with_name(f"{base.stem}-{safe_name}{base.suffix}")
+
+
+@dataclass
+class JournalEntry:
+    """
+    Recorded progress of one task.
+
+    Attributes:
+        task: The task as received from DevHelm
+        state: 'received', 'submitting' or 'submitted'
+        continues: "continue" prompts sent since the task was submitted
+        updated_at: Wall-clock time of the last recorded event
+    """
+    task: Task
+    state: str
+    continues: int
+    updated_at: float
+
+    @property
+    def submitted(self) -> bool:
+        """True if the prompt was (or may have been) typed into Junie."""
+        return self.state in (SUBMITTING, SUBMITTED)
+
+
+class TaskJournal:
+    """
+    Crash-safe record of task receipt, prompt submission and continues.
+    """
+
+    def __init__(self, path: Optional[Path] = None, keep_tasks: int = 100):
+        """
+        Initialize the TaskJournal, creating the database if needed.
+
+        Args:
+            path: Database file (defaults to default_journal_path());
+                ':memory:' keeps the journal in memory
+            keep_tasks: Most recent tasks kept; older ones are pruned
+        """
+        self.path = str(path) if path is not None else str(default_journal_path())
+        self.keep_tasks = keep_tasks
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # WAL with full syncs: a committed event survives a crash or power loss
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    def record_received(self, task: Task) -> JournalEntry:
+        """
+        Record that a task was handed to the agent.
+
+        Receiving a task that is already in the journal keeps its progress.
+
+        Args:
+            task: The received task
+
+        Returns:
+            JournalEntry: The task's recorded progress
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # INSERT OR IGNORE + UPDATE rather than an upsert, which needs SQLite 3.24+
+            db.execute(
+                "INSERT OR IGNORE INTO tasks (task_id, ticket_id, prompt, state, received_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (task.id, task.ticket_id, task.prompt, RECEIVED, now, now),
+            )
+            db.execute("UPDATE tasks SET updated_at = ? WHERE task_id = ?", (now, task.id))
+            self._event(db, task.id, RECEIVED, now)
+            self._prune(db)
+        return self.get(task.id)
+
+    def begin_submit(self, task_id: str) -> bool:
+        """
+        Claim the right to type a task's prompt.
+
+        Args:
+            task_id: Task.id of a received task
+
+        Returns:
+            bool: True if the prompt may be typed now, False if it was already
+                submitted (or a submission was interrupted)
+        """
+        now = time.time()
+        with self._transaction() as db:
+            claimed = db.execute(
+                "UPDATE tasks SET state = ?, updated_at = ? WHERE task_id = ? AND state = ?",
+                (SUBMITTING, now, task_id, RECEIVED),
+            ).rowcount
+            if claimed:
+                self._event(db, task_id, SUBMITTING, now)
+        return bool(claimed)
+
+    def record_submitted(self, task_id: str) -> None:
+        """Record that the prompt was typed and submitted."""
+        self._set_state(task_id, SUBMITTED, 'submitted')
+
+    def abort_submit(self, task_id: str) -> None:
+        """Record that typing failed before anything was entered, so it may be retried."""
+        self._set_state(task_id, RECEIVED, 'aborted')
+
+    def record_continue(self, task_id: str) -> int:
+        """
+        Record a "continue" prompt for a task.
+
+        Args:
+            task_id: Task.id the continue belongs to
+
+        Returns:
+            int: Continues recorded for the task, including this one
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE tasks SET continues = continues + 1, updated_at = ? WHERE task_id = ?",
+                (now, task_id),
+            )
+            self._event(db, task_id, 'continued', now)
+        entry = self.get(task_id)
+        return entry.continues if entry is not None else 0
+
+    def get(self, task_id: str) -> Optional[JournalEntry]:
+        """
+        Look up a task's recorded progress.
+
+        Args:
+            task_id: Task.id to look up
+
+        Returns:
+            JournalEntry or None: The progress, or None if the task is unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT task_id, ticket_id, prompt, state, continues, updated_at FROM tasks WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        return _entry(row)
+
+    def resume(self) -> Optional[JournalEntry]:
+        """
+        Return the most recently received task, to resume after a restart.
+
+        Returns:
+            JournalEntry or None: The latest task's progress, or None if the
+                journal is empty
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT task_id, ticket_id, prompt, state, continues, updated_at FROM tasks "
+                "ORDER BY received_at DESC, rowid DESC LIMIT 1"
+            ).fetchone()
+        return _entry(row)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def _set_state(self, task_id: str, state: str, event: str) -> None:
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE tasks SET state = ?, updated_at = ? WHERE task_id = ?", (state, now, task_id))
+            self._event(db, task_id, event, now)
+
+    def _event(self, db: sqlite3.Connection, task_id: str, kind: str, at: float) -> None:
+        db.execute("INSERT INTO events (task_id, kind, at) VALUES (?, ?, ?)", (task_id, kind, at))
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        db.execute(
+            "DELETE FROM tasks WHERE task_id NOT IN "
+            "(SELECT task_id FROM tasks ORDER BY received_at DESC LIMIT ?)",
+            (self.keep_tasks,),
+        )
+        db.execute("DELETE FROM events WHERE task_id NOT IN (SELECT task_id FROM tasks)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Writers are serialised and wrapped in BEGIN IMMEDIATE ... COMMIT/ROLLBACK
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+
+def _entry(row) -> Optional[JournalEntry]:
+    if row is None:
+        return None
+    task_id, ticket_id, prompt, state, continues, updated_at = row
+    return JournalEntry(Task(id=task_id, ticket_id=ticket_id, prompt=prompt), state, continues, updated_at)
@@ -1,10 +1,254 @@
+import atexit
+import gzip
+import json
 import os
+import shutil
 import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
 from loguru import logger
-from typing import Optional
+from typing import Deque, Optional, TextIO
 from .config import Config
 
 
+class QueueSink:
+    """
+    Non-blocking loguru sink writing batches from a background thread.
+
+    write() only serializes the record and appends it to a bounded queue, so
+    logging never waits for the disk or the terminal. A writer thread takes
+    up to batch_size lines at a time and writes them with a single call.
+
+    Under pressure DEBUG lines go first: once the queue is half full only one
+    in debug_sample DEBUG lines is kept, and once it is full every new line is
+    dropped. Dropped lines are counted and reported in the output as a single
+    WARNING record.
+
+    When writing to a file, the file is rotated once it exceeds rotation_bytes;
+    rotated files are optionally gzip-compressed (on the writer thread) and
+    removed after retention_days.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        stream: Optional[TextIO] = None,
+        serialize: bool = True,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+        debug_sample: int = 10,
+        rotation_bytes: int = 100 * 1024 * 1024,
+        compress: bool = False,
+        retention_days: float = 7.0,
+    ):
+        """
+        Initialize the QueueSink and start its writer thread.
+
+        Args:
+            path: Log file to append to (None writes to stream)
+            stream: Text stream used when no path is given (defaults to stdout)
+            serialize: Write each record as one JSON object; otherwise write
+                the message as formatted by loguru
+            max_queue: Lines held in memory before new lines are dropped
+            batch_size: Most lines written per write call
+            flush_interval: Longest time a line waits before being written
+            debug_sample: Keep one in this many DEBUG lines while the queue is
+                at least half full (1 keeps all of them)
+            rotation_bytes: Rotate the log file once it is this large (0 disables)
+            compress: Gzip rotated log files
+            retention_days: Delete rotated log files older than this (0 keeps them)
+        """
+        self.path = Path(path).expanduser() if path else None
+        self.stream = stream if stream is not None else sys.stdout
+        self.serialize = serialize
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.debug_sample = max(1, debug_sample)
+        self.rotation_bytes = rotation_bytes
+        self.compress = compress
+        self.retention_days = retention_days
+
+        self.dropped: Counter = Counter()
+        self._queue: Deque[str] = deque()
+        self._debug_seen = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._writing = False
+        self._file: Optional[TextIO] = None
+        self._size = 0
+
+        if self.path is not None:
+            self._open()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        # Lines still queued when the process exits are written first
+        atexit.register(self.stop)
+
+    def write(self, message) -> None:
+        """
+        Queue a message (called by loguru for every record).
+
+        Args:
+            message: loguru message; its .record is serialized to JSON when
+                serialize is set
+        """
+        record = message.record
+        level = record['level'].name
+
+        with self._condition:
+            queued = len(self._queue)
+            if queued >= self.max_queue:
+                self.dropped[level] += 1
+                return
+            if level in ('TRACE', 'DEBUG') and queued >= self.max_queue // 2:
+                self._debug_seen += 1
+                if self._debug_seen % self.debug_sample:
+                    self.dropped[level] += 1
+                    return
+
+            self._queue.append(_serialize(record) if self.serialize else str(message))
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every queued line has been written.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            bool: True if the queue was emptied in time
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify()
+            while self._queue or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(remaining, self.flush_interval))
+        return True
+
+    def stop(self) -> None:
+        """Write what is queued and stop the writer (called by logger.remove())."""
+        atexit.unregister(self.stop)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout=10)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._queue and not self._stopping:
+                    self._condition.wait(self.flush_interval)
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                dropped, self.dropped = self.dropped, Counter()
+                stopping = self._stopping and not self._queue
+                self._writing = bool(batch or dropped)
+
+            if dropped:
+                batch.append(self._dropped_line(dropped))
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    # The log pipeline must never take the agent down
+                    sys.stderr.write(f"Log writer failed: {e}\n")
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+            if stopping:
+                return
+
+    def _write_batch(self, batch) -> None:
+        text = "".join(line if line.endswith("\n") else line + "\n" for line in batch)
+        if self._file is None:
+            self.stream.write(text)
+            self.stream.flush()
+            return
+
+        self._file.write(text)
+        self._file.flush()
+        self._size += len(text.encode('utf-8'))
+        if self.rotation_bytes and self._size >= self.rotation_bytes:
+            self._rotate()
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        stamp = time.strftime('%Y-%m-%d_%H-%M-%S')
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        counter = 1
+        while rotated.exists() or rotated.with_name(rotated.name + '.gz').exists():
+            rotated = self.path.with_name(f"{self.path.stem}.{stamp}.{counter}{self.path.suffix}")
+            counter += 1
+        os.replace(self.path, rotated)
+        self._open()
+
+        if self.compress:
+            with open(rotated, 'rb') as source, gzip.open(str(rotated) + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            rotated.unlink()
+        self._remove_expired()
+
+    def _remove_expired(self) -> None:
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        for candidate in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}*"):
+            if candidate != self.path and candidate.stat().st_mtime < cutoff:
+                candidate.unlink()
+
+    def _dropped_line(self, dropped: Counter) -> str:
+        total = sum(dropped.values())
+        message = f"Dropped {total} log messages under pressure"
+        if not self.serialize:
+            return f"{time.strftime('%Y-%m-%d %H:%M:%S')} | WARNING  | {message} ({dict(dropped)})"
+        return json.dumps({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'level': 'WARNING',
+            'message': message,
+            'dropped': dict(dropped),
+        })
+
+
+def _serialize(record) -> str:
+    """Serialize a loguru record as one JSON object."""
+    data = {
+        'time': record['time'].isoformat(timespec='milliseconds'),
+        'level': record['level'].name,
+        'message': record['message'],
+        'name': record['name'],
+        'file': record['file'].name,
+        'function': record['function'],
+        'line': record['line'],
+        'thread': record['thread'].name,
+    }
+    if record['extra']:
+        data['extra'] = record['extra']
+    if record['exception'] is not None:
+        exception = record['exception']
+        data['exception'] = {
+            'type': exception.type.__name__ if exception.type else None,
+            'value': str(exception.value) if exception.value is not None else None,
+        }
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
 class LoggerFactory:
     """
     Factory class for creating and configuring loguru logger instances.
@@ -12,6 +256,11 @@ class LoggerFactory:
     Supports configuration via parameters:
     - log_format: 'json' for JSON formatting, anything else for pretty formatting
     - log_file: File path for logging output, empty/unset means stdout
+    - log_queue_size, log_debug_sample: bounds of the background log queue
+    - log_rotation_mb, log_compress, log_retention_days: log file rotation
+    
+    Records are handed to a QueueSink, so writing logs never blocks the
+    agent loop.
     """
     
     @staticmethod
@@ -25,38 +274,37 @@ class LoggerFactory:
         Returns:
             logger: Configured loguru logger instance
         """
-        # Remove default handler first
+        # Remove existing handlers first (this also drains and stops a previous QueueSink)
         logger.remove()
         
         # Process the format parameter from config
         log_format = config.log_format.lower()
         log_file = config.log_file
         
-        # Determine format based on LOG_FORMAT env var
-        if log_format == 'json':
-            format_string = "{\"time\":\"{time:YYYY-MM-DD HH:mm:ss.SSS}\",\"level\":\"{level}\",\"message\":\"{message}\",\"file\":\"{file.name}\",\"function\":\"{function}\",\"line\":{line}}"
+        # Determine format based on LOG_FORMAT env var (JSON records are serialized by the sink)
+        serialize = log_format == 'json'
+        if serialize:
+            format_string = "{message}"
         else:
             # Pretty format (default)
             format_string = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
         
-        # Determine output destination based on LOG_FILE env var
-        if log_file:
-            # Log to file
-            logger.add(
-                log_file,
-                format=format_string,
-                level="DEBUG",
-                rotation="100 MB",
-                retention="7 days"
-            )
-        else:
-            # Log to stdout (default)
-            logger.add(
-                sys.stdout,
-                format=format_string,
-                level="DEBUG",
-                colorize=True if log_format != 'json' else False
-            )
+        # Write through a bounded background queue so logging never stalls the loop
+        sink = QueueSink(
+            path=log_file or None,
+            serialize=serialize,
+            max_queue=config.log_queue_size,
+            debug_sample=config.log_debug_sample,
+            rotation_bytes=int(config.log_rotation_mb * 1024 * 1024),
+            compress=config.log_compress,
+            retention_days=config.log_retention_days
+        )
+        logger.add(
+            sink,
+            format=format_string,
+            level="DEBUG",
+            colorize=not serialize and not log_file and sys.stdout.isatty()
+        )
         
         return logger
     
@@ -1,11 +1,31 @@
+import asyncio
 import os
+import sqlite3
 import sys
+import threading
 import time
 from typing import Optional, Tuple, Dict
 
 from .task_requester import TaskRequester, Task, TaskStatus, TaskRequesterException
+from .agent_loop import AgentLoop, PassResult, create_task_source
+from .http_client import HttpClient
+from .journal import TaskJournal
+from .async_requester import AsyncTaskRequester
+from .async_runtime import AsyncAgent
+from .fleet import FleetException, FleetSupervisor, parse_fleet
 from .ui_interaction import UIInteraction
+from .calibration import ScaleCalibration
+from .detection import DetectionCache, create_matcher
+from .screen_backend import PyAutoGUIBackend, create_screen_backend
+from .screen_capture import create_screen_capture
+from .frame_bus import BusCapture, FrameBusException, FramePublisher
+from .scheduler import PollScheduler
+from .readiness import ReadinessDetector
+from .damage import DamageWatcher, DamageWatcherException
 from .logger_factory import LoggerFactory
+from .metrics import ERRORS, LOOP_SECONDS, MetricsServer
+from .tracing import TRACER, span
+from .profiler import Profiler, ProfilerException
 from .config import get_config
 
 # Logger will be initialized after environment variables are read
@@ -13,13 +33,18 @@ from .config import get_config
 
 
 
-def fetch_initial_task(task_requester: TaskRequester, logger) -> Task:
+def fetch_initial_task(task_requester: TaskRequester, logger, journal: Optional[TaskJournal] = None) -> Task:
     """
     Fetch the initial task on startup.
     
+    If DevHelm reports a task in progress and the journal shows that this
+    agent already submitted the latest task before a restart, that task is
+    resumed instead of exiting.
+    
     Args:
         task_requester: TaskRequester instance for API calls
         logger: Logger instance for logging
+        journal: Optional TaskJournal recorded by previous runs
         
     Returns:
         Task: The initial task to process
@@ -32,7 +57,14 @@ def fetch_initial_task(task_requester: TaskRequester, logger) -> Task:
         
         if isinstance(result, Task):
             logger.info(f"Initial task received: {result.ticket_id} - {result.prompt}")
+            if journal is not None:
+                journal.record_received(result)
             return result
+        
+        resumed = journal.resume() if journal is not None else None
+        if result == TaskStatus.BUSY and resumed is not None and resumed.submitted:
+            logger.info(f"Resuming task from journal: {resumed.task.ticket_id} ({resumed.continues} continues sent)")
+            return resumed.task
         else:
             logger.warning(f"No initial task available: {result.value}")
             sys.exit(1)
@@ -49,9 +81,9 @@ def main():
     This implementation follows the acceptance criteria:
     - Reads environment variables for API access
     - Fetches initial task on startup (exits if none available)
-    - Runs infinite loop checking UI readiness every minute
+    - Runs infinite loop checking UI readiness
     - Requests new tasks and handles responses appropriately
-    - Sleeps 60 seconds between loop iterations
+    - Sleeps between loop iterations for an adaptive interval (PollScheduler)
     """
     # Read configuration
     config = get_config()
@@ -61,81 +93,250 @@ def main():
     
     logger.info("Starting DevHelm Agent...")
     
+    # Optionally serve loop timings and counters for Prometheus (recorded either way)
+    metrics_server = None
+    if config.metrics_port:
+        try:
+            metrics_server = MetricsServer(host=config.metrics_host, port=config.metrics_port).start()
+            logger.info(f"Serving metrics on {metrics_server.url}")
+        except OSError as e:
+            logger.warning(f"Metrics endpoint unavailable: {e}")
+    
+    # Optionally write JSON timing spans for every phase of the loop
+    if config.trace_file:
+        try:
+            TRACER.configure(config.trace_file)
+            logger.info(f"Writing trace spans to {config.trace_file}")
+        except OSError as e:
+            logger.warning(f"Tracing unavailable: {e}")
+    
+    # Fleet mode: one worker per display, sharing the connection pool and template cache
+    if config.fleet:
+        try:
+            specs = parse_fleet(config.fleet, config.api_key)
+        except FleetException as e:
+            logger.error(f"Invalid FLEET configuration: {e}")
+            sys.exit(1)
+        supervisor = FleetSupervisor(
+            specs,
+            config,
+            logger,
+            restart_backoff=config.fleet_restart_backoff,
+            stall_timeout=config.fleet_stall_timeout
+        )
+        sys.exit(supervisor.run())
+    
     # Initialize components
-    task_requester = TaskRequester(config.api_url, config.api_key)
-    ui = UIInteraction()
+    http_client = HttpClient(
+        connect_timeout=config.http_connect_timeout,
+        read_timeout=config.http_read_timeout,
+        retries=config.http_retries,
+        backoff_factor=config.http_backoff,
+        jitter=config.http_jitter,
+        max_retry_after=config.http_max_retry_after,
+        pool_size=config.http_pool_size,
+        circuit_threshold=config.http_circuit_threshold,
+        circuit_reset=config.http_circuit_reset
+    )
+    task_requester = TaskRequester(
+        config.api_url,
+        config.api_key,
+        http_client=http_client,
+        long_poll=config.task_long_poll,
+        conditional=config.task_conditional
+    )
+    backend = None
+    publisher = None
+    bus_capture = None
+    if config.frame_bus and config.screen_backend == 'pyautogui':
+        # Capture in a separate process; other detectors can attach to the same frames
+        try:
+            publisher = FramePublisher(
+                capture_mode=config.screen_capture_mode,
+                interval=config.frame_bus_interval,
+                slots=config.frame_bus_slots
+            ).start()
+            # A frame older than a few publish intervals means the publisher stopped
+            bus_capture = BusCapture(publisher.bus, max_age=max(1.0, 4 * config.frame_bus_interval))
+            backend = PyAutoGUIBackend(screen_capture=bus_capture, text_input_mode=config.text_input_mode)
+            logger.info(f"Publishing screen frames on frame bus {publisher.name}")
+        except (FrameBusException, OSError) as e:
+            logger.warning(f"Frame bus unavailable, capturing the screen directly: {e}")
+            if publisher is not None:
+                publisher.stop()
+            publisher = bus_capture = None
+    if backend is None:
+        backend = create_screen_backend(
+            config.screen_backend,
+            replay_dir=config.screen_replay_dir,
+            text_input_mode=config.text_input_mode,
+            screen_capture_mode=config.screen_capture_mode
+        )
+    ui = UIInteraction(
+        backend=backend,
+        detection_cache=DetectionCache(config.detection_cache_size),
+        matcher=create_matcher(config.match_engine),
+        calibration=ScaleCalibration(
+            config.calibration_path or None,
+            display=os.getenv('DISPLAY', ''),
+            retry_interval=config.calibration_retry,
+            stale_after=config.calibration_stale
+        ) if config.scale_calibration else None
+    )
+    
+    scheduler = PollScheduler(
+        fast_interval=config.poll_fast_interval,
+        min_interval=config.poll_min_interval,
+        max_interval=config.poll_max_interval,
+        backoff=config.poll_backoff,
+        jitter=config.poll_jitter,
+        fast_window=config.poll_fast_window
+    )
+    
+    readiness = ReadinessDetector(
+        ui,
+        confirmations=config.readiness_confirmations,
+        interval=config.readiness_interval,
+        window=config.readiness_window
+    )
+    
+    # Remember task progress across restarts (never type a prompt twice, keep the continue count)
+    journal = None
+    if config.task_journal:
+        try:
+            journal = TaskJournal(config.task_journal_path or None)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Task journal unavailable, continuing without it: {e}")
+    
+    # The asyncio runtime replaces the loop below (DAMAGE, push and prefetch options apply to the sync loop)
+    if config.runtime == 'async':
+        current_task = fetch_initial_task(task_requester, logger, journal)
+        agent = AsyncAgent(
+            ui,
+            AsyncTaskRequester(task_requester),
+            scheduler,
+            logger,
+            readiness=readiness,
+            max_consecutive_continues=config.max_consecutive_continues,
+            journal=journal,
+            current_task=current_task
+        )
+        logger.info("Entering asyncio runtime...")
+        exit_code = asyncio.run(agent.run())
+        if journal is not None:
+            journal.close()
+        sys.exit(exit_code)
+    
+    # Optionally wake up on X DAMAGE events instead of polling the screen
+    watcher = None
+    if config.damage_watch:
+        try:
+            watcher = DamageWatcher(ui, window_name=config.damage_window or None).start()
+            logger.info("Watching X DAMAGE events for screen changes")
+        except DamageWatcherException as e:
+            logger.warning(f"X DAMAGE watcher unavailable, polling the screen instead: {e}")
+    wake = watcher.changed if watcher is not None else threading.Event()
+    
+    # Optionally receive pushed task assignments and fetch the next task while Junie is working
+    tasks, stream, prefetcher = create_task_source(task_requester, config, on_event=wake.set)
+    if stream is not None:
+        logger.info("Subscribed to pushed task events")
     
     # Fetch initial task (exit if none available)
-    current_task = fetch_initial_task(task_requester, logger)
+    current_task = fetch_initial_task(task_requester, logger, journal)
     
-    logger.info("Entering main runtime loop...")
+    # SIGUSR1 profiles the next iterations of the loop without a restart
+    profiler = None
+    try:
+        profiler = Profiler(
+            config.profile_dir or None,
+            iterations=config.profile_iterations,
+            mode=config.profile_mode,
+            logger=logger
+        )
+        if not profiler.install():
+            profiler = None
+    except ProfilerException as e:
+        logger.warning(f"Profiler unavailable: {e}")
+    
+    # One pass of the loop is shared with the fleet workers; the continue count is restored from the journal
+    agent = AgentLoop(
+        ui,
+        tasks,
+        scheduler,
+        readiness,
+        logger,
+        max_consecutive_continues=config.max_consecutive_continues,
+        journal=journal,
+        current_task=current_task,
+        watcher=watcher,
+        prefetcher=prefetcher,
+        max_detection_age=config.poll_max_interval
+    )
     
-    # Counter for consecutive continue prompts (DH-8: Continue limit)
-    consecutive_continue_count = 0
+    logger.info("Entering main runtime loop...")
     
     # Main runtime loop
+    iteration = None
     while True:
+        iteration_started = time.perf_counter()
+        if iteration is not None:
+            iteration.end()
+        if profiler is not None:
+            profiler.tick()
+        iteration = span('loop.iteration')
         try:
-            # Check if UI is ready for a prompt (looking for "Start Again" button)
-            if ui.isReadyForPrompt():
-                logger.debug("UI is ready for prompt - 'Start Again' button detected")
-                
-                # Sleep to avoid race conditions as specified in business logic
-                time.sleep(60)
-                
-                # Request a new task
+            if watcher is None:
+                wake.clear()
+            
+            # Never decide from a frozen screen: capture directly once the frame publisher stops
+            if bus_capture is not None:
                 try:
-                    result = task_requester.request_task()
-                    
-                    if isinstance(result, Task):
-                        # New task received - update current task and give prompt
-                        current_task = result
-                        logger.info(f"New task received: {current_task.ticket_id} - {current_task.prompt}")
-                        
-                        # Reset continue counter when new task is received (DH-8: Continue limit)
-                        consecutive_continue_count = 0
-                        
-                        success = ui.givePrompt(current_task.prompt)
-                        if success:
-                            logger.info("Successfully entered new task prompt")
-                        else:
-                            logger.error("Failed to enter task prompt")
-                            
-                    elif result == TaskStatus.BUSY:
-                        # DevHelm says still busy - tell Junie to continue
-                        logger.info("DevHelm indicates task still in progress - telling Junie to continue")
-                        
-                        # Check continue limit before sending continue prompt (DH-8: Continue limit)
-                        consecutive_continue_count += 1
-                        logger.debug(f"Continue count: {consecutive_continue_count}/{config.max_consecutive_continues}")
-                        
-                        if consecutive_continue_count > config.max_consecutive_continues:
-                            logger.warning(f"Maximum consecutive continue limit ({config.max_consecutive_continues}) reached. Terminating agent to avoid quota waste.")
-                            sys.exit(0)
-                        
-                        ui.continuePrompt()
-                        logger.info("Successfully entered 'continue' prompt")
-                            
-                    elif result == TaskStatus.NONE:
-                        # DevHelm has no tasks - do nothing
-                        logger.debug("DevHelm has no tasks available - doing nothing")
-                        
-                except TaskRequesterException as e:
-                    logger.error(f"Error requesting task: {e}")
-                    
-            else:
-                # UI not ready - just wait
-                logger.debug("UI not ready for prompt - waiting...")
+                    bus_capture.check()
+                except FrameBusException as e:
+                    logger.warning(f"Frame bus failed, capturing the screen directly: {e}")
+                    publisher.stop()
+                    publisher = bus_capture = None
+                    backend.screen_capture = create_screen_capture(config.screen_capture_mode)
+            
+            outcome = agent.poll()
+            if outcome == PassResult.FINISHED:
+                # Continue limit reached (DH-8): terminate to avoid quota waste
+                sys.exit(0)
+            
+            LOOP_SECONDS.observe(time.perf_counter() - iteration_started)
+            if outcome == PassResult.AGAIN:
+                continue
             
-            # Sleep for 60 seconds as specified in acceptance criteria
-            time.sleep(60)
+            # Sleep until the next poll (short after a prompt, longer while idle)
+            delay = scheduler.sleep(wake)
+            logger.debug(f"Slept {delay:.1f}s before next poll")
             
         except KeyboardInterrupt:
             logger.info("Shutting down agent...")
+            if watcher is not None:
+                watcher.stop()
+            if prefetcher is not None:
+                prefetcher.close()
+            if stream is not None:
+                stream.stop()
+            if publisher is not None:
+                publisher.stop()
+            if journal is not None:
+                journal.close()
+            if metrics_server is not None:
+                metrics_server.stop()
+            if profiler is not None:
+                profiler.stop()
+            iteration.end()
+            TRACER.close()
             break
         except Exception as e:
             logger.error(f"Unexpected error in main loop: {e}")
-            time.sleep(60)  # Continue after error
+            ERRORS.labels('loop').inc()
+            LOOP_SECONDS.observe(time.perf_counter() - iteration_started)
+            scheduler.on_error()
+            scheduler.sleep(wake)  # Continue after error
 
 
 if __name__ == "__main__":
@@ -0,0 +1,426 @@
+"""
+Metrics module exposing agent loop timings in the Prometheus text format.
+
+The agent records where its time goes (screen capture, template matching,
+task requests, typing and whole loop iterations) in histograms and counts
+prompts, continues and errors. Recording is always on and costs a clock read
+and a bucket increment under a lock, so it does not slow the loop down;
+MetricsServer optionally serves the values on a local HTTP endpoint:
+
+    curl http://127.0.0.1:9464/metrics
+
+The instruments below live in a process-wide registry, so every runtime
+(the sync loop, the asyncio runtime and fleet workers) reports into the same
+metrics.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Histogram bucket upper bounds in seconds (the +Inf bucket is implicit)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    """
+    A monotonically increasing count, optionally split by label values.
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the Counter.
+
+        Args:
+            name: Metric name, e.g. 'devhelm_agent_prompts_total'
+            documentation: HELP text
+            labelnames: Label names; values are given to labels()
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> '_BoundCounter':
+        """
+        Select the child counter for a set of label values.
+
+        Args:
+            *values: One value per label name
+
+        Returns:
+            _BoundCounter: Counter bound to those label values
+        """
+        return _BoundCounter(self, _label_key(self, values))
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increment the (unlabelled) counter.
+
+        Args:
+            amount: Non-negative increment
+        """
+        self._inc((), amount)
+
+    def value(self, *values: str) -> float:
+        """Current value for a set of label values (0 if never incremented)."""
+        with self._lock:
+            return self._values.get(tuple(values), 0.0)
+
+    def samples(self) -> List[str]:
+        """Render the counter as exposition lines."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+    def _inc(self, key: Tuple[str, ...], amount: float) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class _BoundCounter:
+
+    __slots__ = ('_counter', '_key')
+
+    def __init__(self, counter: Counter, key: Tuple[str, ...]):
+        self._counter = counter
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._counter._inc(self._key, amount)
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed durations, optionally split by labels.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Initialize the Histogram.
+
+        Args:
+            name: Metric name, e.g. 'devhelm_agent_capture_seconds'
+            documentation: HELP text
+            labelnames: Label names; values are given to labels()
+            buckets: Increasing bucket upper bounds
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> '_BoundHistogram':
+        """
+        Select the child histogram for a set of label values.
+
+        Args:
+            *values: One value per label name
+
+        Returns:
+            _BoundHistogram: Histogram bound to those label values
+        """
+        return _BoundHistogram(self, _label_key(self, values))
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value in the (unlabelled) histogram.
+
+        Args:
+            value: Observed value, in seconds for timings
+        """
+        self._observe((), value)
+
+    def time(self) -> '_Timer':
+        """Context manager observing the duration of its block."""
+        return _Timer(self, ())
+
+    def count(self, *values: str) -> int:
+        """Number of observations for a set of label values."""
+        with self._lock:
+            entry = self._values.get(tuple(values))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        """Render the histogram as exposition lines."""
+        with self._lock:
+            values = sorted((key, (list(entry[0]), entry[1])) for key, entry in self._values.items())
+
+        lines = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ('le',), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def _observe(self, key: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+
+class _BoundHistogram:
+
+    __slots__ = ('_histogram', '_key')
+
+    def __init__(self, histogram: Histogram, key: Tuple[str, ...]):
+        self._histogram = histogram
+        self._key = key
+
+    def observe(self, value: float) -> None:
+        self._histogram._observe(self._key, value)
+
+    def time(self) -> '_Timer':
+        return _Timer(self._histogram, self._key)
+
+
+class _Timer:
+
+    __slots__ = ('_histogram', '_key', '_started')
+
+    def __init__(self, histogram: Histogram, key: Tuple[str, ...]):
+        self._histogram = histogram
+        self._key = key
+
+    def __enter__(self) -> '_Timer':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram._observe(self._key, time.perf_counter() - self._started)
+
+
+Metric = Union[Counter, Histogram]
+
+
+class MetricsRegistry:
+    """
+    A set of metrics rendered together.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Create and register a Counter.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+
+        Returns:
+            Counter: The registered counter
+        """
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """
+        Create and register a Histogram.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+            buckets: Bucket upper bounds
+
+        Returns:
+            Histogram: The registered histogram
+        """
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text (version 0.0.4)
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+class MetricsServer:
+    """
+    Serves a registry on GET /metrics from a background thread.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = '127.0.0.1', port: int = 9464):
+        """
+        Initialize the MetricsServer.
+
+        Args:
+            registry: Registry to serve (defaults to the process-wide REGISTRY)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+        """
+        self.registry = registry if registry is not None else REGISTRY
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self.registry))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL of the metrics endpoint."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> 'MetricsServer':
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _make_handler(registry: MetricsRegistry):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', MetricsServer.CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def request_status(status: Optional[int]) -> str:
+    """
+    Label value for a /v1/task response status.
+
+    Args:
+        status: HTTP status, or None if no response was received
+
+    Returns:
+        str: The status for the statuses of the task contract, else 'error'
+    """
+    return str(status) if status in (200, 204, 304, 409) else 'error'
+
+
+def _label_key(metric: Metric, values: Sequence[str]) -> Tuple[str, ...]:
+    if len(values) != len(metric.labelnames):
+        raise ValueError(f"{metric.name} expects labels {metric.labelnames}, got {tuple(values)}")
+    return tuple(str(value) for value in values)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value, quotes=True)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def _escape(text: str, quotes: bool = False) -> str:
+    text = text.replace('\\', '\\\\').replace('\n', '\\n')
+    return text.replace('"', '\\"') if quotes else text
+
+
+# Process-wide registry and the agent's instruments
+REGISTRY = MetricsRegistry()
+
+CAPTURE_SECONDS = REGISTRY.histogram(
+    'devhelm_agent_capture_seconds',
+    "Time to capture one screen frame",
+)
+MATCH_SECONDS = REGISTRY.histogram(
+    'devhelm_agent_match_seconds',
+    "Time to match one template against a frame",
+    ('template',),
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    'devhelm_agent_request_task_seconds',
+    "Latency of GET /v1/task by response status (error: no usable response)",
+    ('status',),
+)
+TYPING_SECONDS = REGISTRY.histogram(
+    'devhelm_agent_typing_seconds',
+    "Time to type text into the Junie prompt box and press enter",
+    ('kind',),
+)
+LOOP_SECONDS = REGISTRY.histogram(
+    'devhelm_agent_loop_iteration_seconds',
+    "Time spent in one agent loop iteration, excluding the poll sleep",
+)
+PROMPTS = REGISTRY.counter(
+    'devhelm_agent_prompts_total',
+    "Task prompts entered into Junie",
+)
+CONTINUES = REGISTRY.counter(
+    'devhelm_agent_continues_total',
+    "'continue' prompts entered into Junie",
+)
+ERRORS = REGISTRY.counter(
+    'devhelm_agent_errors_total',
+    "Errors in the agent loop by kind (request, prompt, loop)",
+    ('kind',),
+)
@@ -0,0 +1,232 @@
+"""
+Prefetch module for fetching the next task while Junie is still working.
+
+This module provides the TaskPrefetcher class. main() asks it to prefetch
+while the UI is busy; the request runs on a background thread and its result
+is kept in a single slot with a lease. When "Start Again" appears the leased
+result is handed out at once, taking the network round trip off the
+critical path of the hand-off.
+
+A prefetched status (busy/none) is only trusted for a few seconds, because
+the server's answer changes when Junie finishes. A prefetched task has been
+assigned to the agent, so it is never silently dropped: once its lease runs
+out it is re-validated with a fresh request. "Busy" means the server still
+has it in progress for us, so it is kept; any other answer means the server
+released it and that answer is used instead.
+
+A background request that hangs never holds up the hand-off: after
+join_timeout seconds it is abandoned (its result is discarded) and the
+task is requested directly.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+from .task_requester import Task, TaskRequesterException, TaskStatus
+
+
+@dataclass
+class Lease:
+    """
+    A prefetched result and how long it may be used.
+
+    Attributes:
+        result: The prefetched task or status
+        fetched_at: Clock time the result was received
+        expires_at: Clock time after which the result must be re-validated
+    """
+    result: Union[Task, TaskStatus]
+    fetched_at: float
+    expires_at: float
+
+    def expired(self, now: float) -> bool:
+        """True once the lease has run out."""
+        return now >= self.expires_at
+
+
+@dataclass
+class PrefetchStats:
+    """
+    Counters for prefetch effectiveness.
+
+    Attributes:
+        hits: Hand-offs answered from a valid lease
+        misses: Hand-offs that had to request synchronously
+        revalidations: Expired task leases checked with the server
+        releases: Prefetched tasks the server took back
+        errors: Background requests that failed
+        abandoned: Background requests given up on after join_timeout
+    """
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    releases: int = 0
+    errors: int = 0
+    abandoned: int = 0
+
+
+class TaskPrefetcher:
+    """
+    Fetches tasks in the background and holds them under a lease.
+
+    Wraps anything with a request_task() method (TaskRequester or
+    TaskStream) and offers the same request_task() contract. Only one
+    request is normally in flight; the wrapped requester is only used from
+    two threads at once after a request has hung for join_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        source,
+        task_lease: float = 300.0,
+        status_lease: float = 5.0,
+        min_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        join_timeout: float = 10.0,
+    ):
+        """
+        Initialize the TaskPrefetcher.
+
+        Args:
+            source: Object whose request_task() fetches from the server
+            task_lease: Seconds a prefetched task is used without re-validation
+            status_lease: Seconds a prefetched busy/none status is trusted
+            min_interval: Shortest time between background requests
+            clock: Monotonic clock, replaceable in tests
+            join_timeout: Seconds to wait for a background request before
+                abandoning it and requesting directly
+        """
+        self.source = source
+        self.task_lease = task_lease
+        self.status_lease = status_lease
+        self.min_interval = min_interval
+        self._clock = clock
+        self.join_timeout = join_timeout
+
+        self.slot: Optional[Lease] = None
+        self.stats = PrefetchStats()
+        self.last_error: Optional[Exception] = None
+
+        # Mirrors the source for callers that check them after request_task()
+        self.retry_after: Optional[float] = None
+        self.long_polled = False
+
+        self._lock = threading.Lock()
+        self._request_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._last_started: Optional[float] = None
+        self._hold_until = 0.0
+        # Bumped when a hung worker is abandoned, so its late result is dropped
+        self._generation = 0
+
+    def prefetch(self) -> bool:
+        """
+        Start a background request unless one is pointless or too soon.
+
+        Returns:
+            bool: True if a background request was started
+        """
+        now = self._clock()
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            if self.slot is not None and not self.slot.expired(now):
+                return False
+            if now < self._hold_until:
+                return False
+            if self._last_started is not None and now - self._last_started < self.min_interval:
+                return False
+
+            self._last_started = now
+            self._worker = threading.Thread(
+                target=self._prefetch, args=(self._generation,), name="task-prefetch", daemon=True
+            )
+            self._worker.start()
+            return True
+
+    def request_task(self) -> Union[Task, TaskStatus]:
+        """
+        Hand out the leased result, or request one synchronously.
+
+        Returns:
+            Task or TaskStatus: Same contract as TaskRequester.request_task()
+
+        Raises:
+            TaskRequesterException: If a synchronous request fails
+        """
+        if not self._wait_for_worker():
+            self._abandon_worker()
+
+        with self._lock:
+            lease, self.slot = self.slot, None
+
+        if lease is not None and not lease.expired(self._clock()):
+            self.stats.hits += 1
+            self.retry_after, self.long_polled = None, False
+            return lease.result
+
+        if lease is not None and isinstance(lease.result, Task):
+            return self._revalidate(lease.result)
+
+        self.stats.misses += 1
+        return self._fetch()
+
+    def close(self) -> None:
+        """Wait up to join_timeout for a background request to finish."""
+        if not self._wait_for_worker():
+            self._abandon_worker()
+
+    def _prefetch(self, generation: int) -> None:
+        try:
+            result = self._fetch()
+        except TaskRequesterException as e:
+            self.stats.errors += 1
+            self.last_error = e
+            return
+
+        now = self._clock()
+        lease_time = self.task_lease if isinstance(result, Task) else self.status_lease
+        with self._lock:
+            if generation != self._generation:
+                # Abandoned; the server hands an unclaimed task out again
+                return
+            if self.retry_after:
+                self._hold_until = now + self.retry_after
+            self.slot = Lease(result, now, now + lease_time)
+
+    def _revalidate(self, task: Task) -> Union[Task, TaskStatus]:
+        self.stats.revalidations += 1
+        result = self._fetch()
+        if result == TaskStatus.BUSY:
+            # Still in progress for us on the server - the held task stands
+            return task
+
+        self.stats.releases += 1
+        return result
+
+    def _fetch(self) -> Union[Task, TaskStatus]:
+        # A request hung for join_timeout no longer blocks the next one
+        locked = self._request_lock.acquire(timeout=self.join_timeout)
+        try:
+            return self.source.request_task()
+        finally:
+            self.retry_after = getattr(self.source, 'retry_after', None)
+            self.long_polled = getattr(self.source, 'long_polled', False)
+            if locked:
+                self._request_lock.release()
+
+    def _wait_for_worker(self) -> bool:
+        # True once no background request is running
+        worker = self._worker
+        if worker is None:
+            return True
+        worker.join(self.join_timeout)
+        return not worker.is_alive()
+
+    def _abandon_worker(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._worker = None
+        self.stats.abandoned += 1
@@ -0,0 +1,220 @@
+"""
+Profiler module for profiling a running agent on demand.
+
+Sending SIGUSR1 to the agent process profiles the next N loop iterations and
+writes the results to disk, without restarting the agent:
+
+    kill -USR1 $(pgrep -f devhelm-agent)
+
+Two modes are available:
+
+- 'cprofile' runs cProfile on the loop thread and writes a .prof file (load
+  it with pstats or snakeviz) plus a .txt summary sorted by cumulative time.
+- 'sample' samples the loop thread's stack from a helper thread at a fixed
+  interval and writes the stacks in the folded format read by flamegraph.pl
+  and speedscope (.folded), plus a .txt summary of the hottest stacks.
+
+The signal handler only sets a flag; profiling starts and stops at iteration
+boundaries, when the loop calls tick().
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class ProfilerException(Exception):
+    """Raised when the profiler is misconfigured."""
+    pass
+
+
+def default_profile_dir() -> Path:
+    """
+    Return the default directory for profiles.
+
+    Uses $XDG_STATE_HOME (or ~/.local/state), next to the task journal.
+    """
+    state_home = os.getenv('XDG_STATE_HOME') or str(Path.home() / ".local" / "state")
+    return Path(state_home) / "devhelm-junie-agent" / "profiles"
+
+
+class Profiler:
+    """
+    Profiles a number of loop iterations whenever requested.
+    """
+
+    MODES = ('cprofile', 'sample')
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        iterations: int = 20,
+        mode: str = 'cprofile',
+        sample_interval: float = 0.005,
+        logger=None,
+    ):
+        """
+        Initialize the Profiler.
+
+        Args:
+            directory: Where profiles are written (defaults to default_profile_dir())
+            iterations: Loop iterations profiled per request
+            mode: 'cprofile' or 'sample'
+            sample_interval: Seconds between stack samples in 'sample' mode
+            logger: Optional logger told where results were written
+
+        Raises:
+            ProfilerException: If the mode is unknown or iterations < 1
+        """
+        if mode not in self.MODES:
+            raise ProfilerException(f"Unknown profile mode: {mode} (expected one of {', '.join(self.MODES)})")
+        if iterations < 1:
+            raise ProfilerException("At least one iteration must be profiled")
+
+        self.directory = Path(directory) if directory is not None else default_profile_dir()
+        self.iterations = iterations
+        self.mode = mode
+        self.sample_interval = sample_interval
+        self.logger = logger
+
+        self._requested = False
+        self._remaining = 0
+        self._started_at = 0.0
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+
+    @property
+    def active(self) -> bool:
+        """True while iterations are being profiled."""
+        return self._remaining > 0
+
+    def install(self, signum: Optional[int] = None) -> bool:
+        """
+        Request profiling whenever the process receives a signal.
+
+        Must be called from the main thread.
+
+        Args:
+            signum: Signal to listen for (defaults to SIGUSR1)
+
+        Returns:
+            bool: False if the platform has no such signal
+        """
+        if signum is None:
+            signum = getattr(signal, 'SIGUSR1', None)
+            if signum is None:
+                return False
+        signal.signal(signum, lambda *_: self.request())
+        return True
+
+    def request(self) -> None:
+        """Profile the next iterations (safe to call from a signal handler)."""
+        self._requested = True
+
+    def tick(self) -> Optional[Path]:
+        """
+        Mark an iteration boundary; call once at the start of every iteration.
+
+        Starts profiling when requested, and stops and writes the results
+        once the requested number of iterations has run.
+
+        Returns:
+            Optional[Path]: The written profile when one was just finished
+        """
+        if self._remaining:
+            self._remaining -= 1
+            if not self._remaining:
+                return self._finish()
+        elif self._requested:
+            self._requested = False
+            self._start()
+        return None
+
+    def stop(self) -> Optional[Path]:
+        """
+        Stop a running profile early and write what was collected.
+
+        Returns:
+            Optional[Path]: The written profile, or None if none was running
+        """
+        if not self._remaining:
+            return None
+        self._remaining = 0
+        return self._finish()
+
+    def _start(self) -> None:
+        self._remaining = self.iterations
+        self._started_at = time.time()
+        if self.logger is not None:
+            self.logger.info(f"Profiling the next {self.iterations} iterations ({self.mode})")
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), self.sample_interval).start()
+
+    def _finish(self) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = self.directory / time.strftime('profile-%Y%m%d-%H%M%S', time.localtime(self._started_at))
+
+        if self._profile is not None:
+            self._profile.disable()
+            path = stem.with_suffix('.prof')
+            self._profile.dump_stats(str(path))
+            summary = io.StringIO()
+            pstats.Stats(self._profile, stream=summary).sort_stats('cumulative').print_stats(40)
+            self._profile = None
+        else:
+            stacks = self._sampler.stop()
+            self._sampler = None
+            path = stem.with_suffix('.folded')
+            path.write_text(''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items())))
+            summary = io.StringIO()
+            total = sum(stacks.values()) or 1
+            summary.write(f"{total} samples every {self.sample_interval * 1000:.1f} ms\n\n")
+            for stack, count in stacks.most_common(40):
+                summary.write(f"{count / total:6.1%}  {stack.rsplit(';', 1)[-1]}  ({stack})\n")
+
+        stem.with_suffix('.txt').write_text(summary.getvalue())
+        if self.logger is not None:
+            self.logger.info(f"Profile written to {path}")
+        return path
+
+
+class _StackSampler:
+    """Samples one thread's stack from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self) -> '_StackSampler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, int]:
+        self._stopping.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
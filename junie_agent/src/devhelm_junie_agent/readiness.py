@@ -0,0 +1,107 @@
+"""
+Readiness module for confirming the Junie UI is stably ready for a prompt.
+
+The "Start Again" button can flash up briefly while Junie is still settling,
+so a single detection is not enough to hand over a new task. The agent used
+to sleep for a fixed minute to avoid that race. ReadinessDetector instead
+confirms that the button is visible, at the same place, on several
+consecutive captures taken within a short window.
+"""
+
+import time
+from typing import Callable, Optional
+
+from .detection import Box, DetectionResult
+from .tracing import traced
+
+
+class ReadinessDetector:
+    """
+    Debounces the "Start Again" detection over consecutive captures.
+    """
+
+    def __init__(
+        self,
+        ui,
+        confirmations: int = 3,
+        interval: float = 1.0,
+        window: float = 10.0,
+        tolerance: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the ReadinessDetector.
+
+        Args:
+            ui: UIInteraction instance used to run detection passes
+            confirmations: Consecutive captures that must show the button
+            interval: Seconds between confirmation captures
+            window: Maximum seconds allowed for the whole confirmation
+            tolerance: Pixels the button may move between captures and still
+                count as stable
+            clock: Monotonic clock, replaceable in tests
+            sleep: Sleep function, replaceable in tests
+        """
+        if confirmations < 1:
+            raise ValueError("At least one confirmation is required")
+
+        self.ui = ui
+        self.confirmations = confirmations
+        self.interval = interval
+        self.window = window
+        self.tolerance = tolerance
+        self._clock = clock
+        self._sleep = sleep
+
+    @traced('readiness.confirm')
+    def confirm(self, initial: Optional[DetectionResult] = None) -> bool:
+        """
+        Confirm that the UI is stably ready for a prompt.
+
+        Args:
+            initial: A detection result that already showed the button; it
+                counts as the first confirmation
+
+        Returns:
+            bool: True if the button was seen at a stable location on
+                `confirmations` consecutive captures within the window
+        """
+        deadline = self._clock() + self.window
+        anchor: Optional[Box] = None
+        confirmed = 0
+
+        if initial is not None:
+            anchor = initial.location('start_again')
+            if anchor is None:
+                return False
+            confirmed = 1
+
+        while confirmed < self.confirmations:
+            if confirmed:
+                if self._clock() + self.interval > deadline:
+                    return False
+                self._sleep(self.interval)
+
+            location = self._detect()
+            if location is None:
+                return False
+            if anchor is not None and not self._same_place(anchor, location):
+                return False
+
+            anchor = location
+            confirmed += 1
+
+        return True
+
+    def _detect(self) -> Optional[Box]:
+        try:
+            return self.ui.detect().location('start_again')
+        except Exception:
+            return None
+
+    def _same_place(self, first: Box, second: Box) -> bool:
+        return (
+            abs(first.left - second.left) <= self.tolerance
+            and abs(first.top - second.top) <= self.tolerance
+        )
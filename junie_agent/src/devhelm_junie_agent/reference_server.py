@@ -0,0 +1,348 @@
+"""
+Reference server module emulating the DevHelm /v1/task contract locally.
+
+This module provides the ReferenceServer class, a small in-process HTTP
+server used to build, benchmark and test the agent without the real DevHelm
+API. It keeps a queue of tasks and the task currently in progress:
+
+- GET /v1/task answers 200 with the next task (which becomes the task in
+  progress), 409 while a task is in progress, and 204 when the queue is
+  empty. It honours "Prefer: wait=N" long polling and ETag/If-None-Match.
+- GET /v1/task/stream is a server-sent-events stream of the same answers
+  ("task", "busy" and "none" events) pushed whenever the state changes, with
+  event ids so a reconnecting client can resume with Last-Event-ID.
+- POST /_control/tasks queues a task and POST /_control/complete finishes
+  the task in progress, so the server can be driven from another process.
+
+Run it standalone with:
+
+    python -m devhelm_junie_agent.reference_server --port 8080 --task "DH-1:Fix the bug"
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, List, Optional, Tuple
+
+from .task_requester import Task
+
+# (event id, event name, JSON data) kept for Last-Event-ID resumption
+_Event = Tuple[int, str, str]
+
+
+class ReferenceServer:
+    """
+    Local stand-in for the DevHelm task API.
+
+    Use as a context manager or call start()/stop(). All state changes are
+    made under one condition variable that long-poll requests and event
+    streams wait on.
+    """
+
+    # Events kept for clients resuming with Last-Event-ID
+    HISTORY_SIZE = 256
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        api_key: Optional[str] = None,
+        stream: bool = True,
+        heartbeat: float = 15.0,
+    ):
+        """
+        Initialize the ReferenceServer.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            api_key: Required X-API-KEY value (None accepts any key)
+            stream: Serve the /v1/task/stream endpoint
+            heartbeat: Seconds between keep-alive comments on event streams
+        """
+        self.api_key = api_key
+        self.stream_enabled = stream
+        self.heartbeat = heartbeat
+
+        self.queue: Deque[Task] = deque()
+        self.current: Optional[Task] = None
+        self.completed: List[Task] = []
+        self.requests = 0
+
+        self._condition = threading.Condition()
+        self._version = 0
+        self._events: Deque[_Event] = deque(maxlen=self.HISTORY_SIZE)
+        self._next_event_id = 1
+        self._stream_generation = 0
+        self._stopping = False
+
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'ReferenceServer':
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="reference-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and end every open stream."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'ReferenceServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def add_task(self, prompt: str, ticket_id: str = 'DH-1', task_id: Optional[str] = None) -> Task:
+        """
+        Queue a task.
+
+        Args:
+            prompt: Prompt the agent should enter
+            ticket_id: Ticket identifier
+            task_id: Task id (defaults to a random UUID)
+
+        Returns:
+            Task: The queued task
+        """
+        task = Task(id=task_id or str(uuid.uuid4()), ticket_id=ticket_id, prompt=prompt)
+        with self._condition:
+            self.queue.append(task)
+            self._changed()
+        return task
+
+    def complete(self) -> Optional[Task]:
+        """
+        Finish the task in progress.
+
+        Returns:
+            Optional[Task]: The finished task, or None if none was in progress
+        """
+        with self._condition:
+            task, self.current = self.current, None
+            if task is not None:
+                self.completed.append(task)
+                self._changed()
+            return task
+
+    def drop_streams(self) -> None:
+        """Close every open event stream (clients are expected to reconnect)."""
+        with self._condition:
+            self._stream_generation += 1
+            self._condition.notify_all()
+
+    def answer(self) -> Tuple[int, Optional[Task]]:
+        """
+        Answer a task request, assigning the next task if there is one.
+
+        Must be called with the condition held.
+
+        Returns:
+            tuple: (HTTP status, assigned task or None)
+        """
+        if self.current is not None:
+            return 409, None
+        if self.queue:
+            self.current = self.queue.popleft()
+            self._version += 1
+            return 200, self.current
+        return 204, None
+
+    def _changed(self) -> None:
+        # Called with the condition held after every state change
+        self._version += 1
+        self._condition.notify_all()
+
+    def _push_event(self) -> _Event:
+        # Record the answer for stream clients; called with the condition held
+        status, task = self.answer()
+        name = {200: 'task', 409: 'busy', 204: 'none'}[status]
+        data = json.dumps(task.__dict__) if task is not None else '{}'
+        event = (self._next_event_id, name, data)
+        self._next_event_id += 1
+        self._events.append(event)
+        return event
+
+
+def _make_handler(server: ReferenceServer):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if not self._authorised():
+                return
+            if self.path == '/v1/task':
+                self._task()
+            elif self.path == '/v1/task/stream' and server.stream_enabled:
+                self._stream()
+            else:
+                self._send(404, b'{"message": "Not found"}')
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if self.path == '/_control/tasks':
+                task = server.add_task(body['prompt'], body.get('ticket_id', 'DH-1'), body.get('id'))
+                self._send(201, json.dumps(task.__dict__).encode('utf-8'))
+            elif self.path == '/_control/complete':
+                task = server.complete()
+                self._send(200, json.dumps(task.__dict__ if task else {}).encode('utf-8'))
+            else:
+                self._send(404, b'{"message": "Not found"}')
+
+        def log_message(self, format, *args):
+            pass
+
+        def _authorised(self) -> bool:
+            if server.api_key is None or self.headers.get('X-API-KEY') == server.api_key:
+                return True
+            self._send(401, b'{"message": "Invalid API key"}')
+            return False
+
+        def _task(self):
+            wait = _prefer_wait(self.headers.get('Prefer'))
+            with server._condition:
+                server.requests += 1
+                deadline = time.monotonic() + wait
+                # Long poll: hold the request while there is nothing to hand out
+                while (wait and server.current is None and not server.queue
+                       and not server._stopping and time.monotonic() < deadline):
+                    server._condition.wait(deadline - time.monotonic())
+
+                etag = f'"{server._version}"'
+                not_modified = (self.headers.get('If-None-Match') == etag
+                                and (server.current is not None or not server.queue))
+                if not_modified:
+                    status, task = 304, None
+                else:
+                    status, task = server.answer()
+                    etag = f'"{server._version}"'
+
+            headers = {'ETag': etag} if status != 200 else {}
+            if wait:
+                headers['Preference-Applied'] = f"wait={int(wait)}"
+            body = json.dumps(task.__dict__).encode('utf-8') if task is not None else b''
+            self._send(status, body, headers)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            last_id = _int(self.headers.get('Last-Event-ID'))
+            with server._condition:
+                generation = server._stream_generation
+                # Replay what a resuming client missed, then the current state
+                backlog = [event for event in server._events if last_id is not None and event[0] > last_id]
+                backlog.append(server._push_event())
+                version = server._version
+
+            try:
+                for event in backlog:
+                    self._chunk(_format_event(*event))
+                while True:
+                    with server._condition:
+                        server._condition.wait_for(
+                            lambda: (server._version != version or server._stopping
+                                     or server._stream_generation != generation),
+                            timeout=server.heartbeat,
+                        )
+                        if server._stopping or server._stream_generation != generation:
+                            break
+                        event = server._push_event() if server._version != version else None
+                        version = server._version
+                    self._chunk(_format_event(*event) if event else b': keep-alive\n\n')
+                self._chunk(b'')
+            except OSError:
+                pass
+            self.close_connection = True
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def _send(self, status: int, body: bytes, headers: Optional[dict] = None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if body:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def _format_event(event_id: int, name: str, data: str) -> bytes:
+    return f"id: {event_id}\nevent: {name}\ndata: {data}\n\n".encode('utf-8')
+
+
+def _prefer_wait(value: Optional[str]) -> float:
+    for preference in (value or '').split(','):
+        name, _, seconds = preference.strip().partition('=')
+        if name.strip().lower() == 'wait':
+            return max(0.0, min(float(_int(seconds) or 0), 300.0))
+    return 0.0
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def run(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the reference server until interrupted.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the DevHelm /v1/task API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--api-key', default=None, help="Required X-API-KEY (default: accept any)")
+    parser.add_argument('--task', action='append', default=[], metavar='TICKET:PROMPT',
+                        help="Queue a task on startup (repeatable)")
+    args = parser.parse_args(argv)
+
+    server = ReferenceServer(args.host, args.port, api_key=args.api_key)
+    for spec in args.task:
+        ticket_id, _, prompt = spec.partition(':')
+        server.add_task(prompt or ticket_id, ticket_id if prompt else 'DH-1')
+
+    server.start()
+    print(f"Reference server listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,163 @@
+"""
+Scheduler module for deciding how long the agent loop sleeps between polls.
+
+This module provides the PollScheduler class used by main(). Instead of a
+fixed 60-second sleep, the scheduler polls quickly right after a prompt has
+been sent and around the time the current task is expected to finish, and
+backs off exponentially while Junie is busy or no task is available.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from .tracing import traced
+
+
+class PollScheduler:
+    """
+    Adaptive polling interval with exponential backoff and jitter.
+
+    The interval starts at min_interval and is multiplied by backoff (up to
+    max_interval) each time on_busy(), on_idle() or on_error() is called.
+    For fast_window seconds after on_prompt_sent() the fast_interval is used
+    instead. The scheduler also learns how long tasks usually take (prompt
+    sent until "Start Again" is visible) and drops back to min_interval once
+    that time has nearly elapsed, so completion is noticed quickly.
+    """
+
+    def __init__(
+        self,
+        fast_interval: float = 1.0,
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        backoff: float = 2.0,
+        jitter: float = 0.1,
+        fast_window: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        """
+        Initialize the PollScheduler.
+
+        Args:
+            fast_interval: Seconds between polls right after a prompt is sent
+            min_interval: Shortest interval outside the fast window
+            max_interval: Longest interval reached by backing off
+            backoff: Multiplier applied to the interval on every backoff
+            jitter: Random spread as a fraction of the delay (0.1 = +/-10%)
+            fast_window: Seconds after a prompt during which fast_interval is used
+            clock: Monotonic clock, replaceable in tests
+            rng: Random source returning [0, 1), replaceable in tests
+        """
+        if not 0 < fast_interval <= min_interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < fast <= min <= max")
+        if backoff < 1.0:
+            raise ValueError("Backoff multiplier must be at least 1.0")
+
+        self.fast_interval = fast_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.fast_window = fast_window
+        self._clock = clock
+        self._rng = rng
+
+        self.interval = min_interval
+        self._fast_until = 0.0
+        self._hold_until = 0.0
+        self._prompt_sent_at: Optional[float] = None
+        # Exponentially weighted average of task durations, in seconds
+        self.expected_duration: Optional[float] = None
+
+    def on_prompt_sent(self) -> None:
+        """Record that a prompt (new task or "continue") was just entered."""
+        now = self._clock()
+        self._prompt_sent_at = now
+        self._fast_until = now + self.fast_window
+        self.interval = self.min_interval
+
+    def on_ready(self) -> None:
+        """Record that the UI was found ready; updates the expected task duration."""
+        if self._prompt_sent_at is None:
+            return
+        duration = self._clock() - self._prompt_sent_at
+        if self.expected_duration is None:
+            self.expected_duration = duration
+        else:
+            self.expected_duration = 0.7 * self.expected_duration + 0.3 * duration
+        self._prompt_sent_at = None
+
+    def on_busy(self) -> None:
+        """Record that Junie is still working; backs off."""
+        self._back_off()
+
+    def on_idle(self) -> None:
+        """Record that no task was available; backs off."""
+        self._back_off()
+
+    def on_error(self) -> None:
+        """Record a failed iteration; backs off."""
+        self._back_off()
+
+    def defer(self, seconds: float) -> None:
+        """
+        Honour a server Retry-After hint: no poll happens before it expires.
+
+        Args:
+            seconds: Seconds the server asked the agent to wait
+        """
+        self._hold_until = max(self._hold_until, self._clock() + seconds)
+
+    def next_delay(self) -> float:
+        """
+        Compute the delay before the next poll.
+
+        Returns:
+            float: Seconds to sleep
+        """
+        now = self._clock()
+        if now < self._fast_until:
+            delay = self.fast_interval
+        elif self._completion_expected(now):
+            delay = self.min_interval
+        else:
+            delay = self.interval
+
+        spread = delay * self.jitter
+        delay = max(0.0, delay + (self._rng() * 2 - 1) * spread)
+        return max(delay, self._hold_until - now)
+
+    @traced('scheduler.sleep')
+    def sleep(self, wake: Optional[threading.Event] = None) -> float:
+        """
+        Sleep until the next poll.
+
+        Args:
+            wake: Optional event that ends the sleep early when set (for
+                example by a DamageWatcher when the screen changes); it is
+                ignored while a defer() hold is active
+
+        Returns:
+            float: Seconds slept
+        """
+        delay = self.next_delay()
+        # A wake-up must not cut short a server Retry-After hold
+        if wake is None or self._hold_until > self._clock():
+            time.sleep(delay)
+            return delay
+
+        started = time.monotonic()
+        wake.wait(delay)
+        return time.monotonic() - started
+
+    def _back_off(self) -> None:
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def _completion_expected(self, now: float) -> bool:
+        if self._prompt_sent_at is None or self.expected_duration is None:
+            return False
+        # Start polling quickly a little before the usual completion time
+        return now - self._prompt_sent_at >= 0.8 * self.expected_duration
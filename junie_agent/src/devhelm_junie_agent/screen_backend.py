@@ -0,0 +1,476 @@
+"""
+Screen backend module abstracting how the agent sees and drives the screen.
+
+UIInteraction talks to the screen only through a ScreenBackend, which covers
+capturing frames, matching templates, clicking and typing. Three
+implementations are provided:
+
+- PyAutoGUIBackend: the live desktop, driven through pyautogui
+- XvfbBackend: an Xvfb (or any X11) display, captured through MIT-SHM and
+  driven through XTest, without touching the user's session
+- ReplayBackend: a directory of recorded frames; input is recorded instead of
+  sent, so detection and the agent loop run deterministically with no display
+"""
+
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .detection import DetectionResult, Matcher, RegionTracker, detect_templates
+from .screen_capture import ScreenCapture, XShmCapture, create_screen_capture
+from .text_input import TextInputChain, XTestTextInput, create_text_input, default_keyboard
+
+
+class ScreenBackend:
+    """
+    Base class for screen backends.
+
+    Key names passed to press() and hotkey() use pyautogui naming (e.g.
+    'enter', 'ctrl', 'backspace'), so every backend can serve as the
+    keyboard of a TextInputChain.
+    """
+
+    name = "base"
+
+    # Chain used by type_text(); set by subclasses
+    text_input: Optional[TextInputChain] = None
+
+    def capture(self) -> np.ndarray:
+        """
+        Capture the full screen.
+
+        Returns:
+            np.ndarray: 2D uint8 grayscale array of the screen contents
+        """
+        raise NotImplementedError
+
+    def match(
+        self,
+        frame: np.ndarray,
+        templates: dict,
+        confidence: float = 0.9,
+        captured_at: Optional[float] = None,
+        tracker: Optional[RegionTracker] = None,
+        matcher: Optional[Matcher] = None,
+    ) -> DetectionResult:
+        """
+        Match templates against a captured frame.
+
+        Args:
+            frame: Frame returned by capture()
+            templates: Mapping of template name to grayscale template
+            confidence: Minimum correlation score for a match (0.0 - 1.0)
+            captured_at: time.monotonic() timestamp of the frame capture
+            tracker: Optional RegionTracker for region-of-interest searches
+            matcher: Engine for full-frame searches (defaults to match_template)
+
+        Returns:
+            DetectionResult: Locations of every template
+        """
+        return detect_templates(
+            frame,
+            templates,
+            confidence=confidence,
+            captured_at=captured_at,
+            tracker=tracker,
+            matcher=matcher,
+        )
+
+    def click(self, x: int, y: int) -> None:
+        """Left-click at screen coordinates (x, y)."""
+        raise NotImplementedError
+
+    def press(self, key: str) -> None:
+        """Press and release a single key."""
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str) -> None:
+        """Press a key combination, e.g. hotkey('ctrl', 'v')."""
+        raise NotImplementedError
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        """Type text one character at a time."""
+        raise NotImplementedError
+
+    def type_text(self, text: str) -> str:
+        """
+        Enter text into the focused input box using the fastest method.
+
+        Args:
+            text: The text to enter
+
+        Returns:
+            str: Name of the text input method that was used
+        """
+        if self.text_input is None:
+            raise NotImplementedError
+        return self.text_input.enter(text)
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+
+class PyAutoGUIBackend(ScreenBackend):
+    """Drives the live desktop through pyautogui."""
+
+    name = "pyautogui"
+
+    def __init__(
+        self,
+        screen_capture: Optional[ScreenCapture] = None,
+        text_input_mode: str = 'auto',
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            screen_capture: Capture backend (defaults to
+                create_screen_capture('auto'))
+            text_input_mode: Mode passed to create_text_input()
+        """
+        self._gui = default_keyboard()
+        self.screen_capture = screen_capture if screen_capture is not None else create_screen_capture()
+        self.text_input = create_text_input(text_input_mode, keyboard=self._gui)
+
+    def capture(self) -> np.ndarray:
+        return self.screen_capture.capture()
+
+    def click(self, x: int, y: int) -> None:
+        self._gui.click(x, y)
+
+    def press(self, key: str) -> None:
+        self._gui.press(key)
+
+    def hotkey(self, *keys: str) -> None:
+        self._gui.hotkey(*keys)
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        self._gui.write(text, interval=interval)
+
+    def close(self) -> None:
+        self.screen_capture.close()
+
+
+class XvfbBackend(ScreenBackend):
+    """
+    Drives an X11 display (typically Xvfb) through MIT-SHM and XTest.
+
+    Use XvfbBackend.start() to launch a private Xvfb server that is stopped
+    again by close().
+    """
+
+    name = "xvfb"
+
+    # pyautogui key names that differ from X keysym names
+    KEYSYMS = {
+        'enter': 'Return',
+        'return': 'Return',
+        'ctrl': 'Control_L',
+        'shift': 'Shift_L',
+        'alt': 'Alt_L',
+        'backspace': 'BackSpace',
+        'delete': 'Delete',
+        'tab': 'Tab',
+        'esc': 'Escape',
+        'escape': 'Escape',
+        'space': 'space',
+        'home': 'Home',
+        'end': 'End',
+        'up': 'Up',
+        'down': 'Down',
+        'left': 'Left',
+        'right': 'Right',
+    }
+
+    def __init__(
+        self,
+        display_name: str,
+        text_input_mode: str = 'xtest',
+        process: Optional[subprocess.Popen] = None,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            display_name: X display to drive (e.g. ':99')
+            text_input_mode: Mode passed to create_text_input()
+            process: Xvfb process owned by this backend, terminated by close()
+        """
+        self.display_name = display_name
+        self._process = process
+        self.screen_capture = XShmCapture(display_name)
+        self._xtest = XTestTextInput(display_name=display_name)
+        self.text_input = create_text_input(text_input_mode, keyboard=self, display_name=display_name)
+
+    @classmethod
+    def start(
+        cls,
+        width: int = 1920,
+        height: int = 1080,
+        display_name: Optional[str] = None,
+        **kwargs,
+    ) -> 'XvfbBackend':
+        """
+        Launch a private Xvfb server and return a backend bound to it.
+
+        Args:
+            width: Screen width in pixels
+            height: Screen height in pixels
+            display_name: Display to use (defaults to the first free one)
+            **kwargs: Passed to the XvfbBackend constructor
+
+        Returns:
+            XvfbBackend: Backend that stops the server when closed
+        """
+        display_name, process = start_xvfb(width, height, display_name)
+        try:
+            return cls(display_name, process=process, **kwargs)
+        except Exception:
+            process.terminate()
+            process.wait()
+            raise
+
+    def capture(self) -> np.ndarray:
+        return self.screen_capture.capture()
+
+    def click(self, x: int, y: int) -> None:
+        from Xlib import X
+        from Xlib.ext import xtest
+
+        display = self._xtest._get_display()
+        xtest.fake_input(display, X.MotionNotify, x=int(x), y=int(y))
+        xtest.fake_input(display, X.ButtonPress, 1)
+        xtest.fake_input(display, X.ButtonRelease, 1)
+        display.sync()
+
+    def press(self, key: str) -> None:
+        self._xtest.key_combo([self._keysym_name(key)])
+
+    def hotkey(self, *keys: str) -> None:
+        self._xtest.key_combo([self._keysym_name(key) for key in keys])
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        if interval <= 0:
+            self._xtest.type_text(text)
+            return
+        for char in text:
+            self._xtest.type_text(char)
+            time.sleep(interval)
+
+    def close(self) -> None:
+        self.screen_capture.close()
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def _keysym_name(self, key: str) -> str:
+        return self.KEYSYMS.get(key.lower(), key)
+
+
+class ReplayBackend(ScreenBackend):
+    """
+    Replays recorded frames and records input instead of sending it.
+
+    Frames are returned in order by capture(); once they run out the last
+    frame is repeated (or the sequence restarts when loop=True). Every
+    click, key press and typed text is appended to events.
+    """
+
+    name = "replay"
+
+    def __init__(self, frames: Union[str, Path, Sequence[np.ndarray]], loop: bool = False):
+        """
+        Initialize the backend.
+
+        Args:
+            frames: Directory of recorded frames (PNG files, replayed in file
+                name order) or a sequence of grayscale arrays
+            loop: Restart from the first frame after the last one
+        """
+        if isinstance(frames, (str, Path)):
+            self.frames = load_frames(Path(frames))
+        else:
+            self.frames = [np.asarray(frame) for frame in frames]
+        if not self.frames:
+            raise ValueError("ReplayBackend needs at least one frame")
+
+        self.loop = loop
+        self.position = 0
+        self.events: List[Tuple] = []
+
+    def capture(self) -> np.ndarray:
+        frame = self.frames[self.position]
+        if self.position + 1 < len(self.frames):
+            self.position += 1
+        elif self.loop:
+            self.position = 0
+        return frame
+
+    def click(self, x: int, y: int) -> None:
+        self.events.append(('click', x, y))
+
+    def press(self, key: str) -> None:
+        self.events.append(('press', key))
+
+    def hotkey(self, *keys: str) -> None:
+        self.events.append(('hotkey',) + keys)
+
+    def write(self, text: str, interval: float = 0.0) -> None:
+        self.events.append(('write', text))
+
+    def type_text(self, text: str) -> str:
+        self.events.append(('type', text))
+        return self.name
+
+
+def load_frames(directory: Path) -> List[np.ndarray]:
+    """
+    Load recorded frames from a directory as grayscale arrays.
+
+    Args:
+        directory: Directory containing PNG frames
+
+    Returns:
+        list: Frames in file name order
+
+    Raises:
+        FileNotFoundError: If the directory does not exist
+    """
+    if not directory.is_dir():
+        raise FileNotFoundError(f"Frames directory not found: {directory}")
+
+    frames = []
+    for path in sorted(directory.glob("*.png")):
+        frame = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if frame is None:
+            raise FileNotFoundError(f"Unable to read frame: {path}")
+        frames.append(frame)
+    return frames
+
+
+def record_frames(backend: ScreenBackend, directory: Path, count: int, interval: float = 1.0) -> List[Path]:
+    """
+    Capture frames from a backend into a directory for later replay.
+
+    Args:
+        backend: Backend to capture from
+        directory: Output directory (created if missing)
+        count: Number of frames to capture
+        interval: Seconds between captures
+
+    Returns:
+        list: Paths of the written frames
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for index in range(count):
+        if index:
+            time.sleep(interval)
+        path = directory / f"frame_{index:05d}.png"
+        cv2.imwrite(str(path), backend.capture())
+        paths.append(path)
+    return paths
+
+
+def start_xvfb(
+    width: int = 1920,
+    height: int = 1080,
+    display_name: Optional[str] = None,
+    timeout: float = 10.0,
+) -> Tuple[str, subprocess.Popen]:
+    """
+    Launch an Xvfb server with a 24-bit screen.
+
+    Args:
+        width: Screen width in pixels
+        height: Screen height in pixels
+        display_name: Display to use (defaults to the first free one from :99)
+        timeout: Seconds to wait for the server to accept connections
+
+    Returns:
+        tuple: (display_name, process)
+
+    Raises:
+        RuntimeError: If Xvfb exits or does not come up within the timeout
+    """
+    if display_name is None:
+        display_name = _free_display()
+
+    process = subprocess.Popen(
+        ["Xvfb", display_name, "-screen", "0", f"{width}x{height}x24", "-nolisten", "tcp", "-br"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    socket_path = f"/tmp/.X11-unix/X{display_name.lstrip(':').split('.')[0]}"
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            process.wait()
+            raise RuntimeError(f"Xvfb failed to start on {display_name}")
+        time.sleep(0.05)
+
+    return display_name, process
+
+
+def _free_display(first: int = 99) -> str:
+    number = first
+    while os.path.exists(f"/tmp/.X11-unix/X{number}") or os.path.exists(f"/tmp/.X{number}-lock"):
+        number += 1
+    return f":{number}"
+
+
+def create_screen_backend(
+    mode: str = 'pyautogui',
+    display_name: Optional[str] = None,
+    replay_dir: Optional[str] = None,
+    text_input_mode: str = 'auto',
+    screen_capture_mode: str = 'auto',
+) -> ScreenBackend:
+    """
+    Create a screen backend.
+
+    Args:
+        mode: 'pyautogui' (live desktop), 'xvfb' (attach to an existing X
+            display through MIT-SHM/XTest) or 'replay' (recorded frames)
+        display_name: X display for the 'xvfb' backend (defaults to $DISPLAY)
+        replay_dir: Frames directory for the 'replay' backend
+        text_input_mode: Mode passed to create_text_input()
+        screen_capture_mode: Mode passed to create_screen_capture() by the
+            'pyautogui' backend
+
+    Returns:
+        ScreenBackend: The configured backend
+
+    Raises:
+        ValueError: If the mode is unknown or required settings are missing
+    """
+    mode = (mode or 'pyautogui').lower()
+
+    if mode == 'pyautogui':
+        return PyAutoGUIBackend(
+            screen_capture=create_screen_capture(screen_capture_mode, display_name),
+            text_input_mode=text_input_mode,
+        )
+    if mode == 'xvfb':
+        display_name = display_name or os.getenv('DISPLAY')
+        if not display_name:
+            raise ValueError("The xvfb screen backend needs a display (set DISPLAY)")
+        # 'auto' includes the clipboard, which a bare Xvfb usually lacks
+        return XvfbBackend(display_name, text_input_mode='xtest' if text_input_mode == 'auto' else text_input_mode)
+    if mode == 'replay':
+        if not replay_dir:
+            raise ValueError("The replay screen backend needs a frames directory")
+        return ReplayBackend(replay_dir)
+
+    raise ValueError(f"Unknown screen backend: {mode}")
@@ -0,0 +1,356 @@
+"""
+Screen capture module for grabbing grayscale frames of the display.
+
+This module provides the capture backends used by UIInteraction:
+
+- XShmCapture: reads the X11 framebuffer through the MIT-SHM extension
+  straight into a shared memory segment that is exposed as a reusable NumPy
+  array. No subprocess, temporary file or PNG round trip is involved.
+- PyAutoGUICapture: the original pyautogui.screenshot() path, which on Linux
+  shells out to gnome-screenshot/scrot.
+
+create_screen_capture() picks XShmCapture automatically when the X server
+supports it and falls back to pyautogui otherwise.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class ScreenCaptureException(Exception):
+    """Exception raised when a screen capture backend cannot be used."""
+    pass
+
+
+class ScreenCapture:
+    """
+    Base class for screen capture backends.
+
+    Subclasses implement capture() and may release resources in close().
+    """
+
+    name = "base"
+
+    def capture(self) -> np.ndarray:
+        """
+        Capture the full screen.
+
+        Returns:
+            np.ndarray: 2D uint8 grayscale array of the screen contents
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        pass
+
+
+class PyAutoGUICapture(ScreenCapture):
+    """Captures the screen with pyautogui.screenshot()."""
+
+    name = "pyautogui"
+
+    def capture(self) -> np.ndarray:
+        # Imported lazily because importing pyautogui requires a display
+        import pyautogui
+        screenshot = pyautogui.screenshot()
+        return np.asarray(screenshot.convert('L'))
+
+
+# X11 constants used below
+_Z_PIXMAP = 2
+_ALL_PLANES = 0xFFFFFFFFFFFFFFFF
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', ctypes.c_ulong),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int),
+    ]
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of the Xlib XImage structure (the function table that
+    # follows is never touched from Python)
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+        ('red_mask', ctypes.c_ulong),
+        ('green_mask', ctypes.c_ulong),
+        ('blue_mask', ctypes.c_ulong),
+        ('obdata', ctypes.c_void_p),
+    ]
+
+
+_XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+# Number of X protocol errors reported since the handler was installed
+_x_error_count = 0
+
+
+@_XErrorHandler
+def _record_x_error(display, event):
+    # Xlib's default handler terminates the process; count the error instead
+    # so a failed XShmAttach (e.g. on a forwarded display) can fall back
+    global _x_error_count
+    _x_error_count += 1
+    return 0
+
+
+def _load_library(name: str) -> ctypes.CDLL:
+    path = ctypes.util.find_library(name)
+    if not path:
+        raise ScreenCaptureException(f"lib{name} not found")
+    return ctypes.CDLL(path)
+
+
+class XShmCapture(ScreenCapture):
+    """
+    Captures the root window of an X display through MIT-SHM.
+
+    The X server writes every frame into a shared memory segment that stays
+    attached for the lifetime of the object. capture() returns a grayscale
+    conversion written into a preallocated array, so steady-state captures
+    allocate no memory at all. Requires a 24/32-bit TrueColor display, which
+    includes Xvfb with its default settings.
+    """
+
+    name = "xshm"
+
+    def __init__(self, display_name: Optional[str] = None):
+        """
+        Open the display and attach the shared memory segment.
+
+        Args:
+            display_name: X display to capture (defaults to $DISPLAY)
+
+        Raises:
+            ScreenCaptureException: If the display cannot be opened or does
+                not support MIT-SHM
+        """
+        self.display_name = display_name if display_name is not None else os.getenv('DISPLAY')
+        if not self.display_name:
+            raise ScreenCaptureException("No X display configured")
+
+        self._xlib = _load_library('X11')
+        self._xext = _load_library('Xext')
+        self._libc = _load_library('c')
+        self._declare_functions()
+
+        self._display = self._xlib.XOpenDisplay(self.display_name.encode())
+        if not self._display:
+            raise ScreenCaptureException(f"Unable to open display {self.display_name}")
+
+        self._image = None
+        self._shminfo = _XShmSegmentInfo()
+        self._attached = False
+        try:
+            self._attach()
+        except Exception:
+            self.close()
+            raise
+
+    def _declare_functions(self) -> None:
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultScreen.restype = ctypes.c_int
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDestroyImage.argtypes = [ctypes.POINTER(_XImage)]
+        xlib.XSetErrorHandler.argtypes = [_XErrorHandler]
+        xlib.XSetErrorHandler.restype = ctypes.c_void_p
+
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmQueryExtension.restype = ctypes.c_int
+        xext.XShmCreateImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_char_p, ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+            ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        ]
+        xext.XShmGetImage.restype = ctypes.c_int
+
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmget.restype = ctypes.c_int
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    def _attach(self) -> None:
+        xlib, xext, libc = self._xlib, self._xext, self._libc
+
+        if not xext.XShmQueryExtension(self._display):
+            raise ScreenCaptureException("X server does not support MIT-SHM")
+        xlib.XSetErrorHandler(_record_x_error)
+        errors_before = _x_error_count
+
+        screen = xlib.XDefaultScreen(self._display)
+        self._root = xlib.XRootWindow(self._display, screen)
+        self.width = xlib.XDisplayWidth(self._display, screen)
+        self.height = xlib.XDisplayHeight(self._display, screen)
+        depth = xlib.XDefaultDepth(self._display, screen)
+
+        self._image = xext.XShmCreateImage(
+            self._display, xlib.XDefaultVisual(self._display, screen), depth,
+            _Z_PIXMAP, None, ctypes.byref(self._shminfo), self.width, self.height,
+        )
+        if not self._image:
+            raise ScreenCaptureException("XShmCreateImage failed")
+
+        image = self._image.contents
+        if image.bits_per_pixel != 32:
+            raise ScreenCaptureException(f"Unsupported pixel format: {image.bits_per_pixel} bpp")
+
+        size = image.bytes_per_line * image.height
+        shmid = libc.shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+        if shmid < 0:
+            raise ScreenCaptureException("shmget failed")
+        self._shminfo.shmid = shmid
+
+        address = libc.shmat(shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(shmid, _IPC_RMID, None)
+            raise ScreenCaptureException("shmat failed")
+        self._shminfo.shmaddr = address
+        self._shminfo.readOnly = 0
+        image.data = address
+
+        if not xext.XShmAttach(self._display, ctypes.byref(self._shminfo)):
+            raise ScreenCaptureException("XShmAttach failed")
+        xlib.XSync(self._display, 0)
+        if _x_error_count != errors_before:
+            # The server could not map the segment (e.g. a remote display)
+            libc.shmctl(shmid, _IPC_RMID, None)
+            raise ScreenCaptureException("XShmAttach was rejected by the X server")
+        self._attached = True
+
+        # Mark the segment for removal now; it is freed once both sides detach,
+        # so a crash never leaks it
+        libc.shmctl(shmid, _IPC_RMID, None)
+
+        # Zero-copy view of the shared segment (BGRA rows, possibly padded)
+        raw = (ctypes.c_uint8 * size).from_address(address)
+        self._bgra = np.ctypeslib.as_array(raw).reshape(
+            image.height, image.bytes_per_line // 4, 4
+        )[:, :image.width]
+        self._gray = np.empty((image.height, image.width), dtype=np.uint8)
+
+    def capture_bgra(self) -> np.ndarray:
+        """
+        Capture the screen into the shared segment.
+
+        Returns:
+            np.ndarray: (height, width, 4) BGRA view of the shared segment.
+                The view is overwritten by the next capture.
+
+        Raises:
+            ScreenCaptureException: If the X server rejected the request
+        """
+        if not self._xext.XShmGetImage(self._display, self._root, self._image, 0, 0, _ALL_PLANES):
+            raise ScreenCaptureException("XShmGetImage failed")
+        return self._bgra
+
+    def capture(self) -> np.ndarray:
+        """
+        Capture the screen as grayscale.
+
+        Returns:
+            np.ndarray: 2D uint8 array. The same array is reused (and
+                overwritten) by every call.
+        """
+        cv2.cvtColor(self.capture_bgra(), cv2.COLOR_BGRA2GRAY, dst=self._gray)
+        return self._gray
+
+    def close(self) -> None:
+        if self._display is None:
+            return
+        if self._attached:
+            self._xext.XShmDetach(self._display, ctypes.byref(self._shminfo))
+            self._xlib.XSync(self._display, 0)
+            self._attached = False
+        if self._image:
+            # The data pointer belongs to the shared segment, not malloc()
+            self._image.contents.data = None
+            self._xlib.XDestroyImage(self._image)
+            self._image = None
+        if self._shminfo.shmaddr:
+            self._libc.shmdt(self._shminfo.shmaddr)
+            self._shminfo.shmaddr = None
+        self._xlib.XCloseDisplay(self._display)
+        self._display = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def create_screen_capture(mode: str = 'auto', display_name: Optional[str] = None) -> ScreenCapture:
+    """
+    Create a screen capture backend.
+
+    Args:
+        mode: 'auto' (MIT-SHM when available, else pyautogui), 'xshm' or
+            'pyautogui'
+        display_name: X display to capture (defaults to $DISPLAY)
+
+    Returns:
+        ScreenCapture: The selected backend
+
+    Raises:
+        ScreenCaptureException: If mode is 'xshm' and MIT-SHM is unavailable
+        ValueError: If the mode is unknown
+    """
+    mode = (mode or 'auto').lower()
+
+    if mode == 'pyautogui':
+        return PyAutoGUICapture()
+    if mode == 'xshm':
+        return XShmCapture(display_name)
+    if mode != 'auto':
+        raise ValueError(f"Unknown screen capture mode: {mode}")
+
+    if sys.platform.startswith('linux'):
+        try:
+            return XShmCapture(display_name)
+        except ScreenCaptureException:
+            pass
+    return PyAutoGUICapture()
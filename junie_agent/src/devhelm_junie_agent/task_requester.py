@@ -6,10 +6,14 @@ the DevHelm API to fetch new tasks for the agent.
 """
 
 import json
+import time
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional, Union
-import urllib3
+
+from .http_client import CircuitBreaker, HttpClient, HttpClientException, parse_retry_after
+from .metrics import REQUEST_SECONDS, request_status
+from .tracing import annotate, traced
 
 
 class TaskStatus(Enum):
@@ -49,21 +53,71 @@ class TaskRequester:
     Handles requests to the DevHelm API to fetch new tasks.
     
     This class makes HTTP requests to the DevHelm API endpoint to retrieve
-    new tasks for the agent to process.
+    new tasks for the agent to process. Requests go through an HttpClient,
+    so they time out, retry and trip a circuit breaker instead of hanging.
+    
+    Two optional capabilities cut down empty polls:
+    
+    - Long polling: the request carries "Prefer: wait=N" (RFC 7240) and a
+      server that supports it holds the request until a task appears or N
+      seconds pass, confirming with a "Preference-Applied" header. Servers
+      that leave several empty responses in a row unconfirmed are polled
+      plainly from then on.
+    - Conditional requests: the ETag of a 204/409 response is sent back as
+      If-None-Match, and a 304 reply repeats the previous status without a
+      body. Servers that send no ETag are unaffected.
     """
     
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        http_client: Optional[HttpClient] = None,
+        long_poll: float = 0.0,
+        conditional: bool = False,
+        long_poll_fallback: int = 3,
+        breaker: Optional[CircuitBreaker] = None
+    ):
         """
         Initialize the TaskRequester.
         
         Args:
             base_url: The base URL for the DevHelm API
             api_key: The API key for authentication
+            http_client: Client used for requests. Defaults to an HttpClient
+                with default timeouts, retries and pool size.
+            long_poll: Seconds the server may hold a request until a task
+                appears (0 disables long polling)
+            conditional: Send If-None-Match with the last ETag
+            long_poll_fallback: Empty responses in a row without
+                Preference-Applied after which long polling is dropped
+            breaker: Circuit breaker guarding this requester's calls (defaults
+                to the HTTP client's; requesters sharing a client across API
+                keys pass their own)
         """
         self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
         self.api_key = api_key
-        self.http = urllib3.PoolManager()
+        self.http = http_client if http_client is not None else HttpClient()
+        self.long_poll = long_poll
+        self.conditional = conditional
+        self.long_poll_fallback = long_poll_fallback
+        self.breaker = breaker if breaker is not None else self.http.breaker
+        
+        # Seconds the server asked us to wait (Retry-After) on the last response
+        self.retry_after: Optional[float] = None
+        
+        # None until the server has answered a long-poll request
+        self.long_poll_supported: Optional[bool] = None
+        # True if the server held the last request open (long poll applied)
+        self.long_polled = False
+        # Empty responses in a row that did not apply the long poll
+        self._long_poll_misses = 0
+        
+        # ETag and status of the last 204/409 response, for conditional requests
+        self._etag: Optional[str] = None
+        self._last_status: Optional[TaskStatus] = None
     
+    @traced('task.request')
     def request_task(self) -> Union[Task, TaskStatus]:
         """
         Request a new task from the DevHelm API.
@@ -76,49 +130,51 @@ class TaskRequester:
             TaskStatus.BUSY: If there is already a task in progress (HTTP 409)
             TaskStatus.NONE: If no tasks are available to work on (HTTP 204)
             
+            A 304 Not Modified reply to a conditional request returns the
+            status of the previous response.
+            
         Raises:
-            TaskRequesterException: If the server returns an invalid response
-                or an unexpected HTTP status code
+            TaskRequesterException: If the server returns an invalid response,
+                an unexpected HTTP status code, or cannot be reached
         """
+        self.retry_after = None
+        self.long_polled = False
         url = f"{self.base_url}/v1/task"
         headers = {
             'X-API-KEY': self.api_key,
             'Content-Type': 'application/json'
         }
+        options = {}
         
+        long_poll = self.long_poll > 0 and self.long_poll_supported is not False
+        if long_poll:
+            headers['Prefer'] = f"wait={int(self.long_poll)}"
+            options['timeout'] = self.http.timeout_for_wait(self.long_poll)
+        if self.conditional and self._etag is not None:
+            headers['If-None-Match'] = self._etag
+        
+        started = time.perf_counter()
+        status = None
         try:
-            response = self.http.request('GET', url, headers=headers)
+            response = self.http.request('GET', url, headers=headers, breaker=self.breaker, **options)
+            status = response.status
+            self.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            
+            if long_poll:
+                self._track_long_poll(response)
+            
+            # Handle not modified response (same status as the previous poll)
+            if response.status == 304:
+                if self._last_status is None:
+                    self._etag = None
+                    raise TaskRequesterException("Server returned 304 without a previous status")
+                return self._last_status
+            
+            self._remember(response)
             
             # Handle successful response with new task
             if response.status == 200:
-                try:
-                    data = json.loads(response.data.decode('utf-8'))
-                    
-                    # Validate required fields
-                    if not isinstance(data, dict):
-                        raise TaskRequesterException("Invalid response format: expected JSON object")
-                    
-                    required_fields = ['id', 'ticket_id', 'prompt']
-                    missing_fields = [field for field in required_fields if field not in data]
-                    if missing_fields:
-                        raise TaskRequesterException(f"Missing required fields in response: {missing_fields}")
-                    
-                    # Validate field types
-                    if not isinstance(data['id'], str):
-                        raise TaskRequesterException("Invalid response: 'id' must be a string")
-                    if not isinstance(data['ticket_id'], str):
-                        raise TaskRequesterException("Invalid response: 'ticket_id' must be a string")
-                    if not isinstance(data['prompt'], str):
-                        raise TaskRequesterException("Invalid response: 'prompt' must be a string")
-                    
-                    return Task(
-                        id=data['id'],
-                        ticket_id=data['ticket_id'],
-                        prompt=data['prompt']
-                    )
-                    
-                except json.JSONDecodeError as e:
-                    raise TaskRequesterException(f"Invalid JSON response: {e}")
+                return parse_task(response.data)
             
             # Handle conflict response (task already in progress)
             elif response.status == 409:
@@ -138,9 +194,94 @@ class TaskRequester:
                 
                 raise TaskRequesterException(f"Server returned error: {error_message}")
                 
-        except urllib3.exceptions.HTTPError as e:
-            raise TaskRequesterException(f"HTTP request failed: {e}")
+        except HttpClientException as e:
+            raise TaskRequesterException(str(e))
         except Exception as e:
             if isinstance(e, TaskRequesterException):
                 raise
-            raise TaskRequesterException(f"Unexpected error: {e}")
\ No newline at end of file
+            raise TaskRequesterException(f"Unexpected error: {e}")
+        finally:
+            REQUEST_SECONDS.labels(request_status(status)).observe(time.perf_counter() - started)
+            annotate(status=request_status(status))
+    
+    def _track_long_poll(self, response) -> None:
+        """
+        Record whether the server applied the long poll to a response.
+        
+        A task (or an error) is answered straight away even by a server that
+        supports long polling, so only empty responses count against it.
+        """
+        self.long_polled = 'wait' in _header(response, 'Preference-Applied')
+        if self.long_polled:
+            self.long_poll_supported = True
+            self._long_poll_misses = 0
+        elif response.status in (204, 304):
+            self._long_poll_misses += 1
+            if self._long_poll_misses >= self.long_poll_fallback:
+                self.long_poll_supported = False
+    
+    def _remember(self, response) -> None:
+        """
+        Remember the ETag and status of a response for conditional requests.
+        
+        Tasks are never replayed from a 304, so a 200 response clears the ETag.
+        
+        Args:
+            response: HTTP response from the /v1/task endpoint
+        """
+        status = {204: TaskStatus.NONE, 409: TaskStatus.BUSY}.get(response.status)
+        etag = _header(response, 'ETag')
+        if not self.conditional or status is None or not etag:
+            self._etag = None
+            self._last_status = None
+            return
+        
+        self._etag = etag
+        self._last_status = status
+
+
+def _header(response, name: str) -> str:
+    value = response.headers.get(name)
+    return value if isinstance(value, str) else ''
+
+
+def parse_task(payload: bytes) -> Task:
+    """
+    Parse and validate a task JSON payload.
+    
+    Args:
+        payload: UTF-8 encoded JSON object with id, ticket_id and prompt
+        
+    Returns:
+        Task: The parsed task
+        
+    Raises:
+        TaskRequesterException: If the payload is not a valid task
+    """
+    try:
+        data = json.loads(payload.decode('utf-8'))
+    except json.JSONDecodeError as e:
+        raise TaskRequesterException(f"Invalid JSON response: {e}")
+    
+    # Validate required fields
+    if not isinstance(data, dict):
+        raise TaskRequesterException("Invalid response format: expected JSON object")
+    
+    required_fields = ['id', 'ticket_id', 'prompt']
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        raise TaskRequesterException(f"Missing required fields in response: {missing_fields}")
+    
+    # Validate field types
+    if not isinstance(data['id'], str):
+        raise TaskRequesterException("Invalid response: 'id' must be a string")
+    if not isinstance(data['ticket_id'], str):
+        raise TaskRequesterException("Invalid response: 'ticket_id' must be a string")
+    if not isinstance(data['prompt'], str):
+        raise TaskRequesterException("Invalid response: 'prompt' must be a string")
+    
+    return Task(
+        id=data['id'],
+        ticket_id=data['ticket_id'],
+        prompt=data['prompt']
+    )
@@ -0,0 +1,238 @@
+"""
+Task stream module for server-pushed task delivery.
+
+This module provides the TaskStream class. It keeps a server-sent-events
+connection to /v1/task/stream open on a background thread and records the
+task assignments and busy/none notifications the server pushes, so a new
+task is known the moment it is assigned instead of on the next poll. The
+connection is re-established with jittered backoff and resumed with
+Last-Event-ID; while it is down, request_task() falls back to polling
+through the wrapped TaskRequester.
+"""
+
+import codecs
+import random
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional, Union
+
+from .http_client import CircuitBreaker
+from .task_requester import Task, TaskRequester, TaskRequesterException, TaskStatus, parse_task
+
+
+class TaskStream:
+    """
+    Server-sent-events subscription to task assignments.
+
+    request_task() has the same contract as TaskRequester.request_task():
+    pushed tasks are handed out first (in order), otherwise the latest
+    pushed status is returned.
+    """
+
+    def __init__(
+        self,
+        requester: TaskRequester,
+        reconnect_min: float = 1.0,
+        reconnect_max: float = 30.0,
+        heartbeat: float = 15.0,
+        on_event: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the TaskStream.
+
+        Args:
+            requester: TaskRequester providing the URL, API key and HTTP client,
+                and used for polling while the stream is down
+            reconnect_min: First delay before reconnecting, in seconds
+            reconnect_max: Longest delay between reconnection attempts
+            heartbeat: Server keep-alive interval; the read timeout allows
+                two missed heartbeats before reconnecting
+            on_event: Called from the stream thread after every pushed event
+                (main() uses it to end its sleep)
+        """
+        self.requester = requester
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.heartbeat = heartbeat
+        self.on_event = on_event
+
+        self.connected = threading.Event()
+        self.last_event_id: Optional[str] = None
+        self.reconnects = 0
+        # Becomes False if the server has no stream endpoint (HTTP 404)
+        self.supported = True
+        # Reconnect failures must not open the breaker that guards task polling
+        self.breaker = CircuitBreaker(requester.breaker.failure_threshold, requester.breaker.reset_timeout)
+
+        # Mirrors TaskRequester for callers that check them after request_task()
+        self.retry_after: Optional[float] = None
+        self.long_polled = False
+
+        self._lock = threading.Lock()
+        self._tasks: Deque[Task] = deque()
+        self._seen_ids: Deque[str] = deque(maxlen=64)
+        self._status: Optional[TaskStatus] = None
+        self._response = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def url(self) -> str:
+        """URL of the event stream."""
+        return f"{self.requester.base_url}/v1/task/stream"
+
+    def start(self) -> 'TaskStream':
+        """Connect in a background thread (reconnecting until stop())."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="task-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Close the stream and stop reconnecting."""
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            try:
+                # Unblocks the reading thread (urllib3 2.3+); older versions
+                # notice the stop flag at the next heartbeat instead
+                if hasattr(response, 'shutdown'):
+                    response.shutdown()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def request_task(self) -> Union[Task, TaskStatus]:
+        """
+        Get the next task or the current status.
+
+        Returns:
+            Task: The oldest pushed task not handed out yet
+            TaskStatus: The latest pushed status when no task is pending
+
+        Raises:
+            TaskRequesterException: If the stream is down and polling fails
+        """
+        with self._lock:
+            if self._tasks:
+                self.retry_after, self.long_polled = None, False
+                return self._tasks.popleft()
+            if self.connected.is_set() and self._status is not None:
+                self.retry_after, self.long_polled = None, False
+                return self._status
+
+        try:
+            return self.requester.request_task()
+        finally:
+            self.retry_after = self.requester.retry_after
+            self.long_polled = self.requester.long_polled
+
+    def handle_event(self, event: str, data: str, event_id: Optional[str] = None) -> None:
+        """
+        Record one pushed event.
+
+        Args:
+            event: Event name ('task', 'busy' or 'none')
+            data: Event data (the task JSON for 'task' events)
+            event_id: Event id used to resume after a reconnect
+        """
+        if event_id is not None:
+            self.last_event_id = event_id
+
+        with self._lock:
+            if event == 'task':
+                task = parse_task(data.encode('utf-8'))
+                # A resumed stream may replay a task that was already received
+                if task.id not in self._seen_ids:
+                    self._seen_ids.append(task.id)
+                    self._tasks.append(task)
+                self._status = TaskStatus.BUSY
+            elif event == 'busy':
+                self._status = TaskStatus.BUSY
+            elif event == 'none':
+                self._status = TaskStatus.NONE
+            else:
+                return
+
+        if self.on_event is not None:
+            self.on_event()
+
+    def _run(self) -> None:
+        delay = self.reconnect_min
+        while not self._stop.is_set():
+            try:
+                self._consume()
+                delay = self.reconnect_min
+            except Exception:
+                # Connection failures, dropped streams and malformed events
+                # all end in a reconnect
+                pass
+            finally:
+                self.connected.clear()
+                self._response = None
+
+            if self._stop.is_set() or not self.supported:
+                break
+            self.reconnects += 1
+            self._stop.wait(delay * (0.5 + random.random()))
+            delay = min(self.reconnect_max, delay * 2)
+
+    def _consume(self) -> None:
+        headers = {
+            'X-API-KEY': self.requester.api_key,
+            'Accept': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+        }
+        if self.last_event_id is not None:
+            headers['Last-Event-ID'] = self.last_event_id
+
+        http = self.requester.http
+        response = http.request(
+            'GET',
+            self.url,
+            headers=headers,
+            breaker=self.breaker,
+            preload_content=False,
+            retries=False,
+            timeout=http.timeout_for_wait(2 * self.heartbeat),
+        )
+        self._response = response
+        try:
+            if response.status == 404:
+                self.supported = False
+            if response.status != 200:
+                raise TaskRequesterException(f"Task stream unavailable: HTTP {response.status}")
+            self.connected.set()
+            self._parse(response.stream(4096))
+        finally:
+            response.release_conn()
+
+    def _parse(self, chunks) -> None:
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        event, data, event_id = 'message', [], None
+        for chunk in chunks:
+            if self._stop.is_set():
+                return
+            buffer += decoder.decode(chunk)
+            while '\n' in buffer:
+                line, buffer = buffer.split('\n', 1)
+                line = line.rstrip('\r')
+                if not line:
+                    # Blank line: dispatch the event collected so far
+                    if data:
+                        self.handle_event(event, '\n'.join(data), event_id)
+                    event, data, event_id = 'message', [], None
+                elif line.startswith(':'):
+                    continue  # Comment / keep-alive
+                else:
+                    field, _, value = line.partition(':')
+                    value = value[1:] if value.startswith(' ') else value
+                    if field == 'event':
+                        event = value
+                    elif field == 'data':
+                        data.append(value)
+                    elif field == 'id':
+                        event_id = value
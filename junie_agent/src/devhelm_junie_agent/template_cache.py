@@ -0,0 +1,235 @@
+"""
+Template cache module for pre-decoded template images.
+
+This module provides the TemplateCache class used by UIInteraction. Every
+template PNG in the images directory is decoded to grayscale once, together
+with a set of precomputed scaled variants, and kept in memory as NumPy
+arrays. The decoded arrays are persisted to a single .npz pack so that a
+restarted agent skips PNG decoding entirely. The pack records a content hash
+of every source image and is rebuilt automatically when any of them changes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Bump when the pack layout changes so old packs are rebuilt
+PACK_VERSION = 1
+
+DEFAULT_SCALES: Tuple[float, ...] = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0)
+
+
+def default_pack_path() -> Path:
+    """
+    Return the default location of the template pack.
+
+    Uses $XDG_CACHE_HOME (or ~/.cache) so the pack survives restarts without
+    writing into the installed package.
+    """
+    cache_home = os.getenv('XDG_CACHE_HOME') or str(Path.home() / ".cache")
+    return Path(cache_home) / "devhelm-junie-agent" / "templates.npz"
+
+
+class TemplateCache:
+    """
+    In-memory cache of grayscale template arrays and their scaled variants.
+
+    Templates are keyed by file name (e.g. 'start_again.png') and scale.
+    """
+
+    def __init__(
+        self,
+        images_dir: Path,
+        scales: Iterable[float] = DEFAULT_SCALES,
+        pack_path: Optional[Path] = None,
+        persist: bool = True,
+    ):
+        """
+        Initialize the TemplateCache.
+
+        Args:
+            images_dir: Directory containing the template PNG files
+            scales: Scale factors to precompute for every template. 1.0 is
+                always included.
+            pack_path: Location of the on-disk pack (defaults to
+                default_pack_path())
+            persist: Whether to read and write the on-disk pack at all
+        """
+        self.images_dir = Path(images_dir)
+        self.scales = tuple(sorted(set(scales) | {1.0}))
+        self.pack_path: Optional[Path] = None
+        if persist:
+            self.pack_path = Path(pack_path) if pack_path is not None else default_pack_path()
+        self._variants: Dict[str, Dict[float, np.ndarray]] = {}
+        self._manifest: Dict[str, str] = {}
+        self.loaded_from_pack = False
+        # Fleet workers share one cache; loads and refreshes run one at a time
+        self._lock = threading.RLock()
+
+    def load(self) -> None:
+        """
+        Populate the cache from the pack, or decode the PNGs and write a pack.
+
+        The pack is only used when its version, scales and source hashes all
+        match the current images directory.
+        """
+        with self._lock:
+            manifest = self._build_manifest()
+            if self._load_pack(manifest):
+                self.loaded_from_pack = True
+                return
+
+            self._variants = {name: self._decode(name) for name in manifest}
+            self._manifest = manifest
+            self.loaded_from_pack = False
+            self._write_pack()
+
+    def refresh(self) -> bool:
+        """
+        Reload the cache if any source image was added, removed or changed.
+
+        Returns:
+            bool: True if the cache was rebuilt, False if it was up to date
+        """
+        with self._lock:
+            if self._build_manifest() == self._manifest:
+                return False
+            self.load()
+            return True
+
+    def names(self) -> List[str]:
+        """Return the file names of all cached templates."""
+        return sorted(self._variants)
+
+    def get(self, name: str, scale: float = 1.0) -> np.ndarray:
+        """
+        Get a cached template.
+
+        Args:
+            name: Template file name (e.g. 'type_your.png')
+            scale: One of the precomputed scale factors
+
+        Returns:
+            np.ndarray: 2D uint8 grayscale array
+
+        Raises:
+            FileNotFoundError: If no template with that name exists
+            KeyError: If the scale was not precomputed
+        """
+        variants = self._variants.get(name)
+        if variants is None:
+            # A template may have been added to the images directory since load()
+            self.refresh()
+            variants = self._variants.get(name)
+        if variants is None:
+            raise FileNotFoundError(f"{name} not found in {self.images_dir}")
+        return variants[scale]
+
+    def variants(self, name: str) -> Dict[float, np.ndarray]:
+        """
+        Get every precomputed scale of a template.
+
+        Args:
+            name: Template file name (e.g. 'start_again.png')
+
+        Returns:
+            dict: Mapping of scale factor to 2D uint8 grayscale array
+        """
+        with self._lock:
+            self.get(name)
+            return dict(self._variants[name])
+
+    def _build_manifest(self) -> Dict[str, str]:
+        """Hash every PNG in the images directory (no decoding)."""
+        manifest = {}
+        for path in sorted(self.images_dir.glob("*.png")):
+            manifest[path.name] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return manifest
+
+    def _decode(self, name: str) -> Dict[float, np.ndarray]:
+        path = self.images_dir / name
+        image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise FileNotFoundError(f"Unable to read template image: {path}")
+        return {scale: scale_template(image, scale) for scale in self.scales}
+
+    def _pack_header(self, manifest: Dict[str, str]) -> str:
+        return json.dumps({
+            'version': PACK_VERSION,
+            'scales': list(self.scales),
+            'manifest': manifest,
+        }, sort_keys=True)
+
+    def _load_pack(self, manifest: Dict[str, str]) -> bool:
+        if self.pack_path is None or not self.pack_path.exists():
+            return False
+
+        try:
+            with np.load(self.pack_path, allow_pickle=False) as pack:
+                if str(pack['__header__']) != self._pack_header(manifest):
+                    return False
+                variants: Dict[str, Dict[float, np.ndarray]] = {}
+                for name in manifest:
+                    variants[name] = {
+                        scale: pack[_pack_key(name, scale)] for scale in self.scales
+                    }
+        except (OSError, KeyError, ValueError):
+            return False
+
+        self._variants = variants
+        self._manifest = manifest
+        return True
+
+    def _write_pack(self) -> None:
+        if self.pack_path is None:
+            return
+
+        arrays = {
+            _pack_key(name, scale): image
+            for name, scales in self._variants.items()
+            for scale, image in scales.items()
+        }
+        arrays['__header__'] = np.array(self._pack_header(self._manifest))
+
+        tmp_path = None
+        try:
+            self.pack_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a torn pack
+            fd, tmp_path = tempfile.mkstemp(dir=self.pack_path.parent, suffix=".npz.tmp")
+            with os.fdopen(fd, 'wb') as tmp_file:
+                np.savez(tmp_file, **arrays)
+            os.replace(tmp_path, self.pack_path)
+        except OSError:
+            # Persistence is an optimisation only; the in-memory cache still works
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+def scale_template(image: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Resize a grayscale template by a scale factor.
+
+    Args:
+        image: 2D uint8 grayscale array
+        scale: Scale factor (1.0 returns the image unchanged)
+
+    Returns:
+        np.ndarray: The resized array (at least 1x1 pixels)
+    """
+    if scale == 1.0:
+        return image
+    height, width = image.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+def _pack_key(name: str, scale: float) -> str:
+    return f"{name}@{scale:g}"
@@ -0,0 +1,486 @@
+"""
+Text input module for entering prompts into the Junie input box.
+
+This module provides pluggable text-entry backends used by UIInteraction.
+Typing a prompt one character at a time with pyautogui costs a fixed delay
+per character, so long prompts take minutes to hand off. The backends here
+enter the whole prompt in (roughly) constant time:
+
+- ClipboardTextInput: copies the prompt to the clipboard and pastes it
+- XTestTextInput: injects keystrokes through the X11 XTest extension in batches
+- PyAutoGUITextInput: the original per-character pyautogui path
+
+TextInputChain tries the backends in order, checks that the text actually
+landed in the input box and falls back to the next backend when it did not.
+
+Key presses go through a "keyboard": any object providing write(text,
+interval), press(key) and hotkey(*keys) with pyautogui key names. The
+pyautogui module itself is the default keyboard; screen backends provide
+their own (see screen_backend.py).
+"""
+
+import os
+import subprocess
+import time
+from typing import List, Optional, Sequence, Tuple
+
+
+class TextInputException(Exception):
+    """Exception raised when no text input backend could enter the text."""
+    pass
+
+
+class TextInputBackend:
+    """
+    Base class for text input backends.
+
+    Subclasses implement is_available() and type_text().
+    """
+
+    name = "base"
+
+    def is_available(self) -> bool:
+        """
+        Check whether this backend can be used in the current environment.
+
+        Returns:
+            bool: True if the backend can enter text, False otherwise
+        """
+        return True
+
+    def type_text(self, text: str) -> None:
+        """
+        Enter text into the currently focused widget.
+
+        Args:
+            text: The text to enter
+
+        Raises:
+            TextInputException: If the backend failed to enter the text
+        """
+        raise NotImplementedError
+
+
+class PyAutoGUITextInput(TextInputBackend):
+    """
+    Types text one character at a time using keyboard.write().
+
+    This is the original pyautogui.write() behaviour and the last resort of
+    every chain.
+    """
+
+    name = "pyautogui"
+
+    def __init__(self, interval: float = 0.1, keyboard=None):
+        """
+        Initialize the backend.
+
+        Args:
+            interval: Delay in seconds between characters
+            keyboard: Keyboard used to type (defaults to pyautogui)
+        """
+        self.interval = interval
+        self.keyboard = keyboard if keyboard is not None else default_keyboard()
+
+    def type_text(self, text: str) -> None:
+        self.keyboard.write(text, interval=self.interval)
+
+
+class ClipboardTextInput(TextInputBackend):
+    """
+    Enters text by placing it on the clipboard and pasting it with Ctrl+V.
+
+    The clipboard is left holding the text; TextInputChain restores the
+    previous content once verification has finished.
+    """
+
+    name = "clipboard"
+
+    def __init__(self, clipboard=None, settle_delay: float = 0.2, keyboard=None):
+        """
+        Initialize the backend.
+
+        Args:
+            clipboard: Object providing copy(text) and paste() functions.
+                Defaults to the pyperclip module when it is installed.
+            settle_delay: Seconds to wait after pasting so the IDE can
+                process the paste before anything else touches the clipboard
+            keyboard: Keyboard used to press Ctrl+V (defaults to pyautogui)
+        """
+        self.clipboard = clipboard if clipboard is not None else _load_pyperclip()
+        self.settle_delay = settle_delay
+        self.keyboard = keyboard if keyboard is not None else default_keyboard()
+
+    def is_available(self) -> bool:
+        if self.clipboard is None:
+            return False
+        try:
+            self.clipboard.paste()
+            return True
+        except Exception:
+            return False
+
+    def type_text(self, text: str) -> None:
+        if self.clipboard is None:
+            raise TextInputException("No clipboard implementation available")
+
+        try:
+            self.clipboard.copy(text)
+            self.keyboard.hotkey('ctrl', 'v')
+            time.sleep(self.settle_delay)
+        except Exception as e:
+            raise TextInputException(f"Clipboard paste failed: {e}")
+
+
+class XClipboard:
+    """
+    Clipboard of a specific X display, accessed through xclip.
+
+    pyperclip always uses the clipboard of $DISPLAY; this provides the same
+    copy(text) and paste() functions for another display, e.g. a fleet
+    worker's Xvfb server.
+    """
+
+    def __init__(self, display_name: str, timeout: float = 2.0):
+        """
+        Initialize the clipboard.
+
+        Args:
+            display_name: X display whose clipboard is used (e.g. ':99')
+            timeout: Seconds to wait for xclip
+        """
+        self.display_name = display_name
+        self.timeout = timeout
+
+    def copy(self, text: str) -> None:
+        """Place text on the clipboard."""
+        self._xclip(['-i'], text)
+
+    def paste(self) -> str:
+        """Return the text on the clipboard."""
+        return self._xclip(['-o'])
+
+    def _xclip(self, args: List[str], text: Optional[str] = None) -> str:
+        # Raises OSError when xclip is not installed, like pyperclip does without a backend
+        result = subprocess.run(
+            ['xclip', '-selection', 'clipboard'] + args,
+            input=text,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=dict(os.environ, DISPLAY=self.display_name),
+            timeout=self.timeout,
+            universal_newlines=True,
+            check=True,
+        )
+        return result.stdout
+
+
+class XTestTextInput(TextInputBackend):
+    """
+    Injects keystrokes through the X11 XTest extension.
+
+    Key events for a whole batch of characters are queued and flushed to the
+    X server with a single round trip, instead of one sleep per character.
+    Characters without a keycode in the current keyboard mapping cause a
+    TextInputException so the chain can fall back to another backend.
+    """
+
+    name = "xtest"
+
+    # Characters that do not map to a keysym by name
+    SPECIAL_KEYSYMS = {
+        '\n': 'Return',
+        '\t': 'Tab',
+        ' ': 'space',
+    }
+
+    def __init__(self, display_name: Optional[str] = None, batch_size: int = 256):
+        """
+        Initialize the backend.
+
+        Args:
+            display_name: X display to connect to (defaults to $DISPLAY)
+            batch_size: Number of characters to queue before syncing with
+                the X server
+        """
+        self.display_name = display_name
+        self.batch_size = batch_size
+        self._display = None
+
+    def is_available(self) -> bool:
+        try:
+            display = self._get_display()
+            return display.has_extension('XTEST')
+        except Exception:
+            return False
+
+    def type_text(self, text: str) -> None:
+        try:
+            from Xlib import X
+            from Xlib.ext import xtest
+        except ImportError as e:
+            raise TextInputException(f"python-xlib is not installed: {e}")
+
+        display = self._get_display()
+        strokes = [self._keystroke_for(display, char) for char in text]
+        shift_keycode = display.keysym_to_keycode(self._keysym('Shift_L'))
+
+        for start in range(0, len(strokes), self.batch_size):
+            for keycode, needs_shift in strokes[start:start + self.batch_size]:
+                if needs_shift:
+                    xtest.fake_input(display, X.KeyPress, shift_keycode)
+                xtest.fake_input(display, X.KeyPress, keycode)
+                xtest.fake_input(display, X.KeyRelease, keycode)
+                if needs_shift:
+                    xtest.fake_input(display, X.KeyRelease, shift_keycode)
+            display.sync()
+
+    def key_combo(self, keysym_names: Sequence[str]) -> None:
+        """
+        Press a key combination, e.g. ['Control_L', 'v'].
+
+        Keys are pressed in order and released in reverse order.
+
+        Args:
+            keysym_names: X keysym names of the keys to press
+
+        Raises:
+            TextInputException: If a key is not in the keyboard mapping
+        """
+        from Xlib import X
+        from Xlib.ext import xtest
+
+        display = self._get_display()
+        keycodes = []
+        for name in keysym_names:
+            keycode = display.keysym_to_keycode(self._keysym(name))
+            if not keycode:
+                raise TextInputException(f"No keycode for key {name!r}")
+            keycodes.append(keycode)
+
+        for keycode in keycodes:
+            xtest.fake_input(display, X.KeyPress, keycode)
+        for keycode in reversed(keycodes):
+            xtest.fake_input(display, X.KeyRelease, keycode)
+        display.sync()
+
+    def _get_display(self):
+        if self._display is None:
+            from Xlib import display
+            self._display = display.Display(self.display_name)
+        return self._display
+
+    def _keystroke_for(self, display, char: str) -> Tuple[int, bool]:
+        """
+        Resolve the keycode and shift state needed to type a character.
+
+        Args:
+            display: Open Xlib display
+            char: Single character to type
+
+        Returns:
+            tuple: (keycode, needs_shift)
+
+        Raises:
+            TextInputException: If the character is not in the keyboard mapping
+        """
+        keysym = self._keysym(self.SPECIAL_KEYSYMS.get(char, char))
+        if not keysym:
+            # Fall back to the Unicode keysym range for non-Latin-1 characters
+            keysym = 0x01000000 | ord(char)
+
+        for keycode, index in display.keysym_to_keycodes(keysym):
+            if index in (0, 1):
+                return keycode, index == 1
+
+        raise TextInputException(f"No keycode for character {char!r}")
+
+    @staticmethod
+    def _keysym(name: str) -> int:
+        from Xlib import XK
+        keysym = XK.string_to_keysym(name)
+        if not keysym and len(name) == 1:
+            keysym = ord(name) if ord(name) <= 0xff else 0
+        return keysym
+
+
+class TextInputChain:
+    """
+    Enters text using the first backend that works.
+
+    After each attempt the content of the focused input box is read back
+    (Ctrl+A, Ctrl+C) and compared with the expected text. When it does not
+    match the box is cleared and the next backend is tried. The clipboard
+    content from before the call is restored once the text is entered.
+    """
+
+    def __init__(self, backends: List[TextInputBackend], verify: bool = True, clipboard=None, keyboard=None):
+        """
+        Initialize the chain.
+
+        Args:
+            backends: Backends to try, in order of preference
+            verify: Whether to read the text back after entering it
+            clipboard: Object providing copy(text) and paste() used for the
+                read-back. Defaults to the pyperclip module when installed.
+            keyboard: Keyboard used for the read-back and for clearing the
+                input box (defaults to pyautogui)
+        """
+        if not backends:
+            raise ValueError("At least one text input backend is required")
+        self.backends = backends
+        self.verify = verify
+        self.clipboard = clipboard if clipboard is not None else _load_pyperclip()
+        self.keyboard = keyboard if keyboard is not None else default_keyboard()
+        self.last_backend: Optional[str] = None
+
+    def enter(self, text: str) -> str:
+        """
+        Enter text into the focused input box.
+
+        Args:
+            text: The text to enter
+
+        Returns:
+            str: Name of the backend that entered the text
+
+        Raises:
+            TextInputException: If every backend failed
+        """
+        previous_clipboard = self._read_clipboard()
+        try:
+            return self._enter(text)
+        finally:
+            if previous_clipboard is not None:
+                try:
+                    self.clipboard.copy(previous_clipboard)
+                except Exception:
+                    pass
+
+    def _enter(self, text: str) -> str:
+        errors = []
+        for backend in self.backends:
+            if not backend.is_available():
+                errors.append(f"{backend.name}: unavailable")
+                continue
+
+            try:
+                backend.type_text(text)
+            except TextInputException as e:
+                errors.append(f"{backend.name}: {e}")
+                self._clear()
+                continue
+
+            if self._is_committed(text):
+                self.last_backend = backend.name
+                return backend.name
+
+            errors.append(f"{backend.name}: text not committed")
+            self._clear()
+
+        raise TextInputException(f"Unable to enter text ({'; '.join(errors)})")
+
+    def _read_clipboard(self) -> Optional[str]:
+        if self.clipboard is None:
+            return None
+        try:
+            return self.clipboard.paste()
+        except Exception:
+            return None
+
+    def _is_committed(self, text: str) -> bool:
+        """
+        Read back the content of the input box and compare it with text.
+
+        Verification is skipped (treated as success) when it is disabled or
+        no clipboard implementation is available.
+        """
+        if not self.verify or self.clipboard is None:
+            return True
+
+        try:
+            self.keyboard.hotkey('ctrl', 'a')
+            self.keyboard.hotkey('ctrl', 'c')
+            time.sleep(0.1)
+            committed = self.clipboard.paste()
+        except Exception:
+            return True
+        finally:
+            # Move the caret back to the end so the selection is not replaced
+            try:
+                self.keyboard.press('end')
+            except Exception:
+                pass
+
+        return _normalise(committed) == _normalise(text)
+
+    def _clear(self) -> None:
+        try:
+            self.keyboard.hotkey('ctrl', 'a')
+            self.keyboard.press('backspace')
+        except Exception:
+            pass
+
+
+def create_text_input(
+    mode: str = 'auto',
+    interval: float = 0.1,
+    verify: bool = True,
+    keyboard=None,
+    display_name: Optional[str] = None,
+) -> TextInputChain:
+    """
+    Create a TextInputChain for the given mode.
+
+    Args:
+        mode: 'auto' (clipboard, then XTest), 'clipboard', 'xtest' or
+            'pyautogui'. Every mode falls back to per-character typing.
+        interval: Per-character delay for the pyautogui fallback
+        verify: Whether to read the text back after entering it
+        keyboard: Keyboard used for key presses (defaults to pyautogui)
+        display_name: X display for the XTest backend and the clipboard
+            (defaults to $DISPLAY)
+
+    Returns:
+        TextInputChain: The configured chain
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    mode = (mode or 'auto').lower()
+    if mode not in ('auto', 'clipboard', 'xtest', 'pyautogui'):
+        raise ValueError(f"Unknown text input mode: {mode}")
+
+    keyboard = keyboard if keyboard is not None else default_keyboard()
+    # pyperclip only knows $DISPLAY, so another display gets its own clipboard
+    clipboard = XClipboard(display_name) if display_name else None
+    backends: List[TextInputBackend] = []
+    if mode in ('auto', 'clipboard'):
+        backends.append(ClipboardTextInput(clipboard=clipboard, keyboard=keyboard))
+    if mode in ('auto', 'xtest'):
+        backends.append(XTestTextInput(display_name=display_name))
+    backends.append(PyAutoGUITextInput(interval=interval, keyboard=keyboard))
+
+    return TextInputChain(backends, verify=verify, clipboard=clipboard, keyboard=keyboard)
+
+
+def default_keyboard():
+    """
+    Return the default keyboard, the pyautogui module.
+
+    pyautogui is imported lazily because importing it requires a display.
+    """
+    import pyautogui
+    return pyautogui
+
+
+def _load_pyperclip():
+    try:
+        import pyperclip
+        return pyperclip
+    except ImportError:
+        return None
+
+
+def _normalise(text: str) -> str:
+    return text.replace('\r\n', '\n').rstrip()
@@ -0,0 +1,227 @@
+"""
+Tracing module recording timing spans as structured JSON records.
+
+Spans time one phase of the agent (a loop iteration, a screen capture, a
+template match, a task request, typing a prompt) and nest: a span started
+while another one is open on the same thread becomes its child and shares
+its trace id, so every loop iteration forms one trace. Finished spans are
+written as one JSON object per line:
+
+    {"name": "ui.detect", "trace_id": "...", "span_id": "...", "parent_id": "...",
+     "start": 1718000000.123, "duration_ms": 41.7, "thread": "MainThread",
+     "attributes": {...}, "error": null}
+
+Tracing is off until configure() is given a file; while it is off span()
+returns a shared no-op object, so the instrumented code costs a single
+attribute check.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, TextIO, Union
+
+
+class Span:
+    """
+    One timed phase. Use as a context manager or call end().
+    """
+
+    __slots__ = ('tracer', 'name', 'trace_id', 'span_id', 'parent_id', 'start', 'attributes', '_started', '_ended')
+
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'], attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.attributes = attributes
+        self._started = time.perf_counter()
+        self._ended = False
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """
+        Finish the span and write its record (only the first call counts).
+
+        Args:
+            error: Exception that ended the phase, if any
+        """
+        if self._ended:
+            return
+        self._ended = True
+        duration = time.perf_counter() - self._started
+        self.tracer._finish(self, duration, error)
+
+    def __enter__(self) -> 'Span':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.end(exc)
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Creates spans and writes finished ones as JSON lines.
+
+    Each thread keeps its own stack of open spans, so fleet workers and the
+    asyncio runtime's executor thread produce separate traces.
+    """
+
+    def __init__(self):
+        """Initialize a disabled tracer."""
+        self._file: Optional[TextIO] = None
+        self._owns_file = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        """True while spans are recorded."""
+        return self._file is not None
+
+    def configure(self, target: Union[str, Path, TextIO, None]) -> None:
+        """
+        Start (or stop) writing trace records.
+
+        Args:
+            target: JSON lines file to append to, an open text stream, or
+                None to turn tracing off
+        """
+        self.close()
+        if target is None or target == '':
+            return
+        if isinstance(target, (str, Path)):
+            path = Path(target).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+
+    def close(self) -> None:
+        """Stop tracing and close the trace file."""
+        with self._lock:
+            file, self._file = self._file, None
+            if file is not None:
+                file.flush()
+                if self._owns_file:
+                    file.close()
+
+    def span(self, name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+        """
+        Start a span, a child of the span open on this thread (if any).
+
+        Args:
+            name: Phase name, e.g. 'ui.detect'
+            **attributes: Values recorded with the span
+
+        Returns:
+            Span: The started span (a no-op span while tracing is off)
+        """
+        if self._file is None:
+            return NOOP_SPAN
+        stack = self._stack()
+        span = Span(self, name, stack[-1] if stack else None, attributes)
+        stack.append(span)
+        return span
+
+    def current(self) -> Union[Span, _NoopSpan]:
+        """The innermost open span on this thread (a no-op span if none)."""
+        stack = self._stack()
+        return stack[-1] if stack and self._file is not None else NOOP_SPAN
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, span: Span, duration: float, error: Optional[BaseException]) -> None:
+        stack = self._stack()
+        if span in stack:
+            # Spans left open inside this one are abandoned with it
+            del stack[stack.index(span):]
+
+        record = {
+            'name': span.name,
+            'trace_id': span.trace_id,
+            'span_id': span.span_id,
+            'parent_id': span.parent_id,
+            'start': span.start,
+            'duration_ms': duration * 1000.0,
+            'thread': threading.current_thread().name,
+            'attributes': span.attributes,
+            'error': f"{type(error).__name__}: {error}" if error is not None else None,
+        }
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            if span.parent_id is None:
+                self._file.flush()
+
+
+# Process-wide tracer used by the instrumented modules
+TRACER = Tracer()
+
+
+def span(name: str, **attributes: Any) -> Union[Span, _NoopSpan]:
+    """Start a span on the process-wide tracer (see Tracer.span())."""
+    return TRACER.span(name, **attributes)
+
+
+def annotate(**attributes: Any) -> None:
+    """Add attributes to the innermost open span of this thread."""
+    TRACER.current().set(**attributes)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator running every call of a function inside a span.
+
+    Args:
+        name: Span name, e.g. 'task.request'
+
+    Returns:
+        Callable: The decorator
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if TRACER._file is None:
+                return function(*args, **kwargs)
+            with TRACER.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
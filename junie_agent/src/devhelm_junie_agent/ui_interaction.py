@@ -1,32 +1,74 @@
 """
 UI Interaction module for automating GUI interactions.
 
-This module provides the UIInteraction class that handles all pyautogui-based
-UI automation tasks. It encapsulates screen detection, clicking, and text input
-functionality in a clean interface that can be easily swapped out later.
+This module provides the UIInteraction class that handles all UI automation
+tasks. It encapsulates screen detection, clicking, and text input
+functionality in a clean interface; the screen itself is reached through a
+ScreenBackend so it can be swapped for Xvfb or recorded frames.
 """
 
 import os
-import pyautogui
 import time
 from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from .calibration import ScaleCalibration
+from .detection import Box, DetectionCache, DetectionResult, Matcher, RegionTracker, frame_hash, match_template
+from .metrics import CAPTURE_SECONDS, CONTINUES, PROMPTS, TYPING_SECONDS
+from .tracing import annotate, span, traced
+from .screen_backend import PyAutoGUIBackend, ScreenBackend
+from .template_cache import TemplateCache
 
 
 class UIInteraction:
     """
-    Handles all GUI interaction tasks using pyautogui.
+    Handles all GUI interaction tasks through a ScreenBackend.
     
     This class provides methods for detecting UI elements on screen,
     clicking elements, and entering text. All image detection resources
-    are stored in a dedicated images folder.
+    are stored in a dedicated images folder and registered by name in
+    TEMPLATES; every detection pass captures the screen once and matches
+    all registered templates against that frame.
     """
     
-    def __init__(self):
+    # Registered templates: name -> file in the images directory
+    TEMPLATES = {
+        'start_again': 'start_again.png',
+        'type_your': 'type_your.png',
+    }
+    
+    # Minimum correlation score for a template match
+    CONFIDENCE = 0.9
+    
+    def __init__(
+        self,
+        backend: Optional[ScreenBackend] = None,
+        template_cache: Optional[TemplateCache] = None,
+        detection_cache: Optional[DetectionCache] = None,
+        matcher: Optional[Matcher] = None,
+        calibration: Optional[ScaleCalibration] = None
+    ):
         """
         Initialize the UIInteraction class.
         
-        No parameters are accepted as per the requirements.
-        Sets up the path to the images directory.
+        Sets up the path to the images directory, decodes every template
+        into the template cache and sets up the screen backend.
+        
+        Args:
+            backend: Backend used to capture, match, click and type.
+                Defaults to PyAutoGUIBackend() driving the live desktop.
+            template_cache: Cache of decoded templates. Defaults to a
+                TemplateCache over the bundled images directory.
+            detection_cache: LRU cache from frame hash to detection result.
+                Defaults to a DetectionCache with its default size.
+            matcher: Template matching engine (see detection.create_matcher).
+                Defaults to match_template, a full-resolution search.
+            calibration: Per-display template scales. When given, templates
+                are matched at their calibrated scale and a missing template
+                is calibrated on the captured frame. Defaults to None
+                (templates are matched at their captured scale).
         """
         # Get the directory where this file is located
         current_dir = Path(__file__).parent
@@ -35,32 +77,133 @@ class UIInteraction:
         # Ensure images directory exists
         if not self.images_dir.exists():
             raise FileNotFoundError(f"Images directory not found: {self.images_dir}")
+        
+        self.template_cache = template_cache if template_cache is not None else TemplateCache(self.images_dir)
+        if not self.template_cache.names():
+            # A cache shared between several UIInteractions is only loaded once
+            self.template_cache.load()
+        
+        self.backend = backend if backend is not None else PyAutoGUIBackend()
+        self.templates: Dict[str, str] = dict(self.TEMPLATES)
+        self.last_detection: Optional[DetectionResult] = None
+        # Whether the last givePrompt() got as far as typing (False if it failed before)
+        self.prompt_typing_started = False
+        
+        # Remembers where each template was last seen so most passes only
+        # search a small region around it (see region_tracker.stats)
+        self.region_tracker = RegionTracker()
+        
+        # Unchanged frames are answered from here without template matching
+        # (see detection_cache.stats for hit-rate counters)
+        self.detection_cache = detection_cache if detection_cache is not None else DetectionCache()
+        self.matcher = matcher if matcher is not None else match_template
+        self.calibration = calibration
+    
+    def register_template(self, name: str, filename: str):
+        """
+        Register an additional template to be matched on every detection pass.
+        
+        Args:
+            name: Name used to look up the template in a DetectionResult
+            filename: Image file name inside the images directory
+        """
+        self.templates[name] = filename
+        self.detection_cache.clear()
+    
+    @traced('ui.detect')
+    def detect(self, names: Optional[Iterable[str]] = None) -> DetectionResult:
+        """
+        Capture the screen once and match registered templates against it.
+        
+        If an identical frame was matched recently the cached result is
+        returned instead of running the matcher again.
+        
+        Args:
+            names: Template names to match (defaults to all registered templates)
+            
+        Returns:
+            DetectionResult: Locations of every requested template
+        """
+        names = list(names) if names is not None else list(self.templates)
+        
+        captured_at = time.monotonic()
+        frame = self._capture_frame()
+        if self.calibration is not None:
+            self.calibration.select(frame.shape)
+        templates = {name: self._load_template(name) for name in names}
+        
+        cache_key = (frame_hash(frame), tuple(names))
+        cached = self.detection_cache.get(cache_key, captured_at=captured_at)
+        if cached is not None:
+            annotate(cached=True)
+            self.last_detection = cached
+            return cached
+        
+        with span('ui.match', templates=len(templates)):
+            self.last_detection = self.backend.match(
+                frame,
+                templates,
+                confidence=self.CONFIDENCE,
+                captured_at=captured_at,
+                tracker=self.region_tracker,
+                matcher=self.matcher
+            )
+        if self.calibration is not None and self._calibrate(frame, self.last_detection, captured_at):
+            # Templates changed scale, so cached results no longer apply
+            self.detection_cache.clear()
+            return self.last_detection
+        self.detection_cache.put(cache_key, self.last_detection)
+        return self.last_detection
+    
+    def _calibrate(self, frame: np.ndarray, result: DetectionResult, captured_at: float) -> bool:
+        """
+        Calibrate the scale of templates missing from a frame.
+        
+        Found templates are recorded as seen; missing ones that are due for
+        calibration are searched at every scale, and added to the result if
+        found.
+        
+        Args:
+            frame: The frame the result was matched on
+            result: Detection result to complete
+            captured_at: time.monotonic() timestamp of the frame capture
+        
+        Returns:
+            bool: True if a template was found at a new scale
+        """
+        calibrated = False
+        for name, location in list(result.locations.items()):
+            filename = self.templates[name]
+            template = self.template_cache.get(filename)
+            if location is not None:
+                self.calibration.seen(filename, template, now=captured_at)
+                continue
+            if not self.calibration.due(filename, template, now=captured_at):
+                continue
+            with span('ui.calibrate', template=name):
+                box = self.calibration.calibrate(frame, filename, template, now=captured_at)
+            if box is not None:
+                result.locations[name] = box
+                self.region_tracker.record(name, box, roi_hit=None)
+                calibrated = True
+        return calibrated
     
     def isReadyForPrompt(self) -> bool:
         """
         Check if the UI is ready for a prompt by looking for start_again.png.
         
+        The full detection result (including the "Type your" label) is kept
+        in last_detection for callers that need it.
+        
         Returns:
             bool: True if start_again.png is found on screen, False otherwise
         """
         try:
-            start_again_path = self.images_dir / "start_again.png"
-            if not start_again_path.exists():
-                raise FileNotFoundError(f"start_again.png not found in {self.images_dir}")
-            
-            location = pyautogui.locateOnScreen(
-                str(start_again_path),
-                confidence=0.9,
-                grayscale=True
-            )
-            
-            return location is not None
-            
-        except pyautogui.ImageNotFoundException:
-            return False
+            return self.detect().is_ready_for_prompt
         except Exception:
             return False
     
+    @traced('ui.continue_prompt')
     def continuePrompt(self):
         """
         Enter "continue" into the prompt box and press enter.
@@ -69,20 +212,23 @@ class UIInteraction:
         Note: Method renamed from 'continue' to avoid Python reserved keyword.
         """
         try:
-            pyautogui.write('continue', interval=0.1)
-            pyautogui.press('enter')
+            with TYPING_SECONDS.labels('continue').time():
+                self.backend.type_text('continue')
+                self.backend.press('enter')
+            CONTINUES.inc()
             
         except Exception as e:
             # Re-raise the exception to let the caller handle it
             raise e
     
+    @traced('ui.give_prompt')
     def givePrompt(self, prompt: str):
         """
         Find the input box, click it, and enter the provided prompt string.
         
         This method now handles the complete flow:
-        1. Checks if UI is ready for prompt
-        2. Finds and clicks the input box
+        1. Captures the screen once and checks the UI is ready for a prompt
+        2. Clicks the input box next to the "Type your" label in the same frame
         3. Enters the prompt text and presses enter
         
         Args:
@@ -91,97 +237,107 @@ class UIInteraction:
         Returns:
             bool: True if successful, False if input box could not be found or clicked
         """
+        self.prompt_typing_started = False
         try:
             if not isinstance(prompt, str):
                 raise ValueError("Prompt must be a string")
             
-            # Check if we're ready for prompt first
-            if not self.isReadyForPrompt():
+            if not self._find_and_click_input_box(raise_errors=True):
                 return False
             
-            # Look for the "Type your" label
-            type_your_path = self.images_dir / "type_your.png"
-            if not type_your_path.exists():
-                raise FileNotFoundError(f"type_your.png not found in {self.images_dir}")
-            
-            input_label_location = pyautogui.locateOnScreen(
-                str(type_your_path),
-                confidence=0.9,
-                grayscale=True
-            )
-            
-            if input_label_location:
-                # Calculate the click position to the right of the label
-                x_offset = input_label_location.width + 10
-                center_x, center_y = pyautogui.center(input_label_location)
-                click_x = center_x + x_offset
-                click_y = center_y
-                
-                # Click the input box
-                pyautogui.click(click_x, click_y)
-                
-                # Add a short delay to allow the system to register the click
-                time.sleep(1)
-                
-                # Now write the prompt and press enter
-                pyautogui.write(prompt, interval=0.1)
-                pyautogui.press('enter')
-                
-                return True
+            # Now enter the prompt and press enter
+            self.prompt_typing_started = True
+            with TYPING_SECONDS.labels('prompt').time():
+                self.backend.type_text(prompt)
+                self.backend.press('enter')
+            PROMPTS.inc()
             
-            return False
+            return True
             
-        except pyautogui.ImageNotFoundException:
-            return False
         except Exception as e:
             # Re-raise the exception to let the caller handle it
             raise e
     
-    def _find_and_click_input_box(self):
+    def _find_and_click_input_box(self, raise_errors: bool = False):
         """
         Private method to locate and click the input box.
         
-        This method replicates the existing logic from main.py
-        for finding and clicking the input box after detecting
-        the start_again element.
+        Runs a single detection pass and, if the "Start Again" button is
+        visible, clicks to the right of the "Type your" label found in the
+        same frame.
+        
+        Args:
+            raise_errors: Re-raise unexpected errors instead of returning False
         
         Returns:
             bool: True if successfully clicked the input box, False otherwise
         """
         try:
+            detection = self.detect()
+            
             # Check if we're ready for prompt first
-            if not self.isReadyForPrompt():
+            if not detection.is_ready_for_prompt:
                 return False
             
-            # Look for the "Type your" label
-            type_your_path = self.images_dir / "type_your.png"
-            if not type_your_path.exists():
-                raise FileNotFoundError(f"type_your.png not found in {self.images_dir}")
-            
-            input_label_location = pyautogui.locateOnScreen(
-                str(type_your_path),
-                confidence=0.9,
-                grayscale=True
-            )
+            input_label_location = detection.location('type_your')
+            if input_label_location is None:
+                return False
             
-            if input_label_location:
-                # Calculate the click position to the right of the label
-                x_offset = input_label_location.width + 10
-                center_x, center_y = pyautogui.center(input_label_location)
-                click_x = center_x + x_offset
-                click_y = center_y
-                
-                # Click the input box
-                pyautogui.click(click_x, click_y)
-                
-                # Add a short delay to allow the system to register the click
-                time.sleep(1)
-                
-                return True
+            self._click_input_box(input_label_location)
+            return True
             
+        except Exception:
+            if raise_errors:
+                raise
             return False
+    
+    @traced('ui.click_input_box')
+    def _click_input_box(self, input_label_location: Box):
+        """
+        Click the input box to the right of the "Type your" label.
+        
+        Args:
+            input_label_location: Location of the "Type your" label
+        """
+        # Calculate the click position to the right of the label
+        x_offset = input_label_location.width + 10
+        center_x, center_y = input_label_location.center
+        click_x = center_x + x_offset
+        click_y = center_y
+        
+        # Click the input box
+        self.backend.click(click_x, click_y)
+        
+        # Add a short delay to allow the system to register the click
+        time.sleep(1)
+    
+    @traced('ui.capture')
+    def _capture_frame(self) -> np.ndarray:
+        """
+        Capture the full screen as a grayscale array.
+        
+        Returns:
+            np.ndarray: 2D uint8 array of the screen contents
+        """
+        with CAPTURE_SECONDS.time():
+            return self.backend.capture()
+    
+    def _load_template(self, name: str) -> np.ndarray:
+        """
+        Get a registered template from the template cache, resized to its
+        calibrated scale when calibration is enabled.
+        
+        Args:
+            name: Registered template name
             
-        except pyautogui.ImageNotFoundException:
-            return False
-        except Exception:
-            return False
\ No newline at end of file
+        Returns:
+            np.ndarray: 2D uint8 array of the template
+            
+        Raises:
+            FileNotFoundError: If the template image does not exist
+        """
+        filename = self.templates[name]
+        template = self.template_cache.get(filename)
+        if self.calibration is not None:
+            template = self.calibration.template(filename, template)
+        return template
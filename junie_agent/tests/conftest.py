@@ -5,6 +5,7 @@ This module provides pytest fixtures and configuration that are shared
 across all test modules.
 """
 
+import shutil
 import sys
 from unittest.mock import Mock
 import pytest
@@ -33,6 +34,45 @@ def mock_pyautogui():
     return mock_pyautogui
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_home(tmp_path, monkeypatch):
+    """
+    Point XDG_CACHE_HOME at a temporary directory so tests never read or
+    write the real on-disk template pack.
+    
+    This fixture automatically applies to all tests.
+    """
+    cache_home = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
+
+
+@pytest.fixture(scope="session")
+def xvfb_display():
+    """
+    Start an Xvfb server for tests that need a real X display.
+    
+    Tests using this fixture are skipped when Xvfb is not installed.
+    
+    Returns:
+        str: The display name (e.g. ':99')
+    """
+    from devhelm_junie_agent.screen_backend import start_xvfb
+    
+    if not shutil.which("Xvfb"):
+        pytest.skip("Xvfb is not installed")
+    
+    try:
+        display, process = start_xvfb(1280, 720)
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    
+    yield display
+    
+    process.terminate()
+    process.wait()
+
+
 @pytest.fixture
 def sample_task_data():
     """
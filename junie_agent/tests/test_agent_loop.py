@@ -0,0 +1,125 @@
+"""
+Tests for the agent_loop module.
+"""
+
+import unittest
+from unittest.mock import MagicMock, Mock
+
+from devhelm_junie_agent.agent_loop import AgentLoop, PassResult
+from devhelm_junie_agent.journal import TaskJournal
+from devhelm_junie_agent.scheduler import PollScheduler
+from devhelm_junie_agent.task_requester import Task, TaskRequesterException, TaskStatus
+
+
+def make_loop(results, ready=True, **kwargs):
+    """Create an AgentLoop whose task source returns the given results in turn."""
+    ui = Mock(prompt_typing_started=False)
+    ui.isReadyForPrompt.return_value = ready
+    ui.givePrompt.return_value = True
+    tasks = Mock(retry_after=None, long_polled=False)
+    tasks.request_task.side_effect = results
+    readiness = Mock()
+    readiness.confirm.return_value = True
+    scheduler = PollScheduler(jitter=0.0)
+    return AgentLoop(ui, tasks, scheduler, readiness, MagicMock(), **kwargs)
+
+
+class TestAgentLoop(unittest.TestCase):
+    """Test cases for AgentLoop."""
+
+    def setUp(self):
+        self.task = Task(id='task-1', ticket_id='DH-1', prompt="Fix the bug")
+
+    def test_new_task_is_typed_and_journaled(self):
+        """Test a received task is typed once and recorded as submitted."""
+        journal = TaskJournal(':memory:')
+        self.addCleanup(journal.close)
+        loop = make_loop([self.task], journal=journal)
+
+        self.assertEqual(loop.poll(), PassResult.SLEEP)
+
+        loop.ui.givePrompt.assert_called_once_with("Fix the bug")
+        self.assertEqual(journal.get('task-1').state, 'submitted')
+
+    def test_submitted_task_is_not_typed_again(self):
+        """Test a task already submitted according to the journal is skipped."""
+        journal = TaskJournal(':memory:')
+        self.addCleanup(journal.close)
+        journal.record_received(self.task)
+        journal.begin_submit('task-1')
+        journal.record_submitted('task-1')
+        journal.record_continue('task-1')
+        loop = make_loop([self.task], journal=journal)
+
+        self.assertEqual(loop.poll(), PassResult.SLEEP)
+
+        loop.ui.givePrompt.assert_not_called()
+        self.assertEqual(loop.consecutive_continue_count, 1)
+
+    def test_failed_prompt_releases_the_task(self):
+        """Test a prompt that could not be typed may be submitted on a later pass."""
+        journal = TaskJournal(':memory:')
+        self.addCleanup(journal.close)
+        loop = make_loop([self.task], journal=journal)
+        loop.ui.givePrompt.side_effect = RuntimeError("Input box not found")
+
+        with self.assertRaises(RuntimeError):
+            loop.poll()
+
+        self.assertEqual(journal.get('task-1').state, 'received')
+
+    def test_continue_limit_finishes(self):
+        """Test the continue count restored from the journal counts towards the limit."""
+        journal = TaskJournal(':memory:')
+        self.addCleanup(journal.close)
+        journal.record_received(self.task)
+        journal.record_continue('task-1')
+        loop = make_loop([TaskStatus.BUSY, TaskStatus.BUSY], journal=journal, current_task=self.task,
+                         max_consecutive_continues=2)
+
+        self.assertEqual(loop.poll(), PassResult.SLEEP)
+        self.assertEqual(loop.poll(), PassResult.FINISHED)
+
+        loop.ui.continuePrompt.assert_called_once_with()
+        self.assertEqual(journal.get('task-1').continues, 2)
+
+    def test_long_polled_none_polls_again(self):
+        """Test an empty long-poll response asks for the next pass straight away."""
+        loop = make_loop([TaskStatus.NONE])
+        loop.tasks.long_polled = True
+
+        self.assertEqual(loop.poll(), PassResult.AGAIN)
+
+    def test_request_error_honours_retry_after(self):
+        """Test a failed request defers the next poll by the server's Retry-After."""
+        loop = make_loop([TaskRequesterException("HTTP 503")])
+        loop.tasks.retry_after = 30.0
+
+        self.assertEqual(loop.poll(), PassResult.SLEEP)
+
+        self.assertGreater(loop.scheduler.next_delay(), 29.0)
+
+    def test_busy_screen_prefetches(self):
+        """Test the next task is prefetched while Junie is working."""
+        prefetcher = Mock()
+        loop = make_loop([], ready=False, prefetcher=prefetcher)
+
+        self.assertEqual(loop.poll(), PassResult.SLEEP)
+
+        prefetcher.prefetch.assert_called_once_with()
+        loop.tasks.request_task.assert_not_called()
+
+    def test_unchanged_screen_reuses_last_detection(self):
+        """Test detection is skipped while the DAMAGE watcher reports no change."""
+        watcher = Mock()
+        watcher.consume.return_value = False
+        loop = make_loop([], watcher=watcher)
+        loop.ui.last_detection = Mock(is_ready_for_prompt=False, captured_at=float('inf'))
+
+        self.assertEqual(loop.poll(), PassResult.SLEEP)
+
+        loop.ui.isReadyForPrompt.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
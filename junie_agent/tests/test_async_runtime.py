@@ -0,0 +1,226 @@
+"""
+Tests for the asyncio runtime.
+
+AsyncTaskRequester is exercised against the ReferenceServer and the scripted
+stub server; AsyncAgent is driven with a fake UI and a fake task source.
+"""
+
+import asyncio
+import os
+import signal
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from devhelm_junie_agent.async_requester import AsyncTaskRequester
+from devhelm_junie_agent.async_runtime import AsyncAgent
+from devhelm_junie_agent.journal import TaskJournal
+from devhelm_junie_agent.reference_server import ReferenceServer
+from devhelm_junie_agent.scheduler import PollScheduler
+from devhelm_junie_agent.task_requester import Task, TaskRequester, TaskRequesterException, TaskStatus
+
+from .test_http_client import TASK, StubServer, fast_client
+
+
+def make_requester(url, api_key='key'):
+    """Create an AsyncTaskRequester over a TaskRequester with short timeouts."""
+    return AsyncTaskRequester(TaskRequester(url, api_key, http_client=fast_client()))
+
+
+class FakeUI:
+    """UI that becomes ready again shortly after every prompt."""
+
+    def __init__(self, busy_for=0.05):
+        self.busy_for = busy_for
+        self.busy_until = 0.0
+        self.prompts = []
+        self.last_detection = None
+        self.prompt_typing_started = False
+
+    def isReadyForPrompt(self):
+        return time.monotonic() >= self.busy_until
+
+    def givePrompt(self, prompt):
+        self.prompt_typing_started = True
+        self.prompts.append(prompt)
+        self.busy_until = time.monotonic() + self.busy_for
+        return True
+
+    def continuePrompt(self):
+        self.givePrompt("continue")
+
+
+class ScriptedRequester:
+    """Async task source answering from a script."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+        self.retry_after = None
+        self.closed = False
+
+    async def request_task(self):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def close(self):
+        self.closed = True
+
+
+def fast_scheduler():
+    """Create a scheduler with tiny intervals and no jitter."""
+    return PollScheduler(fast_interval=0.01, min_interval=0.01, max_interval=0.02, jitter=0.0)
+
+
+class TestAsyncTaskRequester(unittest.TestCase):
+    """Test cases for AsyncTaskRequester."""
+
+    def test_task_contract(self):
+        """Test 200, 409 and 204 map to a task, BUSY and NONE."""
+        async def scenario(server):
+            requester = make_requester(server.url)
+            task = server.add_task("Fix the bug")
+            try:
+                self.assertEqual(await requester.request_task(), task)
+                self.assertEqual(await requester.request_task(), TaskStatus.BUSY)
+                server.complete()
+                self.assertEqual(await requester.request_task(), TaskStatus.NONE)
+            finally:
+                await requester.close()
+
+        with ReferenceServer(api_key='key') as server:
+            asyncio.run(scenario(server))
+
+    def test_error_status_raises(self):
+        """Test a rejected API key raises TaskRequesterException."""
+        async def scenario(server):
+            requester = make_requester(server.url, api_key='wrong')
+            try:
+                with self.assertRaises(TaskRequesterException):
+                    await requester.request_task()
+            finally:
+                await requester.close()
+
+        with ReferenceServer(api_key='key') as server:
+            asyncio.run(scenario(server))
+
+    def test_request_does_not_block_the_loop(self):
+        """Test the event loop keeps running while a slow request is in flight."""
+        async def scenario(server):
+            requester = make_requester(server.url)
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticker = asyncio.ensure_future(tick())
+            try:
+                result = await requester.request_task()
+            finally:
+                ticker.cancel()
+                await requester.close()
+            return result, ticks
+
+        with StubServer([(204, {'Retry-After': '30'}, b'', 0.3)]) as server:
+            result, ticks = asyncio.run(scenario(server))
+
+        self.assertEqual(result, TaskStatus.NONE)
+        self.assertGreater(ticks, 5)
+
+    def test_retry_after_comes_from_the_requester(self):
+        """Test Retry-After is read from the wrapped TaskRequester."""
+        async def scenario(requester):
+            try:
+                return await requester.request_task()
+            finally:
+                await requester.close()
+
+        with StubServer([TASK]) as server:
+            requester = make_requester(server.url)
+            result = asyncio.run(scenario(requester))
+
+        self.assertEqual(result, Task(id='a1', ticket_id='DH-1', prompt='Do it'))
+        self.assertIsNone(requester.retry_after)
+        self.assertFalse(requester.long_polled)
+
+
+class TestAsyncAgent(unittest.TestCase):
+    """Test cases for AsyncAgent."""
+
+    def make_agent(self, results, **kwargs):
+        """Create an agent over a fake UI and scripted requester."""
+        self.ui = FakeUI()
+        self.requester = ScriptedRequester(results)
+        return AsyncAgent(self.ui, self.requester, fast_scheduler(), MagicMock(), **kwargs)
+
+    def test_prompts_task_and_stops_at_continue_limit(self):
+        """Test a task is entered, then continues until the limit ends the run."""
+        task = Task(id='t1', ticket_id='DH-1', prompt='Do it')
+        agent = self.make_agent([task, TaskStatus.BUSY], max_consecutive_continues=2)
+
+        exit_code = asyncio.run(asyncio.wait_for(agent.run(), 10))
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(self.ui.prompts, ['Do it', 'continue', 'continue'])
+        self.assertTrue(self.requester.closed)
+
+    def test_fetch_errors_do_not_stop_the_agent(self):
+        """Test a failed task request is logged and retried."""
+        task = Task(id='t1', ticket_id='DH-1', prompt='Do it')
+        agent = self.make_agent([TaskRequesterException("down"), task, TaskStatus.BUSY], max_consecutive_continues=0)
+
+        asyncio.run(asyncio.wait_for(agent.run(), 10))
+
+        self.assertEqual(self.ui.prompts, ['Do it'])
+        agent.logger.error.assert_any_call("Error requesting task: down")
+
+    def test_journal_records_prompts_and_continues(self):
+        """Test prompts and continues are recorded and a submitted task is not retyped."""
+        journal = TaskJournal(':memory:')
+        self.addCleanup(journal.close)
+        task = Task(id='t1', ticket_id='DH-1', prompt='Do it')
+        agent = self.make_agent([task, TaskStatus.BUSY, task, TaskStatus.BUSY], max_consecutive_continues=1, journal=journal)
+
+        asyncio.run(asyncio.wait_for(agent.run(), 10))
+
+        self.assertEqual(self.ui.prompts, ['Do it', 'continue'])
+        entry = journal.get('t1')
+        self.assertEqual((entry.state, entry.continues), ('submitted', 1))
+
+    def test_continue_count_restored_from_journal(self):
+        """Test the continue count of the resumed task carries over a restart."""
+        journal = TaskJournal(':memory:')
+        self.addCleanup(journal.close)
+        task = Task(id='t1', ticket_id='DH-1', prompt='Do it')
+        journal.record_received(task)
+        journal.begin_submit(task.id)
+        journal.record_continue(task.id)
+
+        agent = self.make_agent([TaskStatus.BUSY], max_consecutive_continues=2, journal=journal, current_task=task)
+        asyncio.run(asyncio.wait_for(agent.run(), 10))
+
+        self.assertEqual(self.ui.prompts, ['continue'])
+        self.assertEqual(journal.get('t1').continues, 2)
+
+    def test_sigterm_shuts_down_cleanly(self):
+        """Test SIGTERM cancels the coroutines and closes the requester."""
+        agent = self.make_agent([TaskStatus.NONE])
+
+        async def scenario():
+            asyncio.get_running_loop().call_later(0.2, os.kill, os.getpid(), signal.SIGTERM)
+            return await asyncio.wait_for(agent.run(), 10)
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+        self.assertTrue(self.requester.closed)
+        self.assertGreater(self.requester.calls, 0)
+        self.assertEqual(self.ui.prompts, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Smoke tests for the detection benchmark suite in benchmarks/.
+
+The suite is run once at a small resolution to make sure it keeps working
+headless and that its synthetic screens are detected correctly.
+"""
+
+import importlib.util
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parents[1] / "benchmarks"
+
+
+def load_module(name):
+    """Import a script from the benchmarks directory."""
+    if str(BENCHMARKS_DIR) not in sys.path:
+        sys.path.insert(0, str(BENCHMARKS_DIR))
+    spec = importlib.util.spec_from_file_location(f"benchmarks_{name}", BENCHMARKS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestDetectionBenchmarks(unittest.TestCase):
+    """Test cases for benchmarks/bench_detection.py and compare.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Run the suite once at a small resolution."""
+        cls.bench = load_module("bench_detection")
+        cls.compare = load_module("compare")
+        cls.document = cls.bench.run_benchmarks({'small': (640, 360)}, repeat=2, variants=1)
+
+    def result(self, name, **params):
+        """Find a result by name and parameters."""
+        for result in self.document['results']:
+            if result['name'] == name and all(result['params'].get(k) == v for k, v in params.items()):
+                return result
+        self.fail(f"No result for {name} {params}")
+
+    def test_results_are_complete(self):
+        """Test every benchmark group reports timings."""
+        for name in ('capture.replay', 'capture.bus', 'match.full', 'match.roi', 'match.pyramid',
+                     'detect.is_ready_for_prompt', 'detect.give_prompt', 'templates.pack'):
+            result = self.result(name)
+            self.assertEqual(result['samples'], 2)
+            self.assertGreaterEqual(result['p95_ms'], result['min_ms'])
+
+    def test_synthetic_screens_are_detected(self):
+        """Test the matcher finds the templates where they were pasted."""
+        self.assertEqual(self.result('match.full', confidence=0.9, grayscale=True)['accuracy'], 1.0)
+        self.assertEqual(self.result('match.roi')['accuracy'], 1.0)
+        self.assertEqual(self.result('match.pyramid')['accuracy'], 1.0)
+        self.assertEqual(self.result('detect.give_prompt')['accuracy'], 1.0)
+
+    def test_results_file_is_comparable(self):
+        """Test a written results file loads back and slowdowns are flagged."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "results.json"
+            self.bench.write_results(self.document, path)
+            baseline = self.compare.load_results(path)
+
+        candidate = {key: dict(value, median_ms=value['median_ms'] * 2 + 1) for key, value in baseline.items()}
+
+        self.assertEqual(len(baseline), len(self.document['results']))
+        self.assertTrue(all(row['regression'] for row in self.compare.compare(baseline, candidate)))
+        self.assertFalse(any(row['regression'] for row in self.compare.compare(baseline, baseline)))
+
+
+class TestHandoffHarness(unittest.TestCase):
+    """Test cases for benchmarks/bench_handoff.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Import the harness."""
+        cls.bench = load_module("bench_handoff")
+
+    def test_percentile_is_nearest_rank(self):
+        """Test percentiles pick a real sample at or above the rank."""
+        samples = list(range(1, 101))
+
+        self.assertEqual(self.bench.percentile(samples, 0.5), 50)
+        self.assertEqual(self.bench.percentile(samples, 0.99), 99)
+        self.assertEqual(self.bench.percentile([3.0], 0.95), 3.0)
+
+    def test_agent_environment_applies_overrides(self):
+        """Test the agent points at the stand-in server and display, with overrides winning."""
+        env = self.bench.agent_environment('http://127.0.0.1:1', ':42', 0.1, {'TASK_PUSH': 'true', 'POLL_JITTER': '0.5'})
+
+        self.assertEqual(env['BASE_URL'], 'http://127.0.0.1:1')
+        self.assertEqual(env['DISPLAY'], ':42')
+        self.assertEqual(env['SCREEN_BACKEND'], 'xvfb')
+        self.assertEqual(env['TASK_PUSH'], 'true')
+        self.assertEqual(env['POLL_JITTER'], '0.5')
+
+    @unittest.skipUnless(shutil.which("Xvfb"), "Xvfb is not installed")
+    def test_handoffs_are_measured(self):
+        """Test the real agent types every prompt into the fake Junie window."""
+        document = self.bench.run_handoff(iterations=2, warmup=1, prompt_length=20, size=(1280, 720))
+
+        latency = document['results'][0]
+        self.assertEqual(latency['name'], 'handoff.latency')
+        self.assertEqual(latency['samples'], 2)
+        self.assertGreaterEqual(latency['p99_ms'], latency['p50_ms'])
+        self.assertGreater(document['throughput']['chars_per_second'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
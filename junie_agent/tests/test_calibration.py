@@ -0,0 +1,222 @@
+"""
+Tests for template scale calibration.
+
+Synthetic frames are built with the bundled templates pasted in at a known
+scale; profiles are written to a temporary directory.
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from devhelm_junie_agent.calibration import ScaleCalibration, find_scale
+from devhelm_junie_agent.detection import Box
+from devhelm_junie_agent.screen_backend import ReplayBackend
+from devhelm_junie_agent.template_cache import scale_template
+from devhelm_junie_agent.ui_interaction import UIInteraction
+
+IMAGES_DIR = Path(__file__).parent.parent / "src" / "devhelm_junie_agent" / "images"
+
+
+def load_template(name):
+    """Load a bundled template as a grayscale array."""
+    return cv2.imread(str(IMAGES_DIR / f"{name}.png"), cv2.IMREAD_GRAYSCALE)
+
+
+def make_frame(placements, scale=1.0, size=(720, 1280)):
+    """
+    Build a synthetic grayscale screen with scaled templates pasted into it.
+
+    Args:
+        placements: Mapping of template name to (left, top)
+        scale: Scale every template is pasted at
+        size: (height, width) of the frame
+    """
+    rng = np.random.default_rng(7)
+    frame = rng.integers(30, 60, size=size, dtype=np.uint8)
+    for name, (left, top) in placements.items():
+        template = scale_template(load_template(name), scale)
+        height, width = template.shape
+        frame[top:top + height, left:left + width] = template
+    return frame
+
+
+class TestFindScale(unittest.TestCase):
+    """Test cases for find_scale()."""
+
+    def test_finds_display_scale(self):
+        """Test the sweep finds the scale a template was pasted at, including between steps."""
+        template = load_template("start_again")
+        for scale in (0.8, 1.0, 1.25, 1.5, 1.13):
+            with self.subTest(scale=scale):
+                frame = make_frame({"start_again": (501, 300)}, scale=scale)
+
+                found_scale, score, box = find_scale(frame, template)
+
+                self.assertAlmostEqual(found_scale, scale, places=2)
+                self.assertGreaterEqual(score, 0.9)
+                self.assertEqual(box[:2], (501, 300))
+
+    def test_missing_template(self):
+        """Test no scale is returned when the template is not on screen."""
+        self.assertIsNone(find_scale(make_frame({}), load_template("start_again")))
+
+
+class TestScaleCalibration(unittest.TestCase):
+    """Test cases for ScaleCalibration."""
+
+    def setUp(self):
+        """Keep profiles in a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "calibration.json"
+        self.template = load_template("start_again")
+
+    def make_calibration(self, **kwargs):
+        """Create a ScaleCalibration for display ':1' writing to the temporary profile."""
+        return ScaleCalibration(self.path, display=':1', **kwargs)
+
+    def test_profile_persisted_per_display(self):
+        """Test a calibrated scale is reloaded for the same display and resolution only."""
+        frame = make_frame({"start_again": (400, 200)}, scale=1.5)
+        calibration = self.make_calibration()
+        calibration.select(frame.shape)
+
+        box = calibration.calibrate(frame, 'start_again.png', self.template)
+
+        self.assertEqual(box, Box(400, 200, 112, 40))
+        self.assertEqual(calibration.template('start_again.png', self.template).shape, (40, 112))
+
+        reloaded = self.make_calibration()
+        reloaded.select(frame.shape)
+        self.assertEqual(reloaded.scale_for('start_again.png', self.template), 1.5)
+        reloaded.select((1080, 1920))
+        self.assertIsNone(reloaded.scale_for('start_again.png', self.template))
+
+        document = json.loads(self.path.read_text())
+        self.assertEqual(document['displays'][':1@1280x720']['start_again.png']['scale'], 1.5)
+
+    def test_changed_template_is_recalibrated(self):
+        """Test a profile made with a different template image is not used."""
+        frame = make_frame({"start_again": (400, 200)}, scale=1.5)
+        calibration = self.make_calibration()
+        calibration.select(frame.shape)
+        calibration.calibrate(frame, 'start_again.png', self.template, now=100.0)
+
+        changed = self.template.copy()
+        changed[0, 0] ^= 0xFF
+
+        self.assertIsNone(calibration.scale_for('start_again.png', changed))
+        self.assertTrue(calibration.due('start_again.png', changed, now=160.0))
+
+    def test_sweeps_are_rate_limited(self):
+        """Test a missing template is swept at most once per retry interval."""
+        frame = make_frame({})
+        calibration = self.make_calibration(retry_interval=60.0)
+        calibration.select(frame.shape)
+
+        self.assertTrue(calibration.due('start_again.png', self.template, now=100.0))
+        self.assertIsNone(calibration.calibrate(frame, 'start_again.png', self.template, now=100.0))
+
+        self.assertFalse(calibration.due('start_again.png', self.template, now=159.0))
+        self.assertTrue(calibration.due('start_again.png', self.template, now=160.0))
+        self.assertFalse(self.path.exists())
+
+    def test_reused_frame_buffer(self):
+        """Test a sweep of a capture buffer reused with new contents finds the template."""
+        frame = make_frame({})
+        calibration = self.make_calibration(retry_interval=0.0)
+        calibration.select(frame.shape)
+        self.assertIsNone(calibration.calibrate(frame, 'start_again.png', self.template))
+
+        # XShmCapture hands out the same array for every capture
+        scaled = scale_template(self.template, 1.5)
+        frame[500:500 + scaled.shape[0], 900:900 + scaled.shape[1]] = scaled
+
+        self.assertEqual(calibration.calibrate(frame, 'start_again.png', self.template), Box(900, 500, 112, 40))
+        self.assertEqual(calibration.profile(), {'start_again.png': 1.5})
+
+    def test_calibrated_template_swept_again_when_stale(self):
+        """Test a calibrated template missing for stale_after seconds is swept again."""
+        calibration = self.make_calibration(retry_interval=60.0, stale_after=600.0)
+        calibration.select((720, 1280))
+        calibration.seen('start_again.png', self.template, now=100.0)
+
+        self.assertEqual(calibration.scale_for('start_again.png', self.template), 1.0)
+        self.assertFalse(calibration.due('start_again.png', self.template, now=699.0))
+        self.assertTrue(calibration.due('start_again.png', self.template, now=700.0))
+
+    def test_disabled_persistence(self):
+        """Test persist=False keeps the profile in memory only."""
+        frame = make_frame({"start_again": (400, 200)}, scale=1.25)
+        calibration = ScaleCalibration(self.path, persist=False)
+        calibration.select(frame.shape)
+
+        self.assertIsNotNone(calibration.calibrate(frame, 'start_again.png', self.template))
+        self.assertEqual(calibration.profile(), {'start_again.png': 1.25})
+        self.assertFalse(self.path.exists())
+
+
+class TestUIInteractionCalibration(unittest.TestCase):
+    """Test cases for UIInteraction with scale calibration."""
+
+    def setUp(self):
+        """Set up a UIInteraction replaying a HiDPI screen."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "calibration.json"
+        self.frame = make_frame({"start_again": (100, 500), "type_your": (900, 550)}, scale=1.25)
+        self.backend = ReplayBackend([self.frame], loop=True)
+
+    def make_ui(self):
+        """Create a UIInteraction calibrating into the temporary profile."""
+        return UIInteraction(backend=self.backend, calibration=ScaleCalibration(self.path, display=':1'))
+
+    def test_uncalibrated_templates_miss(self):
+        """Test the templates do not match at their captured scale."""
+        ui = UIInteraction(backend=self.backend)
+
+        self.assertFalse(ui.isReadyForPrompt())
+
+    def test_missing_templates_are_calibrated(self):
+        """Test the first pass calibrates and finds both templates at the display scale."""
+        ui = self.make_ui()
+
+        result = ui.detect()
+
+        self.assertTrue(result.is_ready_for_prompt)
+        self.assertEqual(result.location('start_again'), Box(100, 500, 94, 34))
+        self.assertEqual(result.location('type_your')[:2], (900, 550))
+        self.assertEqual(ui.calibration.profile(), {'start_again.png': 1.25, 'type_your.png': 1.25})
+
+    def test_restarted_agent_uses_stored_scale(self):
+        """Test a new UIInteraction matches at the stored scale without sweeping."""
+        self.make_ui().detect()
+        ui = self.make_ui()
+
+        with patch('devhelm_junie_agent.calibration.find_scale') as mock_find_scale:
+            result = ui.detect()
+
+        mock_find_scale.assert_not_called()
+        self.assertTrue(result.is_ready_for_prompt)
+        self.assertEqual(result.location('start_again'), Box(100, 500, 94, 34))
+
+    def test_found_templates_are_not_swept(self):
+        """Test templates matching at their captured scale are recorded without a sweep."""
+        self.backend.frames = [make_frame({"start_again": (100, 500), "type_your": (900, 550)})]
+        ui = self.make_ui()
+
+        with patch('devhelm_junie_agent.calibration.find_scale') as mock_find_scale:
+            self.assertTrue(ui.isReadyForPrompt())
+
+        mock_find_scale.assert_not_called()
+        self.assertEqual(ui.calibration.profile(), {'start_again.png': 1.0, 'type_your.png': 1.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests for the X DAMAGE watcher.
+
+Region filtering is tested without a display; the event subscription is
+exercised against a real Xvfb server when one is installed.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from devhelm_junie_agent.damage import DamageWatcher, DamageWatcherException, overlaps
+from devhelm_junie_agent.detection import Box, DetectionResult, RegionTracker
+
+
+def make_ui(locations, found=None):
+    """Build a UIInteraction stand-in with known template locations."""
+    tracker = RegionTracker()
+    tracker.last_locations.update(locations)
+    found = locations if found is None else found
+    detection = DetectionResult(dict(found))
+    return SimpleNamespace(templates={'start_again': 'start_again.png', 'type_your': 'type_your.png'},
+                           region_tracker=tracker, last_detection=detection)
+
+
+def test_overlaps():
+    """Test box intersection, including touching edges."""
+    box = Box(10, 10, 20, 20)
+
+    assert overlaps(box, Box(25, 25, 10, 10))
+    assert overlaps(box, Box(0, 0, 100, 100))
+    assert not overlaps(box, Box(30, 10, 5, 5))
+    assert not overlaps(box, Box(10, 30, 5, 5))
+
+
+def test_watches_everything_until_templates_are_located():
+    """Test any damage is relevant while a template location is unknown."""
+    watcher = DamageWatcher(make_ui({'start_again': Box(100, 600, 75, 27)}))
+
+    assert watcher.watched_regions() is None
+    assert watcher.handle_damage(Box(0, 0, 1, 1))
+
+
+def test_ignores_damage_outside_watched_regions():
+    """Test damage away from the templates does not flag a change."""
+    watcher = DamageWatcher(make_ui({
+        'start_again': Box(100, 600, 75, 27),
+        'type_your': Box(900, 650, 76, 38),
+    }), padding=16)
+    watcher.consume()
+
+    assert not watcher.handle_damage(Box(500, 100, 50, 50))
+    assert not watcher.consume()
+
+    assert watcher.handle_damage(Box(180, 610, 10, 10))
+    assert watcher.consume()
+    assert not watcher.consume()
+    assert (watcher.damage_events, watcher.relevant_events) == (2, 1)
+
+
+def test_watches_everything_while_a_template_is_missing():
+    """Test any damage is relevant while the last detection missed a template."""
+    locations = {'start_again': Box(100, 600, 75, 27), 'type_your': Box(900, 650, 76, 38)}
+    watcher = DamageWatcher(make_ui(locations, found={'type_your': locations['type_your']}))
+
+    assert watcher.watched_regions() is None
+    assert watcher.handle_damage(Box(500, 100, 50, 50))
+
+
+def test_first_pass_always_detects():
+    """Test the watcher starts flagged so the first loop iteration detects."""
+    assert DamageWatcher().consume()
+
+
+def test_lost_connection_flags_every_pass():
+    """Test a watcher whose X connection fails reports a change on every pass."""
+    watcher = DamageWatcher(make_ui({}))
+    watcher.consume()
+    watcher._display = Mock()
+    watcher._display.screen.side_effect = ConnectionResetError("X server went away")
+
+    with patch('devhelm_junie_agent.damage.select.select', return_value=([1], [], [])):
+        watcher._run()
+
+    assert watcher.consume()
+    assert watcher.consume()
+    assert not watcher.changed.is_set()
+
+
+def test_unreachable_display():
+    """Test an unreachable display raises instead of crashing."""
+    with pytest.raises(DamageWatcherException):
+        DamageWatcher(display_name=":4242").start()
+
+
+def test_damage_events_under_xvfb(xvfb_display):
+    """Test drawing on the screen wakes the watcher only inside watched regions."""
+    from Xlib import X, display as xdisplay
+
+    watched = [Box(100, 100, 50, 50)]
+    watcher = DamageWatcher(display_name=xvfb_display, regions=lambda: watched).start()
+    client = xdisplay.Display(xvfb_display)
+    try:
+        watcher.consume()
+        root = client.screen().root
+        gc = root.create_gc(foreground=client.screen().white_pixel, subwindow_mode=X.IncludeInferiors)
+
+        root.fill_rectangle(gc, 600, 400, 20, 20)
+        client.sync()
+        assert not watcher.changed.wait(1.0)
+
+        root.fill_rectangle(gc, 110, 110, 20, 20)
+        client.sync()
+        assert watcher.changed.wait(5.0)
+        assert watcher.relevant_events >= 1
+    finally:
+        client.close()
+        watcher.stop()
@@ -0,0 +1,372 @@
+"""
+Tests for template detection.
+
+This module verifies template matching on synthetic frames built from the
+bundled template images, and that UIInteraction matches every template
+against a single captured frame.
+"""
+
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from devhelm_junie_agent.detection import (
+    Box,
+    DetectionCache,
+    DetectionResult,
+    PyramidMatcher,
+    RegionTracker,
+    create_matcher,
+    detect_templates,
+    frame_hash,
+    match_template,
+    match_tracked,
+)
+from devhelm_junie_agent.screen_backend import ReplayBackend
+from devhelm_junie_agent.ui_interaction import UIInteraction
+
+IMAGES_DIR = Path(__file__).parent.parent / "src" / "devhelm_junie_agent" / "images"
+
+
+def load_template(name):
+    """Load a bundled template as a grayscale array."""
+    return cv2.imread(str(IMAGES_DIR / f"{name}.png"), cv2.IMREAD_GRAYSCALE)
+
+
+def make_frame(placements, size=(720, 1280)):
+    """
+    Build a synthetic grayscale screen with templates pasted into it.
+
+    Args:
+        placements: Mapping of template name to (left, top)
+        size: (height, width) of the frame
+    """
+    rng = np.random.default_rng(42)
+    frame = rng.integers(30, 60, size=size, dtype=np.uint8)
+    for name, (left, top) in placements.items():
+        template = load_template(name)
+        height, width = template.shape
+        frame[top:top + height, left:left + width] = template
+    return frame
+
+
+class TestMatchTemplate(unittest.TestCase):
+    """Test cases for match_template() and detect_templates()."""
+
+    def test_finds_template(self):
+        """Test a pasted template is found at its exact position."""
+        frame = make_frame({"start_again": (400, 300)})
+        template = load_template("start_again")
+
+        box = match_template(frame, template)
+
+        self.assertEqual(box, Box(400, 300, template.shape[1], template.shape[0]))
+
+    def test_missing_template(self):
+        """Test no match is returned when the template is absent."""
+        frame = make_frame({})
+
+        self.assertIsNone(match_template(frame, load_template("start_again")))
+
+    def test_template_larger_than_frame(self):
+        """Test a template larger than the frame never matches."""
+        frame = np.zeros((10, 10), dtype=np.uint8)
+
+        self.assertIsNone(match_template(frame, load_template("type_your")))
+
+    def test_detect_templates_returns_all_locations(self):
+        """Test every template is matched against the same frame."""
+        frame = make_frame({"start_again": (100, 600), "type_your": (900, 650)})
+        templates = {name: load_template(name) for name in ("start_again", "type_your")}
+
+        result = detect_templates(frame, templates)
+
+        self.assertTrue(result.is_ready_for_prompt)
+        self.assertEqual(result.location("type_your")[:2], (900, 650))
+        self.assertEqual(result.location("start_again").center, (100 + 75 // 2, 600 + 27 // 2))
+
+
+class TestPyramidMatcher(unittest.TestCase):
+    """Test cases for the coarse-to-fine PyramidMatcher."""
+
+    def setUp(self):
+        """Create a matcher and load the templates."""
+        self.matcher = PyramidMatcher()
+        self.templates = {name: load_template(name) for name in ("start_again", "type_your")}
+
+    def test_results_identical_to_full_search(self):
+        """Test even and odd positions give the same box as match_template()."""
+        for left, top in ((400, 300), (401, 300), (400, 301), (1203, 681), (0, 0)):
+            frame = make_frame({"start_again": (left, top), "type_your": (left // 2 + 101, top // 3 + 51)})
+            for name, template in self.templates.items():
+                with self.subTest(name=name, left=left, top=top):
+                    expected = match_template(frame, template)
+                    self.assertIsNotNone(expected)
+                    self.assertEqual(self.matcher(frame, template), expected)
+
+    def test_missing_template(self):
+        """Test no match is returned when the template is absent."""
+        frame = make_frame({"type_your": (900, 650)})
+
+        self.assertIsNone(self.matcher(frame, self.templates["start_again"]))
+
+    def test_best_match_reports_score(self):
+        """Test best_match() returns the best score even below the confidence."""
+        frame = make_frame({"start_again": (400, 300)})
+
+        score, box = self.matcher.best_match(frame, self.templates["start_again"])
+        missing_score, _ = self.matcher.best_match(frame, self.templates["type_your"])
+
+        self.assertGreater(score, 0.99)
+        self.assertEqual(box, Box(400, 300, 75, 27))
+        self.assertLess(missing_score, 0.9)
+
+    def test_small_frame_matched_at_full_resolution(self):
+        """Test a frame too small for a coarse level still finds the template."""
+        frame = make_frame({"start_again": (3, 4)}, size=(36, 84))
+
+        self.assertEqual(self.matcher(frame, self.templates["start_again"]), Box(3, 4, 75, 27))
+
+    def test_reused_frame_buffer(self):
+        """Test a capture buffer reused with new contents is matched afresh."""
+        frame = make_frame({})
+        template = self.templates["start_again"]
+        self.assertIsNone(self.matcher(frame, template))
+
+        # XShmCapture hands out the same array for every capture
+        frame[600:627, 100:175] = template
+
+        self.assertEqual(self.matcher(frame, template), Box(100, 600, 75, 27))
+        self.assertEqual(self.matcher(frame, template), match_template(frame, template))
+
+    def test_create_matcher(self):
+        """Test engines are selected by name."""
+        self.assertIs(create_matcher('full'), match_template)
+        self.assertIsInstance(create_matcher('Pyramid'), PyramidMatcher)
+        with self.assertRaises(ValueError):
+            create_matcher('sift')
+
+
+class TestRegionTracker(unittest.TestCase):
+    """Test cases for region-of-interest tracking."""
+
+    def setUp(self):
+        """Set up a tracker and the start_again template."""
+        self.tracker = RegionTracker(padding=20)
+        self.template = load_template("start_again")
+
+    def test_first_search_is_full_frame(self):
+        """Test a template with no known location is searched in the full frame."""
+        frame = make_frame({"start_again": (400, 300)})
+
+        box = match_tracked(frame, "start_again", self.template, self.tracker)
+
+        self.assertEqual(box[:2], (400, 300))
+        self.assertEqual(self.tracker.stats["start_again"].full_searches, 1)
+        self.assertEqual(self.tracker.region_for("start_again", frame.shape), (380, 280, 495, 347))
+
+    def test_region_hit(self):
+        """Test a template near its last location is found in the region."""
+        self.tracker.record("start_again", Box(400, 300, 75, 27), roi_hit=None)
+        frame = make_frame({"start_again": (410, 305)})
+
+        box = match_tracked(frame, "start_again", self.template, self.tracker)
+
+        self.assertEqual(box[:2], (410, 305))
+        self.assertEqual(self.tracker.stats["start_again"].roi_hits, 1)
+        self.assertEqual(self.tracker.stats["start_again"].hit_rate, 1.0)
+
+    def test_region_miss_falls_back_to_full_frame(self):
+        """Test a template that moved is found by the full-frame fallback."""
+        self.tracker.record("start_again", Box(400, 300, 75, 27), roi_hit=None)
+        frame = make_frame({"start_again": (50, 600)})
+
+        box = match_tracked(frame, "start_again", self.template, self.tracker)
+
+        stats = self.tracker.stats["start_again"]
+        self.assertEqual(box[:2], (50, 600))
+        self.assertEqual((stats.roi_hits, stats.roi_misses), (0, 1))
+        self.assertEqual(self.tracker.last_locations["start_again"][:2], (50, 600))
+
+    def test_location_kept_when_template_disappears(self):
+        """Test the last location survives a pass where the template is hidden."""
+        self.tracker.record("start_again", Box(400, 300, 75, 27), roi_hit=None)
+
+        self.assertIsNone(match_tracked(make_frame({}), "start_again", self.template, self.tracker))
+        self.assertEqual(self.tracker.last_locations["start_again"], Box(400, 300, 75, 27))
+
+    def test_region_clipped_to_frame(self):
+        """Test the padded region never extends past the frame edges."""
+        self.tracker.record("start_again", Box(5, 5, 75, 27), roi_hit=None)
+
+        self.assertEqual(self.tracker.region_for("start_again", (40, 90)), (0, 0, 90, 40))
+
+
+class TestDetectionCache(unittest.TestCase):
+    """Test cases for frame hashing and the DetectionCache."""
+
+    def setUp(self):
+        """Set up a synthetic frame."""
+        self.frame = make_frame({"start_again": (100, 600)})
+
+    def test_hash_ignores_single_pixel_noise(self):
+        """Test capture noise on one pixel does not change the hash."""
+        noisy = self.frame.copy()
+        noisy[300, 300] ^= 1
+
+        self.assertEqual(frame_hash(self.frame), frame_hash(noisy))
+
+    def test_hash_changes_when_element_appears(self):
+        """Test a template appearing changes the hash."""
+        changed = make_frame({"start_again": (100, 600), "type_your": (900, 650)})
+
+        self.assertNotEqual(frame_hash(self.frame), frame_hash(changed))
+
+    def test_hash_depends_on_shape(self):
+        """Test frames of different sizes never share a hash."""
+        self.assertNotEqual(frame_hash(np.zeros((64, 128), np.uint8)), frame_hash(np.zeros((128, 64), np.uint8)))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = DetectionCache(maxsize=2)
+        cache.put("a", DetectionResult({"x": None}))
+        cache.put("b", DetectionResult({"x": None}))
+        cache.get("a")
+        cache.put("c", DetectionResult({"x": None}))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_get_returns_copy_with_new_timestamp(self):
+        """Test cached results are copies stamped with the new capture time."""
+        cache = DetectionCache()
+        cache.put("a", DetectionResult({"start_again": Box(1, 2, 3, 4)}, captured_at=1.0))
+
+        result = cache.get("a", captured_at=5.0)
+        result.locations["start_again"] = None
+
+        self.assertEqual(result.captured_at, 5.0)
+        self.assertIsNotNone(cache.get("a").location("start_again"))
+
+    def test_disabled_cache(self):
+        """Test a maxsize of 0 never stores results."""
+        cache = DetectionCache(maxsize=0)
+        cache.put("a", DetectionResult())
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats.misses, 1)
+
+
+class TestUIInteractionDetection(unittest.TestCase):
+    """Test cases for UIInteraction detection passes."""
+
+    def setUp(self):
+        """Set up a UIInteraction replaying a synthetic screen."""
+        self.backend = ReplayBackend([
+            make_frame({"start_again": (100, 600), "type_your": (900, 650)}),
+            make_frame({}),
+        ])
+        self.ui = UIInteraction(backend=self.backend)
+
+    def test_detect_captures_once(self):
+        """Test one detection pass costs a single screen capture."""
+        result = self.ui.detect()
+
+        self.assertEqual(self.backend.position, 1)
+        self.assertTrue(result.found("start_again"))
+        self.assertTrue(result.found("type_your"))
+        self.assertIs(self.ui.last_detection, result)
+
+    def test_detect_uses_configured_matcher(self):
+        """Test full-frame searches go through the UIInteraction's matcher."""
+        ui = UIInteraction(backend=self.backend, matcher=PyramidMatcher())
+
+        result = ui.detect()
+
+        self.assertEqual(result.location("start_again"), Box(100, 600, 75, 27))
+        self.assertIsInstance(ui.matcher, PyramidMatcher)
+
+    def test_detect_uses_region_on_second_pass(self):
+        """Test repeated passes are answered from the tracked regions."""
+        changed = self.backend.frames[0].copy()
+        changed[0:40, 0:40] = 0
+        self.backend.frames = [self.backend.frames[0], changed]
+        self.ui.detect()
+        self.ui.detect()
+
+        stats = self.ui.region_tracker.stats
+        self.assertEqual(stats["start_again"].roi_hits, 1)
+        self.assertEqual(stats["type_your"].roi_hits, 1)
+
+    def test_unchanged_frame_answered_from_cache(self):
+        """Test an identical frame skips template matching."""
+        self.backend.loop = True
+        self.backend.frames = self.backend.frames[:1]
+        first = self.ui.detect()
+
+        with patch.object(self.backend, 'match') as mock_match:
+            second = self.ui.detect()
+
+        mock_match.assert_not_called()
+        self.assertEqual(second.locations, first.locations)
+        self.assertIsNot(second, first)
+        self.assertEqual(self.ui.detection_cache.stats.hits, 1)
+        self.assertEqual(self.ui.detection_cache.stats.misses, 1)
+        self.assertEqual(self.ui.detection_cache.stats.hit_rate, 0.5)
+
+    def test_changed_frame_is_matched(self):
+        """Test a different frame is matched again."""
+        self.ui.detect()
+        result = self.ui.detect()
+
+        self.assertFalse(result.found("start_again"))
+        self.assertEqual(self.ui.detection_cache.stats.hits, 0)
+
+    def test_register_template(self):
+        """Test additional templates are matched in the same pass."""
+        self.ui.register_template("label", "type_your.png")
+
+        result = self.ui.detect()
+
+        self.assertEqual(result.location("label"), result.location("type_your"))
+        self.assertEqual(self.backend.position, 1)
+
+    @patch('devhelm_junie_agent.ui_interaction.time.sleep')
+    def test_give_prompt_captures_once(self, mock_sleep):
+        """Test givePrompt checks readiness and finds the input box in one capture."""
+        self.assertTrue(self.ui.givePrompt("Work on ticket DH-123"))
+
+        self.assertEqual(self.backend.position, 1)
+        self.assertEqual(self.backend.events, [
+            ('click', 900 + 38 + 76 + 10, 650 + 19),
+            ('type', "Work on ticket DH-123"),
+            ('press', 'enter'),
+        ])
+
+    def test_not_ready_without_start_again(self):
+        """Test the UI is not ready when "Start Again" is not visible."""
+        self.ui.backend = ReplayBackend([make_frame({"type_your": (900, 650)})])
+
+        self.assertFalse(self.ui.isReadyForPrompt())
+        self.assertFalse(self.ui.givePrompt("prompt"))
+        self.assertEqual(self.ui.backend.events, [])
+        self.assertFalse(self.ui.prompt_typing_started)
+
+    @patch('devhelm_junie_agent.ui_interaction.time.sleep')
+    def test_prompt_typing_started(self, mock_sleep):
+        """Test givePrompt records whether it got as far as typing."""
+        self.ui.givePrompt("prompt")
+        self.assertTrue(self.ui.prompt_typing_started)
+
+        with patch.object(self.ui, 'detect', side_effect=RuntimeError("capture failed")):
+            with self.assertRaises(RuntimeError):
+                self.ui.givePrompt("prompt")
+        self.assertFalse(self.ui.prompt_typing_started)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+"""
+Tests for the fleet module.
+
+Workers are driven with fake UIs against the bundled ReferenceServer (one
+per "display"), so no X server is needed.
+"""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from devhelm_junie_agent.config import Config
+from devhelm_junie_agent.detection import Box, DetectionResult
+from devhelm_junie_agent.fleet import FleetException, FleetSupervisor, FleetWorker, WorkerSpec, parse_fleet
+from devhelm_junie_agent.http_client import HttpClient
+from devhelm_junie_agent.reference_server import ReferenceServer
+
+
+class FakeUI:
+    """UI that is ready again shortly after every prompt."""
+
+    def __init__(self, busy_for=0.05):
+        self.busy_for = busy_for
+        self.busy_until = 0.0
+        self.prompts = []
+        self.last_detection = None
+
+    def detect(self):
+        found = Box(10, 10, 40, 20) if time.monotonic() >= self.busy_until else None
+        self.last_detection = DetectionResult(locations={'start_again': found})
+        return self.last_detection
+
+    def isReadyForPrompt(self):
+        return self.detect().found('start_again')
+
+    def givePrompt(self, prompt):
+        self.prompts.append(prompt)
+        self.busy_until = time.monotonic() + self.busy_for
+        return True
+
+    def continuePrompt(self):
+        self.givePrompt("continue")
+
+
+def make_config(url, **kwargs):
+    """Create a Config with tiny polling intervals."""
+    options = dict(
+        poll_fast_interval=0.01,
+        poll_min_interval=0.01,
+        poll_max_interval=0.05,
+        poll_jitter=0.0,
+        readiness_confirmations=1,
+        readiness_interval=0.01,
+        task_journal_path=':memory:',
+    )
+    options.update(kwargs)
+    return Config(url, 'key', 'pretty', '', 2, **options)
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestParseFleet(unittest.TestCase):
+    """Test cases for parse_fleet."""
+
+    def test_parses_displays_and_keys(self):
+        """Test entries with and without their own API key."""
+        specs = parse_fleet(":1=one, :2=two,:3", 'default')
+
+        self.assertEqual(specs, [
+            WorkerSpec(name='display:1', display=':1', api_key='one'),
+            WorkerSpec(name='display:2', display=':2', api_key='two'),
+            WorkerSpec(name='display:3', display=':3', api_key='default'),
+        ])
+
+    def test_rejects_invalid_specifications(self):
+        """Test empty, keyless and duplicate entries are rejected."""
+        for value, default in (("", 'key'), (",", 'key'), (":1", ''), (":1=a,:1=b", 'key'), ("=key", 'key')):
+            with self.subTest(value=value):
+                with self.assertRaises(FleetException):
+                    parse_fleet(value, default)
+
+
+class TestFleetWorker(unittest.TestCase):
+    """Test cases for FleetWorker."""
+
+    def test_worker_hands_off_tasks_with_its_own_key(self):
+        """Test a worker enters queued tasks using its display's API key."""
+        with ReferenceServer(api_key='secret') as server:
+            ui = FakeUI()
+            spec = WorkerSpec(name='display:1', display=':1', api_key='secret')
+            worker = FleetWorker(spec, make_config(server.url), HttpClient(retries=0), None, MagicMock(),
+                                 ui_factory=lambda spec: ui).start()
+            self.addCleanup(worker.stop)
+            server.add_task("First")
+
+            self.assertTrue(wait_for(lambda: ui.prompts[:1] == ["First"]))
+            self.assertEqual(worker.state, 'running')
+
+            server.complete()
+            server.add_task("Second")
+            self.assertTrue(wait_for(lambda: "Second" in ui.prompts))
+
+    def test_continue_limit_finishes_worker(self):
+        """Test the continue limit ends only this worker."""
+        with ReferenceServer() as server:
+            ui = FakeUI()
+            spec = WorkerSpec(name='display:1', display=':1', api_key='key')
+            worker = FleetWorker(spec, make_config(server.url), HttpClient(retries=0), None, MagicMock(),
+                                 ui_factory=lambda spec: ui)
+            server.add_task("Long task")
+            worker.start()
+
+            self.assertTrue(wait_for(lambda: worker.state == 'finished'))
+            self.assertEqual(ui.prompts, ["Long task", "continue", "continue"])
+            self.assertFalse(wait_for(lambda: worker.alive, timeout=0.1))
+
+    def test_worker_journal_never_types_a_task_twice(self):
+        """Test a restarted worker skips a task its journal already submitted."""
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        config = make_config('', task_journal_path=str(Path(journal_dir.name) / "journal.sqlite3"))
+        spec = WorkerSpec(name='display:1', display=':1', api_key='key')
+
+        with ReferenceServer() as server:
+            config.api_url = server.url
+            first_ui = FakeUI()
+            worker = FleetWorker(spec, config, HttpClient(retries=0), None, MagicMock(),
+                                 ui_factory=lambda spec: first_ui).start()
+            server.add_task("First", task_id='task-1')
+            self.assertTrue(wait_for(lambda: first_ui.prompts == ["First"]))
+            worker.stop()
+
+            # The server hands the same task out again after the restart
+            server.complete()
+            server.add_task("First", task_id='task-1')
+            second_ui = FakeUI()
+            logger = MagicMock()
+            worker = FleetWorker(spec, config, HttpClient(retries=0), None, logger,
+                                 ui_factory=lambda spec: second_ui).start()
+            self.addCleanup(worker.stop)
+            self.assertTrue(wait_for(lambda: logger.warning.called))
+            server.complete()
+            server.add_task("Second")
+
+            self.assertTrue(wait_for(lambda: "Second" in second_ui.prompts))
+            self.assertNotIn("First", second_ui.prompts)
+        self.assertTrue((Path(journal_dir.name) / "journal-display_1.sqlite3").exists())
+
+    def test_workers_have_their_own_circuit_breakers(self):
+        """Test one worker's failing requests cannot open another worker's breaker."""
+        with ReferenceServer() as server:
+            http_client = HttpClient(retries=0, circuit_threshold=1)
+            workers = []
+            for display in (':1', ':2'):
+                spec = WorkerSpec(name=f'display{display}', display=display, api_key='key')
+                worker = FleetWorker(spec, make_config(server.url), http_client, None, MagicMock(),
+                                     ui_factory=lambda spec: FakeUI()).start()
+                self.addCleanup(worker.stop)
+                workers.append(worker)
+            self.assertTrue(wait_for(lambda: all(w.agent is not None for w in workers)))
+
+            first, second = (w.agent.tasks.breaker for w in workers)
+            self.assertIsNot(first, second)
+            self.assertIsNot(first, http_client.breaker)
+            self.assertEqual(first.failure_threshold, 1)
+
+            first.record_failure()
+            self.assertEqual(first.state, 'open')
+            self.assertEqual(second.state, 'closed')
+
+
+
+class TestFleetSupervisor(unittest.TestCase):
+    """Test cases for FleetSupervisor."""
+
+    def test_workers_share_pool_and_template_cache(self):
+        """Test every worker gets the same HttpClient and TemplateCache."""
+        factory = MagicMock()
+        config = make_config('http://127.0.0.1:1')
+        supervisor = FleetSupervisor(parse_fleet(":1,:2", 'key'), config, MagicMock(), worker_factory=factory)
+
+        supervisor.start()
+
+        self.assertEqual(factory.call_count, 2)
+        (_, _, first_client, first_cache, _), (_, _, second_client, second_cache, _) = [c.args for c in factory.call_args_list]
+        self.assertIs(first_client, second_client)
+        self.assertIs(first_cache, second_cache)
+        self.assertIsNotNone(first_cache)
+        self.assertEqual(supervisor.http_client.pool.connection_pool_kw['maxsize'], 2)
+
+    def test_failed_worker_is_restarted(self):
+        """Test a worker whose display fails is restarted after a backoff."""
+        with ReferenceServer() as server:
+            uis = []
+
+            def ui_factory(spec):
+                if spec.display == ':2' and not any(d == ':2' for d, _ in uis):
+                    uis.append((':2', None))
+                    raise RuntimeError("Cannot open display :2")
+                ui = FakeUI()
+                uis.append((spec.display, ui))
+                return ui
+
+            def worker_factory(spec, config, http_client, template_cache, logger):
+                return FleetWorker(spec, config, http_client, template_cache, logger, ui_factory=ui_factory)
+
+            supervisor = FleetSupervisor(parse_fleet(":1,:2", 'key'), make_config(server.url), MagicMock(),
+                                         http_client=HttpClient(retries=0), template_cache=MagicMock(),
+                                         worker_factory=worker_factory, restart_backoff=0.05)
+            supervisor.start()
+            self.addCleanup(supervisor.stop)
+
+            self.assertTrue(wait_for(lambda: supervisor.workers['display:2'].state == 'failed'))
+            self.assertEqual(supervisor.health()['display:2'].last_error, "Cannot open display :2")
+
+            def restarted():
+                supervisor.check()
+                return supervisor.workers['display:2'].state == 'running'
+
+            self.assertTrue(wait_for(restarted))
+            health = supervisor.health()
+            self.assertEqual(health['display:2'].restarts, 1)
+            self.assertEqual(health['display:1'].restarts, 0)
+            self.assertTrue(health['display:1'].alive)
+
+    def test_stalled_worker_is_reported(self):
+        """Test a worker without a recent heartbeat is logged once."""
+        worker = MagicMock(alive=True, heartbeat=time.monotonic() - 100)
+        worker.start.return_value = worker
+        logger = MagicMock()
+        supervisor = FleetSupervisor(parse_fleet(":1", 'key'), make_config('http://127.0.0.1:1'), logger,
+                                     template_cache=MagicMock(), worker_factory=lambda *args: worker,
+                                     stall_timeout=10)
+        supervisor.start()
+
+        supervisor.check()
+        supervisor.check()
+
+        self.assertEqual(logger.warning.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+"""
+Tests for the frame bus module.
+
+The ring buffer is exercised in-process and across processes; the
+publisher runs with a synthetic capture backend so no display is needed.
+"""
+
+import multiprocessing
+import pickle
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from devhelm_junie_agent.frame_bus import BusCapture, FrameBus, FrameBusException, FramePublisher
+from devhelm_junie_agent.screen_capture import ScreenCapture
+
+
+class CountingCapture(ScreenCapture):
+    """Capture returning frames filled with an increasing value."""
+
+    name = "counting"
+
+    def __init__(self, shape=(48, 64)):
+        self.shape = shape
+        self.count = 0
+
+    def capture(self):
+        self.count += 1
+        return np.full(self.shape, self.count % 256, dtype=np.uint8)
+
+
+class FailingCapture(ScreenCapture):
+    """Capture that cannot open its display."""
+
+    def __init__(self):
+        raise RuntimeError("no display")
+
+
+def _consume(name, queue):
+    """Attach to a bus in another process and report the newest frame."""
+    bus = FrameBus.attach(name)
+    frame = bus.wait(0, timeout=5.0)
+    queue.put((frame.seq, int(frame.image.sum()), bus.is_current(frame.seq)))
+    del frame
+    bus.close()
+
+
+class TestFrameBus(unittest.TestCase):
+    """Test cases for FrameBus."""
+
+    def setUp(self):
+        """Create a small bus."""
+        self.bus = FrameBus.create((4, 6), slots=3)
+        self.addCleanup(self.bus.close)
+
+    def test_publish_and_read_zero_copy(self):
+        """Test a published frame is read back as a read-only shared view."""
+        frame = np.arange(24, dtype=np.uint8).reshape(4, 6)
+
+        seq = self.bus.publish(frame, captured_at=12.5)
+        result = self.bus.read()
+
+        self.assertEqual(seq, 1)
+        self.assertEqual(result.seq, 1)
+        self.assertEqual(result.captured_at, 12.5)
+        np.testing.assert_array_equal(result.image, frame)
+        self.assertFalse(result.image.flags.writeable)
+        self.assertFalse(result.image.flags.owndata)
+
+    def test_empty_bus_has_no_frame(self):
+        """Test reading before the first frame returns None."""
+        self.assertEqual(self.bus.latest_seq, 0)
+        self.assertIsNone(self.bus.read())
+        self.assertIsNone(self.bus.wait(0, timeout=0.01))
+
+    def test_overwritten_frames_are_detected(self):
+        """Test a frame is no longer current once its slot is reused."""
+        for value in range(1, 4):
+            self.bus.publish(np.full((4, 6), value, dtype=np.uint8))
+        self.assertTrue(self.bus.is_current(1))
+
+        self.bus.publish(np.full((4, 6), 4, dtype=np.uint8))
+
+        self.assertFalse(self.bus.is_current(1))
+        self.assertIsNone(self.bus.read(1))
+        self.assertEqual(int(self.bus.read(2).image[0, 0]), 2)
+
+    def test_rejects_wrong_shape(self):
+        """Test frames of another size are refused."""
+        with self.assertRaises(ValueError):
+            self.bus.publish(np.zeros((5, 6), dtype=np.uint8))
+
+    def test_attach_from_another_process(self):
+        """Test a consumer process reads frames published here."""
+        self.bus.publish(np.full((4, 6), 7, dtype=np.uint8))
+        queue = multiprocessing.Queue()
+
+        process = multiprocessing.Process(target=_consume, args=(self.bus.name, queue))
+        process.start()
+        result = queue.get(timeout=10)
+        process.join(10)
+
+        self.assertEqual(result, (1, 7 * 24, True))
+        self.assertEqual(process.exitcode, 0)
+
+    def test_bus_capture_returns_a_copy(self):
+        """Test BusCapture frames are not changed by frames published later."""
+        capture = BusCapture(self.bus)
+        self.bus.publish(np.full((4, 6), 1, dtype=np.uint8))
+
+        first = capture.capture()
+        for value in range(2, 5):
+            self.bus.publish(np.full((4, 6), value, dtype=np.uint8))
+
+        self.assertTrue(first.flags.owndata)
+        self.assertEqual(int(first[0, 0]), 1)
+        self.assertEqual(int(capture.capture()[0, 0]), 4)
+
+    def test_bus_capture_retries_torn_reads(self):
+        """Test a frame overwritten while it was copied is read again."""
+        capture = BusCapture(self.bus, retries=1)
+        self.bus.publish(np.full((4, 6), 1, dtype=np.uint8))
+
+        with patch.object(self.bus, 'is_current', side_effect=[False, True]):
+            self.assertEqual(int(capture.capture()[0, 0]), 1)
+        with patch.object(self.bus, 'is_current', return_value=False):
+            with self.assertRaises(FrameBusException):
+                capture.capture()
+
+    def test_stale_frames_are_rejected(self):
+        """Test BusCapture raises once the newest frame is older than max_age."""
+        self.bus.publish(np.full((4, 6), 1, dtype=np.uint8), captured_at=time.monotonic() - 10.0)
+
+        with self.assertRaisesRegex(FrameBusException, "old"):
+            BusCapture(self.bus, max_age=5.0).capture()
+        self.assertEqual(int(BusCapture(self.bus).capture()[0, 0]), 1)
+
+    def test_attach_unknown_bus(self):
+        """Test attaching to a missing bus raises FrameBusException."""
+        with self.assertRaises(FrameBusException):
+            FrameBus.attach("devhelm-frames-missing")
+
+
+class TestFramePublisher(unittest.TestCase):
+    """Test cases for FramePublisher and BusCapture."""
+
+    def test_publishes_frames_from_capture_process(self):
+        """Test the publisher keeps writing new frames that BusCapture returns."""
+        publisher = FramePublisher(interval=0.01, capture_factory=CountingCapture).start()
+        self.addCleanup(publisher.stop)
+        capture = BusCapture(publisher.bus)
+
+        first = capture.capture()
+        later = publisher.bus.wait(capture.last_seq, timeout=5.0)
+
+        self.assertEqual(first.shape, (48, 64))
+        self.assertIsNotNone(later)
+        self.assertGreater(later.seq, 1)
+        self.assertEqual(int(later.image[0, 0]), later.seq % 256)
+
+    def test_stop_removes_the_bus(self):
+        """Test stopping the publisher unlinks the shared memory."""
+        publisher = FramePublisher(interval=0.01, capture_factory=CountingCapture).start()
+        name = publisher.name
+
+        publisher.stop()
+
+        with self.assertRaises(FrameBusException):
+            FrameBus.attach(name)
+
+    def test_dead_publisher_is_detected(self):
+        """Test BusCapture raises instead of repeating the last frame once the publisher is gone."""
+        publisher = FramePublisher(interval=0.01, capture_factory=CountingCapture).start()
+        self.addCleanup(publisher.stop)
+        capture = BusCapture(publisher.bus)
+        capture.capture()
+
+        publisher._process.kill()
+        publisher._process.join(5.0)
+
+        self.assertFalse(publisher.bus.publisher_alive())
+        with self.assertRaisesRegex(FrameBusException, "no longer running"):
+            capture.capture()
+
+    def test_default_capture_factory_pickles(self):
+        """Test the default capture factory can be sent to a spawned process."""
+        factory = FramePublisher(capture_mode='mss', display_name=':1').capture_factory
+
+        self.assertEqual(pickle.loads(pickle.dumps(factory)).args, ('mss', ':1'))
+
+    def test_capture_failure_is_reported(self):
+        """Test a publisher that cannot capture raises FrameBusException."""
+        with self.assertRaisesRegex(FrameBusException, "no display"):
+            FramePublisher(capture_factory=FailingCapture).start()
+
+
+if __name__ == '__main__':
+    unittest.main()
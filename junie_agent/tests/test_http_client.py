@@ -0,0 +1,336 @@
+"""
+Tests for the HttpClient module.
+
+Timeouts, retries, Retry-After handling and the circuit breaker are
+exercised against a local stub HTTP server that replays scripted responses.
+"""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from devhelm_junie_agent.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HttpClient,
+    HttpClientException,
+    parse_retry_after,
+)
+from devhelm_junie_agent.task_requester import Task, TaskRequester, TaskRequesterException, TaskStatus
+
+
+class StubServer:
+    """
+    Local HTTP server answering every request from a script.
+
+    Each script entry is (status, headers, body), optionally followed by
+    seconds to hold the request first, or just a number of seconds to stall
+    before answering 204. The last entry is repeated once the script runs
+    out.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers)))
+                stub.connections.add(self.client_address)
+                entry = stub.script.pop(0) if len(stub.script) > 1 else stub.script[0]
+                if isinstance(entry, (int, float)) and not isinstance(entry, bool):
+                    time.sleep(entry)
+                    entry = (204, {}, b'')
+                status, headers, body = entry[:3]
+                if len(entry) > 3:
+                    time.sleep(entry[3])
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        # Clients that time out close the socket before the stalled answer
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+TASK = (200, {'Content-Type': 'application/json'},
+        json.dumps({'id': 'a1', 'ticket_id': 'DH-1', 'prompt': 'Do it'}).encode('utf-8'))
+
+
+def fast_client(**kwargs):
+    """Create a client with short timeouts and no backoff."""
+    options = dict(connect_timeout=1.0, read_timeout=1.0, retries=2, backoff_factor=0.0)
+    options.update(kwargs)
+    return HttpClient(**options)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker class."""
+
+    def setUp(self):
+        """Set up a breaker on a fake clock."""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        """Test consecutive failures open the breaker."""
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_after_reset_timeout(self):
+        """Test a trial request is allowed after the reset timeout."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 30.0
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        """Test a failed trial request opens the breaker again."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now += 30.0
+        self.breaker.record_failure()
+
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_closes(self):
+        """Test a success resets the failure count."""
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_disabled(self):
+        """Test a threshold of 0 never opens the breaker."""
+        breaker = CircuitBreaker(failure_threshold=0)
+        for _ in range(10):
+            breaker.record_failure()
+
+        self.assertTrue(breaker.allow())
+
+
+class TestHttpClient(unittest.TestCase):
+    """Test cases for HttpClient against a local stub server."""
+
+    def test_retries_server_errors(self):
+        """Test 503 responses are retried until a task is returned."""
+        with StubServer([(503, {}, b''), (503, {}, b''), TASK]) as server:
+            response = fast_client().request('GET', server.url + '/v1/task')
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_gives_up_after_retries(self):
+        """Test the last error response is returned once retries are spent."""
+        with StubServer([(503, {}, b'')]) as server:
+            response = fast_client(retries=1).request('GET', server.url + '/v1/task')
+
+        self.assertEqual(response.status, 503)
+        self.assertEqual(len(server.requests), 2)
+
+    def test_honours_retry_after_between_retries(self):
+        """Test a Retry-After header delays the retry."""
+        with StubServer([(429, {'Retry-After': '1'}, b''), TASK]) as server:
+            started = time.monotonic()
+            response = fast_client().request('GET', server.url + '/v1/task')
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(response.status, 200)
+        self.assertGreaterEqual(elapsed, 0.9)
+
+    def test_caps_retry_after(self):
+        """Test an excessive Retry-After is capped."""
+        with StubServer([(503, {'Retry-After': '3600'}, b''), TASK]) as server:
+            started = time.monotonic()
+            response = fast_client(max_retry_after=0.2).request('GET', server.url + '/v1/task')
+
+        self.assertEqual(response.status, 200)
+        self.assertLess(time.monotonic() - started, 5.0)
+
+    def test_read_timeout(self):
+        """Test a hung request times out instead of blocking forever."""
+        with StubServer([3.0]) as server:
+            client = fast_client(read_timeout=0.3, retries=0)
+            started = time.monotonic()
+            with self.assertRaises(HttpClientException):
+                client.request('GET', server.url + '/v1/task')
+
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_non_idempotent_requests_are_not_retried(self):
+        """Test only idempotent methods are retried."""
+        with StubServer([(503, {}, b'')]) as server:
+            server.server.RequestHandlerClass.do_POST = server.server.RequestHandlerClass.do_GET
+            response = fast_client().request('POST', server.url + '/v1/task')
+
+        self.assertEqual(response.status, 503)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_circuit_breaker_fails_fast(self):
+        """Test the breaker rejects requests after repeated failures."""
+        with StubServer([(500, {}, b'')]) as server:
+            client = fast_client(retries=0, circuit_threshold=2)
+            client.request('GET', server.url + '/v1/task')
+            client.request('GET', server.url + '/v1/task')
+
+            with self.assertRaises(CircuitOpenError):
+                client.request('GET', server.url + '/v1/task')
+
+        self.assertEqual(len(server.requests), 2)
+
+    def test_connections_are_reused(self):
+        """Test keep-alive reuses the pooled connection."""
+        with StubServer([(204, {}, b'')]) as server:
+            client = fast_client()
+            for _ in range(3):
+                client.request('GET', server.url + '/v1/task')
+
+        self.assertEqual(len(server.connections), 1)
+
+    def test_parse_retry_after(self):
+        """Test Retry-After parsing of seconds and invalid values."""
+        self.assertEqual(parse_retry_after('30'), 30.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+class TestTaskRequesterOverHttp(unittest.TestCase):
+    """Test cases for TaskRequester against a local stub server."""
+
+    def test_request_task_after_transient_errors(self):
+        """Test a task is returned despite transient server errors."""
+        with StubServer([(502, {}, b''), TASK]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client())
+            result = requester.request_task()
+
+        self.assertEqual(result, Task(id='a1', ticket_id='DH-1', prompt='Do it'))
+        self.assertEqual(server.requests[-1][1]['X-API-KEY'], 'key')
+
+    def test_retry_after_hint_recorded(self):
+        """Test a Retry-After hint on an empty response is exposed."""
+        with StubServer([(204, {'Retry-After': '120'}, b'')]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client())
+            result = requester.request_task()
+
+        self.assertEqual(result, TaskStatus.NONE)
+        self.assertEqual(requester.retry_after, 120.0)
+
+    def test_long_poll_held_by_server(self):
+        """Test the server holding a long-poll request is recognised."""
+        held = (204, {'Preference-Applied': 'wait=5'}, b'', 0.2)
+        with StubServer([held]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client(read_timeout=0.1), long_poll=5)
+            result = requester.request_task()
+
+        self.assertEqual(result, TaskStatus.NONE)
+        self.assertEqual(server.requests[0][1]['Prefer'], 'wait=5')
+        self.assertTrue(requester.long_polled)
+        self.assertTrue(requester.long_poll_supported)
+
+    def test_long_poll_falls_back_to_plain_polling(self):
+        """Test long polling is dropped after several empty responses that do not apply it."""
+        with StubServer([(204, {}, b'')]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client(), long_poll=30, long_poll_fallback=2)
+            requester.request_task()
+            self.assertIsNone(requester.long_poll_supported)
+            requester.request_task()
+            requester.request_task()
+
+        self.assertFalse(requester.long_polled)
+        self.assertFalse(requester.long_poll_supported)
+        self.assertIn('Prefer', server.requests[1][1])
+        self.assertNotIn('Prefer', server.requests[2][1])
+
+    def test_long_poll_kept_after_task_response(self):
+        """Test a task answered without Preference-Applied does not drop long polling."""
+        held = (204, {'Preference-Applied': 'wait=30'}, b'')
+        with StubServer([held, TASK, held]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client(), long_poll=30, long_poll_fallback=1)
+            requester.request_task()
+            self.assertIsInstance(requester.request_task(), Task)
+            requester.request_task()
+
+        self.assertTrue(requester.long_poll_supported)
+        self.assertTrue(all('Prefer' in headers for _, headers in server.requests))
+
+    def test_conditional_request_not_modified(self):
+        """Test a 304 reply repeats the previous status."""
+        with StubServer([(409, {'ETag': '"busy-1"'}, b''), (304, {}, b'')]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client(), conditional=True)
+            first = requester.request_task()
+            second = requester.request_task()
+
+        self.assertEqual(first, TaskStatus.BUSY)
+        self.assertEqual(second, TaskStatus.BUSY)
+        self.assertNotIn('If-None-Match', server.requests[0][1])
+        self.assertEqual(server.requests[1][1]['If-None-Match'], '"busy-1"')
+
+    def test_conditional_request_forgets_etag_after_task(self):
+        """Test a task response clears the ETag so tasks are never replayed."""
+        with StubServer([(204, {'ETag': '"none-1"'}, b''), TASK, (204, {}, b'')]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client(), conditional=True)
+            requester.request_task()
+            self.assertIsInstance(requester.request_task(), Task)
+            requester.request_task()
+
+        self.assertNotIn('If-None-Match', server.requests[2][1])
+
+    def test_not_modified_without_previous_status(self):
+        """Test an unexpected 304 raises TaskRequesterException."""
+        with StubServer([(304, {}, b'')]) as server:
+            requester = TaskRequester(server.url, 'key', http_client=fast_client(), conditional=True)
+            with self.assertRaises(TaskRequesterException):
+                requester.request_task()
+
+    def test_unreachable_server(self):
+        """Test connection failures surface as TaskRequesterException."""
+        with StubServer([(204, {}, b'')]) as server:
+            url = server.url
+
+        requester = TaskRequester(url, 'key', http_client=fast_client(retries=0))
+        with self.assertRaises(TaskRequesterException):
+            requester.request_task()
+
+
+if __name__ == '__main__':
+    unittest.main()
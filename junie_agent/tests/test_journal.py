@@ -0,0 +1,144 @@
+"""
+Tests for the TaskJournal module.
+
+The journal is written to a temporary directory and reopened to simulate an
+agent restart.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from devhelm_junie_agent.journal import TaskJournal, worker_journal_path
+from devhelm_junie_agent.main import fetch_initial_task
+from devhelm_junie_agent.task_requester import Task, TaskStatus
+
+TASK = Task(id='t1', ticket_id='DH-1', prompt='Do it')
+OTHER = Task(id='t2', ticket_id='DH-2', prompt='Do that')
+
+
+class TestTaskJournal(unittest.TestCase):
+    """Test cases for TaskJournal class."""
+
+    def setUp(self):
+        """Open a journal in a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "state" / "journal.sqlite3"
+        self.journal = self.open()
+
+    def open(self, **kwargs):
+        """Open (or reopen) the journal file."""
+        journal = TaskJournal(self.path, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_prompt_is_claimed_once(self):
+        """Test only the first submission of a task is allowed."""
+        entry = self.journal.record_received(TASK)
+
+        self.assertEqual(entry.state, 'received')
+        self.assertTrue(self.journal.begin_submit(TASK.id))
+        self.assertFalse(self.journal.begin_submit(TASK.id))
+
+        self.journal.record_submitted(TASK.id)
+        self.journal.record_received(TASK)
+        self.assertFalse(self.journal.begin_submit(TASK.id))
+        self.assertEqual(self.journal.get(TASK.id).state, 'submitted')
+
+    def test_state_survives_restart(self):
+        """Test a reopened journal resumes the latest task and its continues."""
+        self.journal.record_received(TASK)
+        self.journal.begin_submit(TASK.id)
+        self.journal.record_submitted(TASK.id)
+        self.journal.record_continue(TASK.id)
+        self.assertEqual(self.journal.record_continue(TASK.id), 2)
+        self.journal.close()
+
+        resumed = self.open().resume()
+
+        self.assertEqual(resumed.task, TASK)
+        self.assertTrue(resumed.submitted)
+        self.assertEqual(resumed.continues, 2)
+
+    def test_interrupted_submission_is_not_retyped(self):
+        """Test a crash while typing leaves the task counted as submitted."""
+        self.journal.record_received(TASK)
+        self.journal.begin_submit(TASK.id)
+        self.journal.close()
+
+        journal = self.open()
+
+        self.assertTrue(journal.resume().submitted)
+        self.assertFalse(journal.begin_submit(TASK.id))
+
+    def test_failed_submission_can_be_retried(self):
+        """Test an aborted submission allows typing again."""
+        self.journal.record_received(TASK)
+        self.journal.begin_submit(TASK.id)
+        self.journal.abort_submit(TASK.id)
+
+        self.assertTrue(self.journal.begin_submit(TASK.id))
+
+    def test_resume_returns_latest_task(self):
+        """Test resume() returns the most recently received task."""
+        self.assertIsNone(self.journal.resume())
+
+        self.journal.record_received(TASK)
+        self.journal.record_received(OTHER)
+
+        self.assertEqual(self.journal.resume().task, OTHER)
+
+    def test_old_tasks_are_pruned(self):
+        """Test only the most recent tasks are kept."""
+        journal = self.open(keep_tasks=2)
+        for index in range(4):
+            journal.record_received(Task(id=f"t{index}", ticket_id=f"DH-{index}", prompt="p"))
+
+        self.assertIsNone(journal.get('t0'))
+        self.assertIsNone(journal.get('t1'))
+        self.assertIsNotNone(journal.get('t3'))
+
+    def test_worker_journal_path(self):
+        """Test every fleet worker gets its own journal next to the configured one."""
+        self.assertEqual(worker_journal_path('display:1', '/var/lib/agent/journal.sqlite3'),
+                         Path('/var/lib/agent/journal-display_1.sqlite3'))
+        self.assertEqual(worker_journal_path('display:1', ':memory:'), Path(':memory:'))
+        self.assertEqual(worker_journal_path('display:2').name, "journal-display_2.sqlite3")
+
+
+class TestFetchInitialTaskWithJournal(unittest.TestCase):
+    """Test cases for resuming the initial task from the journal."""
+
+    def setUp(self):
+        """Open an in-memory journal."""
+        self.journal = TaskJournal(':memory:')
+        self.addCleanup(self.journal.close)
+        self.requester = MagicMock()
+
+    def test_resumes_submitted_task_when_busy(self):
+        """Test a busy server resumes the task submitted before the restart."""
+        self.journal.record_received(TASK)
+        self.journal.begin_submit(TASK.id)
+        self.requester.request_task.return_value = TaskStatus.BUSY
+
+        self.assertEqual(fetch_initial_task(self.requester, MagicMock(), self.journal), TASK)
+
+    def test_exits_when_busy_without_journal_entry(self):
+        """Test a busy server with an empty journal still exits."""
+        self.requester.request_task.return_value = TaskStatus.BUSY
+
+        with self.assertRaises(SystemExit):
+            fetch_initial_task(self.requester, MagicMock(), self.journal)
+
+    def test_records_received_initial_task(self):
+        """Test a fresh initial task is recorded."""
+        self.requester.request_task.return_value = TASK
+
+        self.assertEqual(fetch_initial_task(self.requester, MagicMock(), self.journal), TASK)
+        self.assertEqual(self.journal.get(TASK.id).state, 'received')
+
+
+if __name__ == '__main__':
+    unittest.main()
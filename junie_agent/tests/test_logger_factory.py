@@ -0,0 +1,175 @@
+"""
+Tests for the LoggerFactory module and its background QueueSink.
+
+Records are sent through the real loguru logger into sinks writing to
+temporary files or in-memory streams.
+"""
+
+import gzip
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from loguru import logger
+
+from devhelm_junie_agent.config import Config
+from devhelm_junie_agent.logger_factory import LoggerFactory, QueueSink
+
+
+class BlockingStream(io.StringIO):
+    """A stream whose writes wait until released, simulating a stalled disk."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(10)
+        return super().write(text)
+
+
+class TestQueueSink(unittest.TestCase):
+    """Test cases for QueueSink."""
+
+    def add_sink(self, sink, **kwargs):
+        """Route loguru records into a sink until the test ends."""
+        handler_id = logger.add(sink, format="{message}", level="DEBUG", **kwargs)
+        self.addCleanup(self.remove_handler, handler_id)
+        return handler_id
+
+    def remove_handler(self, handler_id):
+        """Remove a handler that the test may already have removed."""
+        try:
+            logger.remove(handler_id)
+        except ValueError:
+            pass
+
+    def test_json_records_are_valid_with_quotes(self):
+        """Test prompts with quotes, backslashes and newlines produce valid JSON."""
+        stream = io.StringIO()
+        sink = QueueSink(stream=stream)
+        handler_id = self.add_sink(sink)
+        prompt = 'Fix "the bug" in C:\\src\nthen {run} the tests'
+
+        logger.bind(ticket='DH-1').info(f"New task received: {prompt}")
+        logger.remove(handler_id)
+
+        record = json.loads(stream.getvalue())
+        self.assertEqual(record['message'], f"New task received: {prompt}")
+        self.assertEqual(record['level'], 'INFO')
+        self.assertEqual(record['extra'], {'ticket': 'DH-1'})
+        self.assertEqual(record['function'], 'test_json_records_are_valid_with_quotes')
+
+    def test_exception_is_serialized(self):
+        """Test logged exceptions are recorded as structured fields."""
+        stream = io.StringIO()
+        sink = QueueSink(stream=stream)
+        handler_id = self.add_sink(sink)
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+        logger.remove(handler_id)
+
+        record = json.loads(stream.getvalue())
+        self.assertEqual(record['exception'], {'type': 'ValueError', 'value': 'boom'})
+
+    def test_debug_lines_are_sampled_then_dropped_under_pressure(self):
+        """Test a stalled writer never blocks logging and sheds DEBUG lines first."""
+        stream = BlockingStream()
+        sink = QueueSink(stream=stream, max_queue=20, batch_size=1, debug_sample=5)
+        handler_id = self.add_sink(sink)
+
+        # The writer thread is stuck on its first line; everything else queues up
+        for index in range(10):
+            logger.info(f"info {index}")
+        for index in range(50):
+            logger.debug(f"debug {index}")
+        for index in range(5):
+            logger.warning(f"warning {index}")
+
+        stream.release.set()
+        self.assertTrue(sink.drain())
+        logger.remove(handler_id)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        messages = [record['message'] for record in records]
+        self.assertTrue(all(f"info {index}" in messages for index in range(10)))
+        debug_kept = sum(message.startswith('debug') for message in messages)
+        self.assertGreater(debug_kept, 0)
+        self.assertLess(debug_kept, 50)
+
+        summary = [record for record in records if 'dropped' in record]
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]['level'], 'WARNING')
+        self.assertEqual(sum(summary[0]['dropped'].values()) + len(messages) - 1, 65)
+
+    def test_rotation_with_compression(self):
+        """Test a full log file is rotated and the old file compressed."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "agent.log"
+            sink = QueueSink(path=str(path), rotation_bytes=200, compress=True, batch_size=1)
+            handler_id = self.add_sink(sink)
+
+            for index in range(10):
+                logger.info(f"line {index:02d} " + "x" * 40)
+            self.assertTrue(sink.drain())
+            logger.remove(handler_id)
+
+            rotated = sorted(Path(directory).glob("agent.*.log.gz"))
+            self.assertTrue(rotated)
+            lines = []
+            for archive in rotated:
+                lines.extend(gzip.decompress(archive.read_bytes()).decode('utf-8').splitlines())
+            lines.extend(path.read_text().splitlines())
+            self.assertEqual(len(lines), 10)
+            self.assertEqual(sorted(json.loads(line)['message'][:7] for line in lines),
+                             [f"line {index:02d}" for index in range(10)])
+
+
+class TestLoggerFactory(unittest.TestCase):
+    """Test cases for LoggerFactory.create_logger()."""
+
+    def setUp(self):
+        """Restore loguru's default stderr handler after each test."""
+        self.addCleanup(logger.add, sys.stderr)
+        self.addCleanup(logger.remove)
+
+    def make_config(self, **kwargs):
+        """Build a Config with the given logging settings."""
+        options = dict(api_url='http://localhost', api_key='key', log_format='', log_file='', max_consecutive_continues=5)
+        options.update(kwargs)
+        return Config(**options)
+
+    def test_json_file_logging(self):
+        """Test LOG_FORMAT=json with LOG_FILE writes JSON lines to the file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "logs" / "agent.log"
+            configured = LoggerFactory.create_logger(self.make_config(log_format='json', log_file=str(path)))
+
+            configured.info('Prompt "quoted"')
+            logger.remove()
+
+            self.assertEqual(json.loads(path.read_text())['message'], 'Prompt "quoted"')
+
+    def test_pretty_stdout_logging(self):
+        """Test the default format writes readable lines to stdout."""
+        stdout = io.StringIO()
+        with patch('sys.stdout', stdout):
+            configured = LoggerFactory.create_logger(self.make_config())
+
+        configured.info("Starting DevHelm Agent...")
+        logger.remove()
+
+        self.assertIn("| INFO     |", stdout.getvalue())
+        self.assertIn("Starting DevHelm Agent...", stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
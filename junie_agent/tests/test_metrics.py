@@ -0,0 +1,142 @@
+"""
+Tests for the metrics module.
+
+Metrics are checked through their rendered Prometheus text, and the
+instrumented code paths through the process-wide instruments.
+"""
+
+import unittest
+import urllib.request
+
+import numpy as np
+
+from devhelm_junie_agent.detection import detect_templates
+from devhelm_junie_agent.http_client import HttpClient
+from devhelm_junie_agent.metrics import (
+    MATCH_SECONDS,
+    REQUEST_SECONDS,
+    MetricsRegistry,
+    MetricsServer,
+    request_status,
+)
+from devhelm_junie_agent.reference_server import ReferenceServer
+from devhelm_junie_agent.task_requester import TaskRequester, TaskRequesterException
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for Counter, Histogram and MetricsRegistry."""
+
+    def setUp(self):
+        """Create an empty registry."""
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test observations land in every bucket at or above them."""
+        histogram = self.registry.histogram('test_seconds', "Test timings", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('test_seconds_sum 5.55', text)
+        self.assertIn('test_seconds_count 3', text)
+
+    def test_labelled_counter(self):
+        """Test label values are rendered and counted separately."""
+        counter = self.registry.counter('test_errors_total', "Test errors", ('kind',))
+        counter.labels('request').inc()
+        counter.labels('request').inc()
+        counter.labels('say "hi"').inc()
+
+        text = self.registry.render()
+
+        self.assertIn('test_errors_total{kind="request"} 2.0', text)
+        self.assertIn('test_errors_total{kind="say \\"hi\\""} 1.0', text)
+        self.assertEqual(counter.value('request'), 2)
+
+    def test_timer_observes_block_duration(self):
+        """Test time() records one observation per block."""
+        histogram = self.registry.histogram('test_block_seconds', "Block timings", ('name',))
+        with histogram.labels('a').time():
+            pass
+
+        self.assertEqual(histogram.count('a'), 1)
+        self.assertEqual(histogram.count('b'), 0)
+
+    def test_invalid_usage(self):
+        """Test wrong label counts, negative increments and duplicate names are rejected."""
+        counter = self.registry.counter('test_total', "Test", ('kind',))
+
+        with self.assertRaises(ValueError):
+            counter.labels()
+        with self.assertRaises(ValueError):
+            counter.labels('x').inc(-1)
+        with self.assertRaises(ValueError):
+            self.registry.counter('test_total', "Again")
+
+    def test_server_serves_metrics(self):
+        """Test the endpoint serves the registry in the text format."""
+        self.registry.counter('test_served_total', "Served").inc()
+        server = MetricsServer(self.registry, port=0).start()
+        self.addCleanup(server.stop)
+
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            body = response.read().decode('utf-8')
+            content_type = response.headers['Content-Type']
+
+        self.assertIn('test_served_total 1.0', body)
+        self.assertTrue(content_type.startswith('text/plain; version=0.0.4'))
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test cases for the instruments recorded by the agent."""
+
+    def test_match_time_per_template(self):
+        """Test every matched template gets its own observation."""
+        frame = np.zeros((60, 80), dtype=np.uint8)
+        template = np.full((5, 5), 255, dtype=np.uint8)
+        before = MATCH_SECONDS.count('metrics_probe')
+
+        detect_templates(frame, {'metrics_probe': template})
+
+        self.assertEqual(MATCH_SECONDS.count('metrics_probe'), before + 1)
+
+    def test_request_latency_by_status(self):
+        """Test task requests are timed under their response status."""
+        with ReferenceServer(api_key='key') as server:
+            requester = TaskRequester(server.url, 'key')
+            before = {status: REQUEST_SECONDS.count(status) for status in ('200', '204', '409')}
+
+            requester.request_task()
+            server.add_task("Work")
+            requester.request_task()
+            requester.request_task()
+
+        self.assertEqual(REQUEST_SECONDS.count('204'), before['204'] + 1)
+        self.assertEqual(REQUEST_SECONDS.count('200'), before['200'] + 1)
+        self.assertEqual(REQUEST_SECONDS.count('409'), before['409'] + 1)
+
+    def test_failed_request_is_counted_as_error(self):
+        """Test an unreachable server is timed under 'error'."""
+        requester = TaskRequester('http://127.0.0.1:9', 'key', http_client=HttpClient(retries=0))
+        before = REQUEST_SECONDS.count('error')
+
+        with self.assertRaises(TaskRequesterException):
+            requester.request_task()
+
+        self.assertEqual(REQUEST_SECONDS.count('error'), before + 1)
+
+    def test_request_status_labels(self):
+        """Test statuses outside the task contract are reported as errors."""
+        self.assertEqual(request_status(409), '409')
+        self.assertEqual(request_status(500), 'error')
+        self.assertEqual(request_status(None), 'error')
+
+
+if __name__ == '__main__':
+    unittest.main()
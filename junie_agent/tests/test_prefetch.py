@@ -0,0 +1,198 @@
+"""
+Tests for the TaskPrefetcher module.
+
+This module verifies background prefetching, lease expiry and the
+re-validation of prefetched tasks, using a scripted task source and the
+bundled ReferenceServer.
+"""
+
+import threading
+import unittest
+
+from devhelm_junie_agent.http_client import HttpClient
+from devhelm_junie_agent.prefetch import TaskPrefetcher
+from devhelm_junie_agent.reference_server import ReferenceServer
+from devhelm_junie_agent.task_requester import Task, TaskRequester, TaskRequesterException, TaskStatus
+
+TASK = Task(id='t1', ticket_id='DH-1', prompt='Do it')
+OTHER = Task(id='t2', ticket_id='DH-2', prompt='Do that')
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedSource:
+    """Task source answering from a script."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+        self.retry_after = None
+        self.long_polled = False
+
+    def request_task(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestTaskPrefetcher(unittest.TestCase):
+    """Test cases for TaskPrefetcher class."""
+
+    def setUp(self):
+        """Set up a fake clock."""
+        self.clock = FakeClock()
+
+    def make_prefetcher(self, results, **kwargs):
+        """Create a prefetcher over a scripted source."""
+        self.source = ScriptedSource(results)
+        options = dict(task_lease=60.0, status_lease=5.0, min_interval=30.0, clock=self.clock)
+        options.update(kwargs)
+        return TaskPrefetcher(self.source, **options)
+
+    def test_prefetched_task_handed_out_without_request(self):
+        """Test a leased task is returned without another request."""
+        prefetcher = self.make_prefetcher([TASK])
+
+        self.assertTrue(prefetcher.prefetch())
+        prefetcher.close()
+
+        self.assertEqual(prefetcher.request_task(), TASK)
+        self.assertEqual(self.source.calls, 1)
+        self.assertEqual(prefetcher.stats.hits, 1)
+
+    def test_without_prefetch_requests_synchronously(self):
+        """Test a hand-off with an empty slot requests directly."""
+        prefetcher = self.make_prefetcher([TaskStatus.NONE])
+
+        self.assertEqual(prefetcher.request_task(), TaskStatus.NONE)
+        self.assertEqual(prefetcher.stats.misses, 1)
+
+    def test_stale_status_is_not_trusted(self):
+        """Test an expired busy/none lease is replaced by a fresh request."""
+        prefetcher = self.make_prefetcher([TaskStatus.BUSY, TaskStatus.NONE])
+        prefetcher.prefetch()
+        prefetcher.close()
+
+        self.clock.now += 6.0
+
+        self.assertEqual(prefetcher.request_task(), TaskStatus.NONE)
+        self.assertEqual(self.source.calls, 2)
+
+    def test_expired_task_kept_while_server_still_busy(self):
+        """Test an expired task lease is kept when the server still has it in progress."""
+        prefetcher = self.make_prefetcher([TASK, TaskStatus.BUSY])
+        prefetcher.prefetch()
+        prefetcher.close()
+
+        self.clock.now += 61.0
+
+        self.assertEqual(prefetcher.request_task(), TASK)
+        self.assertEqual(prefetcher.stats.revalidations, 1)
+        self.assertEqual(prefetcher.stats.releases, 0)
+
+    def test_expired_task_released_by_server(self):
+        """Test an expired task is dropped when the server answers otherwise."""
+        prefetcher = self.make_prefetcher([TASK, OTHER])
+        prefetcher.prefetch()
+        prefetcher.close()
+
+        self.clock.now += 61.0
+
+        self.assertEqual(prefetcher.request_task(), OTHER)
+        self.assertEqual(prefetcher.stats.releases, 1)
+
+    def test_prefetch_is_throttled(self):
+        """Test background requests respect the minimum interval and a valid lease."""
+        prefetcher = self.make_prefetcher([TaskStatus.BUSY, TaskStatus.BUSY])
+
+        self.assertTrue(prefetcher.prefetch())
+        prefetcher.close()
+        self.assertFalse(prefetcher.prefetch())
+
+        self.clock.now += 10.0
+        self.assertFalse(prefetcher.prefetch())
+
+        self.clock.now += 25.0
+        self.assertTrue(prefetcher.prefetch())
+        prefetcher.close()
+        self.assertEqual(self.source.calls, 2)
+
+    def test_background_error_is_recorded(self):
+        """Test a failed background request leaves the slot empty."""
+        prefetcher = self.make_prefetcher([TaskRequesterException("down"), TaskStatus.NONE])
+        prefetcher.prefetch()
+        prefetcher.close()
+
+        self.assertEqual(prefetcher.stats.errors, 1)
+        self.assertIsNone(prefetcher.slot)
+        self.assertEqual(prefetcher.request_task(), TaskStatus.NONE)
+
+    def test_retry_after_delays_prefetch(self):
+        """Test a Retry-After hint from a background request holds the next one."""
+        prefetcher = self.make_prefetcher([TaskStatus.NONE], min_interval=0.0)
+        self.source.retry_after = 120.0
+        prefetcher.prefetch()
+        prefetcher.close()
+
+        self.clock.now += 10.0
+        self.assertFalse(prefetcher.prefetch())
+
+
+    def test_hung_request_is_abandoned(self):
+        """Test a hand-off requests directly when the background request hangs."""
+        release = threading.Event()
+        prefetcher = self.make_prefetcher([TASK, OTHER], join_timeout=0.05)
+        request = self.source.request_task
+        started = []
+
+        def hang_first():
+            started.append(True)
+            if len(started) == 1:
+                release.wait(5)
+            return request()
+
+        self.source.request_task = hang_first
+        prefetcher.prefetch()
+        worker = prefetcher._worker
+
+        self.assertEqual(prefetcher.request_task(), TASK)
+        self.assertEqual((prefetcher.stats.abandoned, prefetcher.stats.misses), (1, 1))
+
+        # The hung request's late answer is not handed out
+        release.set()
+        worker.join(5)
+        self.assertIsNone(prefetcher.slot)
+        self.assertEqual(self.source.calls, 2)
+
+
+class TestPrefetchAgainstReferenceServer(unittest.TestCase):
+    """Test cases for prefetching against the ReferenceServer."""
+
+    def test_prefetched_task_survives_revalidation(self):
+        """Test the server's busy answer keeps an expired prefetched task."""
+        with ReferenceServer() as server:
+            requester = TaskRequester(server.url, 'key', http_client=HttpClient(retries=0))
+            clock = FakeClock()
+            prefetcher = TaskPrefetcher(requester, task_lease=60.0, clock=clock)
+            task = server.add_task("Prefetched work")
+
+            prefetcher.prefetch()
+            prefetcher.close()
+            clock.now += 61.0
+
+            self.assertEqual(prefetcher.request_task(), task)
+            self.assertEqual(server.current, task)
+
+
+if __name__ == '__main__':
+    unittest.main()
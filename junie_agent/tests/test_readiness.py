@@ -0,0 +1,127 @@
+"""
+Tests for the ReadinessDetector module.
+
+This module verifies that the "Start Again" detection is only confirmed when
+the button stays in place over consecutive captures inside the window.
+"""
+
+import unittest
+
+from devhelm_junie_agent.detection import Box, DetectionResult
+from devhelm_junie_agent.readiness import ReadinessDetector
+
+
+def result(box=None):
+    """Build a DetectionResult with an optional "Start Again" location."""
+    return DetectionResult({'start_again': box, 'type_your': None}, captured_at=0.0)
+
+
+class FakeClock:
+    """Clock advanced by the fake sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeUI:
+    """UIInteraction stand-in returning scripted detection results."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def detect(self):
+        self.calls += 1
+        item = self.results.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class TestReadinessDetector(unittest.TestCase):
+    """Test cases for ReadinessDetector class."""
+
+    def setUp(self):
+        """Set up a fake clock and a stable button location."""
+        self.clock = FakeClock()
+        self.box = Box(100, 200, 75, 27)
+
+    def make_detector(self, ui, **kwargs):
+        """Create a detector on the fake clock."""
+        options = dict(confirmations=3, interval=1.0, window=10.0)
+        options.update(kwargs)
+        return ReadinessDetector(ui, clock=self.clock, sleep=self.clock.sleep, **options)
+
+    def test_confirms_stable_button(self):
+        """Test three consecutive captures at the same place confirm readiness."""
+        ui = FakeUI([result(self.box)] * 3)
+
+        self.assertTrue(self.make_detector(ui).confirm())
+        self.assertEqual(ui.calls, 3)
+        self.assertEqual(self.clock.sleeps, [1.0, 1.0])
+
+    def test_initial_result_counts_as_first_confirmation(self):
+        """Test a supplied detection result saves one capture."""
+        ui = FakeUI([result(self.box)] * 2)
+
+        self.assertTrue(self.make_detector(ui).confirm(result(self.box)))
+        self.assertEqual(ui.calls, 2)
+
+    def test_initial_result_without_button_fails(self):
+        """Test an initial result that does not show the button is rejected."""
+        ui = FakeUI([])
+
+        self.assertFalse(self.make_detector(ui).confirm(result(None)))
+        self.assertEqual(ui.calls, 0)
+
+    def test_flicker_fails(self):
+        """Test the button disappearing between captures is not confirmed."""
+        ui = FakeUI([result(self.box), result(None), result(self.box)])
+
+        self.assertFalse(self.make_detector(ui).confirm())
+        self.assertEqual(ui.calls, 2)
+
+    def test_small_movement_is_tolerated(self):
+        """Test jitter within the tolerance still counts as stable."""
+        moved = Box(102, 199, 75, 27)
+        ui = FakeUI([result(self.box), result(moved), result(self.box)])
+
+        self.assertTrue(self.make_detector(ui, tolerance=4).confirm())
+
+    def test_moving_button_fails(self):
+        """Test a button that moves beyond the tolerance is not confirmed."""
+        moved = Box(300, 200, 75, 27)
+        ui = FakeUI([result(self.box), result(moved), result(moved)])
+
+        self.assertFalse(self.make_detector(ui).confirm())
+
+    def test_window_exceeded_fails(self):
+        """Test confirmation gives up when the window is too short."""
+        ui = FakeUI([result(self.box)] * 5)
+
+        detector = self.make_detector(ui, confirmations=5, interval=3.0, window=10.0)
+        self.assertFalse(detector.confirm())
+        self.assertLessEqual(self.clock.now, 10.0)
+
+    def test_detection_error_fails(self):
+        """Test an exception during detection counts as not ready."""
+        ui = FakeUI([result(self.box), RuntimeError("capture failed")])
+
+        self.assertFalse(self.make_detector(ui).confirm())
+
+    def test_invalid_confirmations(self):
+        """Test at least one confirmation is required."""
+        with self.assertRaises(ValueError):
+            ReadinessDetector(FakeUI([]), confirmations=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Tests for the PollScheduler module.
+
+This module verifies the fast window after a prompt, exponential backoff,
+jitter and the learned task-completion estimate.
+"""
+
+import threading
+import unittest
+
+from devhelm_junie_agent.scheduler import PollScheduler
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPollScheduler(unittest.TestCase):
+    """Test cases for PollScheduler class."""
+
+    def setUp(self):
+        """Set up a scheduler without jitter on a fake clock."""
+        self.clock = FakeClock()
+        self.scheduler = PollScheduler(
+            fast_interval=1.0,
+            min_interval=5.0,
+            max_interval=60.0,
+            backoff=2.0,
+            jitter=0.0,
+            fast_window=30.0,
+            clock=self.clock,
+        )
+
+    def test_starts_at_min_interval(self):
+        """Test the first delay is the minimum interval."""
+        self.assertEqual(self.scheduler.next_delay(), 5.0)
+
+    def test_backs_off_exponentially_up_to_max(self):
+        """Test busy and idle polls double the interval up to the maximum."""
+        delays = []
+        for _ in range(6):
+            self.scheduler.on_busy()
+            delays.append(self.scheduler.next_delay())
+        self.scheduler.on_idle()
+
+        self.assertEqual(delays, [10.0, 20.0, 40.0, 60.0, 60.0, 60.0])
+        self.assertEqual(self.scheduler.next_delay(), 60.0)
+
+    def test_fast_window_after_prompt(self):
+        """Test polling is fast right after a prompt and backs off afterwards."""
+        for _ in range(4):
+            self.scheduler.on_busy()
+
+        self.scheduler.on_prompt_sent()
+        self.assertEqual(self.scheduler.next_delay(), 1.0)
+
+        self.clock.now += 31
+        self.assertEqual(self.scheduler.next_delay(), 5.0)
+
+        self.scheduler.on_busy()
+        self.assertEqual(self.scheduler.next_delay(), 10.0)
+
+    def test_fast_polling_when_completion_expected(self):
+        """Test polling speeds up around the learned task duration."""
+        self.scheduler.on_prompt_sent()
+        self.clock.now += 100
+        self.scheduler.on_ready()
+        self.assertEqual(self.scheduler.expected_duration, 100)
+
+        self.scheduler.on_prompt_sent()
+        self.clock.now += 40
+        for _ in range(4):
+            self.scheduler.on_busy()
+        self.assertEqual(self.scheduler.next_delay(), 60.0)
+
+        self.clock.now += 45
+        self.assertEqual(self.scheduler.next_delay(), 5.0)
+
+    def test_jitter_bounds(self):
+        """Test jitter spreads the delay symmetrically."""
+        low = PollScheduler(jitter=0.1, rng=lambda: 0.0)
+        high = PollScheduler(jitter=0.1, rng=lambda: 0.999999)
+
+        self.assertAlmostEqual(low.next_delay(), 4.5)
+        self.assertAlmostEqual(high.next_delay(), 5.5, places=4)
+
+    def test_sleep_ends_early_on_wake(self):
+        """Test a set wake event ends the sleep immediately."""
+        wake = threading.Event()
+        wake.set()
+
+        self.assertLess(self.scheduler.sleep(wake), 1.0)
+
+    def test_defer_holds_next_poll(self):
+        """Test a Retry-After hold lengthens the delay until it expires."""
+        self.scheduler.on_prompt_sent()
+        self.scheduler.defer(120.0)
+
+        self.assertEqual(self.scheduler.next_delay(), 120.0)
+
+        self.clock.now += 119.0
+        self.assertEqual(self.scheduler.next_delay(), 5.0)
+
+    def test_invalid_intervals(self):
+        """Test inconsistent intervals are rejected."""
+        with self.assertRaises(ValueError):
+            PollScheduler(fast_interval=10.0, min_interval=5.0)
+        with self.assertRaises(ValueError):
+            PollScheduler(backoff=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for the screen backend module.
+
+The replay backend is tested with synthetic frames; the Xvfb backend is
+exercised against a real Xvfb server when one is installed.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from devhelm_junie_agent.screen_backend import (
+    ReplayBackend,
+    XvfbBackend,
+    create_screen_backend,
+    record_frames,
+)
+
+
+def make_frames(count):
+    """Build distinguishable grayscale frames."""
+    return [np.full((48, 64), index * 10, dtype=np.uint8) for index in range(count)]
+
+
+class TestReplayBackend(unittest.TestCase):
+    """Test cases for ReplayBackend class."""
+
+    def test_replays_frames_then_holds_last(self):
+        """Test frames are returned in order and the last one repeats."""
+        backend = ReplayBackend(make_frames(2))
+
+        values = [int(backend.capture()[0, 0]) for _ in range(3)]
+
+        self.assertEqual(values, [0, 10, 10])
+
+    def test_loop(self):
+        """Test loop=True restarts from the first frame."""
+        backend = ReplayBackend(make_frames(2), loop=True)
+
+        values = [int(backend.capture()[0, 0]) for _ in range(3)]
+
+        self.assertEqual(values, [0, 10, 0])
+
+    def test_records_input(self):
+        """Test clicks and keys are recorded instead of sent."""
+        backend = ReplayBackend(make_frames(1))
+
+        backend.click(10, 20)
+        backend.hotkey('ctrl', 'v')
+        self.assertEqual(backend.type_text("hello"), "replay")
+        backend.press('enter')
+
+        self.assertEqual(backend.events, [
+            ('click', 10, 20),
+            ('hotkey', 'ctrl', 'v'),
+            ('type', "hello"),
+            ('press', 'enter'),
+        ])
+
+    def test_record_and_replay_directory(self):
+        """Test frames recorded to a directory replay identically."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = record_frames(ReplayBackend(make_frames(3)), Path(tmp_dir), count=3, interval=0)
+            backend = ReplayBackend(tmp_dir)
+
+            self.assertEqual([path.name for path in paths], ["frame_00000.png", "frame_00001.png", "frame_00002.png"])
+            for expected in make_frames(3):
+                np.testing.assert_array_equal(backend.capture(), expected)
+
+    def test_requires_frames(self):
+        """Test an empty frame sequence is rejected."""
+        with self.assertRaises(ValueError):
+            ReplayBackend([])
+
+    def test_missing_directory(self):
+        """Test a missing frames directory raises FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            ReplayBackend("/nonexistent/frames")
+
+
+class TestCreateScreenBackend(unittest.TestCase):
+    """Test cases for create_screen_backend()."""
+
+    def test_replay_requires_directory(self):
+        """Test the replay backend needs a frames directory."""
+        with self.assertRaises(ValueError):
+            create_screen_backend("replay")
+
+    def test_unknown_backend(self):
+        """Test an unknown backend raises ValueError."""
+        with self.assertRaises(ValueError):
+            create_screen_backend("wayland")
+
+
+def test_xvfb_backend_capture_and_input(xvfb_display):
+    """Test the Xvfb backend captures frames and injects input."""
+    backend = XvfbBackend(xvfb_display)
+    try:
+        frame = backend.capture()
+        assert frame.shape == (720, 1280)
+
+        # Input goes to the Xvfb server; with no window focused it is a no-op
+        backend.click(10, 10)
+        backend.hotkey('ctrl', 'a')
+        backend.write("hello")
+    finally:
+        backend.close()
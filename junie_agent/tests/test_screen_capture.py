@@ -0,0 +1,62 @@
+"""
+Tests for the screen capture module.
+
+The MIT-SHM backend is exercised against a real Xvfb server when one is
+installed; backend selection is tested without a display.
+"""
+
+import numpy as np
+import pytest
+
+from devhelm_junie_agent.screen_capture import (
+    PyAutoGUICapture,
+    ScreenCaptureException,
+    XShmCapture,
+    create_screen_capture,
+)
+
+
+def test_auto_falls_back_to_pyautogui_without_display(monkeypatch):
+    """Test auto mode uses pyautogui when there is no X display."""
+    monkeypatch.delenv("DISPLAY", raising=False)
+
+    assert isinstance(create_screen_capture("auto"), PyAutoGUICapture)
+
+
+def test_xshm_requires_display(monkeypatch):
+    """Test the MIT-SHM backend refuses to start without a display."""
+    monkeypatch.delenv("DISPLAY", raising=False)
+
+    with pytest.raises(ScreenCaptureException):
+        create_screen_capture("xshm")
+
+
+def test_xshm_unreachable_display():
+    """Test an unreachable display raises instead of crashing."""
+    with pytest.raises(ScreenCaptureException):
+        XShmCapture(":4242")
+
+
+def test_unknown_mode():
+    """Test an unknown mode raises ValueError."""
+    with pytest.raises(ValueError):
+        create_screen_capture("vnc")
+
+
+def test_xshm_capture_under_xvfb(xvfb_display):
+    """Test MIT-SHM captures the Xvfb framebuffer into a reused array."""
+    capture = create_screen_capture("auto", display_name=xvfb_display)
+    try:
+        assert isinstance(capture, XShmCapture)
+
+        first = capture.capture()
+        second = capture.capture()
+
+        assert first.shape == (720, 1280)
+        assert first.dtype == np.uint8
+        # Xvfb was started with a black root window (-br)
+        assert not first.any()
+        # The same buffer is reused for every capture
+        assert first is second
+    finally:
+        capture.close()
@@ -0,0 +1,181 @@
+"""
+Tests for server-pushed task delivery.
+
+TaskStream and TaskRequester are exercised against the bundled
+ReferenceServer, which emulates the /v1/task contract offline.
+"""
+
+import threading
+import time
+import unittest
+
+from devhelm_junie_agent.http_client import CircuitBreaker, HttpClient, HttpClientException
+from devhelm_junie_agent.reference_server import ReferenceServer
+from devhelm_junie_agent.task_requester import Task, TaskRequester, TaskRequesterException, TaskStatus
+from devhelm_junie_agent.task_stream import TaskStream
+
+
+def make_requester(server, **kwargs):
+    """Create a TaskRequester with short timeouts for the reference server."""
+    client = HttpClient(connect_timeout=1.0, read_timeout=1.0, retries=0)
+    return TaskRequester(server.url, 'key', http_client=client, **kwargs)
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestReferenceServer(unittest.TestCase):
+    """Test cases for the ReferenceServer /v1/task contract."""
+
+    def setUp(self):
+        """Start a reference server."""
+        self.server = ReferenceServer(api_key='key').start()
+        self.addCleanup(self.server.stop)
+
+    def test_task_contract(self):
+        """Test 200 assigns a task, 409 while in progress, 204 when empty."""
+        requester = make_requester(self.server)
+        task = self.server.add_task("Fix the bug", ticket_id='DH-7')
+
+        self.assertEqual(requester.request_task(), task)
+        self.assertEqual(requester.request_task(), TaskStatus.BUSY)
+
+        self.server.complete()
+        self.assertEqual(requester.request_task(), TaskStatus.NONE)
+        self.assertEqual(self.server.completed, [task])
+
+    def test_rejects_wrong_api_key(self):
+        """Test requests with a wrong API key are refused."""
+        client = HttpClient(retries=0)
+        requester = TaskRequester(self.server.url, 'wrong', http_client=client)
+
+        with self.assertRaises(TaskRequesterException):
+            requester.request_task()
+
+    def test_long_poll_returns_task_as_soon_as_queued(self):
+        """Test a held long-poll request returns the task immediately."""
+        requester = make_requester(self.server, long_poll=10)
+        threading.Timer(0.3, self.server.add_task, args=("Late task",)).start()
+
+        started = time.monotonic()
+        result = requester.request_task()
+
+        self.assertIsInstance(result, Task)
+        self.assertLess(time.monotonic() - started, 5.0)
+        self.assertTrue(requester.long_polled)
+
+    def test_conditional_requests(self):
+        """Test an unchanged state is answered with 304."""
+        requester = make_requester(self.server, conditional=True)
+
+        self.assertEqual(requester.request_task(), TaskStatus.NONE)
+        self.assertEqual(requester.request_task(), TaskStatus.NONE)
+        self.assertIsNotNone(requester._etag)
+
+        task = self.server.add_task("New work")
+        self.assertEqual(requester.request_task(), task)
+
+
+class TestTaskStream(unittest.TestCase):
+    """Test cases for TaskStream against the ReferenceServer."""
+
+    def setUp(self):
+        """Start a reference server with a fast heartbeat."""
+        self.server = ReferenceServer(heartbeat=0.5).start()
+        self.addCleanup(self.server.stop)
+        self.woken = threading.Event()
+
+    def start_stream(self, **kwargs):
+        """Subscribe to the reference server."""
+        options = dict(reconnect_min=0.05, reconnect_max=0.2, heartbeat=0.5, on_event=self.woken.set)
+        options.update(kwargs)
+        stream = TaskStream(make_requester(self.server), **options).start()
+        self.addCleanup(stream.stop)
+        return stream
+
+    def test_task_pushed_immediately(self):
+        """Test a queued task is delivered without polling."""
+        stream = self.start_stream()
+        # Wait for the pushed snapshot, not a polled answer from before the stream connected
+        self.assertTrue(wait_for(lambda: stream.last_event_id is not None))
+        self.assertEqual(stream.request_task(), TaskStatus.NONE)
+        requests = self.server.requests
+        self.woken.clear()
+
+        task = self.server.add_task("Pushed task")
+
+        self.assertTrue(self.woken.wait(2.0))
+        self.assertEqual(stream.request_task(), task)
+        self.assertEqual(stream.request_task(), TaskStatus.BUSY)
+        self.assertEqual(self.server.requests, requests)
+
+    def test_status_updates(self):
+        """Test completing the task pushes a 'none' status."""
+        stream = self.start_stream()
+        self.server.add_task("Work")
+        self.assertTrue(wait_for(lambda: isinstance(stream.request_task(), Task)))
+
+        self.server.complete()
+
+        self.assertTrue(wait_for(lambda: stream.request_task() == TaskStatus.NONE))
+
+    def test_reconnects_and_resumes(self):
+        """Test a dropped stream reconnects and receives tasks queued meanwhile."""
+        stream = self.start_stream()
+        self.assertTrue(wait_for(stream.connected.is_set))
+        self.assertTrue(wait_for(lambda: stream.last_event_id is not None))
+
+        self.server.drop_streams()
+        task = self.server.add_task("Queued while reconnecting")
+
+        self.assertTrue(wait_for(lambda: stream.reconnects >= 1))
+        self.assertTrue(wait_for(lambda: stream._tasks))
+        self.assertEqual(stream.request_task(), task)
+
+    def test_falls_back_to_polling_without_stream_endpoint(self):
+        """Test a server without the stream endpoint is polled instead."""
+        server = ReferenceServer(stream=False).start()
+        self.addCleanup(server.stop)
+        stream = TaskStream(make_requester(server), reconnect_min=0.05).start()
+        self.addCleanup(stream.stop)
+        task = server.add_task("Polled task")
+
+        self.assertTrue(wait_for(lambda: not stream.supported))
+        self.assertEqual(stream.request_task(), task)
+        self.assertFalse(stream.connected.is_set())
+
+    def test_stream_failures_do_not_open_polling_breaker(self):
+        """Test failed stream connections trip the stream's own breaker only."""
+        client = HttpClient(connect_timeout=0.5, retries=0, circuit_threshold=1)
+        stream = TaskStream(TaskRequester('http://127.0.0.1:1', 'key', http_client=client))
+
+        with self.assertRaises(HttpClientException):
+            stream._consume()
+
+        self.assertEqual(stream.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_parses_multiline_and_comment_lines(self):
+        """Test the event parser handles comments and multi-line data."""
+        stream = TaskStream(make_requester(self.server))
+        chunks = [
+            b': keep-alive\n\n',
+            b'id: 7\nevent: task\ndata: {"id": "t1", "ticket_id": "DH-1",\n',
+            b'data:  "prompt": "Two\\nlines"}\n\n',
+        ]
+
+        stream._parse(iter(chunks))
+
+        self.assertEqual(stream.last_event_id, '7')
+        self.assertEqual(stream._tasks[0], Task(id='t1', ticket_id='DH-1', prompt='Two\nlines'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for the TemplateCache module.
+
+This module verifies that templates are decoded once, persisted to the
+on-disk pack, reloaded from it, and rebuilt when a source image changes.
+"""
+
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from devhelm_junie_agent.template_cache import TemplateCache, scale_template
+
+IMAGES_DIR = Path(__file__).parent.parent / "src" / "devhelm_junie_agent" / "images"
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Test cases for TemplateCache class."""
+
+    def setUp(self):
+        """Copy the bundled templates into a scratch directory."""
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.images_dir = self.tmp_dir / "images"
+        shutil.copytree(IMAGES_DIR, self.images_dir)
+        self.pack_path = self.tmp_dir / "pack" / "templates.npz"
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.tmp_dir)
+
+    def make_cache(self):
+        return TemplateCache(self.images_dir, scales=(0.5, 2.0), pack_path=self.pack_path)
+
+    def test_load_decodes_grayscale_templates(self):
+        """Test templates are decoded to grayscale with all scales."""
+        cache = self.make_cache()
+        cache.load()
+
+        self.assertEqual(cache.names(), ["start_again.png", "type_your.png"])
+        self.assertEqual(cache.get("start_again.png").shape, (27, 75))
+        self.assertEqual(sorted(cache.variants("type_your.png")), [0.5, 1.0, 2.0])
+        self.assertEqual(cache.get("type_your.png", 2.0).shape, (76, 152))
+        self.assertFalse(cache.loaded_from_pack)
+        self.assertTrue(self.pack_path.exists())
+
+    def test_restart_loads_from_pack(self):
+        """Test a second cache instance skips decoding and uses the pack."""
+        first = self.make_cache()
+        first.load()
+
+        second = self.make_cache()
+        second.load()
+
+        self.assertTrue(second.loaded_from_pack)
+        np.testing.assert_array_equal(second.get("start_again.png"), first.get("start_again.png"))
+        np.testing.assert_array_equal(second.get("start_again.png", 0.5), first.get("start_again.png", 0.5))
+
+    def test_changed_source_rebuilds_pack(self):
+        """Test modifying a source PNG invalidates the pack."""
+        self.make_cache().load()
+
+        image = cv2.imread(str(self.images_dir / "start_again.png"))
+        cv2.imwrite(str(self.images_dir / "start_again.png"), 255 - image)
+
+        cache = self.make_cache()
+        cache.load()
+
+        self.assertFalse(cache.loaded_from_pack)
+
+        rebuilt = self.make_cache()
+        rebuilt.load()
+        self.assertTrue(rebuilt.loaded_from_pack)
+
+    def test_refresh_picks_up_new_template(self):
+        """Test a template added after load() is found on first use."""
+        cache = self.make_cache()
+        cache.load()
+        shutil.copy(self.images_dir / "type_your.png", self.images_dir / "extra.png")
+
+        self.assertEqual(cache.get("extra.png").shape, (38, 76))
+
+    def test_concurrent_refresh_loads_once(self):
+        """Test workers sharing a cache reload it once when a template is added."""
+        cache = self.make_cache()
+        cache.load()
+        shutil.copy(self.images_dir / "type_your.png", self.images_dir / "extra.png")
+        shapes = []
+
+        with patch.object(cache, 'load', wraps=cache.load) as mock_load:
+            threads = [threading.Thread(target=lambda: shapes.append(cache.get("extra.png").shape))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(shapes, [(38, 76)] * 8)
+
+    def test_missing_template(self):
+        """Test an unknown template raises FileNotFoundError."""
+        cache = TemplateCache(self.images_dir, persist=False)
+        cache.load()
+
+        with self.assertRaises(FileNotFoundError):
+            cache.get("missing.png")
+        self.assertIsNone(cache.pack_path)
+
+    def test_scale_template(self):
+        """Test scaled variants are resized and never empty."""
+        image = np.zeros((10, 20), dtype=np.uint8)
+
+        self.assertIs(scale_template(image, 1.0), image)
+        self.assertEqual(scale_template(image, 0.5).shape, (5, 10))
+        self.assertEqual(scale_template(image, 0.01).shape, (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
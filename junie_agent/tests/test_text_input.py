@@ -0,0 +1,173 @@
+"""
+Tests for the text input module.
+
+This module verifies the backend fallback chain and the read-back check
+that confirms a prompt was committed to the input box.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from devhelm_junie_agent.text_input import (
+    ClipboardTextInput,
+    PyAutoGUITextInput,
+    TextInputBackend,
+    TextInputChain,
+    TextInputException,
+    XClipboard,
+    create_text_input,
+)
+
+
+class FakeClipboard:
+    """In-memory clipboard used in place of pyperclip."""
+
+    def __init__(self, content=""):
+        self.content = content
+
+    def copy(self, text):
+        self.content = text
+
+    def paste(self):
+        return self.content
+
+
+class RecordingBackend(TextInputBackend):
+    """Backend that records the text it was asked to enter."""
+
+    def __init__(self, name, available=True, error=None):
+        self.name = name
+        self.available = available
+        self.error = error
+        self.typed = []
+
+    def is_available(self):
+        return self.available
+
+    def type_text(self, text):
+        if self.error:
+            raise self.error
+        self.typed.append(text)
+
+
+@patch('devhelm_junie_agent.text_input.time.sleep')
+class TestTextInputChain(unittest.TestCase):
+    """Test cases for TextInputChain."""
+
+    def setUp(self):
+        """Set up a mock keyboard."""
+        self.keyboard = Mock()
+
+    def test_uses_first_available_backend(self, mock_sleep):
+        """Test the chain skips unavailable backends."""
+        unavailable = RecordingBackend("clipboard", available=False)
+        fallback = RecordingBackend("pyautogui")
+        chain = TextInputChain([unavailable, fallback], verify=False, keyboard=self.keyboard)
+
+        self.assertEqual(chain.enter("hello"), "pyautogui")
+        self.assertEqual(fallback.typed, ["hello"])
+        self.assertEqual(chain.last_backend, "pyautogui")
+
+    def test_falls_back_on_backend_error(self, mock_sleep):
+        """Test a failing backend is cleared and the next one is tried."""
+        failing = RecordingBackend("xtest", error=TextInputException("no keycode"))
+        fallback = RecordingBackend("pyautogui")
+        chain = TextInputChain([failing, fallback], verify=False, keyboard=self.keyboard)
+
+        self.assertEqual(chain.enter("hello"), "pyautogui")
+        self.keyboard.press.assert_any_call('backspace')
+
+    def test_falls_back_when_text_not_committed(self, mock_sleep):
+        """Test the read-back check rejects a backend whose text did not land."""
+        clipboard = FakeClipboard("previous")
+        first = RecordingBackend("clipboard")
+        second = RecordingBackend("pyautogui")
+        # Initial clipboard, read-back after first backend, read-back after second
+        clipboard.paste = Mock(side_effect=["previous", "", "a prompt\n"])
+        chain = TextInputChain([first, second], clipboard=clipboard, keyboard=self.keyboard)
+
+        self.assertEqual(chain.enter("a prompt"), "pyautogui")
+        self.assertEqual(first.typed, ["a prompt"])
+        self.assertEqual(second.typed, ["a prompt"])
+
+    def test_selection_released_when_read_back_fails(self, mock_sleep):
+        """Test the caret is moved to the end even when the clipboard cannot be read."""
+        clipboard = FakeClipboard("previous")
+        clipboard.paste = Mock(side_effect=["previous", RuntimeError("no clipboard")])
+        backend = RecordingBackend("clipboard")
+        chain = TextInputChain([backend], clipboard=clipboard, keyboard=self.keyboard)
+
+        self.assertEqual(chain.enter("a prompt"), "clipboard")
+        self.keyboard.press.assert_called_once_with('end')
+
+    def test_restores_previous_clipboard(self, mock_sleep):
+        """Test the clipboard content from before the call is restored."""
+        clipboard = FakeClipboard("previous")
+        backend = ClipboardTextInput(clipboard=clipboard, settle_delay=0, keyboard=self.keyboard)
+        chain = TextInputChain([backend], verify=False, clipboard=clipboard, keyboard=self.keyboard)
+
+        self.assertEqual(chain.enter("a prompt"), "clipboard")
+        self.keyboard.hotkey.assert_any_call('ctrl', 'v')
+        self.assertEqual(clipboard.content, "previous")
+
+    def test_raises_when_all_backends_fail(self, mock_sleep):
+        """Test a TextInputException is raised when nothing works."""
+        chain = TextInputChain(
+            [RecordingBackend("clipboard", available=False)], verify=False, keyboard=self.keyboard
+        )
+
+        with self.assertRaises(TextInputException) as context:
+            chain.enter("hello")
+
+        self.assertIn("clipboard: unavailable", str(context.exception))
+
+    def test_pyautogui_backend_types_per_character(self, mock_sleep):
+        """Test the fallback backend keeps the original write() call."""
+        PyAutoGUITextInput(interval=0.05, keyboard=self.keyboard).type_text("hello")
+
+        self.keyboard.write.assert_called_once_with("hello", interval=0.05)
+
+
+class TestCreateTextInput(unittest.TestCase):
+    """Test cases for create_text_input()."""
+
+    def test_modes_end_with_pyautogui_fallback(self):
+        """Test every mode falls back to per-character typing."""
+        for mode in ("auto", "clipboard", "xtest", "pyautogui"):
+            chain = create_text_input(mode, keyboard=Mock())
+            self.assertEqual(chain.backends[-1].name, "pyautogui")
+
+    def test_display_gets_its_own_clipboard(self):
+        """Test a chain for another display reads and pastes through that display's clipboard."""
+        chain = create_text_input("clipboard", keyboard=Mock(), display_name=":99")
+
+        self.assertIsInstance(chain.clipboard, XClipboard)
+        self.assertEqual(chain.clipboard.display_name, ":99")
+        self.assertIs(chain.backends[0].clipboard, chain.clipboard)
+
+    def test_unknown_mode(self):
+        """Test an unknown mode raises ValueError."""
+        with self.assertRaises(ValueError):
+            create_text_input("telepathy")
+
+
+class TestXClipboard(unittest.TestCase):
+    """Test cases for XClipboard."""
+
+    @patch('devhelm_junie_agent.text_input.subprocess.run')
+    def test_uses_display(self, mock_run):
+        """Test xclip runs against the clipboard's display."""
+        mock_run.return_value = Mock(stdout="hello")
+        clipboard = XClipboard(":99")
+
+        clipboard.copy("hello")
+        self.assertEqual(clipboard.paste(), "hello")
+
+        for call, flag in zip(mock_run.call_args_list, ('-i', '-o')):
+            self.assertEqual(call.args[0], ['xclip', '-selection', 'clipboard', flag])
+            self.assertEqual(call.kwargs['env']['DISPLAY'], ":99")
+        self.assertEqual(mock_run.call_args_list[0].kwargs['input'], "hello")
+
+
+if __name__ == '__main__':
+    unittest.main()
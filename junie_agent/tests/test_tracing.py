@@ -0,0 +1,183 @@
+"""
+Tests for the tracing and profiler modules.
+
+Spans are written to an in-memory stream and parsed back; profiles are
+written to a temporary directory.
+"""
+
+import io
+import json
+import os
+import signal
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from devhelm_junie_agent.profiler import Profiler, ProfilerException
+from devhelm_junie_agent.tracing import NOOP_SPAN, TRACER, Tracer, annotate, span, traced
+
+
+class TestTracer(unittest.TestCase):
+    """Test cases for Tracer and the span helpers."""
+
+    def setUp(self):
+        """Trace into an in-memory stream."""
+        self.stream = io.StringIO()
+        self.tracer = Tracer()
+        self.tracer.configure(self.stream)
+        self.addCleanup(self.tracer.close)
+
+    def records(self):
+        """Parse the written trace records."""
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_nested_spans_share_a_trace(self):
+        """Test a child span records its parent and the parent's trace id."""
+        with self.tracer.span('loop.iteration') as parent:
+            with self.tracer.span('ui.detect', templates=2):
+                pass
+            parent.set(ready=True)
+
+        child, root = self.records()
+
+        self.assertEqual(child['name'], 'ui.detect')
+        self.assertEqual(child['parent_id'], root['span_id'])
+        self.assertEqual(child['trace_id'], root['trace_id'])
+        self.assertIsNone(root['parent_id'])
+        self.assertEqual(child['attributes'], {'templates': 2})
+        self.assertEqual(root['attributes'], {'ready': True})
+        self.assertGreaterEqual(root['duration_ms'], child['duration_ms'])
+
+    def test_iterations_are_separate_traces(self):
+        """Test consecutive root spans get their own trace ids."""
+        self.tracer.span('loop.iteration').end()
+        self.tracer.span('loop.iteration').end()
+
+        first, second = self.records()
+
+        self.assertNotEqual(first['trace_id'], second['trace_id'])
+
+    def test_error_is_recorded(self):
+        """Test an exception leaving a span is recorded on it."""
+        with self.assertRaises(ValueError):
+            with self.tracer.span('task.request'):
+                raise ValueError("boom")
+
+        self.assertEqual(self.records()[0]['error'], "ValueError: boom")
+
+    def test_disabled_tracer_returns_noop_span(self):
+        """Test no records are written while tracing is off."""
+        self.tracer.close()
+
+        self.assertIs(self.tracer.span('ui.detect'), NOOP_SPAN)
+        self.assertFalse(self.tracer.enabled)
+
+    def test_configure_appends_to_file(self):
+        """Test a file target receives JSON lines."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "traces" / "agent.jsonl"
+            tracer = Tracer()
+            tracer.configure(path)
+            tracer.span('loop.iteration').end()
+            tracer.close()
+
+            self.assertEqual(json.loads(path.read_text())['name'], 'loop.iteration')
+
+
+class TestTracedHelpers(unittest.TestCase):
+    """Test cases for the process-wide span(), annotate() and traced()."""
+
+    def setUp(self):
+        """Trace the process-wide tracer into an in-memory stream."""
+        self.stream = io.StringIO()
+        TRACER.configure(self.stream)
+        self.addCleanup(TRACER.close)
+
+    def test_traced_function_is_annotated(self):
+        """Test traced() wraps calls and annotate() reaches the innermost span."""
+        @traced('task.request')
+        def request():
+            annotate(status='204')
+            return 'none'
+
+        with span('loop.iteration'):
+            self.assertEqual(request(), 'none')
+
+        inner, outer = [json.loads(line) for line in self.stream.getvalue().splitlines()]
+        self.assertEqual(inner['name'], 'task.request')
+        self.assertEqual(inner['attributes'], {'status': '204'})
+        self.assertEqual(inner['parent_id'], outer['span_id'])
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for the on-demand Profiler."""
+
+    def setUp(self):
+        """Write profiles to a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.logger = MagicMock()
+
+    def run_iterations(self, profiler, count):
+        """Call tick() like the loop does, with a little work per iteration."""
+        written = []
+        for _ in range(count):
+            path = profiler.tick()
+            if path is not None:
+                written.append(path)
+            sum(range(20000))
+            time.sleep(0.01)
+        return written
+
+    def test_cprofile_runs_requested_iterations(self):
+        """Test a request profiles exactly N iterations and writes the stats."""
+        profiler = Profiler(self.directory, iterations=3, logger=self.logger)
+        self.assertEqual(self.run_iterations(profiler, 2), [])
+
+        profiler.request()
+        written = self.run_iterations(profiler, 5)
+
+        self.assertEqual(len(written), 1)
+        self.assertEqual(written[0].suffix, '.prof')
+        self.assertIn('cumulative', written[0].with_suffix('.txt').read_text())
+        self.assertFalse(profiler.active)
+
+    def test_sampling_writes_folded_stacks(self):
+        """Test the sampling mode writes stacks in the folded format."""
+        profiler = Profiler(self.directory, iterations=3, mode='sample', sample_interval=0.001)
+        profiler.request()
+
+        path = self.run_iterations(profiler, 4)[0]
+
+        self.assertEqual(path.suffix, '.folded')
+        stack, count = path.read_text().splitlines()[0].rsplit(' ', 1)
+        self.assertIn(':', stack)
+        self.assertGreater(int(count), 0)
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR1'), "SIGUSR1 is not available")
+    def test_signal_requests_profile(self):
+        """Test SIGUSR1 starts profiling at the next iteration."""
+        profiler = Profiler(self.directory, iterations=1)
+        previous = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+        self.assertTrue(profiler.install())
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        profiler.tick()
+
+        self.assertTrue(profiler.active)
+        self.assertIsNotNone(profiler.stop())
+
+    def test_invalid_configuration(self):
+        """Test unknown modes and zero iterations are rejected."""
+        with self.assertRaises(ProfilerException):
+            Profiler(self.directory, mode='perf')
+        with self.assertRaises(ProfilerException):
+            Profiler(self.directory, iterations=0)
+
+
+if __name__ == '__main__':
+    unittest.main()